@@ -1,4 +1,7 @@
-from typing import Dict, List
+from datetime import datetime, timezone
+from typing import List, Optional, Sequence
+
+MAX_IDENTIFIER_LENGTH = 63
 
 
 class ForeignKey:
@@ -17,33 +20,159 @@ class ForeignKey:
     def __str__(self):
         return self.__repr__()
 
-    def get_foreign_key_sql(self, tableName: str) -> str:
+    def get_foreign_key_sql(self, tableName: str, notValid: bool = False) -> str:
         return f"""
             ALTER TABLE {tableName}
-            ADD CONSTRAINT {self.columnName}
-            FOREIGN KEY ({self.columnName}) REFERENCES {self.tableReferenced} ({self.referenceColumn});
+            ADD CONSTRAINT {self.constraintName}
+            FOREIGN KEY ({self.columnName}) REFERENCES {self.tableReferenced} ({self.referenceColumn}){' NOT VALID' if notValid else ''};
         """
 
+    def get_validate_sql(self, tableName: str) -> str:
+        return f"ALTER TABLE {tableName} VALIDATE CONSTRAINT {self.constraintName};"
+
+
+class Index:
+    def __init__(
+        self,
+        tableName: str,
+        columns: Sequence[str],
+        method: str = "btree",
+        include: Optional[Sequence[str]] = None,
+        where: Optional[str] = None,
+        name: Optional[str] = None,
+    ):
+        self.tableName = tableName
+        self.columns = list(columns)
+        self.method = method
+        self.include = list(include or [])
+        self.where = where
+        # the default matches the names PostgresEngine.create_index gives single column indexes
+        self.name = name or f"{tableName}_{'_'.join(self.columns)}"
+        if len(self.name) > MAX_IDENTIFIER_LENGTH:
+            raise ValueError(f"Index name {self.name} is longer than {MAX_IDENTIFIER_LENGTH} characters, pass a shorter name")
+
+    def __repr__(self):
+        return f"{self.name} ON {self.tableName} USING {self.method} ({', '.join(self.columns)})"
+
+    def __str__(self):
+        return self.__repr__()
+
+    def create_index_sql(
+        self,
+        tableName: Optional[str] = None,
+        indexName: Optional[str] = None,
+        concurrently: bool = False,
+        onlyParent: bool = False,
+    ) -> str:
+        # tableName and indexName are overridden when building the index on each partition of a partitioned table
+        includeClause = f" INCLUDE ({', '.join(self.include)})" if len(self.include) > 0 else ""
+        whereClause = f" WHERE {self.where}" if self.where is not None else ""
+        return (
+            f"CREATE INDEX{' CONCURRENTLY' if concurrently else ''} IF NOT EXISTS {indexName or self.name} "
+            f"ON{' ONLY' if onlyParent else ''} {tableName or self.tableName} USING {self.method} ({', '.join(self.columns)})"
+            f"{includeClause}{whereClause};"
+        )
+
+
+class Partitioning:
+
+    method = None
+
+    def __init__(self, columnName: str):
+        self.columnName = columnName
+
+    def __repr__(self):
+        return f"PARTITION BY {self.method} ({self.columnName})"
+
+    def __str__(self):
+        return self.__repr__()
+
+    def get_initial_partitions_sql(self, tableName: str) -> List[str]:
+        return []
+
+    def get_partitions_sql(self, tableName: str, minValue: int, maxValue: int) -> List[str]:
+        return []
+
+
+class MonthlyRangePartitioning(Partitioning):
+
+    method = "RANGE"
+
+    def __init__(self, columnName: str, unitsPerSecond: int = 1):
+        super().__init__(columnName=columnName)
+        # BZ2Processor stores unix timestamps in seconds
+        self.unitsPerSecond = unitsPerSecond
+
+    def get_partition_name(self, tableName: str, monthStart: datetime) -> str:
+        return f"{tableName}_{monthStart:%Y_%m}"
+
+    def get_partitions_sql(self, tableName: str, minValue: int, maxValue: int) -> List[str]:
+        # one partition per calendar month (UTC) between the two values, created on demand as data is loaded
+        lastTime = datetime.fromtimestamp(maxValue / self.unitsPerSecond, tz=timezone.utc)
+        monthStart = datetime.fromtimestamp(minValue / self.unitsPerSecond, tz=timezone.utc).replace(
+            day=1, hour=0, minute=0, second=0, microsecond=0
+        )
+        partitionsSql = []
+        while monthStart <= lastTime:
+            nextMonthStart = monthStart.replace(year=monthStart.year + monthStart.month // 12, month=monthStart.month % 12 + 1)
+            partitionsSql.append(f"""
+                    CREATE TABLE IF NOT EXISTS {self.get_partition_name(tableName=tableName, monthStart=monthStart)}
+                    PARTITION OF {tableName}
+                    FOR VALUES FROM ({int(monthStart.timestamp()) * self.unitsPerSecond})
+                    TO ({int(nextMonthStart.timestamp()) * self.unitsPerSecond});
+                """)
+            monthStart = nextMonthStart
+        return partitionsSql
+
+
+class HashPartitioning(Partitioning):
+
+    method = "HASH"
+
+    def __init__(self, columnName: str, numPartitions: int = 16):
+        super().__init__(columnName=columnName)
+        self.numPartitions = numPartitions
+
+    def get_initial_partitions_sql(self, tableName: str) -> List[str]:
+        return [f"""
+                CREATE TABLE IF NOT EXISTS {tableName}_{remainder}
+                PARTITION OF {tableName}
+                FOR VALUES WITH (MODULUS {self.numPartitions}, REMAINDER {remainder});
+            """ for remainder in range(self.numPartitions)]
+
 
 class Table:
     def __init__(self):
         self.tableName = None
         self.columns = None
+        self.partitioning: Optional[Partitioning] = None
+
+    def get_primary_key_names(self) -> List[str]:
+        primaryKeyNames = [col.name for col in self.columns if col.primaryKey]
+        # postgres needs the partition key in the primary key of a partitioned table
+        if self.partitioning is not None and self.partitioning.columnName not in primaryKeyNames:
+            primaryKeyNames.append(self.partitioning.columnName)
+        return primaryKeyNames
 
     def create_table_sql(self) -> str:
         return f"""
             CREATE TABLE IF NOT EXISTS {self.tableName}
             (
                 {', '.join([str(col) for col in self.columns])},
-            PRIMARY KEY ({','.join([col.name for col in self.columns if col.primaryKey])})
-            );
+            PRIMARY KEY ({','.join(self.get_primary_key_names())})
+            ){f" {self.partitioning}" if self.partitioning is not None else ""};
         """
 
+    def create_partitions_sql(self) -> List[str]:
+        if self.partitioning is None:
+            return []
+        return self.partitioning.get_initial_partitions_sql(tableName=self.tableName)
+
     def foreign_key_constraints(self) -> List[ForeignKey]:
         return []
 
-    def get_indices(self) -> List[Dict[str, str]]:
-        return [{"table": self.tableName, "column": column.name} for column in self.columns if column.isIndex]
+    def get_indices(self) -> List[Index]:
+        return [Index(tableName=self.tableName, columns=[column.name]) for column in self.columns if column.isIndex]
 
     def get_column_names(self) -> List[str]:
         return [col.name for col in self.columns]
@@ -1,6 +1,11 @@
 from typing import List
 
-from historical_odds_processing.datamodel.data_store_schema.database_components import Column, ForeignKey, Table
+from historical_odds_processing.datamodel.data_store_schema.database_components import (
+    Column,
+    ForeignKey,
+    MonthlyRangePartitioning,
+    Table,
+)
 from historical_odds_processing.datamodel.data_store_schema.mapping_table_schema import (
     BettingTypes,
     CountryCodes,
@@ -127,6 +132,7 @@ class LastTradedPrice(Table):
             Column(name="betfair_runner_table_id", dataType="BIGINT"),
             Column(name="price", dataType="FLOAT"),
         ]
+        self.partitioning = MonthlyRangePartitioning(columnName="unix_timestamp")
 
     def foreign_key_constraints(self) -> List[ForeignKey]:
         return [
@@ -1,24 +1,62 @@
-INDEXES = [
-    {"table": "tbl_betfair_betting_types", "column": "betting_type_name"},
-    {"table": "tbl_betfair_market_types", "column": "market_type"},
-    {"table": "tbl_betfair_market_status", "column": "market_status_name"},
-    {"table": "tbl_betfair_country_codes", "column": "country_code"},
-    {"table": "tbl_betfair_timezones", "column": "timezone"},
-    {"table": "tbl_betfair_markets", "column": "betfair_market_id"},
-    {"table": "tbl_betfair_markets", "column": "event_id"},
-    {"table": "tbl_betfair_market_definitions", "column": "version"},
-    {"table": "tbl_betfair_market_definitions", "column": "unix_timestamp"},
-    {"table": "tbl_betfair_market_definitions", "column": "betfair_market_id"},
-    {"table": "tbl_betfair_market_definitions", "column": "event_id"},
-    {"table": "tbl_betfair_runners", "column": "runner_name"},
-    {"table": "tbl_betfair_runners", "column": "betfair_id"},
-    {"table": "tbl_betfair_runner_status", "column": "status"},
-    {"table": "tbl_betfair_runner_status_updates", "column": "betfair_runner_table_id"},
-    {"table": "tbl_betfair_runner_status_updates", "column": "betfair_market_id"},
-    {"table": "tbl_betfair_runner_status_updates", "column": "event_id"},
-    {"table": "tbl_betfair_runner_status_updates", "column": "unix_timestamp"},
-    {"table": "tbl_betfair_last_traded_price", "column": "betfair_market_id"},
-    {"table": "tbl_betfair_last_traded_price", "column": "betfair_runner_table_id"},
-    {"table": "tbl_betfair_last_traded_price", "column": "event_id"},
-    {"table": "tbl_betfair_last_traded_price", "column": "unix_timestamp"},
+from historical_odds_processing.datamodel.data_store_schema.database_components import Index
+
+BASE_INDEXES = [
+    Index(tableName="tbl_betfair_betting_types", columns=["betting_type_name"]),
+    Index(tableName="tbl_betfair_market_types", columns=["market_type"]),
+    Index(tableName="tbl_betfair_market_status", columns=["market_status_name"]),
+    Index(tableName="tbl_betfair_country_codes", columns=["country_code"]),
+    Index(tableName="tbl_betfair_timezones", columns=["timezone"]),
+    Index(tableName="tbl_betfair_markets", columns=["betfair_market_id"]),
+    Index(tableName="tbl_betfair_markets", columns=["event_id"]),
+    Index(tableName="tbl_betfair_market_definitions", columns=["version"]),
+    Index(tableName="tbl_betfair_market_definitions", columns=["unix_timestamp"]),
+    Index(tableName="tbl_betfair_runners", columns=["runner_name"]),
+    Index(tableName="tbl_betfair_runners", columns=["betfair_id"]),
+    Index(tableName="tbl_betfair_runner_status", columns=["status"]),
+    Index(tableName="tbl_betfair_runner_status_updates", columns=["betfair_runner_table_id"]),
+    Index(tableName="tbl_betfair_runner_status_updates", columns=["event_id"]),
+    Index(tableName="tbl_betfair_last_traded_price", columns=["betfair_runner_table_id"]),
+    Index(tableName="tbl_betfair_last_traded_price", columns=["event_id"]),
 ]
+
+# the hot queries filter on market and runner then sort on time, so these replace the single column indexes on
+# betfair_market_id and unix_timestamp, and the INCLUDE columns let the latest price/status come from an index only scan
+QUERY_INDEXES = [
+    Index(
+        tableName="tbl_betfair_last_traded_price",
+        columns=["betfair_market_id", "betfair_runner_table_id", "unix_timestamp"],
+        include=["price"],
+        name="tbl_betfair_last_traded_price_market_runner_timestamp",
+    ),
+    Index(
+        tableName="tbl_betfair_runner_status_updates",
+        columns=["betfair_market_id", "betfair_runner_table_id", "unix_timestamp"],
+        include=["status_id"],
+        name="tbl_betfair_runner_status_updates_market_runner_timestamp",
+    ),
+    Index(
+        tableName="tbl_betfair_market_definitions",
+        columns=["betfair_market_id", "unix_timestamp"],
+        name="tbl_betfair_market_definitions_market_timestamp",
+    ),
+    Index(
+        tableName="tbl_betfair_market_definitions",
+        columns=["event_id", "unix_timestamp"],
+        name="tbl_betfair_market_definitions_event_timestamp",
+    ),
+    # rows are loaded roughly in time order, so a BRIN index covers time range scans at a fraction of a B-tree's size
+    Index(
+        tableName="tbl_betfair_last_traded_price",
+        columns=["unix_timestamp"],
+        method="brin",
+        name="tbl_betfair_last_traded_price_unix_timestamp_brin",
+    ),
+    Index(
+        tableName="tbl_betfair_runner_status_updates",
+        columns=["unix_timestamp"],
+        method="brin",
+        name="tbl_betfair_runner_status_updates_unix_timestamp_brin",
+    ),
+]
+
+INDEXES = BASE_INDEXES + QUERY_INDEXES
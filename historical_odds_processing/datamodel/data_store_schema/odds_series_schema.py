@@ -0,0 +1,85 @@
+from typing import List
+
+from historical_odds_processing.datamodel.data_store_schema.database_components import Column
+from historical_odds_processing.datamodel.data_store_schema.database_components import Index
+from historical_odds_processing.datamodel.data_store_schema.database_components import MonthlyRangePartitioning
+from historical_odds_processing.datamodel.data_store_schema.database_components import Table
+
+
+class OddsSeries(Table):
+    def __init__(self):
+        super().__init__()
+        # vw_last_traded_bets stored with its joins already done, so training reads a market's rows in one index range
+        self.tableName = "tbl_betfair_odds_series"
+        self.columns = [
+            Column(name="runner_name", dataType="TEXT"),
+            Column(name="runner_betfair_id", dataType="BIGINT"),
+            Column(name="unix_timestamp", dataType="BIGINT"),
+            Column(name="betfair_market_id", dataType="TEXT"),
+            Column(name="market_type", dataType="TEXT"),
+            Column(name="market_type_id", dataType="INTEGER"),
+            Column(name="event_name", dataType="TEXT"),
+            Column(name="event_id", dataType="BIGINT"),
+            Column(name="price", dataType="FLOAT"),
+            Column(name="betting_type", dataType="TEXT"),
+            Column(name="betting_type_id", dataType="INTEGER"),
+            Column(name="country_code", dataType="TEXT"),
+            Column(name="country_code_id", dataType="INTEGER"),
+            Column(name="timezone", dataType="TEXT"),
+            # the id of the source row, which also marks how far the table has been refreshed
+            Column(name="last_traded_price_id", dataType="BIGINT", primaryKey=True),
+        ]
+        self.partitioning = MonthlyRangePartitioning(columnName="unix_timestamp")
+
+    def get_column_names(self) -> List[str]:
+        return [col.name for col in self.columns if col.name != "last_traded_price_id"]
+
+    def get_indices(self) -> List[Index]:
+        return [
+            Index(
+                tableName=self.tableName,
+                columns=["betfair_market_id", "runner_betfair_id", "unix_timestamp"],
+                name="tbl_betfair_odds_series_market_runner_timestamp",
+            )
+        ]
+
+    def get_refresh_sql(self) -> str:
+        return f"""
+            INSERT INTO {self.tableName}
+            (
+                {', '.join([col.name for col in self.columns])}
+            )
+            SELECT
+                tbl_betfair_runners.runner_name,
+                tbl_betfair_runners.betfair_id,
+                tbl_betfair_last_traded_price.unix_timestamp,
+                tbl_betfair_last_traded_price.betfair_market_id,
+                vw_betfair_markets.market_type,
+                vw_betfair_markets.market_type_id,
+                vw_betfair_markets.event_name,
+                tbl_betfair_last_traded_price.event_id,
+                tbl_betfair_last_traded_price.price,
+                vw_betfair_markets.betting_type,
+                vw_betfair_markets.betting_type_id,
+                vw_betfair_markets.country_code,
+                vw_betfair_markets.country_code_id,
+                vw_betfair_markets.timezone,
+                tbl_betfair_last_traded_price.id
+            FROM
+                tbl_betfair_last_traded_price
+            LEFT JOIN
+                tbl_betfair_runners
+            ON
+                tbl_betfair_last_traded_price.betfair_runner_table_id = tbl_betfair_runners.id
+            LEFT JOIN
+                vw_betfair_markets
+            ON
+                tbl_betfair_last_traded_price.betfair_market_id = vw_betfair_markets.betfair_market_id
+            AND
+                tbl_betfair_last_traded_price.event_id = vw_betfair_markets.event_id
+            WHERE
+                tbl_betfair_last_traded_price.id > %(lastRefreshedId)s
+            ORDER BY
+                tbl_betfair_last_traded_price.betfair_market_id, tbl_betfair_last_traded_price.unix_timestamp
+            ;
+        """
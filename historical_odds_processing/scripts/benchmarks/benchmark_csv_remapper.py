@@ -0,0 +1,92 @@
+import sys
+
+sys.path.append("../../../")
+sys.path.append("../../")
+from pathlib import Path
+from shutil import rmtree
+from tempfile import mkdtemp
+from time import perf_counter
+from typing import Any, Dict, Union
+
+import fire
+import numpy as np
+import pandas as pd
+
+from historical_odds_processing.store.db_creation.column_remapper import ColumnRemapper
+from historical_odds_processing.store.db_creation.csv_remapper import CSVRemapper
+from historical_odds_processing.store.db_creation.output_filenames import OutputFilenames
+from utils.paths import get_path
+from utils.runner_identifier import get_runner_identifier
+
+
+def write_synthetic_last_traded_price_csv(
+    filePath: Union[str, Path], numRows: int, numRunners: int, seed: int = 0
+) -> Dict[str, int]:
+    randomState = np.random.RandomState(seed)
+    runnerIdentifiers = np.array(
+        [get_runner_identifier(f"runner {runnerIndex}", 1000000 + runnerIndex) for runnerIndex in range(numRunners)],
+        dtype=object,
+    )
+    runnerIndexes = randomState.randint(low=0, high=numRunners, size=numRows)
+    pd.DataFrame(
+        {
+            "unix_timestamp": np.arange(numRows, dtype=np.int64) + 1559347200000,
+            "betfair_market_id": "1.159564697",
+            "event_id": 29302120,
+            "betfair_runner_table_id": runnerIdentifiers[runnerIndexes],
+            "price": np.round(randomState.uniform(low=1.01, high=100, size=numRows), 2),
+        }
+    ).to_csv(filePath, index=False)
+    return {runnerIdentifier: runnerId for runnerId, runnerIdentifier in enumerate(runnerIdentifiers)}
+
+
+def remap_with_dict_lookups(
+    csvToRemap: str, remappingDict: Dict[str, Dict[Any, Any]], outputDirectory: str, chunkSize: int
+) -> None:
+    # the original CSVRemapper, kept here as the baseline
+    existingPathParts = Path(csvToRemap).parts
+    outputPath = get_path(outputDirectory, existingPathParts[-4], existingPathParts[-3], existingPathParts[-2])
+    for chunkIndex, chunk in enumerate(pd.read_csv(csvToRemap, chunksize=chunkSize)):
+        for column, remappingDictionary in remappingDict.items():
+            chunk[column] = chunk[column].map(remappingDictionary.get)
+        chunk.to_csv(f'{outputPath}/{existingPathParts[-1].split(".")[0]}_{chunkIndex}.csv', index=False)
+
+
+def benchmark_csv_remapper(numRows: int = 10000000, numRunners: int = 50000, chunkSize: int = 250000) -> None:
+    workingDirectory = mkdtemp()
+    try:
+        csvPath = Path(get_path(workingDirectory, "2019", "Jun", "0_0"), f"{OutputFilenames.LAST_TRADED_PRICE}.csv")
+        runnerMapping = write_synthetic_last_traded_price_csv(filePath=csvPath, numRows=numRows, numRunners=numRunners)
+        remappers = {
+            "dict lookups": lambda outputDirectory: remap_with_dict_lookups(
+                csvToRemap=str(csvPath),
+                remappingDict={"betfair_runner_table_id": runnerMapping},
+                outputDirectory=outputDirectory,
+                chunkSize=chunkSize,
+            ),
+            "pandas": lambda outputDirectory: CSVRemapper(
+                csvToRemap=str(csvPath),
+                remappingDict={"betfair_runner_table_id": ColumnRemapper(mapping=runnerMapping)},
+                outputDirectory=outputDirectory,
+                chunkSize=chunkSize,
+            ).process_csv(),
+            "pyarrow": lambda outputDirectory: CSVRemapper(
+                csvToRemap=str(csvPath),
+                remappingDict={"betfair_runner_table_id": ColumnRemapper(mapping=runnerMapping)},
+                outputDirectory=outputDirectory,
+                chunkSize=chunkSize,
+                useArrow=True,
+            ).process_csv(),
+        }
+        for remapperName, remapper in remappers.items():
+            outputDirectory = get_path(workingDirectory, "remapped_files", remapperName.replace(" ", "_"))
+            startTime = perf_counter()
+            remapper(outputDirectory)
+            elapsedSeconds = perf_counter() - startTime
+            print(f"{remapperName:>12}: {elapsedSeconds:.1f}s, {numRows / elapsedSeconds:,.0f} rows/sec")
+    finally:
+        rmtree(workingDirectory)
+
+
+if __name__ == "__main__":
+    fire.Fire(benchmark_csv_remapper)
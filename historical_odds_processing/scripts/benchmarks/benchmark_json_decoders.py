@@ -0,0 +1,40 @@
+import sys
+
+sys.path.append("../../../")
+sys.path.append("../../")
+import bz2
+from pathlib import Path
+from time import perf_counter
+from typing import List, Optional, Union
+
+import fire
+
+from historical_odds_processing.store.db_creation.json_decoders import get_available_json_decoder_names
+from historical_odds_processing.store.db_creation.json_decoders import get_json_decoder
+from historical_odds_processing.tests.example_bz2_data.paths import EXAMPLE_BZ2_FILES_DIRECTORY
+
+
+def load_lines(inputDirectory: Union[str, Path]) -> List[bytes]:
+    lines = []
+    for filePath in sorted(Path(inputDirectory).glob("**/*.bz2")):
+        with bz2.open(filename=filePath, mode="rb") as bz2file:
+            lines.extend(bz2file.readlines())
+    return lines
+
+
+def benchmark_json_decoders(
+    inputDirectory: Optional[Union[str, Path]] = None, numRepeats: int = 200, decoderNames: Optional[List[str]] = None
+) -> None:
+    lines = load_lines(inputDirectory=inputDirectory or EXAMPLE_BZ2_FILES_DIRECTORY)
+    for decoderName in decoderNames or get_available_json_decoder_names():
+        decoder = get_json_decoder(name=decoderName)
+        startTime = perf_counter()
+        for _ in range(numRepeats):
+            for line in lines:
+                decoder.decode(line)
+        elapsedSeconds = perf_counter() - startTime
+        print(f"{decoderName:>10}: {len(lines) * numRepeats / elapsedSeconds:,.0f} lines/sec")
+
+
+if __name__ == "__main__":
+    fire.Fire(benchmark_json_decoders)
@@ -0,0 +1,172 @@
+import sys
+
+sys.path.append("../../../")
+sys.path.append("../../")
+from io import BytesIO
+from time import perf_counter
+from typing import Callable, Dict
+
+import fire
+import numpy as np
+import pandas as pd
+import testing.postgresql
+
+from historical_odds_processing.datamodel.data_store_schema.historical_trading_schema import ALL_HISTORICAL_SCHEMAS
+from historical_odds_processing.datamodel.data_store_schema.historical_trading_schema import LastTradedPrice
+from historical_odds_processing.datamodel.data_store_schema.historical_trading_schema import MarketInfo
+from historical_odds_processing.datamodel.data_store_schema.historical_trading_schema import RunnerStatusUpdates
+from historical_odds_processing.datamodel.data_store_schema.indexes import BASE_INDEXES
+from historical_odds_processing.datamodel.data_store_schema.indexes import QUERY_INDEXES
+from historical_odds_processing.datamodel.data_store_schema.mapping_table_schema import ALL_MAPPING_SCHEMAS
+from historical_odds_processing.datamodel.data_store_schema.mapping_table_schema import Runners
+from historical_odds_processing.datamodel.data_store_schema.views import ALL_VIEWS
+from historical_odds_processing.scripts.database_build.post_load_build import add_indexes
+from historical_odds_processing.store.postgres_insertion_engine import PostgresInsertionEngine
+
+# 2019-06-01 00:00:00
+FIRST_MARKET_TIMESTAMP = 1559347200
+
+
+def copy_dataframe(insertionEngine: PostgresInsertionEngine, tableName: str, data: pd.DataFrame) -> None:
+    csvBuffer = BytesIO(data.to_csv(index=False).encode())
+    insertionEngine.copy_from_stream(tableName=tableName, columnNames=list(data.columns), stream=csvBuffer)
+
+
+def create_synthetic_database(
+    insertionEngine: PostgresInsertionEngine, numMarkets: int, numRunnersPerMarket: int, numTicksPerRunner: int, seed: int = 0
+) -> None:
+    for table in ALL_MAPPING_SCHEMAS + ALL_HISTORICAL_SCHEMAS:
+        insertionEngine.create_table(schema=table.create_table_sql())
+    for view in ALL_VIEWS:
+        insertionEngine.create_table(schema=view)
+
+    randomState = np.random.RandomState(seed)
+    numRunners = numMarkets * numRunnersPerMarket
+    marketIds = np.array([f"1.{159000000 + marketIndex}" for marketIndex in range(numMarkets)], dtype=object)
+    eventIds = 29000000 + np.arange(numMarkets)
+    copy_dataframe(
+        insertionEngine=insertionEngine,
+        tableName=Runners().tableName,
+        data=pd.DataFrame(
+            {"betfair_id": 1000000 + np.arange(numRunners), "runner_name": [f"runner {i}" for i in range(numRunners)]}
+        ),
+    )
+    copy_dataframe(
+        insertionEngine=insertionEngine,
+        tableName=MarketInfo().tableName,
+        data=pd.DataFrame({"betfair_market_id": marketIds, "event_id": eventIds, "event_name": "synthetic event"}),
+    )
+
+    # markets open an hour apart and trade for an hour, so rows arrive in roughly timestamp order as they do from the files
+    numRows = numRunners * numTicksPerRunner
+    marketIndexes = np.repeat(np.arange(numMarkets), numRunnersPerMarket * numTicksPerRunner)
+    runnerIds = np.repeat(np.arange(numRunners), numTicksPerRunner) + 1
+    unixTimestamps = FIRST_MARKET_TIMESTAMP + marketIndexes * 3600 + randomState.randint(low=0, high=3600, size=numRows)
+    lastTradedPrices = pd.DataFrame(
+        {
+            "unix_timestamp": unixTimestamps,
+            "betfair_market_id": marketIds[marketIndexes],
+            "event_id": eventIds[marketIndexes],
+            "betfair_runner_table_id": runnerIds,
+            "price": np.round(randomState.uniform(low=1.01, high=100, size=numRows), 2),
+        }
+    ).sort_values("unix_timestamp", kind="stable")
+    lastTradedPrice = LastTradedPrice()
+    for partitionSql in lastTradedPrice.partitioning.get_partitions_sql(
+        tableName=lastTradedPrice.tableName,
+        minValue=int(unixTimestamps.min()),
+        maxValue=int(unixTimestamps.max()),
+    ):
+        insertionEngine.create_table(schema=partitionSql)
+    copy_dataframe(insertionEngine=insertionEngine, tableName=lastTradedPrice.tableName, data=lastTradedPrices)
+
+    statusRows = lastTradedPrices.iloc[:: max(numTicksPerRunner // 10, 1)]
+    copy_dataframe(
+        insertionEngine=insertionEngine,
+        tableName=RunnerStatusUpdates().tableName,
+        data=pd.DataFrame(
+            {
+                "unix_timestamp": statusRows["unix_timestamp"],
+                "status_id": 1,
+                "betfair_runner_table_id": statusRows["betfair_runner_table_id"],
+                "betfair_market_id": statusRows["betfair_market_id"],
+                "event_id": statusRows["event_id"],
+            }
+        ),
+    )
+
+
+def time_query(query: Callable[[int], None], numQueries: int) -> Dict[str, float]:
+    latencies = []
+    for queryIndex in range(numQueries):
+        startTime = perf_counter()
+        query(queryIndex)
+        latencies.append((perf_counter() - startTime) * 1000)
+    return {"median_ms": float(np.median(latencies)), "p95_ms": float(np.percentile(latencies, 95))}
+
+
+def benchmark_query_indexes(
+    numMarkets: int = 1000, numRunnersPerMarket: int = 10, numTicksPerRunner: int = 100, numQueries: int = 200, seed: int = 0
+) -> None:
+    with testing.postgresql.Postgresql() as postgresql:
+        config = postgresql.dsn()
+        insertionEngine = PostgresInsertionEngine(
+            databaseName=config["database"],
+            user=config["user"],
+            password=config.get("password"),
+            port=config["port"],
+            host=config["host"],
+        )
+        startTime = perf_counter()
+        create_synthetic_database(
+            insertionEngine=insertionEngine,
+            numMarkets=numMarkets,
+            numRunnersPerMarket=numRunnersPerMarket,
+            numTicksPerRunner=numTicksPerRunner,
+            seed=seed,
+        )
+        print(f"loaded {numMarkets * numRunnersPerMarket * numTicksPerRunner:,} prices in {perf_counter() - startTime:.1f}s")
+
+        randomState = np.random.RandomState(seed + 1)
+        queryMarkets = randomState.randint(low=0, high=numMarkets, size=numQueries)
+        queryRunners = queryMarkets * numRunnersPerMarket + randomState.randint(
+            low=0, high=numRunnersPerMarket, size=numQueries
+        )
+        hotQueries = {
+            "get_last_traded_price": lambda queryIndex: insertionEngine.get_last_traded_price(
+                betfairMarketId=f"1.{159000000 + queryMarkets[queryIndex]}",
+                betfairRunnerTableId=int(queryRunners[queryIndex] + 1),
+            ),
+            "get_last_runner_status_info": lambda queryIndex: insertionEngine.get_last_runner_status_info(
+                betfairMarketId=f"1.{159000000 + queryMarkets[queryIndex]}",
+                betfairRunnerTableId=int(queryRunners[queryIndex] + 1),
+            ),
+            "get_odds_time_series": lambda queryIndex: insertionEngine.get_odds_time_series(
+                betfairMarketId=f"1.{159000000 + queryMarkets[queryIndex]}",
+                minUnixTimestamp=FIRST_MARKET_TIMESTAMP + int(queryMarkets[queryIndex]) * 3600,
+                maxUnixTimestamp=FIRST_MARKET_TIMESTAMP + int(queryMarkets[queryIndex] + 1) * 3600,
+            ),
+        }
+
+        # each set is added on top of the previous ones, as add_files_to_database does after a load
+        indexSets = {"no indexes": [], "base indexes": BASE_INDEXES, "query indexes": QUERY_INDEXES}
+        results = []
+        for indexSetName, indexes in indexSets.items():
+            startTime = perf_counter()
+            add_indexes(insertionEngine=insertionEngine, indexes=indexes)
+            indexBuildSeconds = perf_counter() - startTime
+            insertionEngine.run_autocommit_query(query="ANALYZE;")
+            for queryName, query in hotQueries.items():
+                results.append(
+                    {
+                        "index_set": indexSetName,
+                        "query": queryName,
+                        "index_build_s": round(indexBuildSeconds, 2),
+                        **time_query(query=query, numQueries=numQueries),
+                    }
+                )
+        print(pd.DataFrame(results).to_string(index=False, float_format="{:.2f}".format))
+
+
+if __name__ == "__main__":
+    fire.Fire(benchmark_query_indexes)
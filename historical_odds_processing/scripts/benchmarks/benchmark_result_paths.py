@@ -0,0 +1,102 @@
+import sys
+
+sys.path.append("../../../")
+sys.path.append("../../")
+
+import fire
+import numpy as np
+import pandas as pd
+import testing.postgresql
+
+from historical_odds_processing.datamodel.data_store_schema.indexes import INDEXES
+from historical_odds_processing.scripts.benchmarks.benchmark_query_indexes import create_synthetic_database
+from historical_odds_processing.scripts.benchmarks.benchmark_query_indexes import FIRST_MARKET_TIMESTAMP
+from historical_odds_processing.scripts.benchmarks.benchmark_query_indexes import time_query
+from historical_odds_processing.scripts.database_build.post_load_build import add_indexes
+from historical_odds_processing.store.postgres_insertion_engine import PostgresInsertionEngine
+from historical_odds_processing.store.postgres_query_engine import ODDS_SERIES_ARRAY_COLUMNS
+
+
+def benchmark_result_paths(
+    numMarkets: int = 1000,
+    numRunnersPerMarket: int = 10,
+    numTicksPerRunner: int = 100,
+    numQueries: int = 200,
+    marketsPerBatch: int = 50,
+    seed: int = 0,
+) -> None:
+    with testing.postgresql.Postgresql() as postgresql:
+        config = postgresql.dsn()
+        insertionEngine = PostgresInsertionEngine(
+            databaseName=config["database"],
+            user=config["user"],
+            password=config.get("password"),
+            port=config["port"],
+            host=config["host"],
+        )
+        create_synthetic_database(
+            insertionEngine=insertionEngine,
+            numMarkets=numMarkets,
+            numRunnersPerMarket=numRunnersPerMarket,
+            numTicksPerRunner=numTicksPerRunner,
+            seed=seed,
+        )
+        add_indexes(insertionEngine=insertionEngine, indexes=INDEXES)
+        insertionEngine.run_autocommit_query(query="ANALYZE;")
+        bettingTypeId = insertionEngine.insert_betting_type(bettingTypeName="ODDS")
+
+        randomState = np.random.RandomState(seed + 1)
+        queryMarkets = randomState.randint(low=0, high=numMarkets, size=numQueries)
+        marketBatches = [
+            [
+                f"1.{159000000 + marketIndex}"
+                for marketIndex in randomState.randint(low=0, high=numMarkets, size=marketsPerBatch)
+            ]
+            for _ in range(numQueries)
+        ]
+
+        def get_market_filters(queryIndex: int) -> dict:
+            return {
+                "betfairMarketId": f"1.{159000000 + queryMarkets[queryIndex]}",
+                "minUnixTimestamp": FIRST_MARKET_TIMESTAMP + int(queryMarkets[queryIndex]) * 3600,
+                "maxUnixTimestamp": FIRST_MARKET_TIMESTAMP + int(queryMarkets[queryIndex] + 1) * 3600,
+            }
+
+        def get_dataframe_arrays(dataframe: pd.DataFrame) -> dict:
+            return {column: dataframe[column].to_numpy() for column in ODDS_SERIES_ARRAY_COLUMNS}
+
+        # each pair fetches the same rows, once through a DataFrame and once straight into numpy
+        resultPaths = {
+            ("scalar lookup", "DataFrame"): lambda queryIndex: insertionEngine.run_select_query(
+                query="SELECT id FROM tbl_betfair_betting_types WHERE id = %(bettingTypeId)s",
+                parameters={"bettingTypeId": bettingTypeId},
+            ),
+            ("scalar lookup", "column"): lambda queryIndex: insertionEngine.run_column_query(
+                query="SELECT id FROM tbl_betfair_betting_types WHERE id = %(bettingTypeId)s",
+                parameters={"bettingTypeId": bettingTypeId},
+            ),
+            ("market odds series", "DataFrame"): lambda queryIndex: get_dataframe_arrays(
+                dataframe=insertionEngine.get_odds_time_series(**get_market_filters(queryIndex=queryIndex))
+            ),
+            ("market odds series", "binary COPY"): lambda queryIndex: insertionEngine.get_odds_time_series_arrays(
+                **get_market_filters(queryIndex=queryIndex)
+            ),
+            ("batch of markets", "DataFrame"): lambda queryIndex: {
+                betfairMarketId: get_dataframe_arrays(dataframe=marketDataframe)
+                for betfairMarketId, marketDataframe in insertionEngine.get_odds_time_series_for_markets(
+                    betfairMarketIds=marketBatches[queryIndex]
+                ).groupby("betfair_market_id")
+            },
+            ("batch of markets", "binary COPY"): lambda queryIndex: insertionEngine.get_odds_time_series_arrays_for_markets(
+                betfairMarketIds=marketBatches[queryIndex]
+            ),
+        }
+        results = [
+            {"query": queryName, "result_path": resultPath, **time_query(query=query, numQueries=numQueries)}
+            for (queryName, resultPath), query in resultPaths.items()
+        ]
+        print(pd.DataFrame(results).to_string(index=False, float_format="{:.2f}".format))
+
+
+if __name__ == "__main__":
+    fire.Fire(benchmark_result_paths)
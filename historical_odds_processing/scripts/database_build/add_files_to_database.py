@@ -2,102 +2,244 @@ import sys
 
 sys.path.append("../../../")
 sys.path.append("../../")
+from io import BytesIO
 import os
 import pandas as pd
 from pathlib import Path
-import pickle
-from typing import List, Union
+from typing import Callable, List, Optional, Tuple, Union
 
 import fire
 from tqdm.auto import tqdm
 
 from historical_odds_processing.datamodel.data_store_schema.database_components import Table
-from historical_odds_processing.datamodel.data_store_schema.indexes import INDEXES
 from historical_odds_processing.datamodel.data_store_schema.historical_trading_schema import ALL_HISTORICAL_SCHEMAS
 from historical_odds_processing.datamodel.data_store_schema.mapping_table_schema import Runners
 from historical_odds_processing.datamodel.data_store_schema.mapping_table_schema import ALL_MAPPING_SCHEMAS
-from historical_odds_processing.datamodel.data_store_schema.views import ALL_VIEWS
+from historical_odds_processing.scripts.database_build.post_load_build import run_post_load_build
+from historical_odds_processing.scripts.database_build.refresh_odds_series import refresh_odds_series
+from historical_odds_processing.store.db_creation.id_mapping import IdMapping
+from historical_odds_processing.store.db_creation.ingestion_manifest import IngestionManifest
+from historical_odds_processing.store.db_creation.ingestion_manifest import get_manifest_path
+from historical_odds_processing.store.postgres_copy_loader import PostgresCopyLoader
 from historical_odds_processing.store.postgres_insertion_engine import PostgresInsertionEngine
 from utils.runner_identifier import break_runner_identifier_string
 
+try:
+    import pyarrow.csv as pacsv
+    import pyarrow.parquet as pq
+except ImportError:
+    pacsv = None
+    pq = None
+
 
 def copy_rows_into_table(
-    insertionEngine: PostgresInsertionEngine, table: Table, orderedColumns: List[str], csvPaths: List[Union[str, Path]]
+    insertionEngine: PostgresInsertionEngine,
+    table: Table,
+    orderedColumns: List[str],
+    csvPaths: List[Union[str, Path]],
+    fileLoadedCallback: Optional[Callable[[Union[str, Path]], None]] = None,
 ) -> None:
     tableName = table.tableName
     tableColumns = ", ".join(orderedColumns)
     for csvPath in tqdm(csvPaths, position=0, desc=f"inserting {table.tableName} CSVs"):
-        insertionEngine.create_table(
-            schema=f"""
+        insertionEngine.create_table(schema=f"""
                 COPY {tableName}(
                     {tableColumns}
                 )
                 FROM '{csvPath}' DELIMITER ',' CSV HEADER;
-            """
+            """)
+        if fileLoadedCallback is not None:
+            fileLoadedCallback(csvPath)
+
+
+def copy_parquet_into_table(
+    insertionEngine: PostgresInsertionEngine,
+    table: Table,
+    parquetPaths: List[Union[str, Path]],
+    fileLoadedCallback: Optional[Callable[[Union[str, Path]], None]] = None,
+) -> None:
+    # postgres can't read parquet itself, so each file is streamed to it as CSV over COPY FROM STDIN
+    for parquetPath in tqdm(parquetPaths, position=0, desc=f"inserting {table.tableName} parquet files"):
+        parquetTable = pq.read_table(parquetPath, columns=table.get_column_names())
+        csvBuffer = BytesIO()
+        pacsv.write_csv(parquetTable, csvBuffer)
+        csvBuffer.seek(0)
+        insertionEngine.copy_from_stream(tableName=table.tableName, columnNames=parquetTable.column_names, stream=csvBuffer)
+        if fileLoadedCallback is not None:
+            fileLoadedCallback(parquetPath)
+
+
+def load_files_into_table(
+    insertionEngine: PostgresInsertionEngine,
+    table: Table,
+    orderedColumns: List[str],
+    filePaths: List[Union[str, Path]],
+    copyLoader: Optional[PostgresCopyLoader] = None,
+    fileLoadedCallback: Optional[Callable[[Union[str, Path]], None]] = None,
+) -> None:
+    # every file is loaded in its own transaction, and fileLoadedCallback is called with it once it's committed
+    if copyLoader is not None:
+        copyLoader.load_files(
+            tableName=table.tableName,
+            columnNames=orderedColumns,
+            filePaths=filePaths,
+            fileLoadedCallback=fileLoadedCallback,
         )
+        return
+    copy_rows_into_table(
+        insertionEngine=insertionEngine,
+        table=table,
+        orderedColumns=orderedColumns,
+        csvPaths=[filePath for filePath in filePaths if Path(filePath).suffix != ".parquet"],
+        fileLoadedCallback=fileLoadedCallback,
+    )
+    copy_parquet_into_table(
+        insertionEngine=insertionEngine,
+        table=table,
+        parquetPaths=[filePath for filePath in filePaths if Path(filePath).suffix == ".parquet"],
+        fileLoadedCallback=fileLoadedCallback,
+    )
+
+
+def get_column_range(filePath: Union[str, Path], columnName: str) -> Optional[Tuple[int, int]]:
+    if Path(filePath).suffix == ".parquet":
+        values = pq.read_table(filePath, columns=[columnName]).column(columnName).to_pandas()
+    else:
+        values = pd.read_csv(filePath, usecols=[columnName])[columnName]
+    if values.count() == 0:
+        return None
+    return int(values.min()), int(values.max())
+
+
+def create_table_partitions(
+    insertionEngine: PostgresInsertionEngine,
+    table: Table,
+    filePaths: List[Union[str, Path]],
+    ingestionManifest: Optional[IngestionManifest] = None,
+) -> None:
+    # partitions have to exist before rows can be copied into them, so they're created from the range of the files. The
+    # ranges the manifest recorded when the chunks were written are used where there are any, and other files are read
+    if table.partitioning is None:
+        return
+    knownColumnRanges = {}
+    if ingestionManifest is not None and table.partitioning.columnName == "unix_timestamp":
+        knownColumnRanges = ingestionManifest.get_timestamp_ranges(filePaths=filePaths)
+    unknownFilePaths = [filePath for filePath in filePaths if str(Path(filePath).resolve()) not in knownColumnRanges]
+    columnRanges = list(knownColumnRanges.values()) + [
+        get_column_range(filePath=filePath, columnName=table.partitioning.columnName)
+        for filePath in tqdm(unknownFilePaths, position=0, desc=f"finding {table.tableName} partitions")
+    ]
+    columnRanges = [columnRange for columnRange in columnRanges if columnRange is not None]
+    if len(columnRanges) == 0:
+        return
+    insertionEngine.create_partitions(
+        table=table,
+        minValue=min(minValue for minValue, _ in columnRanges),
+        maxValue=max(maxValue for _, maxValue in columnRanges),
+    )
+
 
+def get_max_table_id(insertionEngine: PostgresInsertionEngine, table: Table) -> int:
+    output = insertionEngine.run_select_query(query=f"SELECT COALESCE(MAX(id), -1) AS max_id FROM {table.tableName}")
+    return int(output["max_id"].values[0])
 
-def process_mapping(insertionEngine: PostgresInsertionEngine, table: Table, pickleMappingFile: Union[str, Path]) -> None:
-    mapping = pickle.load(open(pickleMappingFile, "rb"))
+
+def process_mapping(
+    insertionEngine: PostgresInsertionEngine,
+    table: Table,
+    pickleMappingFile: Union[str, Path],
+    minId: int = 0,
+    copyLoader: Optional[PostgresCopyLoader] = None,
+) -> None:
+    # mappings are append-only, so rows already in the table never change and only ids from minId on need inserting
+    mapping = IdMapping.load(filePath=pickleMappingFile)
+    newEntries = [(entry, entryId) for entryId, entry in enumerate(mapping.entries) if entryId >= minId]
+    if len(newEntries) == 0:
+        return
     if isinstance(table, Runners):
-        tableMap = pd.DataFrame(data=mapping.items(), columns=["combined_runner_info", "id"])
+        tableMap = pd.DataFrame(data=newEntries, columns=["combined_runner_info", "id"])
         splitRunnerInfo = [break_runner_identifier_string(runnerIdentifier=v) for v in tableMap["combined_runner_info"]]
         tableMap["runner_name"] = [v[0] for v in splitRunnerInfo]
         tableMap["betfair_id"] = [v[1] for v in splitRunnerInfo]
         tableMap = tableMap.drop("combined_runner_info", axis=1)
     else:
-        tableMap = pd.DataFrame(data=mapping.items(), columns=list(reversed(table.get_column_names())))
-    csvOutputPath = f"{pickleMappingFile.parent}/{table.tableName}_final_mapping.csv"
-    tableMap.sort_values("id").to_csv(csvOutputPath, index=False)
-    copy_rows_into_table(
-        insertionEngine=insertionEngine, table=table, orderedColumns=list(tableMap.columns), csvPaths=[csvOutputPath]
+        tableMap = pd.DataFrame(data=newEntries, columns=list(reversed(table.get_column_names())))
+    csvOutputPath = f"{Path(pickleMappingFile).parent}/{table.tableName}_final_mapping.csv"
+    tableMap.to_csv(csvOutputPath, index=False)
+    load_files_into_table(
+        insertionEngine=insertionEngine,
+        table=table,
+        orderedColumns=list(tableMap.columns),
+        filePaths=[csvOutputPath],
+        copyLoader=copyLoader,
     )
 
 
-def add_files_to_database(insertionEngine: PostgresInsertionEngine, inputDirectory: Union[str, Path]) -> None:
+def add_files_to_database(
+    insertionEngine: PostgresInsertionEngine,
+    inputDirectory: Union[str, Path],
+    incremental: bool = False,
+    copyLoader: Optional[PostgresCopyLoader] = None,
+) -> None:
+    ingestionManifest = None
+    if Path(get_manifest_path(outputDirectory=inputDirectory)).exists():
+        ingestionManifest = IngestionManifest(outputDirectory=inputDirectory)
+    elif incremental:
+        raise ValueError(f"Incremental loads need the ingestion manifest in {inputDirectory}")
+    loadedFilePaths = ingestionManifest.get_loaded_filepaths() if incremental else set()
+
     for table in ALL_MAPPING_SCHEMAS:
         mappingFilePath = list(Path(inputDirectory).glob(f"{table.savingIdentifier}*final_mapping.pkl"))
         if len(mappingFilePath) != 1:
             raise Exception(f"Check mapping file for {table.tableName}")
-        process_mapping(insertionEngine=insertionEngine, table=table, pickleMappingFile=mappingFilePath[0])
+        minId = get_max_table_id(insertionEngine=insertionEngine, table=table) + 1 if incremental else 0
+        process_mapping(
+            insertionEngine=insertionEngine,
+            table=table,
+            pickleMappingFile=mappingFilePath[0],
+            minId=minId,
+            copyLoader=copyLoader,
+        )
 
     for table in ALL_HISTORICAL_SCHEMAS:
-        allCsvPaths = list(Path(f"{inputDirectory}/remapped_files").glob(f"**/{table.savingIdentifier}*.csv"))
-        copy_rows_into_table(
-            insertionEngine=insertionEngine, table=table, orderedColumns=table.get_column_names(), csvPaths=allCsvPaths
+        allFilePaths = [
+            filePath
+            for fileExtension in ("csv", "parquet")
+            for filePath in Path(f"{inputDirectory}/remapped_files").glob(f"**/{table.savingIdentifier}*.{fileExtension}")
+            if str(filePath.resolve()) not in loadedFilePaths
+        ]
+        create_table_partitions(
+            insertionEngine=insertionEngine, table=table, filePaths=allFilePaths, ingestionManifest=ingestionManifest
+        )
+        load_files_into_table(
+            insertionEngine=insertionEngine,
+            table=table,
+            orderedColumns=table.get_column_names(),
+            filePaths=allFilePaths,
+            copyLoader=copyLoader,
+            # files are recorded as they're committed, so a failed load can be resumed without copying them again
+            fileLoadedCallback=ingestionManifest.add_loaded_filepath if ingestionManifest is not None else None,
         )
 
-
-def add_foreign_keys(insertionEngine: PostgresInsertionEngine) -> None:
-    fkQuery = """
-        ALTER TABLE {tableName}
-        ADD CONSTRAINT {constraintName} {foreignKeySQL};
-    """
-    for table in tqdm(ALL_HISTORICAL_SCHEMAS, desc="adding foreign keys"):
-        for constraint in table.foreign_key_constraints():
-            insertionEngine.create_table(
-                schema=fkQuery.format(
-                    tableName=table.tableName, constraintName=constraint.constraintName, foreignKeySQL=str(constraint)
-                )
-            )
-
-
-def add_indexes(insertionEngine: PostgresInsertionEngine) -> None:
-    for index in tqdm(INDEXES, desc="adding indexes"):
-        insertionEngine.create_index(tableName=index["table"], column=index["column"])
-
-
-def add_views(insertionEngine: PostgresInsertionEngine) -> None:
-    for view in tqdm(ALL_VIEWS, desc="adding views"):
-        insertionEngine.create_table(schema=view)
+    if ingestionManifest is not None:
+        ingestionManifest.close()
 
 
-def main(inputDirectory: Union[str, Path]) -> None:
+def main(
+    inputDirectory: Union[str, Path], incremental: bool = False, numConnections: int = 4, refreshOddsSeries: bool = False
+) -> None:
     insertionEngine = PostgresInsertionEngine(user=os.environ["POSTGRES_USERNAME"], password=os.environ["POSTGRES_PASSWORD"])
-    add_files_to_database(insertionEngine=insertionEngine, inputDirectory=inputDirectory)
-    add_foreign_keys(insertionEngine=insertionEngine)
-    add_indexes(insertionEngine=insertionEngine)
-    add_views(insertionEngine=insertionEngine)
+    with PostgresCopyLoader(
+        user=os.environ["POSTGRES_USERNAME"], password=os.environ["POSTGRES_PASSWORD"], numConnections=numConnections
+    ) as copyLoader:
+        add_files_to_database(
+            insertionEngine=insertionEngine, inputDirectory=inputDirectory, incremental=incremental, copyLoader=copyLoader
+        )
+    # keys, indexes and views were created by the initial load
+    if not incremental:
+        run_post_load_build(insertionEngine=insertionEngine, numWorkers=numConnections)
+    if refreshOddsSeries:
+        refresh_odds_series(insertionEngine=insertionEngine)
 
 
 if __name__ == "__main__":
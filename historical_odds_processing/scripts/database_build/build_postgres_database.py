@@ -16,6 +16,8 @@ def create_postgres_data_store() -> None:
     postgresEngine = PostgresInsertionEngine(user=os.environ["POSTGRES_USERNAME"], password=os.environ["POSTGRES_PASSWORD"])
     for tableSchema in ALL_MAPPING_SCHEMAS + ALL_HISTORICAL_SCHEMAS:
         postgresEngine.create_table(schema=tableSchema.create_table_sql())
+        for partitionSql in tableSchema.create_partitions_sql():
+            postgresEngine.create_table(schema=partitionSql)
         logging.info(f"Added new table: {tableSchema.tableName}")
 
     logging.info("Done!")
@@ -0,0 +1,186 @@
+import sys
+
+sys.path.append("../../../")
+sys.path.append("../../")
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+import logging
+import os
+from time import perf_counter
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import fire
+from tqdm.auto import tqdm
+
+from historical_odds_processing.datamodel.data_store_schema.database_components import Index
+from historical_odds_processing.datamodel.data_store_schema.historical_trading_schema import ALL_HISTORICAL_SCHEMAS
+from historical_odds_processing.datamodel.data_store_schema.indexes import INDEXES
+from historical_odds_processing.datamodel.data_store_schema.mapping_table_schema import ALL_MAPPING_SCHEMAS
+from historical_odds_processing.datamodel.data_store_schema.views import ALL_VIEWS
+from historical_odds_processing.store.postgres_insertion_engine import PostgresInsertionEngine
+
+
+def get_build_settings(maintenanceWorkMem: str = "1GB", maxParallelMaintenanceWorkers: int = 2) -> Dict[str, Any]:
+    # session level settings, so the server defaults used by normal queries are left alone
+    return {"maintenance_work_mem": maintenanceWorkMem, "max_parallel_maintenance_workers": maxParallelMaintenanceWorkers}
+
+
+@contextmanager
+def timed_step(stepTimings: Dict[str, float], stepName: str) -> Iterator[None]:
+    startTime = perf_counter()
+    yield
+    stepTimings[stepName] = perf_counter() - startTime
+    logging.info(f"{stepName} took {stepTimings[stepName]:.1f}s")
+
+
+def run_queries(
+    insertionEngine: PostgresInsertionEngine, queries: List[str], sessionSettings: Optional[Dict[str, Any]] = None
+) -> None:
+    for query in queries:
+        insertionEngine.run_autocommit_query(query=query, sessionSettings=sessionSettings)
+
+
+def run_queries_per_relation(
+    insertionEngine: PostgresInsertionEngine,
+    relationQueries: Dict[str, List[str]],
+    description: str,
+    numWorkers: int = 4,
+    sessionSettings: Optional[Dict[str, Any]] = None,
+) -> None:
+    # index builds and constraint validations on the same relation block each other, so the parallelism is across relations
+    with ThreadPoolExecutor(max_workers=numWorkers) as executor:
+        futures = [
+            executor.submit(run_queries, insertionEngine=insertionEngine, queries=queries, sessionSettings=sessionSettings)
+            for queries in relationQueries.values()
+        ]
+        for future in tqdm(as_completed(futures), total=len(futures), desc=description):
+            future.result()
+
+
+def get_index_queries(insertionEngine: PostgresInsertionEngine, index: Index, concurrently: bool = True) -> List[str]:
+    partitionNames = insertionEngine.get_partition_names(tableName=index.tableName)
+    if len(partitionNames) == 0:
+        return [index.create_index_sql(concurrently=concurrently)]
+    # postgres can't build an index concurrently on a partitioned table, so each partition is built on its own and attached
+    indexQueries = [index.create_index_sql(onlyParent=True)]
+    for partitionName in partitionNames:
+        partitionIndexName = f"{index.name}{partitionName[len(index.tableName):]}"
+        indexQueries.append(
+            index.create_index_sql(tableName=partitionName, indexName=partitionIndexName, concurrently=concurrently)
+        )
+        indexQueries.append(f"ALTER INDEX {index.name} ATTACH PARTITION {partitionIndexName};")
+    return indexQueries
+
+
+def add_indexes(
+    insertionEngine: PostgresInsertionEngine,
+    indexes: Sequence[Index] = INDEXES,
+    numWorkers: int = 4,
+    concurrently: bool = True,
+    sessionSettings: Optional[Dict[str, Any]] = None,
+) -> None:
+    tableIndexQueries = {}
+    for index in indexes:
+        tableIndexQueries.setdefault(index.tableName, []).extend(
+            get_index_queries(insertionEngine=insertionEngine, index=index, concurrently=concurrently)
+        )
+    run_queries_per_relation(
+        insertionEngine=insertionEngine,
+        relationQueries=tableIndexQueries,
+        description="adding indexes",
+        numWorkers=numWorkers,
+        sessionSettings=sessionSettings,
+    )
+
+
+def add_foreign_keys(
+    insertionEngine: PostgresInsertionEngine, numWorkers: int = 4, sessionSettings: Optional[Dict[str, Any]] = None
+) -> None:
+    # NOT VALID constraints are added instantly under a short lock, and validating them afterwards only blocks writes
+    addQueries, validateQueries, parentQueries = [], {}, []
+    for table in ALL_HISTORICAL_SCHEMAS:
+        existingConstraints = insertionEngine.get_constraint_names(tableName=table.tableName)
+        partitionNames = insertionEngine.get_partition_names(tableName=table.tableName)
+        for constraint in table.foreign_key_constraints():
+            if constraint.constraintName in existingConstraints:
+                continue
+            if table.partitioning is None:
+                addQueries.append(constraint.get_foreign_key_sql(tableName=table.tableName, notValid=True))
+                validateQueries.setdefault(table.tableName, []).append(constraint.get_validate_sql(tableName=table.tableName))
+                continue
+            # partitioned tables can't take NOT VALID constraints, but adding the constraint to the parent attaches
+            # the already validated partition constraints instead of scanning the partitions again
+            for partitionName in partitionNames:
+                if constraint.constraintName not in insertionEngine.get_constraint_names(tableName=partitionName):
+                    addQueries.append(constraint.get_foreign_key_sql(tableName=partitionName, notValid=True))
+                validateQueries.setdefault(partitionName, []).append(constraint.get_validate_sql(tableName=partitionName))
+            # without any partitions there is nothing to validate, so the constraint goes straight onto the parent
+            parentQueries.append(constraint.get_foreign_key_sql(tableName=table.tableName))
+
+    run_queries(insertionEngine=insertionEngine, queries=addQueries)
+    run_queries_per_relation(
+        insertionEngine=insertionEngine,
+        relationQueries=validateQueries,
+        description="validating foreign keys",
+        numWorkers=numWorkers,
+        sessionSettings=sessionSettings,
+    )
+    run_queries(insertionEngine=insertionEngine, queries=parentQueries, sessionSettings=sessionSettings)
+
+
+def analyze_tables(insertionEngine: PostgresInsertionEngine, numWorkers: int = 4) -> None:
+    # analyzing a partitioned table also analyzes its partitions
+    run_queries_per_relation(
+        insertionEngine=insertionEngine,
+        relationQueries={
+            table.tableName: [f"ANALYZE {table.tableName};"] for table in ALL_MAPPING_SCHEMAS + ALL_HISTORICAL_SCHEMAS
+        },
+        description="analyzing tables",
+        numWorkers=numWorkers,
+    )
+
+
+def add_views(insertionEngine: PostgresInsertionEngine) -> None:
+    for view in tqdm(ALL_VIEWS, desc="adding views"):
+        insertionEngine.create_table(schema=view)
+
+
+def run_post_load_build(
+    insertionEngine: PostgresInsertionEngine,
+    numWorkers: int = 4,
+    maintenanceWorkMem: str = "1GB",
+    maxParallelMaintenanceWorkers: int = 2,
+) -> Dict[str, float]:
+    buildSettings = get_build_settings(
+        maintenanceWorkMem=maintenanceWorkMem, maxParallelMaintenanceWorkers=maxParallelMaintenanceWorkers
+    )
+    stepTimings = {}
+    with timed_step(stepTimings=stepTimings, stepName="indexes"):
+        add_indexes(insertionEngine=insertionEngine, numWorkers=numWorkers, sessionSettings=buildSettings)
+    with timed_step(stepTimings=stepTimings, stepName="foreign keys"):
+        add_foreign_keys(insertionEngine=insertionEngine, numWorkers=numWorkers, sessionSettings=buildSettings)
+    with timed_step(stepTimings=stepTimings, stepName="analyze"):
+        analyze_tables(insertionEngine=insertionEngine, numWorkers=numWorkers)
+    with timed_step(stepTimings=stepTimings, stepName="views"):
+        add_views(insertionEngine=insertionEngine)
+    logging.info(
+        "post load build: "
+        + ", ".join(f"{stepName} {elapsedSeconds:.1f}s" for stepName, elapsedSeconds in stepTimings.items())
+    )
+    return stepTimings
+
+
+def main(numWorkers: int = 4, maintenanceWorkMem: str = "1GB", maxParallelMaintenanceWorkers: int = 2) -> None:
+    insertionEngine = PostgresInsertionEngine(user=os.environ["POSTGRES_USERNAME"], password=os.environ["POSTGRES_PASSWORD"])
+    stepTimings = run_post_load_build(
+        insertionEngine=insertionEngine,
+        numWorkers=numWorkers,
+        maintenanceWorkMem=maintenanceWorkMem,
+        maxParallelMaintenanceWorkers=maxParallelMaintenanceWorkers,
+    )
+    for stepName, elapsedSeconds in stepTimings.items():
+        print(f"{stepName:>12}: {elapsedSeconds:.1f}s")
+
+
+if __name__ == "__main__":
+    fire.Fire(main)
@@ -0,0 +1,46 @@
+import sys
+
+sys.path.append("../../../")
+sys.path.append("../../")
+import logging
+import os
+
+import fire
+
+from historical_odds_processing.datamodel.data_store_schema.odds_series_schema import OddsSeries
+from historical_odds_processing.store.postgres_insertion_engine import PostgresInsertionEngine
+
+
+def refresh_odds_series(insertionEngine: PostgresInsertionEngine) -> int:
+    # only last traded prices added since the previous refresh are joined, so a refresh after an incremental load is cheap
+    oddsSeries = OddsSeries()
+    insertionEngine.create_table(schema=oddsSeries.create_table_sql())
+    lastRefreshedId = insertionEngine.get_odds_series_last_refreshed_id()
+    numNewRows, minUnixTimestamp, maxUnixTimestamp = insertionEngine.get_new_last_traded_price_summary(
+        lastRefreshedId=lastRefreshedId
+    )
+    if numNewRows == 0:
+        logging.info(f"{oddsSeries.tableName} is up to date")
+        return 0
+    for partitionSql in oddsSeries.partitioning.get_partitions_sql(
+        tableName=oddsSeries.tableName, minValue=minUnixTimestamp, maxValue=maxUnixTimestamp
+    ):
+        insertionEngine.create_table(schema=partitionSql)
+    insertionEngine.run_update_query(
+        query=oddsSeries.get_refresh_sql(), parameters={"lastRefreshedId": lastRefreshedId}, returnId=False
+    )
+    # the index is built after the first fill rather than maintained row by row during it
+    for index in oddsSeries.get_indices():
+        insertionEngine.create_table(schema=index.create_index_sql())
+    insertionEngine.run_autocommit_query(query=f"ANALYZE {oddsSeries.tableName};")
+    logging.info(f"Added {numNewRows:,} rows to {oddsSeries.tableName}")
+    return numNewRows
+
+
+def main() -> None:
+    insertionEngine = PostgresInsertionEngine(user=os.environ["POSTGRES_USERNAME"], password=os.environ["POSTGRES_PASSWORD"])
+    refresh_odds_series(insertionEngine=insertionEngine)
+
+
+if __name__ == "__main__":
+    fire.Fire(main)
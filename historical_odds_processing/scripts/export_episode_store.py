@@ -0,0 +1,131 @@
+import sys
+
+sys.path.append("../../")
+import logging
+import os
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+import fire
+import numpy as np
+from tqdm.auto import tqdm
+
+from historical_odds_processing.store.postgres_query_engine import PostgresQueryEngine
+from trading.datamodel.constants import BETFAIR_DRAW_RUNNER_ID
+from trading.datamodel.episode_store.episode_store import EpisodeStoreWriter
+
+WINNER_STATUS = "WINNER"
+MARKET_TYPE_ODDS_SERIES_TYPES = {"MATCH_ODDS": "match_odds"}
+OVER_UNDER_MARKET_TYPE_PREFIX = "OVER_UNDER_"
+
+
+def get_odds_series_type(marketType: str) -> str:
+    if marketType in MARKET_TYPE_ODDS_SERIES_TYPES:
+        return MARKET_TYPE_ODDS_SERIES_TYPES[marketType]
+    if marketType.startswith(OVER_UNDER_MARKET_TYPE_PREFIX):
+        return "over_under"
+    raise ValueError(f"No odds series type for market type {marketType}")
+
+
+def get_runner_columns(oddsSeriesType: str, eventName: str, runnerNames: Dict[int, str]) -> Optional[Dict[int, int]]:
+    # maps betfair runner ids to their position in the odds vector, or None if the runners can't all be placed
+    runnerColumns = {}
+    if oddsSeriesType == "match_odds":
+        teamNames = [teamName.strip() for teamName in eventName.split(" v ")]
+        if len(teamNames) != 2:
+            return None
+        for runnerBetfairId, runnerName in runnerNames.items():
+            if runnerBetfairId == BETFAIR_DRAW_RUNNER_ID:
+                runnerColumns[runnerBetfairId] = 2
+            elif runnerName.strip() in teamNames:
+                runnerColumns[runnerBetfairId] = teamNames.index(runnerName.strip())
+    else:
+        for runnerBetfairId, runnerName in runnerNames.items():
+            if "over" in runnerName.lower():
+                runnerColumns[runnerBetfairId] = 0
+            elif "under" in runnerName.lower():
+                runnerColumns[runnerBetfairId] = 1
+    if len(runnerColumns) != len(runnerNames) or len(set(runnerColumns.values())) != len(runnerColumns):
+        return None
+    return runnerColumns
+
+
+def export_episode_store(
+    queryEngine: PostgresQueryEngine,
+    outputDirectory: Union[str, Path],
+    marketType: str = "MATCH_ODDS",
+    countryCode: Optional[str] = None,
+    chunkSize: int = 100000,
+    useOddsSeries: bool = False,
+) -> Counter:
+    oddsSeriesType = get_odds_series_type(marketType=marketType)
+    markets = queryEngine.get_markets_by_type(marketType=marketType, countryCode=countryCode)
+    eventNames = {} if len(markets) == 0 else dict(zip(markets["betfair_market_id"], markets["event_name"]))
+    runnerStatuses = queryEngine.get_final_runner_statuses(betfairMarketIds=list(eventNames.keys()))
+    marketRunners = {} if len(runnerStatuses) == 0 else dict(list(runnerStatuses.groupby("betfair_market_id")))
+
+    exportCounts = Counter()
+    with EpisodeStoreWriter(directory=outputDirectory, oddsSeriesType=oddsSeriesType) as writer:
+        for betfairMarketId, arrays in tqdm(
+            queryEngine.iter_odds_time_series(
+                marketType=marketType, countryCode=countryCode, chunkSize=chunkSize, useOddsSeries=useOddsSeries
+            ),
+            total=len(eventNames),
+            desc="exporting episodes",
+        ):
+            if betfairMarketId not in marketRunners:
+                exportCounts["no runner statuses"] += 1
+                continue
+            runners = marketRunners[betfairMarketId]
+            runnerColumns = get_runner_columns(
+                oddsSeriesType=oddsSeriesType,
+                eventName=eventNames[betfairMarketId],
+                runnerNames=dict(zip(runners["runner_betfair_id"], runners["runner_name"])),
+            )
+            if runnerColumns is None:
+                exportCounts["unrecognised runners"] += 1
+                continue
+            winners = runners.loc[runners["status"] == WINNER_STATUS, "runner_betfair_id"].tolist()
+            # void and unsettled markets have no single winner to reward against
+            if len(winners) != 1:
+                exportCounts["no single winner"] += 1
+                continue
+            rowColumns = np.full(len(arrays["runner_betfair_id"]), -1, dtype=np.int8)
+            for runnerBetfairId, runnerColumn in runnerColumns.items():
+                rowColumns[arrays["runner_betfair_id"] == runnerBetfairId] = runnerColumn
+            isKnownRunner = rowColumns >= 0
+            writer.add_episode(
+                betfairMarketId=betfairMarketId,
+                unixTimestamps=arrays["unix_timestamp"][isKnownRunner],
+                runnerColumns=rowColumns[isKnownRunner],
+                prices=arrays["price"][isKnownRunner],
+                winningColumn=runnerColumns[winners[0]],
+            )
+            exportCounts["exported"] += 1
+    logging.info(f"Exported {marketType} episodes to {outputDirectory}: {dict(exportCounts)}")
+    return exportCounts
+
+
+def main(
+    outputDirectory: str,
+    marketType: str = "MATCH_ODDS",
+    countryCode: Optional[str] = None,
+    chunkSize: int = 100000,
+    useOddsSeries: bool = False,
+) -> None:
+    queryEngine = PostgresQueryEngine(user=os.environ["POSTGRES_USERNAME"], password=os.environ["POSTGRES_PASSWORD"])
+    exportCounts = export_episode_store(
+        queryEngine=queryEngine,
+        outputDirectory=outputDirectory,
+        marketType=marketType,
+        countryCode=countryCode,
+        chunkSize=chunkSize,
+        useOddsSeries=useOddsSeries,
+    )
+    for reason, numMarkets in exportCounts.items():
+        print(f"{reason:>22}: {numMarkets:,}")
+
+
+if __name__ == "__main__":
+    fire.Fire(main)
@@ -1,30 +1,59 @@
 from pathlib import Path
 import pickle
-from typing import Tuple, Union
+from typing import List, Optional, Tuple, Union
 
 import fire
 from tqdm.auto import tqdm
 
+from historical_odds_processing.store.db_creation.id_mapping import IdMapping
+from historical_odds_processing.store.db_creation.id_mapping import get_final_mapping_path
+from historical_odds_processing.store.db_creation.ingestion_manifest import IngestionManifest
+from historical_odds_processing.store.db_creation.ingestion_manifest import get_manifest_path
 from historical_odds_processing.store.db_creation.output_filenames import OutputFilenames
 from utils.batching import run_multiprocessing
 
 
-def merge_mapping(args: Tuple[Union[str, Path], str]) -> None:
-    workingDirectory, mappingName = args
+def merge_mapping(args: Tuple[Union[str, Path], str, Optional[List[str]]]) -> None:
+    workingDirectory, mappingName, chunkPaths = args
     allEntries = set()
-    allMappingFiles = list(Path(workingDirectory).glob(f"**/{mappingName}.pkl"))
+    if chunkPaths is None:
+        allMappingFiles = list(Path(workingDirectory).glob(f"**/{mappingName}.pkl"))
+    else:
+        allMappingFiles = [Path(chunkPath, f"{mappingName}.pkl") for chunkPath in chunkPaths]
     for file in tqdm(allMappingFiles, desc=f"Merging {mappingName} mapping files"):
         entries = pickle.load(open(file, "rb"))
         allEntries = allEntries.union(entries)
-    mapping = {entry: i for i, entry in enumerate(allEntries)}
-    pickle.dump(mapping, open(f"{workingDirectory}/{mappingName}_final_mapping.pkl", "wb"))
+    # existing entries keep their ids, so files remapped (and rows loaded) with an earlier mapping stay valid
+    finalMappingPath = get_final_mapping_path(outputDirectory=workingDirectory, mappingName=mappingName)
+    mapping = IdMapping.load_or_create(filePath=finalMappingPath)
+    mapping.extend(entries=allEntries)
+    mapping.save(filePath=finalMappingPath)
 
 
 def merge_all_mappings(outputDirectory: Union[str, Path]) -> None:
-    run_multiprocessing(
-        functionToProcess=merge_mapping,
-        parameterList=[(outputDirectory, filename) for filename in OutputFilenames.ALL_MAPPING_FILES],
+    if not Path(get_manifest_path(outputDirectory=outputDirectory)).exists():
+        run_multiprocessing(
+            functionToProcess=merge_mapping,
+            parameterList=[(outputDirectory, filename, None) for filename in OutputFilenames.ALL_MAPPING_FILES],
+        )
+        return
+
+    ingestionManifest = IngestionManifest(outputDirectory=outputDirectory)
+    finalMappingsExist = all(
+        Path(get_final_mapping_path(outputDirectory=outputDirectory, mappingName=filename)).exists()
+        for filename in OutputFilenames.ALL_MAPPING_FILES
     )
+    # chunks that have been remapped were merged before, so only the new ones can add entries
+    if finalMappingsExist:
+        chunkPaths = ingestionManifest.get_chunk_paths_to_remap()
+    else:
+        chunkPaths = ingestionManifest.get_complete_chunk_paths()
+    if len(chunkPaths) > 0:
+        run_multiprocessing(
+            functionToProcess=merge_mapping,
+            parameterList=[(outputDirectory, filename, chunkPaths) for filename in OutputFilenames.ALL_MAPPING_FILES],
+        )
+    ingestionManifest.close()
 
 
 if __name__ == "__main__":
@@ -1,47 +1,76 @@
+from functools import partial
+from multiprocessing import Manager
 from pathlib import Path
-import re
-from typing import List, Tuple, Optional, Union
+from typing import List, Optional, Union
 
 import fire
-from tqdm.auto import tqdm
 
 from historical_odds_processing.datamodel.data_store_schema.historical_trading_schema import LastTradedPrice
 from historical_odds_processing.datamodel.data_store_schema.historical_trading_schema import MarketDefinitions
 from historical_odds_processing.datamodel.data_store_schema.historical_trading_schema import MarketInfo
 from historical_odds_processing.datamodel.data_store_schema.historical_trading_schema import RunnerStatusUpdates
+from historical_odds_processing.store.db_creation.bz2_ingestion_scheduler import BZ2IngestionScheduler
 from historical_odds_processing.store.db_creation.bz2_processor import BZ2Processor
+from historical_odds_processing.store.db_creation.csv_output_handler import CSV_COMPRESSION_EXTENSIONS
 from historical_odds_processing.store.db_creation.csv_output_handler import CSVOutputHandler
+from historical_odds_processing.store.db_creation.ingestion_manifest import IngestionManifest
+from historical_odds_processing.store.db_creation.json_decoders import get_json_decoder
+from historical_odds_processing.store.db_creation.market_file_index import MarketFileIndex
 from historical_odds_processing.store.db_creation.output_filenames import OutputFilenames
-from utils.batching import get_data_batches
-from utils.batching import run_multiprocessing
+from historical_odds_processing.store.db_creation.parquet_output_handler import ParquetOutputHandler
+from historical_odds_processing.store.db_creation.parquet_output_handler import get_encoded_id_column_types
+from historical_odds_processing.store.db_creation.shared_id_encoder import SharedIdEncoder
 from utils.paths import get_path
 
+OUTPUT_HANDLERS = {
+    CSVOutputHandler.fileExtension: CSVOutputHandler,
+    ParquetOutputHandler.fileExtension: ParquetOutputHandler,
+}
 
-def process_bz2_file(args: Tuple[List[Union[str, Path]], List[str], Union[str, Path], int]) -> None:
-    filepathBatch, validCountryCodes, outputPath, chunkId = args
-    outputPath = get_path(outputPath, chunkId)
-    marketInfoHandler = CSVOutputHandler(
-        fileName=f"{outputPath}/{OutputFilenames.MARKET_INFO}.csv", tableFields=MarketInfo().get_column_names()
+
+def get_bz2_processor(
+    outputPath: Union[str, Path],
+    validCountryCodes: List[str],
+    jsonDecoderName: Optional[str] = None,
+    outputFormat: str = CSVOutputHandler.fileExtension,
+    compression: Optional[str] = None,
+    idEncoder: Optional[SharedIdEncoder] = None,
+) -> BZ2Processor:
+    if outputFormat not in OUTPUT_HANDLERS:
+        raise ValueError(f"Unknown output format: {outputFormat}, choose from {list(OUTPUT_HANDLERS)}")
+    outputHandler = OUTPUT_HANDLERS[outputFormat]
+    fileExtension = outputFormat
+    if compression is not None:
+        outputHandler = partial(outputHandler, compression=compression)
+        if outputFormat == CSVOutputHandler.fileExtension:
+            fileExtension = f"{outputFormat}.{CSV_COMPRESSION_EXTENSIONS.get(compression, compression)}"
+    if idEncoder is not None and outputFormat == ParquetOutputHandler.fileExtension:
+        outputHandler = partial(outputHandler, columnTypes=get_encoded_id_column_types())
+    marketInfoHandler = outputHandler(
+        fileName=f"{outputPath}/{OutputFilenames.MARKET_INFO}.{fileExtension}", tableFields=MarketInfo().get_column_names()
     )
-    marketDefinitionHandler = CSVOutputHandler(
-        fileName=f"{outputPath}/{OutputFilenames.MARKET_DEFINITIONS}.csv", tableFields=MarketDefinitions().get_column_names()
+    marketDefinitionHandler = outputHandler(
+        fileName=f"{outputPath}/{OutputFilenames.MARKET_DEFINITIONS}.{fileExtension}",
+        tableFields=MarketDefinitions().get_column_names(),
     )
-    runnerStatusHandler = CSVOutputHandler(
-        fileName=f"{outputPath}/{OutputFilenames.RUNNER_STATUS_UPDATES}.csv",
+    runnerStatusHandler = outputHandler(
+        fileName=f"{outputPath}/{OutputFilenames.RUNNER_STATUS_UPDATES}.{fileExtension}",
         tableFields=RunnerStatusUpdates().get_column_names(),
     )
-    lastPriceHandler = CSVOutputHandler(
-        fileName=f"{outputPath}/{OutputFilenames.LAST_TRADED_PRICE}.csv", tableFields=LastTradedPrice().get_column_names()
+    lastPriceHandler = outputHandler(
+        fileName=f"{outputPath}/{OutputFilenames.LAST_TRADED_PRICE}.{fileExtension}",
+        tableFields=LastTradedPrice().get_column_names(),
     )
-    fileProcessor = BZ2Processor(
-        bz2FilePaths=filepathBatch,
+    return BZ2Processor(
+        bz2FilePaths=[],
         marketInfoHandler=marketInfoHandler,
         marketDefinitionHandler=marketDefinitionHandler,
         runnerStatusUpdateHandler=runnerStatusHandler,
         lastTradedPriceHandler=lastPriceHandler,
         countryCodeFilter=validCountryCodes,
+        jsonDecoder=get_json_decoder(name=jsonDecoderName),
+        idEncoder=idEncoder,
     )
-    fileProcessor.process_files(outputDirectory=outputPath)
 
 
 def process_all_bz2_files(
@@ -49,17 +78,54 @@ def process_all_bz2_files(
     outputDirectory: Union[str, Path],
     validCountryCodes: List[str],
     numThreads: Optional[int] = None,
+    maxInFlight: Optional[int] = None,
+    jsonDecoderName: Optional[str] = None,
+    marketTypes: Optional[List[str]] = None,
+    indexPath: Optional[Union[str, Path]] = None,
+    filesPerChunk: Optional[int] = 1000,
+    outputFormat: str = CSVOutputHandler.fileExtension,
+    compression: Optional[str] = None,
+    fuseIdEncoding: bool = False,
 ) -> None:
-    for yearDir in tqdm(list(Path(inputDirectory).glob("*")), position=0, desc="looping through years"):
-        for monthDir in tqdm(list(yearDir.glob("*")), position=1, desc="looping through months"):
-            outputPath = get_path(outputDirectory, yearDir.parts[-1], monthDir.parts[-1])
-            marketFilepaths = Path(monthDir).glob("**/*.bz2")
-            marketFilepaths = [file for file in marketFilepaths if re.search("^\d\.\d.*\.bz2", file.parts[-1]) is not None]
-            filepathBatches = get_data_batches(data=marketFilepaths, numBatches=numThreads)
-            run_multiprocessing(
-                functionToProcess=process_bz2_file,
-                parameterList=[(paths, validCountryCodes, outputPath, i) for i, paths in enumerate(filepathBatches)],
-            )
+    Path(outputDirectory).mkdir(parents=True, exist_ok=True)
+    marketFileIndex = MarketFileIndex(indexPath=indexPath or f"{outputDirectory}/{OutputFilenames.MARKET_FILE_INDEX}.sqlite")
+    ingestionManifest = IngestionManifest(outputDirectory=outputDirectory)
+    manager, idEncoder, chunkCompletionCallback = None, None, None
+    schedulerOutputDirectory = outputDirectory
+    if fuseIdEncoding:
+        if outputFormat == CSVOutputHandler.fileExtension and compression is not None:
+            raise ValueError("Compressed CSVs can't be loaded by the database build, so can't be written as final outputs")
+        # chunks are written with their final ids, straight to where the database build reads them from
+        manager = Manager()
+        idEncoder = SharedIdEncoder.from_final_mappings(manager=manager, outputDirectory=outputDirectory)
+        chunkCompletionCallback = partial(idEncoder.save_final_mappings, outputDirectory=outputDirectory)
+        schedulerOutputDirectory = get_path(outputDirectory, "remapped_files")
+    scheduler = BZ2IngestionScheduler(
+        inputDirectory=inputDirectory,
+        outputDirectory=schedulerOutputDirectory,
+        processorFactory=partial(
+            get_bz2_processor,
+            validCountryCodes=validCountryCodes,
+            jsonDecoderName=jsonDecoderName,
+            outputFormat=outputFormat,
+            compression=compression,
+            idEncoder=idEncoder,
+        ),
+        numWorkers=numThreads,
+        maxInFlight=maxInFlight,
+        marketFileIndex=marketFileIndex,
+        countryCodeFilter=validCountryCodes,
+        marketTypeFilter=marketTypes,
+        ingestionManifest=ingestionManifest,
+        filesPerChunk=filesPerChunk,
+        chunkCompletionCallback=chunkCompletionCallback,
+    )
+    scheduler.run()
+    if idEncoder is not None:
+        idEncoder.save_final_mappings(outputDirectory=outputDirectory)
+        manager.shutdown()
+    marketFileIndex.close()
+    ingestionManifest.close()
 
 
 if __name__ == "__main__":
@@ -1,100 +1,181 @@
 import numpy as np
 from pathlib import Path
-import pickle
-from typing import Dict, List, Tuple, Union
+from shutil import rmtree
+from typing import Dict, List, Optional, Tuple, Union
 
 import fire
 from tqdm.auto import tqdm
 
+from historical_odds_processing.store.db_creation.column_remapper import ColumnRemapper
 from historical_odds_processing.store.db_creation.csv_remapper import CSVRemapper
+from historical_odds_processing.store.db_creation.id_mapping import IdMapping
+from historical_odds_processing.store.db_creation.ingestion_manifest import IngestionManifest
+from historical_odds_processing.store.db_creation.ingestion_manifest import get_manifest_path
+from historical_odds_processing.store.db_creation.ingestion_manifest import get_mapping_fingerprint
 from historical_odds_processing.store.db_creation.output_filenames import OutputFilenames
+from historical_odds_processing.store.db_creation.parquet_remapper import ParquetRemapper
 from utils.batching import get_data_batches, run_multiprocessing
 from utils.paths import get_path
 
 
-def remap_csv(args: Tuple[List[Union[Path, str]], Dict[str, str], str, int, Union[str, Path]]) -> None:
-    filesToRemap, mappingDict, fileType, chunkSize, outputDirectory = args
+def remap_csv(args: Tuple[List[Union[Path, str]], Dict[str, str], str, int, Union[str, Path], bool]) -> None:
+    filesToRemap, mappingDict, fileType, chunkSize, outputDirectory, useArrow = args
+    # lookups are built once per batch of files rather than once per file
     loadedMaps = {
-        mappingName: pickle.load(open(mappingFileLocation, "rb")) for mappingName, mappingFileLocation in mappingDict.items()
+        mappingName: ColumnRemapper(mapping=IdMapping.load(filePath=mappingFileLocation).to_dict())
+        for mappingName, mappingFileLocation in mappingDict.items()
     }
-    for csvFile in tqdm(filesToRemap, desc=f"remapping {fileType}"):
-        csvRemapper = CSVRemapper(
-            csvToRemap=str(csvFile),
-            remappingDict=loadedMaps,
-            outputDirectory=get_path(outputDirectory, "remapped_files"),
-            chunkSize=chunkSize,
-        )
-        csvRemapper.process_csv()
-
-
-def remap_market_info(numThreads: int, chunkSize: int, outputDirectory: Union[str, Path]) -> None:
+    for fileToRemap in tqdm(filesToRemap, desc=f"remapping {fileType}"):
+        if Path(fileToRemap).suffix == ".parquet":
+            parquetRemapper = ParquetRemapper(
+                parquetToRemap=str(fileToRemap),
+                remappingDict=loadedMaps,
+                outputDirectory=get_path(outputDirectory, "remapped_files"),
+                chunkSize=chunkSize,
+            )
+            parquetRemapper.process_parquet()
+        else:
+            csvRemapper = CSVRemapper(
+                csvToRemap=str(fileToRemap),
+                remappingDict=loadedMaps,
+                outputDirectory=get_path(outputDirectory, "remapped_files"),
+                chunkSize=chunkSize,
+                useArrow=useArrow,
+            )
+            csvRemapper.process_csv()
+
+
+def get_files_to_remap(
+    outputDirectory: Union[str, Path], fileType: str, chunkPaths: Optional[List[str]] = None
+) -> List[Union[Path, str]]:
+    # chunks can be written by any of the output handlers, so match on the file stem only
+    if chunkPaths is None:
+        return list(Path(outputDirectory).glob(f"**/{fileType}.*"))
+    return [filePath for chunkPath in chunkPaths for filePath in Path(chunkPath).glob(f"{fileType}.*")]
+
+
+def remap_market_info(
+    numThreads: int,
+    chunkSize: int,
+    outputDirectory: Union[str, Path],
+    chunkPaths: Optional[List[str]] = None,
+    useArrow: bool = False,
+) -> None:
     mappingDict = {
         "betting_type": f"{outputDirectory}/{OutputFilenames.BETTING_TYPES}_final_mapping.pkl",
         "market_type": f"{outputDirectory}/{OutputFilenames.MARKET_TYPES}_final_mapping.pkl",
         "country_code": f"{outputDirectory}/{OutputFilenames.COUNTRY_CODES}_final_mapping.pkl",
         "timezone": f"{outputDirectory}/{OutputFilenames.TIMEZONES}_final_mapping.pkl",
     }
-    allFiles = list(Path(outputDirectory).glob(f"**/{OutputFilenames.MARKET_INFO}.csv"))
+    allFiles = get_files_to_remap(outputDirectory=outputDirectory, fileType=OutputFilenames.MARKET_INFO, chunkPaths=chunkPaths)
     fileBatches = get_data_batches(data=allFiles, numBatches=np.ceil(len(allFiles) / numThreads))
     run_multiprocessing(
         functionToProcess=remap_csv,
         parameterList=[
-            (fileBatch, mappingDict, OutputFilenames.MARKET_INFO, chunkSize, outputDirectory) for fileBatch in fileBatches
+            (fileBatch, mappingDict, OutputFilenames.MARKET_INFO, chunkSize, outputDirectory, useArrow)
+            for fileBatch in fileBatches
         ],
         threads=numThreads,
     )
 
 
-def remap_market_definitions(numThreads: int, chunkSize: int, outputDirectory: Union[str, Path]) -> None:
+def remap_market_definitions(
+    numThreads: int,
+    chunkSize: int,
+    outputDirectory: Union[str, Path],
+    chunkPaths: Optional[List[str]] = None,
+    useArrow: bool = False,
+) -> None:
     mappingDict = {"market_status": f"{outputDirectory}/{OutputFilenames.MARKET_STATUS}_final_mapping.pkl"}
-    allFiles = list(Path(outputDirectory).glob(f"**/{OutputFilenames.MARKET_DEFINITIONS}.csv"))
+    allFiles = get_files_to_remap(
+        outputDirectory=outputDirectory, fileType=OutputFilenames.MARKET_DEFINITIONS, chunkPaths=chunkPaths
+    )
     fileBatches = get_data_batches(data=allFiles, numBatches=np.ceil(len(allFiles) / numThreads))
     run_multiprocessing(
         functionToProcess=remap_csv,
         parameterList=[
-            (fileBatch, mappingDict, OutputFilenames.MARKET_DEFINITIONS, chunkSize, outputDirectory)
+            (fileBatch, mappingDict, OutputFilenames.MARKET_DEFINITIONS, chunkSize, outputDirectory, useArrow)
             for fileBatch in fileBatches
         ],
         threads=numThreads,
     )
 
 
-def remap_runner_status_updates(numThreads: int, chunkSize: int, outputDirectory: Union[str, Path]) -> None:
+def remap_runner_status_updates(
+    numThreads: int,
+    chunkSize: int,
+    outputDirectory: Union[str, Path],
+    chunkPaths: Optional[List[str]] = None,
+    useArrow: bool = False,
+) -> None:
     mappingDict = {
         "status_id": f"{outputDirectory}/{OutputFilenames.RUNNER_STATUS}_final_mapping.pkl",
         "betfair_runner_table_id": f"{outputDirectory}/{OutputFilenames.RUNNERS}_final_mapping.pkl",
     }
-    allFiles = list(Path(outputDirectory).glob(f"**/{OutputFilenames.RUNNER_STATUS_UPDATES}.csv"))
+    allFiles = get_files_to_remap(
+        outputDirectory=outputDirectory, fileType=OutputFilenames.RUNNER_STATUS_UPDATES, chunkPaths=chunkPaths
+    )
     fileBatches = get_data_batches(data=allFiles, numBatches=np.ceil(len(allFiles) / numThreads))
     run_multiprocessing(
         functionToProcess=remap_csv,
         parameterList=[
-            (fileBatch, mappingDict, OutputFilenames.RUNNER_STATUS_UPDATES, chunkSize, outputDirectory)
+            (fileBatch, mappingDict, OutputFilenames.RUNNER_STATUS_UPDATES, chunkSize, outputDirectory, useArrow)
             for fileBatch in fileBatches
         ],
         threads=numThreads,
     )
 
 
-def remap_last_traded_price(numThreads: int, chunkSize: int, outputDirectory: Union[str, Path]) -> None:
+def remap_last_traded_price(
+    numThreads: int,
+    chunkSize: int,
+    outputDirectory: Union[str, Path],
+    chunkPaths: Optional[List[str]] = None,
+    useArrow: bool = False,
+) -> None:
     mappingDict = {"betfair_runner_table_id": f"{outputDirectory}/{OutputFilenames.RUNNERS}_final_mapping.pkl"}
-    allFiles = list(Path(outputDirectory).glob(f"**/{OutputFilenames.LAST_TRADED_PRICE}.csv"))
+    allFiles = get_files_to_remap(
+        outputDirectory=outputDirectory, fileType=OutputFilenames.LAST_TRADED_PRICE, chunkPaths=chunkPaths
+    )
     fileBatches = get_data_batches(data=allFiles, numBatches=np.ceil(len(allFiles) / numThreads))
     run_multiprocessing(
         functionToProcess=remap_csv,
         parameterList=[
-            (fileBatch, mappingDict, OutputFilenames.LAST_TRADED_PRICE, chunkSize, outputDirectory)
+            (fileBatch, mappingDict, OutputFilenames.LAST_TRADED_PRICE, chunkSize, outputDirectory, useArrow)
             for fileBatch in fileBatches
         ],
         threads=numThreads,
     )
 
 
-def remap_all_id_features(numThreads: int, outputDirectory: Union[str, Path], chunkSize: int = 250000) -> None:
-    remap_market_info(numThreads=numThreads, chunkSize=chunkSize, outputDirectory=outputDirectory)
-    remap_market_definitions(numThreads=numThreads, chunkSize=chunkSize, outputDirectory=outputDirectory)
-    remap_runner_status_updates(numThreads=numThreads, chunkSize=chunkSize, outputDirectory=outputDirectory)
-    remap_last_traded_price(numThreads=numThreads, chunkSize=chunkSize, outputDirectory=outputDirectory)
+def remap_all_id_features(
+    numThreads: int, outputDirectory: Union[str, Path], chunkSize: int = 250000, useArrow: bool = False
+) -> None:
+    ingestionManifest, chunkPaths, mappingFingerprint = None, None, None
+    if Path(get_manifest_path(outputDirectory=outputDirectory)).exists():
+        # ids are stable across merges, so only chunks that haven't been remapped yet need rewriting
+        ingestionManifest = IngestionManifest(outputDirectory=outputDirectory)
+        mappingFingerprint = get_mapping_fingerprint(outputDirectory=outputDirectory)
+        chunkPaths = ingestionManifest.get_chunk_paths_to_remap()
+        for chunkPath in chunkPaths:
+            rmtree(ingestionManifest.get_remapped_chunk_path(chunkPath=chunkPath), ignore_errors=True)
+
+    remap_market_info(
+        numThreads=numThreads, chunkSize=chunkSize, outputDirectory=outputDirectory, chunkPaths=chunkPaths, useArrow=useArrow
+    )
+    remap_market_definitions(
+        numThreads=numThreads, chunkSize=chunkSize, outputDirectory=outputDirectory, chunkPaths=chunkPaths, useArrow=useArrow
+    )
+    remap_runner_status_updates(
+        numThreads=numThreads, chunkSize=chunkSize, outputDirectory=outputDirectory, chunkPaths=chunkPaths, useArrow=useArrow
+    )
+    remap_last_traded_price(
+        numThreads=numThreads, chunkSize=chunkSize, outputDirectory=outputDirectory, chunkPaths=chunkPaths, useArrow=useArrow
+    )
+
+    if ingestionManifest is not None:
+        ingestionManifest.set_mapping_fingerprint(chunkPaths=chunkPaths, mappingFingerprint=mappingFingerprint)
+        ingestionManifest.close()
 
 
 if __name__ == "__main__":
@@ -3,7 +3,7 @@ import sys
 sys.path.append("../../")
 import os
 from pathlib import Path
-from typing import Union
+from typing import Optional, Union
 
 import fire
 
@@ -20,7 +20,14 @@ from historical_odds_processing.scripts.file_processing_steps.remap_all_id_featu
 from multiprocessing import cpu_count
 
 
-def main(inputDirectory: Union[str, Path], maxNumThreads: int = None) -> None:
+def main(
+    inputDirectory: Union[str, Path],
+    maxNumThreads: int = None,
+    jsonDecoderName: Optional[str] = None,
+    outputFormat: str = "csv",
+    fuseIdEncoding: bool = False,
+    useArrowRemap: bool = False,
+) -> None:
     outputDirectory = os.environ["POSTGRES_HISTORICAL_ODDS_DIR"]
     numThreads = maxNumThreads or cpu_count()
     process_all_bz2_files(
@@ -28,9 +35,13 @@ def main(inputDirectory: Union[str, Path], maxNumThreads: int = None) -> None:
         outputDirectory=outputDirectory,
         validCountryCodes=COUNTRY_CODES_OF_INTEREST,
         numThreads=numThreads,
+        jsonDecoderName=jsonDecoderName,
+        outputFormat=outputFormat,
+        fuseIdEncoding=fuseIdEncoding,
     )
-    merge_all_mappings(outputDirectory=outputDirectory)
-    remap_all_id_features(numThreads=numThreads, outputDirectory=outputDirectory, chunkSize=250000)
+    if not fuseIdEncoding:
+        merge_all_mappings(outputDirectory=outputDirectory)
+        remap_all_id_features(numThreads=numThreads, outputDirectory=outputDirectory, chunkSize=250000, useArrow=useArrowRemap)
 
 
 if __name__ == "__main__":
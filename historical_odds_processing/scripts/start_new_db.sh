@@ -12,7 +12,6 @@ python process_betfair_files.py --inputDirectory="$BETFAIR_FILE_INPUT_DIRECTORY"
 sudo docker run -d \
     --publish=5432:5432 \
     --name betfair_odds_data \
-    --volume="$POSTGRES_HISTORICAL_ODDS_DIR":"$POSTGRES_HISTORICAL_ODDS_DIR" \
     --volume="$POSTGRES_BACKUP_DIRECTORY":"$POSTGRES_BACKUP_DIRECTORY" \
     --env POSTGRES_USER="$POSTGRES_USERNAME" \
     --env POSTGRES_PASSWORD="$POSTGRES_PASSWORD" \
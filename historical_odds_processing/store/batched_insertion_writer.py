@@ -0,0 +1,267 @@
+from collections import deque
+import csv
+import io
+import logging
+import threading
+from time import monotonic, perf_counter
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from historical_odds_processing.datamodel.data_store_schema.historical_trading_schema import LastTradedPrice
+from historical_odds_processing.datamodel.data_store_schema.historical_trading_schema import MarketDefinitions
+from historical_odds_processing.datamodel.data_store_schema.historical_trading_schema import RunnerStatusUpdates
+from historical_odds_processing.store.postgres_insertion_engine import get_market_definition_values
+from historical_odds_processing.store.postgres_insertion_engine import PostgresInsertionEngine
+
+FLUSH_METHODS = ("copy", "insert")
+
+
+class BatchedWriteStats:
+    def __init__(self, maxLatencySamples: int = 1000):
+        self.numFlushes = 0
+        self.numRowsWritten = 0
+        self.numBackpressureWaits = 0
+        self.backpressureSeconds = 0.0
+        self.flushLatencies = deque(maxlen=maxLatencySamples)
+
+    def get_flush_latency_percentile(self, percentile: float) -> float:
+        return float(np.percentile(self.flushLatencies, percentile)) if len(self.flushLatencies) > 0 else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.numFlushes} flushes, {self.numRowsWritten:,} rows, flush latency "
+            f"p50 {self.get_flush_latency_percentile(percentile=50) * 1000:.1f}ms "
+            f"p95 {self.get_flush_latency_percentile(percentile=95) * 1000:.1f}ms "
+            f"max {max(self.flushLatencies, default=0.0) * 1000:.1f}ms, "
+            f"{self.numBackpressureWaits} backpressure waits ({self.backpressureSeconds:.1f}s)"
+        )
+
+
+class TableBuffer:
+    def __init__(self, tableName: str, columnNames: List[str]):
+        self.tableName = tableName
+        self.columnNames = columnNames
+        self.rows = []
+        self.oldestRowTime = None
+
+    def append(self, row: Sequence[Any]) -> None:
+        if len(self.rows) == 0:
+            self.oldestRowTime = monotonic()
+        self.rows.append(row)
+
+    def take_rows(self) -> List[Sequence[Any]]:
+        rows, self.rows, self.oldestRowTime = self.rows, [], None
+        return rows
+
+
+def get_storable_value(value: Any) -> Any:
+    # lists are stored as their text like the CSV output, and None becomes an empty CSV field, which COPY reads as NULL
+    if isinstance(value, (list, dict)):
+        return str(value)
+    return value
+
+
+class BatchedInsertionWriter:
+    def __init__(
+        self,
+        insertionEngine: PostgresInsertionEngine,
+        maxBatchSize: int = 10000,
+        maxBatchAgeSeconds: float = 1.0,
+        maxPendingRows: int = 100000,
+        flushMethod: str = "copy",
+    ):
+        if flushMethod not in FLUSH_METHODS:
+            raise ValueError(f"flushMethod must be one of {FLUSH_METHODS}, got {flushMethod}")
+        # the engine is only used from the flusher thread, so callers shouldn't share it while the writer is open
+        self.insertionEngine = insertionEngine
+        self.maxBatchSize = maxBatchSize
+        self.maxBatchAgeSeconds = maxBatchAgeSeconds
+        self.maxPendingRows = maxPendingRows
+        self.flushMethod = flushMethod
+        self.stats = BatchedWriteStats()
+        self.tables = {table.tableName: table for table in [LastTradedPrice(), RunnerStatusUpdates(), MarketDefinitions()]}
+        self.buffers = {
+            table.tableName: TableBuffer(tableName=table.tableName, columnNames=table.get_column_names())
+            for table in self.tables.values()
+        }
+        self.numPendingRows = 0
+        self.numFlushRequests = 0
+        self.numCompletedFlushRequests = 0
+        self.isClosed = False
+        self.flushError = None
+        self.condition = threading.Condition()
+        self.flusherThread = threading.Thread(target=self._run_flusher, name="batched_insertion_writer", daemon=True)
+        self.flusherThread.start()
+
+    def __enter__(self) -> "BatchedInsertionWriter":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def add_last_traded_price(
+        self, unixTimestamp: int, betfairMarketId: str, betfairRunnerTableId: int, price: float, eventId: Optional[int] = None
+    ) -> None:
+        self._add_row(
+            tableName=LastTradedPrice().tableName,
+            columnValues={
+                "unix_timestamp": unixTimestamp,
+                "betfair_market_id": betfairMarketId,
+                "event_id": eventId,
+                "betfair_runner_table_id": betfairRunnerTableId,
+                "price": price,
+            },
+        )
+
+    def add_runner_status_update(
+        self, unixTimestamp: int, statusId: int, betfairMarketId: str, betfairRunnerTableId: int, eventId: Optional[int] = None
+    ) -> None:
+        self._add_row(
+            tableName=RunnerStatusUpdates().tableName,
+            columnValues={
+                "unix_timestamp": unixTimestamp,
+                "status_id": statusId,
+                "betfair_runner_table_id": betfairRunnerTableId,
+                "betfair_market_id": betfairMarketId,
+                "event_id": eventId,
+            },
+        )
+
+    def add_market_definition(
+        self, betfairMarketId: str, eventId: int, unixTimestamp: int, marketStatusId: int, marketDefinition: Dict[str, Any]
+    ) -> None:
+        self._add_row(
+            tableName=MarketDefinitions().tableName,
+            columnValues=get_market_definition_values(
+                betfairMarketId=betfairMarketId,
+                eventId=eventId,
+                unixTimestamp=unixTimestamp,
+                marketStatusId=marketStatusId,
+                marketDefinition=marketDefinition,
+            ),
+        )
+
+    def flush(self) -> None:
+        # blocks until every row added before the call has been written
+        with self.condition:
+            self._raise_flush_error()
+            if self.isClosed:
+                return
+            self.numFlushRequests += 1
+            flushRequest = self.numFlushRequests
+            self.condition.notify_all()
+            self.condition.wait_for(lambda: self.numCompletedFlushRequests >= flushRequest or self.flushError is not None)
+            self._raise_flush_error()
+
+    def close(self) -> None:
+        with self.condition:
+            if self.isClosed:
+                return
+            self.isClosed = True
+            self.condition.notify_all()
+        self.flusherThread.join()
+        logging.info(f"batched insertion writer: {self.stats}")
+        self._raise_flush_error()
+
+    def _raise_flush_error(self) -> None:
+        if self.flushError is not None:
+            raise RuntimeError("a background flush failed, so buffered rows may not have been written") from self.flushError
+
+    def _add_row(self, tableName: str, columnValues: Dict[str, Any]) -> None:
+        buffer = self.buffers[tableName]
+        row = tuple(get_storable_value(value=columnValues[columnName]) for columnName in buffer.columnNames)
+        with self.condition:
+            self._raise_flush_error()
+            if self.isClosed:
+                raise RuntimeError("rows can't be added to a closed writer")
+            if self.numPendingRows >= self.maxPendingRows:
+                # producers wait for the flusher rather than buffering without limit when the database falls behind
+                self.stats.numBackpressureWaits += 1
+                self.condition.notify_all()
+                waitStartTime = perf_counter()
+                self.condition.wait_for(lambda: self.numPendingRows < self.maxPendingRows or self.flushError is not None)
+                self.stats.backpressureSeconds += perf_counter() - waitStartTime
+                self._raise_flush_error()
+            buffer.append(row=row)
+            self.numPendingRows += 1
+            if len(buffer.rows) >= self.maxBatchSize:
+                self.condition.notify_all()
+
+    def _get_due_buffers(self, flushAll: bool) -> List[TableBuffer]:
+        currentTime = monotonic()
+        flushAll = flushAll or self.numPendingRows >= self.maxPendingRows
+        return [
+            buffer
+            for buffer in self.buffers.values()
+            if len(buffer.rows) > 0
+            and (
+                flushAll
+                or len(buffer.rows) >= self.maxBatchSize
+                or currentTime - buffer.oldestRowTime >= self.maxBatchAgeSeconds
+            )
+        ]
+
+    def _get_seconds_until_due(self) -> float:
+        oldestRowTimes = [buffer.oldestRowTime for buffer in self.buffers.values() if buffer.oldestRowTime is not None]
+        if len(oldestRowTimes) == 0:
+            return self.maxBatchAgeSeconds
+        return max(0.0, min(oldestRowTimes) + self.maxBatchAgeSeconds - monotonic())
+
+    def _run_flusher(self) -> None:
+        while True:
+            with self.condition:
+                self.condition.wait_for(
+                    lambda: self.isClosed
+                    or self.numFlushRequests > self.numCompletedFlushRequests
+                    or len(self._get_due_buffers(flushAll=False)) > 0,
+                    timeout=self._get_seconds_until_due(),
+                )
+                flushRequest = self.numFlushRequests
+                flushAll = self.isClosed or flushRequest > self.numCompletedFlushRequests
+                dueBatches = [
+                    (buffer.tableName, buffer.columnNames, buffer.take_rows())
+                    for buffer in self._get_due_buffers(flushAll=flushAll)
+                ]
+                isClosing = self.isClosed
+            try:
+                # writes happen outside the lock, so producers keep filling the buffers while a batch is in flight
+                for tableName, columnNames, rows in dueBatches:
+                    self._write_batch(tableName=tableName, columnNames=columnNames, rows=rows)
+            except Exception as ex:
+                logging.exception(f"error flushing batched rows: {ex}")
+                with self.condition:
+                    self.flushError = ex
+                    self.condition.notify_all()
+                return
+            with self.condition:
+                if flushAll:
+                    self.numCompletedFlushRequests = flushRequest
+                self.condition.notify_all()
+            if isClosing:
+                return
+
+    def _write_batch(self, tableName: str, columnNames: List[str], rows: List[Sequence[Any]]) -> None:
+        startTime = perf_counter()
+        partitioning = self.tables[tableName].partitioning
+        if partitioning is not None:
+            partitionValues = [row[columnNames.index(partitioning.columnName)] for row in rows]
+            self.insertionEngine.create_partitions(
+                table=self.tables[tableName], minValue=min(partitionValues), maxValue=max(partitionValues)
+            )
+        if self.flushMethod == "copy":
+            stream = io.StringIO()
+            csvWriter = csv.writer(stream)
+            csvWriter.writerow(columnNames)
+            csvWriter.writerows(rows)
+            stream.seek(0)
+            self.insertionEngine.copy_from_stream(tableName=tableName, columnNames=columnNames, stream=stream)
+        else:
+            self.insertionEngine.insert_rows(tableName=tableName, columnNames=columnNames, rows=rows)
+        flushLatency = perf_counter() - startTime
+        with self.condition:
+            self.numPendingRows -= len(rows)
+            self.stats.numFlushes += 1
+            self.stats.numRowsWritten += len(rows)
+            self.stats.flushLatencies.append(flushLatency)
+            self.condition.notify_all()
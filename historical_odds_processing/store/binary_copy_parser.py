@@ -0,0 +1,60 @@
+import struct
+from typing import Any, Dict, List
+
+import numpy as np
+
+BINARY_COPY_SIGNATURE = b"PGCOPY\n\xff\r\n\x00"
+# signature, flags field and header extension length
+BINARY_COPY_HEADER_LENGTH = len(BINARY_COPY_SIGNATURE) + 8
+BINARY_COPY_TRAILER_LENGTH = 2
+NULL_FIELD_LENGTH = -1
+
+
+def get_binary_row_dtype(columnDtypes: Dict[str, Any]) -> np.dtype:
+    # a row is its field count followed by a length and a big endian value for each field
+    fields = [("num_fields", ">i2")]
+    for columnName, dtype in columnDtypes.items():
+        fields.extend([(f"{columnName}_length", ">i4"), (columnName, np.dtype(dtype).newbyteorder(">"))])
+    return np.dtype(fields)
+
+
+def parse_binary_copy(data: bytes, columnDtypes: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    # columns must be fixed width types, cast in the query to match the dtypes, e.g. BIGINT for int64 and FLOAT8 for float64
+    if data[: len(BINARY_COPY_SIGNATURE)] != BINARY_COPY_SIGNATURE:
+        raise ValueError("Data is not in postgres binary COPY format")
+    (extensionLength,) = struct.unpack_from(">i", data, len(BINARY_COPY_SIGNATURE) + 4)
+    rowData = memoryview(data)[BINARY_COPY_HEADER_LENGTH + extensionLength : len(data) - BINARY_COPY_TRAILER_LENGTH]
+    rowDtype = get_binary_row_dtype(columnDtypes=columnDtypes)
+    if len(rowData) % rowDtype.itemsize == 0:
+        rows = np.frombuffer(rowData, dtype=rowDtype)
+        # every row having the expected field count and lengths means the fixed layout lines up with all of them
+        if (rows["num_fields"] == len(columnDtypes)).all() and all(
+            (rows[f"{columnName}_length"] == np.dtype(dtype).itemsize).all() for columnName, dtype in columnDtypes.items()
+        ):
+            return {columnName: rows[columnName].astype(dtype) for columnName, dtype in columnDtypes.items()}
+    return _parse_binary_copy_rows(rowData=rowData, columnDtypes=columnDtypes)
+
+
+def _parse_binary_copy_rows(rowData: memoryview, columnDtypes: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    # rows with NULLs don't fit the fixed layout, so they're read field by field
+    columnValues: Dict[str, List[Any]] = {columnName: [] for columnName in columnDtypes}
+    offset = 0
+    while offset < len(rowData):
+        (numFields,) = struct.unpack_from(">h", rowData, offset)
+        if numFields != len(columnDtypes):
+            raise ValueError(f"Expected {len(columnDtypes)} fields per row, got {numFields}")
+        offset += 2
+        for columnName, dtype in columnDtypes.items():
+            dtype = np.dtype(dtype)
+            (fieldLength,) = struct.unpack_from(">i", rowData, offset)
+            offset += 4
+            if fieldLength == NULL_FIELD_LENGTH:
+                if dtype.kind != "f":
+                    raise ValueError(f"NULL found in {columnName}, which can only be read as a float column")
+                columnValues[columnName].append(np.nan)
+                continue
+            if fieldLength != dtype.itemsize:
+                raise ValueError(f"Expected {dtype.itemsize} byte values in {columnName}, got {fieldLength}")
+            columnValues[columnName].append(np.frombuffer(rowData, dtype=dtype.newbyteorder(">"), count=1, offset=offset)[0])
+            offset += fieldLength
+    return {columnName: np.asarray(values, dtype=columnDtypes[columnName]) for columnName, values in columnValues.items()}
@@ -0,0 +1,32 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+TimestampRange = Tuple[int, int]
+
+
+class BaseOutputHandler(ABC):
+
+    fileExtension = None
+
+    def __init__(self, fileName: str, tableFields: Sequence[str]):
+        self.fileName = fileName
+        self.tableFields = tableFields
+        # the smallest and largest unix_timestamp written, which the database build creates partitions from
+        self.timestampRange: Optional[TimestampRange] = None
+
+    def _update_timestamp_range(self, data: Dict[Any, Any]) -> None:
+        unixTimestamp = data.get("unix_timestamp")
+        if unixTimestamp is None:
+            return
+        if self.timestampRange is None:
+            self.timestampRange = (unixTimestamp, unixTimestamp)
+        elif not self.timestampRange[0] <= unixTimestamp <= self.timestampRange[1]:
+            self.timestampRange = (min(self.timestampRange[0], unixTimestamp), max(self.timestampRange[1], unixTimestamp))
+
+    @abstractmethod
+    def add(self, data: Dict[Any, Any]) -> None:
+        pass
+
+    @abstractmethod
+    def close(self) -> None:
+        pass
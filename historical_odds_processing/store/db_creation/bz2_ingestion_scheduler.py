@@ -0,0 +1,192 @@
+import re
+from multiprocessing import cpu_count
+from multiprocessing import Process
+from multiprocessing import Queue
+from pathlib import Path
+from queue import Full
+from threading import Thread
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+from uuid import uuid4
+
+from tqdm.auto import tqdm
+
+from historical_odds_processing.store.db_creation.bz2_processor import BZ2Processor
+from historical_odds_processing.store.db_creation.ingestion_manifest import ChunkFileRecord
+from historical_odds_processing.store.db_creation.ingestion_manifest import IngestionManifest
+from historical_odds_processing.store.db_creation.ingestion_manifest import get_chunk_file_record
+from historical_odds_processing.store.db_creation.market_file_index import MarketFileIndex
+from utils.paths import get_path
+
+MARKET_FILENAME_PATTERN = re.compile(r"^\d\.\d.*\.bz2")
+# how long scheduling waits on a full task queue before checking that workers are still alive to empty it
+TASK_PUT_TIMEOUT_SECONDS = 1.0
+
+
+def run_ingestion_worker(
+    workerId: int,
+    taskQueue: Queue,
+    processorFactory: Callable[[Union[str, Path]], BZ2Processor],
+    resultQueue: Optional[Queue] = None,
+    runId: str = "",
+    filesPerChunk: Optional[int] = None,
+) -> None:
+    # each worker keeps one processor (and so one output chunk) per month directory, rotating it every filesPerChunk files
+    processors: Dict[str, Tuple[BZ2Processor, str, List[ChunkFileRecord]]] = {}
+    chunkCounts: Dict[str, int] = {}
+
+    def complete_chunk(outputPath: str) -> None:
+        processor, chunkPath, fileRecords = processors.pop(outputPath)
+        processor.save_outputs(outputDirectory=chunkPath)
+        processor.close()
+        if resultQueue is not None:
+            resultQueue.put((chunkPath, fileRecords, processor.get_timestamp_range()))
+
+    while True:
+        task = taskQueue.get()
+        if task is None:
+            break
+        filePath, outputPath = task
+        if outputPath not in processors:
+            chunkIndex = chunkCounts.get(outputPath, 0)
+            chunkCounts[outputPath] = chunkIndex + 1
+            chunkPath = str(Path(outputPath, f"{runId}{workerId}_{chunkIndex}"))
+            if resultQueue is not None:
+                resultQueue.put((chunkPath, None, None))
+            processors[outputPath] = (processorFactory(get_path(chunkPath)), chunkPath, [])
+        processor, _, fileRecords = processors[outputPath]
+        processor.process_file(filePath=filePath)
+        if resultQueue is not None:
+            fileRecords.append(get_chunk_file_record(filePath=filePath))
+        if filesPerChunk is not None and len(fileRecords) >= filesPerChunk:
+            complete_chunk(outputPath=outputPath)
+
+    for outputPath in list(processors):
+        complete_chunk(outputPath=outputPath)
+
+
+class BZ2IngestionScheduler:
+    def __init__(
+        self,
+        inputDirectory: Union[str, Path],
+        outputDirectory: Union[str, Path],
+        processorFactory: Callable[[Union[str, Path]], BZ2Processor],
+        numWorkers: Optional[int] = None,
+        maxInFlight: Optional[int] = None,
+        marketFileIndex: Optional[MarketFileIndex] = None,
+        countryCodeFilter: Optional[Sequence[str]] = None,
+        marketTypeFilter: Optional[Sequence[str]] = None,
+        ingestionManifest: Optional[IngestionManifest] = None,
+        filesPerChunk: Optional[int] = None,
+        chunkCompletionCallback: Optional[Callable[[], None]] = None,
+    ):
+        self.inputDirectory = inputDirectory
+        self.outputDirectory = outputDirectory
+        self.processorFactory = processorFactory
+        self.numWorkers = numWorkers or cpu_count()
+        self.maxInFlight = maxInFlight or 2 * self.numWorkers
+        self.marketFileIndex = marketFileIndex
+        self.countryCodeFilter = countryCodeFilter
+        self.marketTypeFilter = marketTypeFilter
+        self.ingestionManifest = ingestionManifest
+        self.filesPerChunk = filesPerChunk
+        self.chunkCompletionCallback = chunkCompletionCallback
+
+    def get_market_filepaths(self) -> List[Tuple[Path, str]]:
+        marketFilepaths = []
+        for yearDir in sorted(Path(self.inputDirectory).glob("*")):
+            for monthDir in sorted(yearDir.glob("*")):
+                outputPath = str(Path(self.outputDirectory, yearDir.parts[-1], monthDir.parts[-1]))
+                for filePath in monthDir.glob("**/*.bz2"):
+                    if MARKET_FILENAME_PATTERN.search(filePath.parts[-1]) is not None:
+                        marketFilepaths.append((filePath, outputPath))
+        if self.marketFileIndex is not None:
+            marketFilepaths = self._filter_with_index(marketFilepaths=marketFilepaths)
+        if self.ingestionManifest is not None:
+            marketFilepaths = self._filter_with_manifest(marketFilepaths=marketFilepaths)
+        # largest first, so the long in-play markets don't end up as stragglers at the end of the run
+        return sorted(marketFilepaths, key=lambda task: task[0].stat().st_size, reverse=True)
+
+    def _filter_with_index(self, marketFilepaths: List[Tuple[Path, str]]) -> List[Tuple[Path, str]]:
+        filePaths = [filePath for filePath, _ in marketFilepaths]
+        self.marketFileIndex.update(filePaths=filePaths, numWorkers=self.numWorkers)
+        validFilePaths = set(
+            self.marketFileIndex.filter_filepaths(
+                filePaths=filePaths, countryCodes=self.countryCodeFilter, marketTypes=self.marketTypeFilter
+            )
+        )
+        return [(filePath, outputPath) for filePath, outputPath in marketFilepaths if filePath in validFilePaths]
+
+    def _filter_with_manifest(self, marketFilepaths: List[Tuple[Path, str]]) -> List[Tuple[Path, str]]:
+        self.ingestionManifest.recover()
+        pendingFilePaths = set(
+            self.ingestionManifest.get_pending_filepaths(filePaths=[filePath for filePath, _ in marketFilepaths])
+        )
+        return [(filePath, outputPath) for filePath, outputPath in marketFilepaths if filePath in pendingFilePaths]
+
+    def _collect_results(self, resultQueue: Queue) -> None:
+        while True:
+            result = resultQueue.get()
+            if result is None:
+                break
+            chunkPath, fileRecords, timestampRange = result
+            if fileRecords is None:
+                self.ingestionManifest.start_chunk(chunkPath=chunkPath)
+            else:
+                # runs before the chunk is marked complete, e.g. to persist the ids the chunk was written with
+                if self.chunkCompletionCallback is not None:
+                    self.chunkCompletionCallback()
+                self.ingestionManifest.complete_chunk(
+                    chunkPath=chunkPath, fileRecords=fileRecords, timestampRange=timestampRange
+                )
+
+    @staticmethod
+    def _put_task(taskQueue: Queue, task: Optional[Tuple[str, str]], workers: List[Process]) -> None:
+        # the task queue is bounded, so if every worker has died nothing will ever make room in it
+        while True:
+            try:
+                taskQueue.put(task, timeout=TASK_PUT_TIMEOUT_SECONDS)
+                return
+            except Full:
+                if not any(worker.is_alive() for worker in workers):
+                    exitCodes = [worker.exitcode for worker in workers]
+                    raise RuntimeError(
+                        f"All ingestion workers exited, with exit codes {exitCodes}, before scheduling finished"
+                    )
+
+    def run(self) -> None:
+        marketFilepaths = self.get_market_filepaths()
+        taskQueue = Queue(maxsize=self.maxInFlight)
+        resultQueue = Queue() if self.ingestionManifest is not None else None
+        # chunks are named per run so a resumed run never appends to the chunks of an earlier one
+        runId = f"{uuid4().hex[:8]}_"
+        workers = [
+            Process(
+                target=run_ingestion_worker,
+                args=(workerId, taskQueue, self.processorFactory, resultQueue, runId, self.filesPerChunk),
+            )
+            for workerId in range(self.numWorkers)
+        ]
+        collector = Thread(target=self._collect_results, args=(resultQueue,)) if resultQueue is not None else None
+        if collector is not None:
+            collector.start()
+        for worker in workers:
+            worker.start()
+        try:
+            for filePath, outputPath in tqdm(marketFilepaths, desc="scheduling bz2 files"):
+                self._put_task(taskQueue=taskQueue, task=(str(filePath), outputPath), workers=workers)
+            for _ in workers:
+                self._put_task(taskQueue=taskQueue, task=None, workers=workers)
+        except RuntimeError:
+            # the tasks left in the queue will never be taken, so don't wait to flush them on exit
+            taskQueue.cancel_join_thread()
+            raise
+        finally:
+            for worker in workers:
+                worker.join()
+            if collector is not None:
+                resultQueue.put(None)
+                collector.join()
+
+        failedWorkers = [workerId for workerId, worker in enumerate(workers) if worker.exitcode != 0]
+        if len(failedWorkers) > 0:
+            raise RuntimeError(f"Ingestion workers {failedWorkers} exited with errors")
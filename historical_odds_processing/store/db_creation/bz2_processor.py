@@ -1,18 +1,21 @@
 import bz2
 import logging
-import json
 import pickle
 
 from datetime import datetime
 from pathlib import Path
 from tqdm.auto import tqdm
-from typing import Any, Dict, Sequence, Tuple, Union
+from typing import Any, Dict, Optional, Sequence, Tuple, Union
 
 from historical_odds_processing.datamodel.constants import BETFAIR_DATETIME_FORMAT
 from historical_odds_processing.datamodel.constants import BETFAIR_MARKET_DEFINITION_TAG
 from historical_odds_processing.datamodel.constants import BETFAIR_RUNNER_CHANGE_TAG
-from historical_odds_processing.store.db_creation.csv_output_handler import CSVOutputHandler
+from historical_odds_processing.store.db_creation.base_output_handler import BaseOutputHandler
+from historical_odds_processing.store.db_creation.base_output_handler import TimestampRange
+from historical_odds_processing.store.db_creation.json_decoders import BaseJsonDecoder
+from historical_odds_processing.store.db_creation.json_decoders import get_json_decoder
 from historical_odds_processing.store.db_creation.output_filenames import OutputFilenames
+from historical_odds_processing.store.db_creation.shared_id_encoder import SharedIdEncoder
 from utils.runner_identifier import get_runner_identifier
 
 
@@ -20,11 +23,13 @@ class BZ2Processor:
     def __init__(
         self,
         bz2FilePaths: Sequence[str],
-        marketInfoHandler: CSVOutputHandler,
-        marketDefinitionHandler: CSVOutputHandler,
-        runnerStatusUpdateHandler: CSVOutputHandler,
-        lastTradedPriceHandler: CSVOutputHandler,
+        marketInfoHandler: BaseOutputHandler,
+        marketDefinitionHandler: BaseOutputHandler,
+        runnerStatusUpdateHandler: BaseOutputHandler,
+        lastTradedPriceHandler: BaseOutputHandler,
         countryCodeFilter: Sequence[str] = None,
+        jsonDecoder: Optional[BaseJsonDecoder] = None,
+        idEncoder: Optional[SharedIdEncoder] = None,
     ):
         self.bz2FilePaths = bz2FilePaths
         self.marketInfoHandler = marketInfoHandler
@@ -32,6 +37,8 @@ class BZ2Processor:
         self.runnerStatusUpdateHandler = runnerStatusUpdateHandler
         self.lastTradedPriceHandler = lastTradedPriceHandler
         self.countryCodeFilter = countryCodeFilter
+        self.jsonDecoder = jsonDecoder or get_json_decoder()
+        self.idEncoder = idEncoder
         self.bettingTypes = set()
         self.marketTypes = set()
         self.marketStatuses = set()
@@ -41,6 +48,11 @@ class BZ2Processor:
         self.runnerStatus = set()
         self.lastRunnerStatus = {}
 
+    def encode(self, mappingName: str, value: Any) -> Any:
+        if self.idEncoder is None:
+            return value
+        return self.idEncoder.encode(mappingName=mappingName, value=value)
+
     def process_market_info(self, marketChangeData: Dict[str, Any]) -> Tuple[str, int]:
         marketDefinitionData = marketChangeData[BETFAIR_MARKET_DEFINITION_TAG]
         bettingType = marketDefinitionData["bettingType"]
@@ -61,10 +73,10 @@ class BZ2Processor:
                 "event_id": int(eventId),
                 "event_name": marketDefinitionData["eventName"],
                 "event_type_id": int(marketDefinitionData["eventTypeId"]),
-                "betting_type": bettingType,
-                "market_type": marketType,
-                "country_code": countryCode,
-                "timezone": timezone,
+                "betting_type": self.encode(mappingName=OutputFilenames.BETTING_TYPES, value=bettingType),
+                "market_type": self.encode(mappingName=OutputFilenames.MARKET_TYPES, value=marketType),
+                "country_code": self.encode(mappingName=OutputFilenames.COUNTRY_CODES, value=countryCode),
+                "timezone": self.encode(mappingName=OutputFilenames.TIMEZONES, value=timezone),
             }
         )
         return betfairMarketId, eventId
@@ -97,7 +109,7 @@ class BZ2Processor:
                 "runners_voidable": int(marketDefinitionData.get("runnersVoidable")),
                 "num_active_runners": int(marketDefinitionData.get("numberOfActiveRunners")),
                 "bet_delay": int(marketDefinitionData.get("betDelay")),
-                "market_status": marketStatus,
+                "market_status": self.encode(mappingName=OutputFilenames.MARKET_STATUS, value=marketStatus),
                 "regulators": marketDefinitionData.get("regulators"),
                 "discount_allowed": int(marketDefinitionData.get("discountAllowed")),
                 "open_date": datetime.strptime(marketDefinitionData["openDate"].split(".")[0], BETFAIR_DATETIME_FORMAT),
@@ -110,17 +122,19 @@ class BZ2Processor:
         runnerIdentifierDict = {}
         for runner in runners:
             runnerIdentifier = get_runner_identifier(runner["name"], runner["id"])
-            runnerIdentifierDict[runner["id"]] = runnerIdentifier
             runnerStatus = runner["status"]
             self.runners.add(runnerIdentifier)
             self.runnerStatus.add(runnerStatus)
+            runnerIdentifier = self.encode(mappingName=OutputFilenames.RUNNERS, value=runnerIdentifier)
+            runnerIdentifierDict[runner["id"]] = runnerIdentifier
+            encodedRunnerStatus = self.encode(mappingName=OutputFilenames.RUNNER_STATUS, value=runnerStatus)
             runnerInstance = get_runner_identifier(runner["name"], runner["id"], betfairMarketId, eventId)
             if runnerInstance not in self.lastRunnerStatus:
                 self.lastRunnerStatus.update({runnerInstance: self.runnerStatus})
                 self.runnerStatusUpdateHandler.add(
                     data={
                         "unix_timestamp": int(unixTimestamp),
-                        "status_id": runnerStatus,
+                        "status_id": encodedRunnerStatus,
                         "betfair_runner_table_id": runnerIdentifier,
                         "betfair_market_id": str(betfairMarketId),
                         "event_id": int(eventId),
@@ -132,7 +146,7 @@ class BZ2Processor:
                     self.runnerStatusUpdateHandler.add(
                         data={
                             "unix_timestamp": int(unixTimestamp),
-                            "status_id": runnerStatus,
+                            "status_id": encodedRunnerStatus,
                             "betfair_runner_table_id": runnerIdentifier,
                             "betfair_market_id": str(betfairMarketId),
                             "event_id": int(eventId),
@@ -162,46 +176,73 @@ class BZ2Processor:
         pickle.dump(self.runners, open(f"{outputDirectory}/{OutputFilenames.RUNNERS}.pkl", "wb"))
         pickle.dump(self.runnerStatus, open(f"{outputDirectory}/{OutputFilenames.RUNNER_STATUS}.pkl", "wb"))
 
-    def process_files(self, outputDirectory: Union[str, Path]) -> None:
-        Path(outputDirectory).mkdir(parents=True, exist_ok=True)
-        for filePath in tqdm(self.bz2FilePaths):
-            try:
-                with bz2.open(filename=filePath, mode="rb") as bz2file:
-                    countryCode = None
-                    betfairMarketId = None
-                    eventId = None
-                    runnerIdentifierDict = None
-                    for line in bz2file:
-                        info = json.loads(line)
-                        unixTimestamp = int(info["pt"] / 1000)
-                        marketChange = info["mc"][0]
-                        if BETFAIR_MARKET_DEFINITION_TAG in marketChange:
-                            countryCode = marketChange[BETFAIR_MARKET_DEFINITION_TAG].get("countryCode", countryCode)
-                            if self.countryCodeFilter is not None and countryCode not in self.countryCodeFilter:
-                                break
-
-                            if betfairMarketId is None:
-                                betfairMarketId, eventId = self.process_market_info(marketChangeData=marketChange)
-
-                            self.process_market_definition(
-                                unixTimestamp=unixTimestamp, betfairMarketId=betfairMarketId, marketChangeData=marketChange
-                            )
+    def process_file(self, filePath: Union[str, Path]) -> None:
+        try:
+            with bz2.open(filename=filePath, mode="rb") as bz2file:
+                countryCode = None
+                betfairMarketId = None
+                eventId = None
+                runnerIdentifierDict = None
+                for line in bz2file:
+                    info = self.jsonDecoder.decode(line)
+                    if info is None:
+                        continue
+                    unixTimestamp = int(info["pt"] / 1000)
+                    marketChange = info["mc"][0]
+                    if BETFAIR_MARKET_DEFINITION_TAG in marketChange:
+                        countryCode = marketChange[BETFAIR_MARKET_DEFINITION_TAG].get("countryCode", countryCode)
+                        if self.countryCodeFilter is not None and countryCode not in self.countryCodeFilter:
+                            break
+
+                        if betfairMarketId is None:
+                            betfairMarketId, eventId = self.process_market_info(marketChangeData=marketChange)
 
-                            runnerIdentifierDict = self.process_runners(
-                                runners=marketChange["marketDefinition"]["runners"],
+                        self.process_market_definition(
+                            unixTimestamp=unixTimestamp, betfairMarketId=betfairMarketId, marketChangeData=marketChange
+                        )
+
+                        runnerIdentifierDict = self.process_runners(
+                            runners=marketChange["marketDefinition"]["runners"],
+                            unixTimestamp=unixTimestamp,
+                            betfairMarketId=betfairMarketId,
+                            eventId=eventId,
+                        )
+                    if BETFAIR_RUNNER_CHANGE_TAG in marketChange:
+                        for priceChange in marketChange["rc"]:
+                            self.process_last_traded_price(
                                 unixTimestamp=unixTimestamp,
                                 betfairMarketId=betfairMarketId,
                                 eventId=eventId,
+                                runnerIdentifier=runnerIdentifierDict[priceChange["id"]],
+                                price=priceChange["ltp"],
                             )
-                        if BETFAIR_RUNNER_CHANGE_TAG in marketChange:
-                            for priceChange in marketChange["rc"]:
-                                self.process_last_traded_price(
-                                    unixTimestamp=unixTimestamp,
-                                    betfairMarketId=betfairMarketId,
-                                    eventId=eventId,
-                                    runnerIdentifier=runnerIdentifierDict[priceChange["id"]],
-                                    price=priceChange["ltp"],
-                                )
-            except Exception as ex:
-                logging.exception(f"Error processing {filePath}:\n{ex}")
+        except Exception as ex:
+            logging.exception(f"Error processing {filePath}:\n{ex}")
+
+    def process_files(self, outputDirectory: Union[str, Path]) -> None:
+        Path(outputDirectory).mkdir(parents=True, exist_ok=True)
+        for filePath in tqdm(self.bz2FilePaths):
+            self.process_file(filePath=filePath)
         self.save_outputs(outputDirectory=outputDirectory)
+
+    def get_timestamp_range(self) -> Optional[TimestampRange]:
+        # the range of every row written, whichever table it's in
+        handlerRanges = [
+            handler.timestampRange
+            for handler in (
+                self.marketInfoHandler,
+                self.marketDefinitionHandler,
+                self.runnerStatusUpdateHandler,
+                self.lastTradedPriceHandler,
+            )
+            if handler.timestampRange is not None
+        ]
+        if len(handlerRanges) == 0:
+            return None
+        return min(minValue for minValue, _ in handlerRanges), max(maxValue for _, maxValue in handlerRanges)
+
+    def close(self) -> None:
+        self.marketInfoHandler.close()
+        self.marketDefinitionHandler.close()
+        self.runnerStatusUpdateHandler.close()
+        self.lastTradedPriceHandler.close()
@@ -0,0 +1,33 @@
+from typing import Any, Dict, Union
+
+import numpy as np
+import pandas as pd
+
+
+class ColumnRemapper:
+    def __init__(self, mapping: Dict[Any, int]):
+        # built once per mapping, so each column is remapped with a couple of hash lookups instead of a python call per cell
+        self.keys = pd.Index([key for key in mapping if key is not None], dtype=object)
+        self.values = np.fromiter((mapping[key] for key in self.keys), dtype=np.int64, count=len(self.keys))
+        # missing values (None from parquet, NaN from CSV) take the id of the None entry, as in the fused encoding
+        self.missingValuePosition = len(self.keys) if None in mapping else -1
+        self.values = np.append(self.values, mapping.get(None, 0))
+
+    def __len__(self) -> int:
+        return len(self.keys) + int(self.missingValuePosition >= 0)
+
+    def remap(self, column: Union[pd.Series, np.ndarray]) -> pd.arrays.IntegerArray:
+        # id columns repeat heavily (a runner per price tick), so only the distinct values are looked up
+        codes, uniqueValues = pd.factorize(np.asarray(column, dtype=object))
+        # the appended position is picked up by the -1 code factorize gives missing values
+        uniquePositions = np.append(self.keys.get_indexer(uniqueValues), self.missingValuePosition)
+        positions = uniquePositions[codes]
+        isMissing = positions < 0
+        return pd.arrays.IntegerArray(self.values[np.where(isMissing, -1, positions)], isMissing)
+
+
+def get_column_remappers(remappingDict: Dict[str, Union[Dict[Any, int], ColumnRemapper]]) -> Dict[str, ColumnRemapper]:
+    return {
+        column: mapping if isinstance(mapping, ColumnRemapper) else ColumnRemapper(mapping=mapping)
+        for column, mapping in remappingDict.items()
+    }
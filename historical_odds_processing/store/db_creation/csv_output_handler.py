@@ -1,17 +1,88 @@
 import csv
-from typing import Any, Dict, Sequence
+import gzip
+from io import StringIO
+from typing import Any, BinaryIO, Dict, Optional, Sequence
 
+from historical_odds_processing.store.db_creation.base_output_handler import BaseOutputHandler
 
-class CSVOutputHandler:
-    def __init__(self, fileName: str, tableFields: Sequence[str]):
-        self.fileName = fileName
-        self.tableFields = tableFields
-        open(self.fileName, "wt").write(f"{','.join(tableFields)}\n")
-        self.file = open(self.fileName, "at")
-        self.csv = csv.DictWriter(self.file, fieldnames=tableFields, escapechar="\\", quotechar='"', quoting=csv.QUOTE_ALL)
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+CSV_COMPRESSION_EXTENSIONS = {"gzip": "gz", "zstd": "zst"}
+
+
+def open_compressed_file(fileName: str, compression: Optional[str] = None) -> BinaryIO:
+    if compression is None:
+        return open(fileName, "wb")
+    if compression == "gzip":
+        return gzip.open(fileName, "wb", compresslevel=6)
+    if compression == "zstd":
+        if zstandard is None:
+            raise ImportError("zstandard must be installed to write zstd compressed CSVs")
+        return zstandard.open(fileName, "wb")
+    raise ValueError(f"Unknown compression: {compression}, choose from {list(CSV_COMPRESSION_EXTENSIONS)}")
+
+
+def open_compressed_csv(fileName: str) -> BinaryIO:
+    # the compression is worked out from the file extension, as pandas only infers zstd from pandas 1.4 on
+    if fileName.endswith(f".{CSV_COMPRESSION_EXTENSIONS['gzip']}"):
+        return gzip.open(fileName, "rb")
+    if fileName.endswith(f".{CSV_COMPRESSION_EXTENSIONS['zstd']}"):
+        if zstandard is None:
+            raise ImportError("zstandard must be installed to read zstd compressed CSVs")
+        return zstandard.open(fileName, "rb")
+    return open(fileName, "rb")
+
+
+class CSVOutputHandler(BaseOutputHandler):
+
+    fileExtension = "csv"
+
+    def __init__(self, fileName: str, tableFields: Sequence[str], flushSize: int = 10000, compression: Optional[str] = None):
+        super().__init__(fileName=fileName, tableFields=tableFields)
+        self.flushSize = flushSize
+        self.compression = compression
+        self.fieldNames = set(tableFields)
+        self.rowBuffer = []
+        self.rowsWritten = 0
+        self.bytesWritten = 0
+        self.file = open_compressed_file(fileName=self.fileName, compression=compression)
+        self._write_text(text=f"{','.join(tableFields)}\n")
+
+    def __enter__(self) -> "CSVOutputHandler":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def _write_text(self, text: str) -> None:
+        encodedText = text.encode()
+        self.file.write(encodedText)
+        self.bytesWritten += len(encodedText)
 
     def add(self, data: Dict[Any, Any]) -> None:
-        self.csv.writerow(data)
+        if not self.fieldNames.issuperset(data):
+            unknownFields = [field for field in data if field not in self.fieldNames]
+            raise ValueError(f"dict contains fields not in fieldnames: {', '.join(repr(field) for field in unknownFields)}")
+        self.rowBuffer.append(tuple(data.get(field, "") for field in self.tableFields))
+        self._update_timestamp_range(data=data)
+        if len(self.rowBuffer) >= self.flushSize:
+            self.flush()
+
+    def flush(self) -> None:
+        if len(self.rowBuffer) == 0:
+            return
+        textBuffer = StringIO()
+        csvWriter = csv.writer(textBuffer, escapechar="\\", quotechar='"', quoting=csv.QUOTE_ALL, lineterminator="\n")
+        csvWriter.writerows(self.rowBuffer)
+        self._write_text(text=textBuffer.getvalue())
+        self.rowsWritten += len(self.rowBuffer)
+        self.rowBuffer = []
 
     def close(self) -> None:
+        if self.file.closed:
+            return
+        self.flush()
         self.file.close()
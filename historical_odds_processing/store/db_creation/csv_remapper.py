@@ -1,26 +1,86 @@
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Union
 
 import pandas as pd
 
+from historical_odds_processing.store.db_creation.column_remapper import ColumnRemapper
+from historical_odds_processing.store.db_creation.column_remapper import get_column_remappers
+from historical_odds_processing.store.db_creation.csv_output_handler import open_compressed_csv
 from utils.paths import get_path
 
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:
+    pa = None
+    pacsv = None
+
+# market ids look like floats, so they'd otherwise lose trailing zeros on the way through
+STRING_COLUMNS = ["betfair_market_id"]
+
 
 class CSVRemapper:
     def __init__(
-        self, csvToRemap: str, remappingDict: Dict[str, Dict[Any, Any]], outputDirectory: str, chunkSize: int = 100000
+        self,
+        csvToRemap: str,
+        remappingDict: Dict[str, Union[Dict[Any, Any], ColumnRemapper]],
+        outputDirectory: str,
+        chunkSize: int = 100000,
+        useArrow: bool = False,
     ):
+        if useArrow and pa is None:
+            raise ImportError("pyarrow must be installed to remap CSVs with useArrow")
         self.csvToRemap = csvToRemap
-        self.remappingDict = remappingDict
+        self.columnRemappers = get_column_remappers(remappingDict=remappingDict)
         self.outputDirectory = outputDirectory
         self.chunkSize = chunkSize
+        self.useArrow = useArrow
 
     def process_csv(self) -> None:
         existingPathParts = Path(self.csvToRemap).parts
         outputPath = get_path(self.outputDirectory, existingPathParts[-4], existingPathParts[-3], existingPathParts[-2])
-        dataframeChunkIterator = pd.read_csv(self.csvToRemap, chunksize=self.chunkSize)
-        for chunkIndex, chunk in enumerate(dataframeChunkIterator):
-            outputFilename = f'{existingPathParts[-1].split(".")[0]}_{chunkIndex}.csv'
-            for column, remappingDictionary in self.remappingDict.items():
-                chunk[column] = chunk[column].map(remappingDictionary.get)
-            chunk.to_csv(f"{outputPath}/{outputFilename}", index=False)
+        outputStem = existingPathParts[-1].split(".")[0]
+        if self.useArrow:
+            self._process_csv_with_arrow(outputPath=outputPath, outputStem=outputStem)
+            return
+        with open_compressed_csv(fileName=str(self.csvToRemap)) as csvFile:
+            dataframeChunkIterator = pd.read_csv(
+                csvFile, chunksize=self.chunkSize, dtype={column: str for column in STRING_COLUMNS}
+            )
+            for chunkIndex, chunk in enumerate(dataframeChunkIterator):
+                for column, columnRemapper in self.columnRemappers.items():
+                    chunk[column] = columnRemapper.remap(column=chunk[column])
+                chunk.to_csv(f"{outputPath}/{outputStem}_{chunkIndex}.csv", index=False)
+
+    def _remap_batch(self, batch: "pa.RecordBatch") -> "pa.RecordBatch":
+        columns = []
+        for field, column in zip(batch.schema, batch.columns):
+            if field.name in self.columnRemappers:
+                column = pa.array(self.columnRemappers[field.name].remap(column=column.to_numpy(zero_copy_only=False)))
+            columns.append(column)
+        return pa.RecordBatch.from_arrays(columns, names=batch.schema.names)
+
+    def _process_csv_with_arrow(self, outputPath: str, outputStem: str) -> None:
+        # id columns are read as strings (empty ones as null, like pandas), so they aren't type-inferred per block
+        convertOptions = pacsv.ConvertOptions(
+            column_types={column: pa.string() for column in [*STRING_COLUMNS, *self.columnRemappers]}, strings_can_be_null=True
+        )
+        writeOptions = pacsv.WriteOptions(quoting_style="needed")
+        chunkIndex, numChunkRows, csvWriter = 0, 0, None
+        for batch in pacsv.open_csv(self.csvToRemap, convert_options=convertOptions):
+            batch = self._remap_batch(batch=batch)
+            # the streaming reader yields blocks by size, so batches are re-cut into output files of chunkSize rows
+            while batch.num_rows > 0:
+                if csvWriter is None:
+                    csvWriter = pacsv.CSVWriter(
+                        f"{outputPath}/{outputStem}_{chunkIndex}.csv", schema=batch.schema, write_options=writeOptions
+                    )
+                numRowsToWrite = min(self.chunkSize - numChunkRows, batch.num_rows)
+                csvWriter.write_batch(batch.slice(0, numRowsToWrite))
+                batch = batch.slice(numRowsToWrite)
+                numChunkRows += numRowsToWrite
+                if numChunkRows == self.chunkSize:
+                    csvWriter.close()
+                    chunkIndex, numChunkRows, csvWriter = chunkIndex + 1, 0, None
+        if csvWriter is not None:
+            csvWriter.close()
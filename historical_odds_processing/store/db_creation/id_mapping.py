@@ -0,0 +1,73 @@
+import os
+import pickle
+from pathlib import Path
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple, Union
+
+
+def get_entry_sort_key(entry: Hashable) -> Tuple[bool, str]:
+    # entries can include None (e.g. markets without a country code), so sort on the string form
+    return entry is not None, str(entry)
+
+
+def get_final_mapping_path(outputDirectory: Union[str, Path], mappingName: str) -> str:
+    return f"{outputDirectory}/{mappingName}_final_mapping.pkl"
+
+
+class IdMapping:
+    def __init__(self, entries: Optional[Sequence[Hashable]] = None):
+        # the entries list is the id -> entry index, ids are never reused or reassigned
+        self.entries: List[Hashable] = list(entries or [])
+        self.entryIds: Dict[Hashable, int] = {entry: entryId for entryId, entry in enumerate(self.entries)}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, entry: Hashable) -> bool:
+        return entry in self.entryIds
+
+    def get_id(self, entry: Hashable) -> Optional[int]:
+        return self.entryIds.get(entry)
+
+    def get_entry(self, entryId: int) -> Hashable:
+        return self.entries[entryId]
+
+    def add(self, entry: Hashable) -> int:
+        entryId = self.entryIds.get(entry)
+        if entryId is None:
+            entryId = len(self.entries)
+            self.entries.append(entry)
+            self.entryIds[entry] = entryId
+        return entryId
+
+    def extend(self, entries: Iterable[Hashable]) -> int:
+        newEntries = {entry for entry in entries if entry not in self.entryIds}
+        # new entries are appended in sorted order, so the same inputs always give the same ids
+        for entry in sorted(newEntries, key=get_entry_sort_key):
+            self.add(entry=entry)
+        return len(newEntries)
+
+    def to_dict(self) -> Dict[Hashable, int]:
+        return dict(self.entryIds)
+
+    @classmethod
+    def from_dict(cls, mapping: Dict[Hashable, int]) -> "IdMapping":
+        entries = [None] * len(mapping)
+        for entry, entryId in mapping.items():
+            entries[entryId] = entry
+        return cls(entries=entries)
+
+    def save(self, filePath: Union[str, Path]) -> None:
+        pickle.dump({"entries": self.entries}, open(f"{filePath}.tmp", "wb"))
+        os.replace(f"{filePath}.tmp", filePath)
+
+    @classmethod
+    def load(cls, filePath: Union[str, Path]) -> "IdMapping":
+        savedMapping = pickle.load(open(filePath, "rb"))
+        if "entries" in savedMapping and isinstance(savedMapping["entries"], list):
+            return cls(entries=savedMapping["entries"])
+        # mappings written before ids were stable were plain entry -> id dicts
+        return cls.from_dict(mapping=savedMapping)
+
+    @classmethod
+    def load_or_create(cls, filePath: Union[str, Path]) -> "IdMapping":
+        return cls.load(filePath=filePath) if Path(filePath).exists() else cls()
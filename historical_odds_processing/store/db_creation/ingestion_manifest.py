@@ -0,0 +1,274 @@
+import hashlib
+import sqlite3
+from pathlib import Path
+from shutil import rmtree
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+
+from historical_odds_processing.store.db_creation.base_output_handler import TimestampRange
+from historical_odds_processing.store.db_creation.output_filenames import OutputFilenames
+
+ChunkFileRecord = Tuple[str, int, float, str]
+
+
+class ChunkStatus:
+
+    IN_PROGRESS = "in_progress"
+    COMPLETE = "complete"
+
+
+class ManifestStages:
+
+    MERGE = "merge"
+
+
+def get_manifest_path(outputDirectory: Union[str, Path]) -> str:
+    return f"{outputDirectory}/{OutputFilenames.INGESTION_MANIFEST}.sqlite"
+
+
+def get_file_hash(filePath: Union[str, Path], blockSize: int = 2**20) -> str:
+    fileHash = hashlib.sha1()
+    with open(filePath, "rb") as file:
+        for block in iter(lambda: file.read(blockSize), b""):
+            fileHash.update(block)
+    return fileHash.hexdigest()
+
+
+def get_fingerprint(values: Iterable[str]) -> str:
+    fingerprint = hashlib.sha1()
+    for value in values:
+        fingerprint.update(f"{value}\n".encode())
+    return fingerprint.hexdigest()
+
+
+def get_mapping_fingerprint(outputDirectory: Union[str, Path]) -> str:
+    return get_fingerprint(
+        get_file_hash(f"{outputDirectory}/{mappingName}_final_mapping.pkl")
+        for mappingName in OutputFilenames.ALL_MAPPING_FILES
+    )
+
+
+def get_chunk_file_record(filePath: Union[str, Path]) -> ChunkFileRecord:
+    fileStats = Path(filePath).stat()
+    return str(Path(filePath).resolve()), fileStats.st_size, fileStats.st_mtime, get_file_hash(filePath=filePath)
+
+
+class IngestionManifest:
+    def __init__(self, outputDirectory: Union[str, Path], manifestPath: Optional[Union[str, Path]] = None):
+        self.outputDirectory = str(Path(outputDirectory).resolve())
+        self.manifestPath = str(manifestPath or get_manifest_path(outputDirectory=outputDirectory))
+        # the scheduler records finished chunks from a collector thread
+        self.connection = sqlite3.connect(self.manifestPath, check_same_thread=False)
+        self.connection.executescript("""
+                CREATE TABLE IF NOT EXISTS input_files
+                (
+                    file_path TEXT PRIMARY KEY,
+                    file_size INTEGER,
+                    modified_time REAL,
+                    content_hash TEXT,
+                    chunk_path TEXT
+                );
+                CREATE TABLE IF NOT EXISTS output_chunks
+                (
+                    chunk_path TEXT PRIMARY KEY,
+                    status TEXT,
+                    mapping_fingerprint TEXT
+                );
+                CREATE TABLE IF NOT EXISTS stage_fingerprints
+                (
+                    stage TEXT PRIMARY KEY,
+                    fingerprint TEXT
+                );
+                CREATE TABLE IF NOT EXISTS loaded_files
+                (
+                    file_path TEXT PRIMARY KEY
+                );
+                CREATE TABLE IF NOT EXISTS loaded_chunks
+                (
+                    chunk_path TEXT PRIMARY KEY
+                );
+                CREATE TABLE IF NOT EXISTS chunk_timestamp_ranges
+                (
+                    chunk_path TEXT PRIMARY KEY,
+                    min_unix_timestamp INTEGER,
+                    max_unix_timestamp INTEGER
+                );
+            """)
+        self.connection.commit()
+
+    def get_remapped_chunk_path(self, chunkPath: Union[str, Path]) -> str:
+        # chunks written with fused id encoding are already written with their final ids under remapped_files
+        remappedDirectory = Path(self.outputDirectory, "remapped_files")
+        if remappedDirectory in Path(chunkPath).parents:
+            return str(chunkPath)
+        return str(Path(remappedDirectory, *Path(chunkPath).relative_to(self.outputDirectory).parts))
+
+    def start_chunk(self, chunkPath: Union[str, Path]) -> None:
+        self.connection.execute(
+            "INSERT OR REPLACE INTO output_chunks VALUES (?, ?, NULL)",
+            (str(Path(chunkPath).resolve()), ChunkStatus.IN_PROGRESS),
+        )
+        self.connection.commit()
+
+    def complete_chunk(
+        self,
+        chunkPath: Union[str, Path],
+        fileRecords: Sequence[ChunkFileRecord],
+        timestampRange: Optional[TimestampRange] = None,
+    ) -> None:
+        # timestampRange is the range of the unix_timestamp column over every row written to the chunk, or None if it has
+        # no rows
+        chunkPath = str(Path(chunkPath).resolve())
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO input_files VALUES (?, ?, ?, ?, ?)",
+            [(*fileRecord, chunkPath) for fileRecord in fileRecords],
+        )
+        self.connection.execute(
+            "INSERT OR REPLACE INTO chunk_timestamp_ranges VALUES (?, ?, ?)", (chunkPath, *(timestampRange or (None, None)))
+        )
+        self.connection.execute("INSERT OR REPLACE INTO output_chunks VALUES (?, ?, NULL)", (chunkPath, ChunkStatus.COMPLETE))
+        self.connection.commit()
+
+    def invalidate_chunks(self, chunkPaths: Iterable[str]) -> None:
+        # a loaded chunk's rows can't be told apart from other chunks' rows in the database, so reprocessing it would insert
+        # them a second time
+        chunkPaths = list(chunkPaths)
+        loadedChunkPaths = sorted(self.get_loaded_chunk_paths().intersection(chunkPaths))
+        if len(loadedChunkPaths) > 0:
+            raise ValueError(
+                f"Chunks {loadedChunkPaths} have input files that changed after the chunks were loaded into the database. "
+                "Rebuild the database from scratch instead of loading incrementally"
+            )
+        for chunkPath in chunkPaths:
+            rmtree(chunkPath, ignore_errors=True)
+            rmtree(self.get_remapped_chunk_path(chunkPath=chunkPath), ignore_errors=True)
+            self.connection.execute("DELETE FROM input_files WHERE chunk_path = ?", (chunkPath,))
+            self.connection.execute("DELETE FROM output_chunks WHERE chunk_path = ?", (chunkPath,))
+            self.connection.execute("DELETE FROM chunk_timestamp_ranges WHERE chunk_path = ?", (chunkPath,))
+        self.connection.commit()
+
+    def recover(self) -> List[str]:
+        incompleteChunkPaths = [
+            row[0]
+            for row in self.connection.execute(
+                "SELECT chunk_path FROM output_chunks WHERE status = ?", (ChunkStatus.IN_PROGRESS,)
+            )
+        ]
+        self.invalidate_chunks(chunkPaths=incompleteChunkPaths)
+        return incompleteChunkPaths
+
+    def get_pending_filepaths(self, filePaths: Sequence[Union[str, Path]]) -> List[Union[str, Path]]:
+        indexedRows = {
+            row[0]: row[1:]
+            for row in self.connection.execute(
+                "SELECT file_path, file_size, modified_time, content_hash, chunk_path FROM input_files"
+            )
+        }
+        changedChunkPaths = set()
+        for filePath in filePaths:
+            indexedRow = indexedRows.get(str(Path(filePath).resolve()))
+            if indexedRow is None:
+                continue
+            fileSize, modifiedTime, contentHash, chunkPath = indexedRow
+            fileStats = Path(filePath).stat()
+            if fileSize == fileStats.st_size and modifiedTime == fileStats.st_mtime:
+                continue
+            if get_file_hash(filePath=filePath) == contentHash:
+                self.connection.execute(
+                    "UPDATE input_files SET file_size = ?, modified_time = ? WHERE file_path = ?",
+                    (fileStats.st_size, fileStats.st_mtime, str(Path(filePath).resolve())),
+                )
+                continue
+            changedChunkPaths.add(chunkPath)
+        self.connection.commit()
+        # every other file in a changed chunk has to be reprocessed along with the changed file
+        self.invalidate_chunks(chunkPaths=changedChunkPaths)
+
+        processedFilePaths = {row[0] for row in self.connection.execute("SELECT file_path FROM input_files")}
+        return [filePath for filePath in filePaths if str(Path(filePath).resolve()) not in processedFilePaths]
+
+    def get_complete_chunk_paths(self) -> List[str]:
+        return [
+            row[0]
+            for row in self.connection.execute(
+                "SELECT chunk_path FROM output_chunks WHERE status = ? ORDER BY chunk_path", (ChunkStatus.COMPLETE,)
+            )
+        ]
+
+    def get_chunk_paths_to_remap(self) -> List[str]:
+        # final mappings are append-only, so a chunk only ever needs remapping once
+        return [
+            row[0]
+            for row in self.connection.execute(
+                """
+                    SELECT chunk_path FROM output_chunks
+                    WHERE status = ? AND mapping_fingerprint IS NULL
+                    ORDER BY chunk_path
+                """,
+                (ChunkStatus.COMPLETE,),
+            )
+        ]
+
+    def set_mapping_fingerprint(self, chunkPaths: Iterable[str], mappingFingerprint: str) -> None:
+        self.connection.executemany(
+            "UPDATE output_chunks SET mapping_fingerprint = ? WHERE chunk_path = ?",
+            [(mappingFingerprint, chunkPath) for chunkPath in chunkPaths],
+        )
+        self.connection.commit()
+
+    def get_stage_fingerprint(self, stage: str) -> Optional[str]:
+        row = self.connection.execute("SELECT fingerprint FROM stage_fingerprints WHERE stage = ?", (stage,)).fetchone()
+        return row[0] if row is not None else None
+
+    def set_stage_fingerprint(self, stage: str, fingerprint: str) -> None:
+        self.connection.execute("INSERT OR REPLACE INTO stage_fingerprints VALUES (?, ?)", (stage, fingerprint))
+        self.connection.commit()
+
+    def get_loaded_filepaths(self) -> Set[str]:
+        return {row[0] for row in self.connection.execute("SELECT file_path FROM loaded_files")}
+
+    def get_loaded_chunk_paths(self) -> Set[str]:
+        return {row[0] for row in self.connection.execute("SELECT chunk_path FROM loaded_chunks")}
+
+    def get_chunk_paths_by_filepath(self, filePaths: Iterable[Union[str, Path]]) -> Dict[str, str]:
+        # loaded files are remapped files, which sit in the remapped copy of the chunk they came from. Files outside every
+        # complete chunk are left out
+        chunkPathsByRemappedPath = {
+            self.get_remapped_chunk_path(chunkPath=chunkPath): chunkPath for chunkPath in self.get_complete_chunk_paths()
+        }
+        chunkPathsByFilePath = {}
+        for filePath in filePaths:
+            filePath = str(Path(filePath).resolve())
+            for parentPath in Path(filePath).parents:
+                if str(parentPath) in chunkPathsByRemappedPath:
+                    chunkPathsByFilePath[filePath] = chunkPathsByRemappedPath[str(parentPath)]
+                    break
+        return chunkPathsByFilePath
+
+    def get_timestamp_ranges(self, filePaths: Iterable[Union[str, Path]]) -> Dict[str, Optional[TimestampRange]]:
+        # the unix_timestamp range of the chunk each file came from, for files whose chunk recorded one when it was written
+        chunkRanges = {
+            row[0]: (row[1], row[2]) if row[1] is not None else None
+            for row in self.connection.execute(
+                "SELECT chunk_path, min_unix_timestamp, max_unix_timestamp FROM chunk_timestamp_ranges"
+            )
+        }
+        return {
+            filePath: chunkRanges[chunkPath]
+            for filePath, chunkPath in self.get_chunk_paths_by_filepath(filePaths=filePaths).items()
+            if chunkPath in chunkRanges
+        }
+
+    def add_loaded_filepaths(self, filePaths: Iterable[Union[str, Path]]) -> None:
+        filePaths = [str(Path(filePath).resolve()) for filePath in filePaths]
+        loadedChunkPaths = set(self.get_chunk_paths_by_filepath(filePaths=filePaths).values())
+        self.connection.executemany("INSERT OR REPLACE INTO loaded_files VALUES (?)", [(filePath,) for filePath in filePaths])
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO loaded_chunks VALUES (?)", [(chunkPath,) for chunkPath in loadedChunkPaths]
+        )
+        self.connection.commit()
+
+    def add_loaded_filepath(self, filePath: Union[str, Path]) -> None:
+        self.add_loaded_filepaths(filePaths=[filePath])
+
+    def close(self) -> None:
+        self.connection.close()
@@ -0,0 +1,119 @@
+import json
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Union
+
+from historical_odds_processing.datamodel.constants import BETFAIR_MARKET_DEFINITION_TAG
+from historical_odds_processing.datamodel.constants import BETFAIR_RUNNER_CHANGE_TAG
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import simdjson
+except ImportError:
+    simdjson = None
+
+
+class BaseJsonDecoder(ABC):
+
+    name = None
+
+    @abstractmethod
+    def decode(self, line: Union[bytes, str]) -> Optional[Dict[str, Any]]:
+        pass
+
+
+class StdlibJsonDecoder(BaseJsonDecoder):
+
+    name = "stdlib"
+
+    def decode(self, line: Union[bytes, str]) -> Optional[Dict[str, Any]]:
+        return json.loads(line)
+
+
+class OrjsonDecoder(BaseJsonDecoder):
+
+    name = "orjson"
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError("orjson must be installed to use OrjsonDecoder")
+
+    def decode(self, line: Union[bytes, str]) -> Optional[Dict[str, Any]]:
+        return orjson.loads(line)
+
+
+class SimdjsonDecoder(BaseJsonDecoder):
+
+    name = "simdjson"
+
+    def __init__(self):
+        if simdjson is None:
+            raise ImportError("pysimdjson must be installed to use SimdjsonDecoder")
+        self.parser = simdjson.Parser()
+
+    def decode(self, line: Union[bytes, str]) -> Optional[Dict[str, Any]]:
+        return self.parser.parse(line).as_dict()
+
+
+class LazyMarketChangeDecoder(BaseJsonDecoder):
+
+    # only materialises the parts of a market change update that BZ2Processor reads, and skips lines without them
+
+    name = "lazy"
+
+    def __init__(self, fallbackDecoder: Optional[BaseJsonDecoder] = None):
+        self.parser = simdjson.Parser() if simdjson is not None else None
+        self.fallbackDecoder = fallbackDecoder or get_json_decoder()
+        self.marketDefinitionTag = f'"{BETFAIR_MARKET_DEFINITION_TAG}"'.encode()
+        self.runnerChangeTag = f'"{BETFAIR_RUNNER_CHANGE_TAG}"'.encode()
+
+    def decode(self, line: Union[bytes, str]) -> Optional[Dict[str, Any]]:
+        if isinstance(line, str):
+            line = line.encode()
+        if self.marketDefinitionTag not in line and self.runnerChangeTag not in line:
+            return None
+        # market definitions make up most of the line they appear on, so a full decode of those lines is cheapest
+        if self.parser is None or self.marketDefinitionTag in line:
+            return self.fallbackDecoder.decode(line)
+
+        document = self.parser.parse(line)
+        marketChange = document["mc"][0]
+        lazyMarketChange = {"id": marketChange["id"]}
+        if BETFAIR_RUNNER_CHANGE_TAG in marketChange:
+            lazyMarketChange[BETFAIR_RUNNER_CHANGE_TAG] = [
+                {"id": runnerChange["id"], "ltp": runnerChange["ltp"]}
+                for runnerChange in marketChange[BETFAIR_RUNNER_CHANGE_TAG]
+            ]
+        return {"pt": document["pt"], "mc": [lazyMarketChange]}
+
+
+JSON_DECODERS = {
+    StdlibJsonDecoder.name: StdlibJsonDecoder,
+    OrjsonDecoder.name: OrjsonDecoder,
+    SimdjsonDecoder.name: SimdjsonDecoder,
+    LazyMarketChangeDecoder.name: LazyMarketChangeDecoder,
+}
+
+
+def get_available_json_decoder_names() -> List[str]:
+    availableNames = [StdlibJsonDecoder.name, LazyMarketChangeDecoder.name]
+    if orjson is not None:
+        availableNames.append(OrjsonDecoder.name)
+    if simdjson is not None:
+        availableNames.append(SimdjsonDecoder.name)
+    return availableNames
+
+
+def get_json_decoder(name: Optional[str] = None) -> BaseJsonDecoder:
+    if name is not None:
+        if name not in JSON_DECODERS:
+            raise ValueError(f"Unknown json decoder: {name}, choose from {list(JSON_DECODERS)}")
+        return JSON_DECODERS[name]()
+    if orjson is not None:
+        return OrjsonDecoder()
+    if simdjson is not None:
+        return SimdjsonDecoder()
+    return StdlibJsonDecoder()
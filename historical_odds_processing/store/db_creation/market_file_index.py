@@ -0,0 +1,121 @@
+import bz2
+import logging
+import sqlite3
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple, Union
+
+from historical_odds_processing.datamodel.constants import BETFAIR_MARKET_DEFINITION_TAG
+from historical_odds_processing.store.db_creation.json_decoders import get_json_decoder
+from utils.batching import run_multiprocessing
+
+MarketFileIndexRow = Tuple[str, int, float, int, Optional[str], Optional[int], Optional[str], Optional[str]]
+
+
+def read_first_line(filePath: Union[str, Path], readSize: int = 8192) -> bytes:
+    # bz2 only emits output once a whole block is decompressed, so this reads as little of the first block as it can
+    decompressor = bz2.BZ2Decompressor()
+    decompressedBytes = b""
+    with open(filePath, "rb") as compressedFile:
+        while b"\n" not in decompressedBytes and not decompressor.eof:
+            compressedBytes = compressedFile.read(readSize)
+            if len(compressedBytes) == 0:
+                break
+            decompressedBytes += decompressor.decompress(compressedBytes)
+    return decompressedBytes.split(b"\n")[0]
+
+
+def scan_market_file(filePath: Union[str, Path]) -> MarketFileIndexRow:
+    fileStats = Path(filePath).stat()
+    marketId, eventTypeId, marketType, countryCode = None, None, None, None
+    hasMarketDefinition = 0
+    try:
+        info = get_json_decoder().decode(read_first_line(filePath=filePath))
+        marketChange = info["mc"][0]
+        marketId = str(marketChange["id"])
+        if BETFAIR_MARKET_DEFINITION_TAG in marketChange:
+            marketDefinition = marketChange[BETFAIR_MARKET_DEFINITION_TAG]
+            hasMarketDefinition = 1
+            eventTypeId = int(marketDefinition["eventTypeId"]) if "eventTypeId" in marketDefinition else None
+            marketType = marketDefinition.get("marketType")
+            countryCode = marketDefinition.get("countryCode")
+    except Exception as ex:
+        logging.exception(f"Error scanning {filePath}:\n{ex}")
+    return (
+        str(Path(filePath).resolve()),
+        fileStats.st_size,
+        fileStats.st_mtime,
+        hasMarketDefinition,
+        marketId,
+        eventTypeId,
+        marketType,
+        countryCode,
+    )
+
+
+class MarketFileIndex:
+    def __init__(self, indexPath: Union[str, Path]):
+        self.indexPath = str(indexPath)
+        self.connection = sqlite3.connect(self.indexPath)
+        self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS market_files
+                (
+                    file_path TEXT PRIMARY KEY,
+                    file_size INTEGER,
+                    modified_time REAL,
+                    has_market_definition INTEGER,
+                    betfair_market_id TEXT,
+                    event_type_id INTEGER,
+                    market_type TEXT,
+                    country_code TEXT
+                )
+            """)
+        self.connection.commit()
+
+    def _get_indexed_rows(self) -> dict:
+        rows = self.connection.execute(
+            "SELECT file_path, file_size, modified_time, has_market_definition, market_type, country_code FROM market_files"
+        )
+        return {row[0]: row[1:] for row in rows}
+
+    def get_stale_filepaths(self, filePaths: Sequence[Union[str, Path]]) -> List[str]:
+        indexedRows = self._get_indexed_rows()
+        staleFilePaths = []
+        for filePath in filePaths:
+            fileStats = Path(filePath).stat()
+            indexedRow = indexedRows.get(str(Path(filePath).resolve()))
+            if indexedRow is None or indexedRow[0] != fileStats.st_size or indexedRow[1] != fileStats.st_mtime:
+                staleFilePaths.append(str(filePath))
+        return staleFilePaths
+
+    def update(self, filePaths: Sequence[Union[str, Path]], numWorkers: Optional[int] = None) -> int:
+        staleFilePaths = self.get_stale_filepaths(filePaths=filePaths)
+        if len(staleFilePaths) > 0:
+            rows = run_multiprocessing(functionToProcess=scan_market_file, parameterList=staleFilePaths, threads=numWorkers)
+            self.connection.executemany("INSERT OR REPLACE INTO market_files VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self.connection.commit()
+        return len(staleFilePaths)
+
+    def filter_filepaths(
+        self,
+        filePaths: Sequence[Union[str, Path]],
+        countryCodes: Optional[Sequence[str]] = None,
+        marketTypes: Optional[Sequence[str]] = None,
+    ) -> List[Union[str, Path]]:
+        indexedRows = self._get_indexed_rows()
+        validFilePaths = []
+        for filePath in filePaths:
+            indexedRow = indexedRows.get(str(Path(filePath).resolve()))
+            # files that weren't scanned, or didn't start with a market definition, are left for the full processing to filter
+            if indexedRow is None or not indexedRow[2]:
+                validFilePaths.append(filePath)
+                continue
+            _, _, _, marketType, countryCode = indexedRow
+            if countryCodes is not None and countryCode not in countryCodes:
+                continue
+            if marketTypes is not None and marketType not in marketTypes:
+                continue
+            validFilePaths.append(filePath)
+        return validFilePaths
+
+    def close(self) -> None:
+        self.connection.close()
@@ -13,4 +13,7 @@ class OutputFilenames:
     RUNNER_STATUS_UPDATES = "runner_status_updates"
     LAST_TRADED_PRICE = "last_traded_price"
 
+    MARKET_FILE_INDEX = "market_file_index"
+    INGESTION_MANIFEST = "ingestion_manifest"
+
     ALL_MAPPING_FILES = [BETTING_TYPES, MARKET_TYPES, MARKET_STATUS, COUNTRY_CODES, TIMEZONES, RUNNERS, RUNNER_STATUS]
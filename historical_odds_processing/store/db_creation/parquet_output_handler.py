@@ -0,0 +1,100 @@
+from typing import Any, Dict, Optional, Sequence
+
+from historical_odds_processing.store.db_creation.base_output_handler import BaseOutputHandler
+from historical_odds_processing.store.db_creation.shared_id_encoder import ENCODED_COLUMN_MAPPINGS
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+
+def get_parquet_column_types() -> Dict[str, Any]:
+    # types of the columns BZ2Processor writes, before the id features are remapped to integers
+    return {
+        "betfair_market_id": pa.dictionary(pa.int32(), pa.string()),
+        "event_id": pa.int64(),
+        "event_name": pa.string(),
+        "event_type_id": pa.int64(),
+        "unix_timestamp": pa.int64(),
+        "version": pa.int64(),
+        "bsp_market": pa.int64(),
+        "turn_in_play_enabled": pa.int64(),
+        "persistence_enabled": pa.int64(),
+        "market_base_rate": pa.float64(),
+        "num_winners": pa.int64(),
+        "market_start_time": pa.timestamp("s"),
+        "market_suspend_time": pa.timestamp("s"),
+        "bsp_reconciled": pa.int64(),
+        "market_is_complete": pa.int64(),
+        "in_play": pa.int64(),
+        "cross_matching": pa.int64(),
+        "runners_voidable": pa.int64(),
+        "num_active_runners": pa.int64(),
+        "bet_delay": pa.int64(),
+        "discount_allowed": pa.int64(),
+        "open_date": pa.timestamp("s"),
+        "price": pa.float64(),
+    }
+
+
+def get_encoded_id_column_types() -> Dict[str, Any]:
+    return {column: pa.int64() for column in ENCODED_COLUMN_MAPPINGS}
+
+
+class ParquetOutputHandler(BaseOutputHandler):
+
+    fileExtension = "parquet"
+
+    def __init__(
+        self,
+        fileName: str,
+        tableFields: Sequence[str],
+        columnTypes: Optional[Dict[str, Any]] = None,
+        rowGroupSize: int = 100000,
+        compression: str = "zstd",
+    ):
+        if pa is None:
+            raise ImportError("pyarrow must be installed to use ParquetOutputHandler")
+        super().__init__(fileName=fileName, tableFields=tableFields)
+        columnTypes = {**get_parquet_column_types(), **(columnTypes or {})}
+        self.schema = pa.schema([(field, columnTypes.get(field, pa.string())) for field in tableFields])
+        self.rowGroupSize = rowGroupSize
+        self.fieldNames = set(tableFields)
+        self.stringFields = {
+            field.name for field in self.schema if pa.types.is_string(field.type) or pa.types.is_dictionary(field.type)
+        }
+        self.columnBuffers = {field: [] for field in tableFields}
+        self.numBufferedRows = 0
+        self.writer = pq.ParquetWriter(self.fileName, schema=self.schema, compression=compression)
+
+    def add(self, data: Dict[Any, Any]) -> None:
+        unknownFields = [field for field in data if field not in self.fieldNames]
+        if len(unknownFields) > 0:
+            raise ValueError(f"dict contains fields not in fieldnames: {', '.join(repr(field) for field in unknownFields)}")
+        for field, columnBuffer in self.columnBuffers.items():
+            columnBuffer.append(data.get(field))
+        self.numBufferedRows += 1
+        self._update_timestamp_range(data=data)
+        if self.numBufferedRows >= self.rowGroupSize:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.numBufferedRows == 0:
+            return
+        columns = []
+        for field in self.schema:
+            values = self.columnBuffers[field.name]
+            if field.name in self.stringFields:
+                # match the CSV output for values like the regulators list
+                values = [value if value is None or isinstance(value, str) else str(value) for value in values]
+            columns.append(pa.array(values, type=field.type))
+        self.writer.write_table(pa.Table.from_arrays(columns, schema=self.schema))
+        self.columnBuffers = {field: [] for field in self.tableFields}
+        self.numBufferedRows = 0
+
+    def close(self) -> None:
+        self.flush()
+        self.writer.close()
@@ -0,0 +1,40 @@
+from pathlib import Path
+from typing import Any, Dict, Union
+
+from historical_odds_processing.store.db_creation.column_remapper import ColumnRemapper
+from historical_odds_processing.store.db_creation.column_remapper import get_column_remappers
+from utils.paths import get_path
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+
+class ParquetRemapper:
+    def __init__(
+        self,
+        parquetToRemap: str,
+        remappingDict: Dict[str, Union[Dict[Any, Any], ColumnRemapper]],
+        outputDirectory: str,
+        chunkSize: int = 100000,
+    ):
+        if pa is None:
+            raise ImportError("pyarrow must be installed to use ParquetRemapper")
+        self.parquetToRemap = parquetToRemap
+        self.columnRemappers = get_column_remappers(remappingDict=remappingDict)
+        self.outputDirectory = outputDirectory
+        self.chunkSize = chunkSize
+
+    def process_parquet(self) -> None:
+        existingPathParts = Path(self.parquetToRemap).parts
+        outputPath = get_path(self.outputDirectory, existingPathParts[-4], existingPathParts[-3], existingPathParts[-2])
+        parquetFile = pq.ParquetFile(self.parquetToRemap)
+        for chunkIndex, batch in enumerate(parquetFile.iter_batches(batch_size=self.chunkSize)):
+            outputFilename = f'{existingPathParts[-1].split(".")[0]}_{chunkIndex}.parquet'
+            chunk = batch.to_pandas()
+            for column, columnRemapper in self.columnRemappers.items():
+                chunk[column] = columnRemapper.remap(column=chunk[column])
+            pq.write_table(pa.Table.from_pandas(chunk, preserve_index=False), f"{outputPath}/{outputFilename}")
@@ -0,0 +1,65 @@
+from multiprocessing.managers import SyncManager
+from pathlib import Path
+from typing import Any, Dict, Union
+
+from historical_odds_processing.store.db_creation.id_mapping import IdMapping
+from historical_odds_processing.store.db_creation.id_mapping import get_final_mapping_path
+from historical_odds_processing.store.db_creation.output_filenames import OutputFilenames
+
+ENCODED_COLUMN_MAPPINGS = {
+    "betting_type": OutputFilenames.BETTING_TYPES,
+    "market_type": OutputFilenames.MARKET_TYPES,
+    "country_code": OutputFilenames.COUNTRY_CODES,
+    "timezone": OutputFilenames.TIMEZONES,
+    "market_status": OutputFilenames.MARKET_STATUS,
+    "status_id": OutputFilenames.RUNNER_STATUS,
+    "betfair_runner_table_id": OutputFilenames.RUNNERS,
+}
+
+
+def load_final_mappings(outputDirectory: Union[str, Path]) -> Dict[str, Dict[Any, int]]:
+    return {
+        mappingName: IdMapping.load_or_create(
+            filePath=get_final_mapping_path(outputDirectory=outputDirectory, mappingName=mappingName)
+        ).to_dict()
+        for mappingName in OutputFilenames.ALL_MAPPING_FILES
+    }
+
+
+class SharedIdEncoder:
+    def __init__(self, manager: SyncManager, initialMappings: Dict[str, Dict[Any, int]] = None):
+        # ids are handed out by manager-backed dicts, so every worker process agrees on them without a remap stage
+        initialMappings = initialMappings or {}
+        self.sharedMappings = {
+            mappingName: manager.dict(initialMappings.get(mappingName, {}))
+            for mappingName in OutputFilenames.ALL_MAPPING_FILES
+        }
+        self.lock = manager.Lock()
+        self.localCaches = {mappingName: {} for mappingName in OutputFilenames.ALL_MAPPING_FILES}
+
+    @classmethod
+    def from_final_mappings(cls, manager: SyncManager, outputDirectory: Union[str, Path]) -> "SharedIdEncoder":
+        return cls(manager=manager, initialMappings=load_final_mappings(outputDirectory=outputDirectory))
+
+    def encode(self, mappingName: str, value: Any) -> int:
+        localCache = self.localCaches[mappingName]
+        encodedValue = localCache.get(value)
+        if encodedValue is None:
+            sharedMapping = self.sharedMappings[mappingName]
+            with self.lock:
+                encodedValue = sharedMapping.get(value)
+                if encodedValue is None:
+                    encodedValue = len(sharedMapping)
+                    sharedMapping[value] = encodedValue
+            localCache[value] = encodedValue
+        return encodedValue
+
+    def get_mappings(self) -> Dict[str, Dict[Any, int]]:
+        with self.lock:
+            return {mappingName: sharedMapping.copy() for mappingName, sharedMapping in self.sharedMappings.items()}
+
+    def save_final_mappings(self, outputDirectory: Union[str, Path]) -> None:
+        for mappingName, mapping in self.get_mappings().items():
+            IdMapping.from_dict(mapping=mapping).save(
+                filePath=get_final_mapping_path(outputDirectory=outputDirectory, mappingName=mappingName)
+            )
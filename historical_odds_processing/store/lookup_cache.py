@@ -0,0 +1,38 @@
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class LRUCache:
+    def __init__(self, maxSize: Optional[int] = None):
+        # maxSize=None keeps every entry, which is what the small, fully preloaded lookup tables use
+        self.maxSize = maxSize
+        self.entries = OrderedDict()
+        self.numHits = 0
+        self.numMisses = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.entries
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        if key not in self.entries:
+            self.numMisses += 1
+            return None
+        self.numHits += 1
+        self.entries.move_to_end(key)
+        return self.entries[key]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if self.maxSize is not None and len(self.entries) > self.maxSize:
+            self.entries.popitem(last=False)
+
+    def update(self, entries: Dict[Hashable, Any]) -> None:
+        for key, value in entries.items():
+            self.put(key=key, value=value)
+
+    def clear(self) -> None:
+        self.entries.clear()
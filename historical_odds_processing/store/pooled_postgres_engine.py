@@ -0,0 +1,198 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from hashlib import md5
+import logging
+import re
+import threading
+from time import monotonic
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+import pandas as pd
+import psycopg2
+import psycopg2.extensions
+from easy_postgres_engine.postgres_engine import replace_nan_with_none_in_dataframe
+from psycopg2.pool import ThreadedConnectionPool
+
+from historical_odds_processing.store.postgres_insertion_engine import PostgresInsertionEngine
+from historical_odds_processing.store.postgres_query_engine import PostgresQueryEngine
+
+QUERY_PARAMETER_PATTERN = re.compile(r"%\((\w+)\)s")
+
+
+class PooledConnection(psycopg2.extensions.connection):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.preparedStatements = set()
+        self.lastCheckedTime = monotonic()
+
+
+@lru_cache(maxsize=1024)
+def get_prepared_statement(query: str) -> Tuple[str, str, Tuple[str, ...]]:
+    # named parameters become positional ones, and each distinct query text gets its own statement name
+    parameterNames = tuple(dict.fromkeys(QUERY_PARAMETER_PATTERN.findall(query)))
+    preparedQuery = QUERY_PARAMETER_PATTERN.sub(lambda match: f"${parameterNames.index(match.group(1)) + 1}", query)
+    return f"statement_{md5(query.encode()).hexdigest()[:16]}", preparedQuery, parameterNames
+
+
+class PooledConnectionMixin:
+    def __init__(
+        self,
+        minConnections: int = 1,
+        maxConnections: int = 8,
+        healthCheckIntervalSeconds: float = 30.0,
+        usePreparedStatements: bool = True,
+        **kwargs,
+    ):
+        # the engine's connection and cursor are per thread, so every inherited query method can be called concurrently
+        self.threadState = threading.local()
+        super().__init__(**kwargs)
+        self.maxConnections = maxConnections
+        self.healthCheckIntervalSeconds = healthCheckIntervalSeconds
+        self.usePreparedStatements = usePreparedStatements
+        self.unpreparableQueries = set()
+        # psycopg2's pool raises when it's exhausted, so threads wait here for a free connection instead
+        self.availableConnections = threading.BoundedSemaphore(value=maxConnections)
+        self.connectionPool = ThreadedConnectionPool(
+            minconn=minConnections,
+            maxconn=maxConnections,
+            user=self.user,
+            password=self.password,
+            host=self.host,
+            port=self.port,
+            database=self.databaseName,
+            connection_factory=PooledConnection,
+        )
+
+    @property
+    def connection(self) -> Optional[PooledConnection]:
+        return getattr(self.threadState, "connection", None)
+
+    @connection.setter
+    def connection(self, connection: Optional[PooledConnection]) -> None:
+        self.threadState.connection = connection
+
+    @property
+    def cursor(self) -> Optional[psycopg2.extensions.cursor]:
+        return getattr(self.threadState, "cursor", None)
+
+    @cursor.setter
+    def cursor(self, cursor: Optional[psycopg2.extensions.cursor]) -> None:
+        self.threadState.cursor = cursor
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close_pool()
+
+    def _is_healthy(self, connection: PooledConnection) -> bool:
+        if connection.closed:
+            return False
+        if monotonic() - connection.lastCheckedTime < self.healthCheckIntervalSeconds:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            connection.rollback()
+        except psycopg2.Error:
+            return False
+        connection.lastCheckedTime = monotonic()
+        return True
+
+    def _get_connection(self) -> None:
+        if self.connection is not None:
+            # a query that raised before closing leaves its connection checked out
+            self.close()
+        self.availableConnections.acquire()
+        for _ in range(self.maxConnections + 1):
+            connection = self.connectionPool.getconn()
+            if self._is_healthy(connection=connection):
+                self.connection = connection
+                return
+            logging.warning("Discarding broken pooled connection")
+            self.connectionPool.putconn(connection, close=True)
+        self.availableConnections.release()
+        raise psycopg2.OperationalError("No healthy connection available in the pool")
+
+    def close(self) -> None:
+        if self.cursor is not None:
+            self.cursor.close()
+            self.cursor = None
+        if self.connection is not None:
+            # the pool rolls back anything left open and closes connections that are broken
+            self.connectionPool.putconn(self.connection)
+            self.connection = None
+            self.availableConnections.release()
+
+    def close_pool(self) -> None:
+        self.close()
+        self.connectionPool.closeall()
+
+    def _execute(self, cursor: psycopg2.extensions.cursor, query: str, parameters: Optional[Dict[str, Any]] = None) -> None:
+        if not self.usePreparedStatements or parameters is None or query in self.unpreparableQueries:
+            super()._execute(cursor=cursor, query=query, parameters=parameters)
+            return
+        statementName, preparedQuery, parameterNames = get_prepared_statement(query=query)
+        if statementName not in self.connection.preparedStatements:
+            try:
+                cursor.execute(f"PREPARE {statementName} AS {preparedQuery}")
+            except psycopg2.ProgrammingError:
+                # postgres couldn't infer the parameter types, so the query is left unprepared
+                self.connection.rollback()
+                self.unpreparableQueries.add(query)
+                super()._execute(cursor=cursor, query=query, parameters=parameters)
+                return
+            self.connection.preparedStatements.add(statementName)
+        executeArguments = ", ".join(f"%({parameterName})s" for parameterName in parameterNames)
+        cursor.execute(f"EXECUTE {statementName}({executeArguments})", parameters)
+
+    def run_select_query(self, query: str, parameters: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+        self._get_connection()
+        self._get_cursor(isInsertionQuery=False)
+        try:
+            self._execute(cursor=self.cursor, query=query, parameters=parameters)
+            outputs = self.cursor.fetchall()
+        finally:
+            self.close()
+        return replace_nan_with_none_in_dataframe(dataframe=pd.DataFrame(outputs))
+
+
+class PooledPostgresQueryEngine(PooledConnectionMixin, PostgresQueryEngine):
+    pass
+
+
+class PooledPostgresInsertionEngine(PooledConnectionMixin, PostgresInsertionEngine):
+    pass
+
+
+class AsyncPostgresQueryEngine:
+    def __init__(self, pooledEngine: PooledConnectionMixin):
+        # queries run on threads holding pooled connections, so coroutines can have up to maxConnections queries in flight
+        self.pooledEngine = pooledEngine
+        self.executor = ThreadPoolExecutor(max_workers=pooledEngine.maxConnections)
+
+    async def __aenter__(self) -> "AsyncPostgresQueryEngine":
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        self.close()
+
+    async def run(self, function: Callable[..., Any], **kwargs) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self.executor, partial(function, **kwargs))
+
+    async def run_select_query(self, query: str, parameters: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+        return await self.run(self.pooledEngine.run_select_query, query=query, parameters=parameters)
+
+    async def get_odds_time_series(self, betfairMarketId: str, **kwargs) -> pd.DataFrame:
+        return await self.run(self.pooledEngine.get_odds_time_series, betfairMarketId=betfairMarketId, **kwargs)
+
+    async def get_many_odds_time_series(self, betfairMarketIds: Sequence[str], **kwargs) -> Dict[str, pd.DataFrame]:
+        oddsTimeSeries = await asyncio.gather(
+            *[self.get_odds_time_series(betfairMarketId=betfairMarketId, **kwargs) for betfairMarketId in betfairMarketIds]
+        )
+        return dict(zip(betfairMarketIds, oddsTimeSeries))
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True)
+        self.pooledEngine.close_pool()
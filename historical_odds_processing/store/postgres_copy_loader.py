@@ -0,0 +1,194 @@
+import gzip
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from io import BytesIO
+from pathlib import Path
+from time import perf_counter, sleep
+from typing import BinaryIO, Callable, Optional, Sequence, Tuple, Union
+
+import psycopg2
+from psycopg2.pool import ThreadedConnectionPool
+from tqdm.auto import tqdm
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import pyarrow.csv as pacsv
+    import pyarrow.parquet as pq
+except ImportError:
+    pacsv = None
+    pq = None
+
+TRANSIENT_ERRORS = (psycopg2.OperationalError, psycopg2.extensions.TransactionRollbackError)
+
+
+class ByteCountingReader:
+    def __init__(self, stream: BinaryIO):
+        self.stream = stream
+        self.bytesRead = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.stream.read(size)
+        self.bytesRead += len(data)
+        return data
+
+    def readline(self, size: int = -1) -> bytes:
+        data = self.stream.readline(size)
+        self.bytesRead += len(data)
+        return data
+
+    def close(self) -> None:
+        self.stream.close()
+
+
+def open_copy_stream(filePath: Union[str, Path], columnNames: Sequence[str]) -> BinaryIO:
+    # every file is streamed to postgres as CSV with a header row, whatever format it was written in
+    suffix = Path(filePath).suffix
+    if suffix == ".gz":
+        return gzip.open(filePath, "rb")
+    if suffix == ".zst":
+        if zstandard is None:
+            raise ImportError("zstandard must be installed to load zstd compressed CSVs")
+        return zstandard.open(filePath, "rb")
+    if suffix == ".parquet":
+        if pq is None:
+            raise ImportError("pyarrow must be installed to load parquet files")
+        csvBuffer = BytesIO()
+        pacsv.write_csv(pq.read_table(filePath, columns=list(columnNames)), csvBuffer)
+        csvBuffer.seek(0)
+        return csvBuffer
+    return open(filePath, "rb")
+
+
+class CopyLoadStats:
+    def __init__(self, tableName: str):
+        self.tableName = tableName
+        self.numFiles = 0
+        self.numRows = 0
+        self.numBytes = 0
+        self.elapsedSeconds = 0.0
+
+    @property
+    def rowsPerSecond(self) -> float:
+        return self.numRows / self.elapsedSeconds if self.elapsedSeconds > 0 else 0.0
+
+    @property
+    def megabytesPerSecond(self) -> float:
+        return self.numBytes / 2**20 / self.elapsedSeconds if self.elapsedSeconds > 0 else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.tableName}: {self.numFiles} files, {self.numRows:,} rows in {self.elapsedSeconds:.1f}s "
+            f"({self.rowsPerSecond:,.0f} rows/sec, {self.megabytesPerSecond:.1f} MB/sec)"
+        )
+
+
+class PostgresCopyLoader:
+    def __init__(
+        self,
+        user: str,
+        password: str,
+        databaseName: str = "betfair_odds_data",
+        host: str = "localhost",
+        port: int = 5432,
+        numConnections: int = 4,
+        maxRetries: int = 3,
+        retryDelaySeconds: float = 1.0,
+    ):
+        self.numConnections = numConnections
+        self.maxRetries = maxRetries
+        self.retryDelaySeconds = retryDelaySeconds
+        # files are streamed over COPY FROM STDIN, so they don't need to be on the database host
+        self.connectionPool = ThreadedConnectionPool(
+            minconn=1, maxconn=numConnections, user=user, password=password, host=host, port=port, database=databaseName
+        )
+
+    def __enter__(self) -> "PostgresCopyLoader":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def copy_file(self, tableName: str, columnNames: Sequence[str], filePath: Union[str, Path]) -> Tuple[int, int]:
+        copyQuery = f"COPY {tableName}({', '.join(columnNames)}) FROM STDIN WITH (FORMAT CSV, HEADER TRUE)"
+        for attempt in range(self.maxRetries + 1):
+            connection, isCommitting = None, False
+            try:
+                connection = self.connectionPool.getconn()
+                stream = ByteCountingReader(stream=open_copy_stream(filePath=filePath, columnNames=columnNames))
+                try:
+                    with connection.cursor() as cursor:
+                        cursor.copy_expert(sql=copyQuery, file=stream)
+                        numRows = cursor.rowcount
+                    isCommitting = True
+                    connection.commit()
+                finally:
+                    stream.close()
+                self.connectionPool.putconn(connection)
+                return numRows, stream.bytesRead
+            except TRANSIENT_ERRORS as ex:
+                # each file is copied in its own transaction, so a failed attempt leaves nothing behind to clean up. That
+                # isn't known when the commit itself fails, as the file may have been loaded, so it isn't retried
+                if connection is not None:
+                    self.connectionPool.putconn(connection, close=True)
+                if isCommitting or attempt == self.maxRetries:
+                    raise ex
+                logging.warning(f"Retrying copy of {filePath} into {tableName} after error: {ex}")
+                sleep(self.retryDelaySeconds * 2**attempt)
+            except Exception as ex:
+                if connection is not None:
+                    connection.rollback()
+                    self.connectionPool.putconn(connection)
+                logging.exception(f"error: {ex} \ncopyQuery: {copyQuery}\nfile: {filePath}")
+                raise ex
+
+    def load_files(
+        self,
+        tableName: str,
+        columnNames: Sequence[str],
+        filePaths: Sequence[Union[str, Path]],
+        showProgress: bool = True,
+        fileLoadedCallback: Optional[Callable[[Union[str, Path]], None]] = None,
+    ) -> CopyLoadStats:
+        # fileLoadedCallback is called with each file as soon as its copy is committed. After a failure, files that haven't
+        # started copying are cancelled, and the files already committed are still reported before the error is raised
+        loadStats = CopyLoadStats(tableName=tableName)
+        startTime = perf_counter()
+        loadError = None
+        with ThreadPoolExecutor(max_workers=self.numConnections) as executor:
+            futures = {
+                executor.submit(self.copy_file, tableName=tableName, columnNames=columnNames, filePath=filePath): filePath
+                for filePath in filePaths
+            }
+            progressBar = tqdm(total=len(futures), desc=f"copying into {tableName}", disable=not showProgress)
+            for future in as_completed(futures):
+                if future.cancelled():
+                    continue
+                if future.exception() is not None:
+                    loadError = loadError or future.exception()
+                    for pendingFuture in futures:
+                        pendingFuture.cancel()
+                    continue
+                numRows, numBytes = future.result()
+                if fileLoadedCallback is not None:
+                    fileLoadedCallback(futures[future])
+                loadStats.numFiles += 1
+                loadStats.numRows += numRows
+                loadStats.numBytes += numBytes
+                loadStats.elapsedSeconds = perf_counter() - startTime
+                progressBar.set_postfix(
+                    rows_per_sec=f"{loadStats.rowsPerSecond:,.0f}", mb_per_sec=f"{loadStats.megabytesPerSecond:.1f}"
+                )
+                progressBar.update(1)
+            progressBar.close()
+        if loadError is not None:
+            raise loadError
+        loadStats.elapsedSeconds = perf_counter() - startTime
+        logging.info(str(loadStats))
+        return loadStats
+
+    def close(self) -> None:
+        self.connectionPool.closeall()
@@ -1,22 +1,157 @@
 from datetime import datetime
-from typing import Any, Dict
+import logging
+from typing import Any, Dict, IO, Optional, Sequence
+
+import pandas as pd
+import psycopg2
+import psycopg2.extras
 
 from historical_odds_processing.datamodel.constants import BETFAIR_DATETIME_FORMAT
+from historical_odds_processing.datamodel.data_store_schema.database_components import Table
+from historical_odds_processing.datamodel.data_store_schema.historical_trading_schema import LastTradedPrice
 from historical_odds_processing.store.postgres_query_engine import PostgresQueryEngine
 from utils.text_processing import clean_text
 
 
+def get_market_definition_values(
+    betfairMarketId: str, eventId: int, unixTimestamp: int, marketStatusId: int, marketDefinition: Dict[str, Any]
+) -> Dict[str, Any]:
+    marketStartTime = marketDefinition.get("marketTime")
+    marketSuspendTime = marketDefinition.get("suspendTime")
+    openDate = marketDefinition.get("openDate")
+    return {
+        "betfair_market_id": betfairMarketId,
+        "event_id": eventId,
+        "unix_timestamp": unixTimestamp,
+        "version": marketDefinition.get("version"),
+        "bsp_market": marketDefinition.get("bspMarket"),
+        "turn_in_play_enabled": marketDefinition.get("turnInPlayEnabled"),
+        "persistence_enabled": marketDefinition.get("persistenceEnabled"),
+        "market_base_rate": marketDefinition.get("marketBaseRate"),
+        "num_winners": marketDefinition.get("numberOfWinners"),
+        "market_start_time": (
+            datetime.strptime(marketStartTime.split(".")[0], BETFAIR_DATETIME_FORMAT) if marketStartTime is not None else None
+        ),
+        "market_suspend_time": (
+            datetime.strptime(marketSuspendTime.split(".")[0], BETFAIR_DATETIME_FORMAT)
+            if marketSuspendTime is not None
+            else None
+        ),
+        "bsp_reconciled": marketDefinition.get("bspReconciled"),
+        "market_is_complete": marketDefinition.get("complete"),
+        "in_play": marketDefinition.get("inPlay"),
+        "cross_matching": marketDefinition.get("crossMatching"),
+        "runners_voidable": marketDefinition.get("runnersVoidable"),
+        "num_active_runners": marketDefinition.get("numberOfActiveRunners"),
+        "bet_delay": marketDefinition.get("betDelay"),
+        "market_status": marketStatusId,
+        "regulators": marketDefinition.get("regulators"),
+        "discount_allowed": marketDefinition.get("discountAllowed"),
+        "open_date": datetime.strptime(openDate.split(".")[0], BETFAIR_DATETIME_FORMAT) if openDate is not None else None,
+    }
+
+
 class PostgresInsertionEngine(PostgresQueryEngine):
     def __init__(
-        self, user: str, password: str, databaseName: str = "betfair_odds_data", host: str = "localhost", port: int = 5432
+        self,
+        user: str,
+        password: str,
+        databaseName: str = "betfair_odds_data",
+        host: str = "localhost",
+        port: int = 5432,
+        useLookupCache: bool = False,
+        runnerCacheSize: int = 100000,
     ):
-        super().__init__(user=user, password=password, databaseName=databaseName, host=host, port=port)
+        super().__init__(
+            user=user,
+            password=password,
+            databaseName=databaseName,
+            host=host,
+            port=port,
+            useLookupCache=useLookupCache,
+            runnerCacheSize=runnerCacheSize,
+        )
+        self.lastTradedPriceTable = LastTradedPrice()
+        self.createdPartitionsSql = set()
+
+    def create_partitions(self, table: Table, minValue: int, maxValue: int) -> None:
+        # partitioned tables have no default partition, so rows can only be written once their partition exists. Partitions
+        # this engine has already created are remembered, so live inserts only create each one once
+        if table.partitioning is None:
+            return
+        for partitionSql in table.partitioning.get_partitions_sql(
+            tableName=table.tableName, minValue=minValue, maxValue=maxValue
+        ):
+            if partitionSql not in self.createdPartitionsSql:
+                self.create_table(schema=partitionSql)
+                self.createdPartitionsSql.add(partitionSql)
+
+    def copy_from_stream(self, tableName: str, columnNames: Sequence[str], stream: IO) -> None:
+        self._get_connection()
+        self._get_cursor(isInsertionQuery=True)
+        copyQuery = f"COPY {tableName}({', '.join(columnNames)}) FROM STDIN WITH (FORMAT CSV, HEADER TRUE)"
+        try:
+            self.cursor.copy_expert(sql=copyQuery, file=stream)
+            self.connection.commit()
+            self.invalidate_lookup_caches(tableName=tableName)
+        except Exception as ex:
+            logging.exception(f"error: {ex} \ncopyQuery: {copyQuery}")
+            raise ex
+        finally:
+            self.close()
+
+    def insert_rows(self, tableName: str, columnNames: Sequence[str], rows: Sequence[Sequence[Any]]) -> None:
+        # one multi-row statement per page instead of a round trip per row
+        self._get_connection()
+        self._get_cursor(isInsertionQuery=True)
+        insertQuery = f"INSERT INTO {tableName}({', '.join(columnNames)}) VALUES %s ON CONFLICT DO NOTHING"
+        try:
+            psycopg2.extras.execute_values(self.cursor, insertQuery, rows, page_size=1000)
+            self.connection.commit()
+            self.invalidate_lookup_caches(tableName=tableName)
+        except Exception as ex:
+            logging.exception(f"error: {ex} \ninsertQuery: {insertQuery}")
+            raise ex
+        finally:
+            self.close()
+
+    def run_autocommit_query(self, query: str, sessionSettings: Optional[Dict[str, Any]] = None) -> None:
+        # CREATE INDEX CONCURRENTLY can't run inside a transaction block, and a local connection lets threads share the engine
+        connection = psycopg2.connect(
+            user=self.user, password=self.password, host=self.host, port=self.port, database=self.databaseName
+        )
+        connection.autocommit = True
+        try:
+            with connection.cursor() as cursor:
+                for settingName, settingValue in (sessionSettings or {}).items():
+                    cursor.execute("SELECT set_config(%s, %s, false);", (settingName, str(settingValue)))
+                cursor.execute(query)
+        except Exception as ex:
+            logging.exception(f"error: {ex} \nquery: {query}")
+            raise ex
+        finally:
+            connection.close()
+
+    def run_select_query_in_transaction(self, query: str, parameters: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+        # for statements that both write and return rows, which run_select_query would never commit
+        self._get_connection()
+        self._get_cursor(isInsertionQuery=False)
+        try:
+            self.cursor.execute(query, parameters)
+            outputs = self.cursor.fetchall()
+            self.connection.commit()
+        except Exception as ex:
+            logging.exception(f"error: {ex} \nquery: {query} \nparameters: {parameters}")
+            raise ex
+        finally:
+            self.close()
+        return pd.DataFrame(outputs)
 
     def insert_betting_type(self, bettingTypeName: str) -> int:
         existingId = self.get_betting_type_index(bettingTypeName=bettingTypeName)
         if existingId is not None:
             return existingId
-        return self.run_update_query(
+        insertedId = self.run_update_query(
             query="""
                 INSERT INTO
                     tbl_betfair_betting_types(betting_type_name)
@@ -25,12 +160,14 @@ class PostgresInsertionEngine(PostgresQueryEngine):
             """,
             parameters={"bettingTypeName": clean_text(text=bettingTypeName)},
         )
+        self.invalidate_lookup_caches(tableName="tbl_betfair_betting_types")
+        return insertedId
 
     def insert_market_type(self, marketType: str) -> int:
         existingId = self.get_market_type_index(marketType=marketType)
         if existingId is not None:
             return existingId
-        return self.run_update_query(
+        insertedId = self.run_update_query(
             query="""
                 INSERT INTO
                     tbl_betfair_market_types(market_type)
@@ -39,12 +176,14 @@ class PostgresInsertionEngine(PostgresQueryEngine):
             """,
             parameters={"marketType": clean_text(text=marketType)},
         )
+        self.invalidate_lookup_caches(tableName="tbl_betfair_market_types")
+        return insertedId
 
     def insert_market_status(self, marketStatus: str) -> int:
         existingId = self.get_market_status_index(marketStatus=marketStatus)
         if existingId is not None:
             return existingId
-        return self.run_update_query(
+        insertedId = self.run_update_query(
             query="""
                 INSERT INTO
                     tbl_betfair_market_status(market_status_name)
@@ -53,12 +192,14 @@ class PostgresInsertionEngine(PostgresQueryEngine):
             """,
             parameters={"marketStatus": clean_text(text=marketStatus)},
         )
+        self.invalidate_lookup_caches(tableName="tbl_betfair_market_status")
+        return insertedId
 
     def insert_country_code(self, countryCode: str) -> int:
         existingId = self.get_country_code_index(countryCode=countryCode)
         if existingId is not None:
             return existingId
-        return self.run_update_query(
+        insertedId = self.run_update_query(
             query="""
                 INSERT INTO
                     tbl_betfair_country_codes(country_code)
@@ -67,12 +208,14 @@ class PostgresInsertionEngine(PostgresQueryEngine):
             """,
             parameters={"countryCode": clean_text(text=countryCode)},
         )
+        self.invalidate_lookup_caches(tableName="tbl_betfair_country_codes")
+        return insertedId
 
     def insert_timezone(self, timezone: str) -> int:
         existingId = self.get_timezone_index(timezone=timezone)
         if existingId is not None:
             return existingId
-        return self.run_update_query(
+        insertedId = self.run_update_query(
             query="""
                 INSERT INTO
                     tbl_betfair_timezones(timezone)
@@ -81,6 +224,8 @@ class PostgresInsertionEngine(PostgresQueryEngine):
             """,
             parameters={"timezone": clean_text(text=timezone)},
         )
+        self.invalidate_lookup_caches(tableName="tbl_betfair_timezones")
+        return insertedId
 
     def insert_market(
         self,
@@ -93,22 +238,36 @@ class PostgresInsertionEngine(PostgresQueryEngine):
         countryCodeId: int,
         timezoneId: int,
     ) -> int:
-        existingId = self.get_market(betfairEventId=eventId, betfairMarketId=betfairMarketId)
-        if existingId is not None:
-            return int(existingId["id"].values[0])
-        return self.run_update_query(
+        # get or insert in one round trip, which also works on databases without a unique index on the market
+        output = self.run_select_query_in_transaction(
             query="""
-                INSERT INTO
-                    tbl_betfair_markets
-                    (
-                        betfair_market_id, event_name, event_id, event_type_id, betting_type, market_type,
-                        country_code, timezone
-                    )
-                VALUES
-                    (
+                WITH existing_market AS (
+                    SELECT
+                        id
+                    FROM
+                        tbl_betfair_markets
+                    WHERE
+                        betfair_market_id = %(betfairMarketId)s AND
+                        event_id = %(eventId)s
+                ), inserted_market AS (
+                    INSERT INTO
+                        tbl_betfair_markets
+                        (
+                            betfair_market_id, event_name, event_id, event_type_id, betting_type, market_type,
+                            country_code, timezone
+                        )
+                    SELECT
                         %(betfairMarketId)s, %(eventName)s, %(eventId)s, %(eventTypeId)s, %(bettingType)s, %(marketType)s,
                         %(countryCode)s, %(timezone)s
-                    )
+                    WHERE
+                        NOT EXISTS (SELECT 1 FROM existing_market)
+                    ON CONFLICT DO NOTHING
+                    RETURNING
+                        id
+                )
+                SELECT id FROM inserted_market
+                UNION ALL
+                SELECT id FROM existing_market
             """,
             parameters={
                 "betfairMarketId": betfairMarketId,
@@ -121,70 +280,41 @@ class PostgresInsertionEngine(PostgresQueryEngine):
                 "timezone": timezoneId,
             },
         )
+        if len(output) == 0:
+            # a concurrent writer inserted the market after this statement's snapshot was taken
+            return int(self.get_market(betfairEventId=eventId, betfairMarketId=betfairMarketId)["id"].values[0])
+        return int(output["id"].values[0])
 
     def insert_market_definition(
         self, betfairMarketId: str, eventId: int, unixTimestamp: int, marketStatusId: int, marketDefinition: Dict[str, Any]
     ) -> int:
-        marketStartTime = marketDefinition.get("marketTime")
-        marketSuspendTime = marketDefinition.get("suspendTime")
-        openDate = marketDefinition.get("openDate")
+        columnValues = get_market_definition_values(
+            betfairMarketId=betfairMarketId,
+            eventId=eventId,
+            unixTimestamp=unixTimestamp,
+            marketStatusId=marketStatusId,
+            marketDefinition=marketDefinition,
+        )
         return self.run_update_query(
-            query="""
+            query=f"""
                 INSERT INTO
                     tbl_betfair_market_definitions
                     (
-                        betfair_market_id, event_id, unix_timestamp, version, bsp_market,
-                        turn_in_play_enabled, persistence_enabled, market_base_rate, num_winners,
-                        market_start_time, market_suspend_time, bsp_reconciled, market_is_complete,
-                        in_play, cross_matching, runners_voidable, num_active_runners, bet_delay,
-                        market_status, regulators, discount_allowed, open_date
+                        {', '.join(columnValues.keys())}
                     )
                 VALUES
                     (
-                        %(betfairMarketId)s, %(eventId)s, %(unixTimestamp)s, %(version)s, %(bspMarket)s,
-                        %(turnInPlayEnabled)s, %(persistenceEnabled)s, %(marketBaseRate)s, %(numWinners)s,
-                        %(marketStartTime)s, %(marketSuspendTime)s, %(bspReconciled)s, %(marketIsComplete)s,
-                        %(inPlay)s, %(crossMatching)s, %(runnersVoidable)s, %(numActiveRunners)s, %(betDelay)s,
-                        %(marketStatus)s, %(regulators)s, %(discountAllowed)s, %(openDate)s
+                        {', '.join(f'%({columnName})s' for columnName in columnValues.keys())}
                     )
             """,
-            parameters={
-                "betfairMarketId": betfairMarketId,
-                "eventId": eventId,
-                "unixTimestamp": unixTimestamp,
-                "version": marketDefinition.get("version"),
-                "bspMarket": marketDefinition.get("bspMarket"),
-                "turnInPlayEnabled": marketDefinition.get("turnInPlayEnabled"),
-                "persistenceEnabled": marketDefinition.get("persistenceEnabled"),
-                "marketBaseRate": marketDefinition.get("marketBaseRate"),
-                "numWinners": marketDefinition.get("numberOfWinners"),
-                "marketStartTime": datetime.strptime(marketStartTime.split(".")[0], BETFAIR_DATETIME_FORMAT)
-                if marketStartTime is not None
-                else None,
-                "marketSuspendTime": datetime.strptime(marketSuspendTime.split(".")[0], BETFAIR_DATETIME_FORMAT)
-                if marketSuspendTime is not None
-                else None,
-                "bspReconciled": marketDefinition.get("bspReconciled"),
-                "marketIsComplete": marketDefinition.get("complete"),
-                "inPlay": marketDefinition.get("inPlay"),
-                "crossMatching": marketDefinition.get("crossMatching"),
-                "runnersVoidable": marketDefinition.get("runnersVoidable"),
-                "numActiveRunners": marketDefinition.get("numberOfActiveRunners"),
-                "betDelay": marketDefinition.get("betDelay"),
-                "marketStatus": marketStatusId,
-                "regulators": marketDefinition.get("regulators"),
-                "discountAllowed": marketDefinition.get("discountAllowed"),
-                "openDate": datetime.strptime(openDate.split(".")[0], BETFAIR_DATETIME_FORMAT)
-                if openDate is not None
-                else None,
-            },
+            parameters=columnValues,
         )
 
     def insert_runner(self, runnerName: str, betfairId: int) -> int:
         existingId = self.get_runner_id_by_betfair_id(betfairRunnerId=betfairId)
         if existingId is not None:
             return existingId
-        return self.run_update_query(
+        insertedId = self.run_update_query(
             query="""
                 INSERT INTO
                     tbl_betfair_runners(runner_name, betfair_id)
@@ -196,12 +326,15 @@ class PostgresInsertionEngine(PostgresQueryEngine):
                 "betfairId": betfairId,
             },
         )
+        if self.useLookupCache:
+            self.runnerCache.put(key=betfairId, value=insertedId)
+        return insertedId
 
     def insert_runner_status(self, runnerStatus: str) -> int:
         existingId = self.get_runner_status_id(runnerStatus=runnerStatus)
         if existingId is not None:
             return existingId
-        return self.run_update_query(
+        insertedId = self.run_update_query(
             query="""
                 INSERT INTO
                     tbl_betfair_runner_status(status)
@@ -210,6 +343,8 @@ class PostgresInsertionEngine(PostgresQueryEngine):
             """,
             parameters={"status": clean_text(text=runnerStatus)},
         )
+        self.invalidate_lookup_caches(tableName="tbl_betfair_runner_status")
+        return insertedId
 
     def insert_runner_status_update(
         self, unixTimestamp: int, statusId: int, betfairMarketId: str, betfairRunnerTableId: int
@@ -237,6 +372,7 @@ class PostgresInsertionEngine(PostgresQueryEngine):
     def insert_last_traded_price(
         self, unixTimestamp: int, betfairMarketId: str, betfairRunnerTableId: int, price: float
     ) -> int:
+        self.create_partitions(table=self.lastTradedPriceTable, minValue=unixTimestamp, maxValue=unixTimestamp)
         return self.run_update_query(
             query="""
                 INSERT INTO
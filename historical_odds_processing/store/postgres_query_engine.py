@@ -1,17 +1,165 @@
-from typing import Optional, Union
+import io
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple, Union
 
+import numpy as np
 import pandas as pd
+import psycopg2
+import psycopg2.extensions
 from easy_postgres_engine import PostgresEngine
 
+from historical_odds_processing.datamodel.data_store_schema.odds_series_schema import OddsSeries
+from historical_odds_processing.store.binary_copy_parser import parse_binary_copy
+from historical_odds_processing.store.lookup_cache import LRUCache
+
+# small mapping tables that are cached whole, so a value missing from the cache is missing from the table
+LOOKUP_TABLE_COLUMNS = {
+    "tbl_betfair_betting_types": "betting_type_name",
+    "tbl_betfair_market_types": "market_type",
+    "tbl_betfair_market_status": "market_status_name",
+    "tbl_betfair_country_codes": "country_code",
+    "tbl_betfair_timezones": "timezone",
+    "tbl_betfair_runner_status": "status",
+}
+RUNNERS_TABLE_NAME = "tbl_betfair_runners"
+ODDS_SERIES_ARRAY_COLUMNS = ("unix_timestamp", "runner_betfair_id", "price")
+MISSING_RUNNER_ID = -1
+ODDS_SERIES_ARRAY_DTYPES = {"unix_timestamp": np.int64, "runner_betfair_id": np.int64, "price": np.float64}
+# the casts and defaults get_odds_series_arrays applies, done in the query so binary COPY sees fixed width values
+ODDS_SERIES_ARRAY_SELECT = f"""
+    unix_timestamp::BIGINT AS unix_timestamp,
+    COALESCE(runner_betfair_id, {MISSING_RUNNER_ID})::BIGINT AS runner_betfair_id,
+    COALESCE(price, 'NaN')::DOUBLE PRECISION AS price
+"""
+
+
+def get_odds_series_arrays(columnValues: Sequence[Tuple[Any, ...]]) -> Dict[str, np.ndarray]:
+    unixTimestamps, runnerBetfairIds, prices = columnValues
+    return {
+        "unix_timestamp": np.asarray(unixTimestamps, dtype=np.int64),
+        "runner_betfair_id": np.asarray(
+            [MISSING_RUNNER_ID if runnerBetfairId is None else runnerBetfairId for runnerBetfairId in runnerBetfairIds],
+            dtype=np.int64,
+        ),
+        # missing prices become NaN
+        "price": np.asarray(prices, dtype=np.float64),
+    }
+
+
+def concatenate_odds_series_arrays(arrayChunks: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    if len(arrayChunks) == 1:
+        return {column: array.copy() for column, array in arrayChunks[0].items()}
+    return {column: np.concatenate([arrayChunk[column] for arrayChunk in arrayChunks]) for column in ODDS_SERIES_ARRAY_COLUMNS}
+
 
 class PostgresQueryEngine(PostgresEngine):
     def __init__(
-        self, user: str, password: str, databaseName: str = "betfair_odds_data", host: str = "localhost", port: int = 5432
+        self,
+        user: str,
+        password: str,
+        databaseName: str = "betfair_odds_data",
+        host: str = "localhost",
+        port: int = 5432,
+        useLookupCache: bool = False,
+        runnerCacheSize: int = 100000,
     ):
         super().__init__(user=user, password=password, databaseName=databaseName, host=host, port=port)
+        # the caches only see writes made through this engine, so they're off for engines shared with bulk loads
+        self.useLookupCache = useLookupCache
+        self.lookupCaches: Dict[str, LRUCache] = {}
+        self.duplicateLookupValues: Dict[str, Set[Any]] = {}
+        self.runnerCache = LRUCache(maxSize=runnerCacheSize)
+        if self.useLookupCache:
+            self.preload_lookup_caches()
+
+    def preload_lookup_caches(self) -> None:
+        # invalidated tables are loaded again on their next lookup
+        for tableName in LOOKUP_TABLE_COLUMNS:
+            self._load_lookup_cache(tableName=tableName)
+
+    def _load_lookup_cache(self, tableName: str) -> None:
+        _, rows = self._fetch_rows(query=f"SELECT id, {LOOKUP_TABLE_COLUMNS[tableName]} AS lookup_value FROM {tableName}")
+        lookupIds, duplicateLookupValues = {}, set()
+        for lookupId, lookupValue in rows:
+            if lookupValue in lookupIds:
+                duplicateLookupValues.add(lookupValue)
+            lookupIds[lookupValue] = int(lookupId)
+        self.lookupCaches[tableName] = LRUCache()
+        self.lookupCaches[tableName].update(
+            entries={key: value for key, value in lookupIds.items() if key is not None and key not in duplicateLookupValues}
+        )
+        self.duplicateLookupValues[tableName] = duplicateLookupValues
+
+    def invalidate_lookup_caches(self, tableName: Optional[str] = None) -> None:
+        # inserted values are cleaned before they're stored, so the small tables are reloaded rather than patched
+        if tableName is None:
+            self.lookupCaches.clear()
+            self.runnerCache.clear()
+        elif tableName == RUNNERS_TABLE_NAME:
+            self.runnerCache.clear()
+        else:
+            self.lookupCaches.pop(tableName, None)
+
+    def _get_cached_lookup_id(self, tableName: str, lookupValue: Any) -> Tuple[bool, Optional[int]]:
+        # returns whether the cache could answer, and the id if the value exists
+        if not self.useLookupCache or lookupValue is None:
+            return False, None
+        if tableName not in self.lookupCaches:
+            self._load_lookup_cache(tableName=tableName)
+        if lookupValue in self.duplicateLookupValues[tableName]:
+            # left to the query, which raises on duplicates
+            return False, None
+        return True, self.lookupCaches[tableName].get(key=lookupValue)
+
+    def _execute(self, cursor: psycopg2.extensions.cursor, query: str, parameters: Optional[Dict[str, Any]] = None) -> None:
+        cursor.execute(query, parameters)
+
+    def _fetch_rows(self, query: str, parameters: Optional[Dict[str, Any]] = None) -> Tuple[List[str], List[Tuple[Any, ...]]]:
+        # plain tuples straight from the cursor, without building a DataFrame
+        self._get_connection()
+        self._get_cursor(isInsertionQuery=True)
+        try:
+            self._execute(cursor=self.cursor, query=query, parameters=parameters)
+            return [column.name for column in self.cursor.description], self.cursor.fetchall()
+        finally:
+            self.close()
+
+    def run_column_query(self, query: str, parameters: Optional[Dict[str, Any]] = None) -> List[Any]:
+        # the first column of each row, which is all the id and name lookups need
+        _, rows = self._fetch_rows(query=query, parameters=parameters)
+        return [row[0] for row in rows]
+
+    def run_select_arrays(
+        self, query: str, parameters: Optional[Dict[str, Any]] = None, columnDtypes: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, np.ndarray]:
+        columnNames, rows = self._fetch_rows(query=query, parameters=parameters)
+        columnDtypes = columnDtypes or {}
+        columnValues = zip(*rows) if len(rows) > 0 else [()] * len(columnNames)
+        return {
+            columnName: np.asarray(values, dtype=columnDtypes.get(columnName))
+            for columnName, values in zip(columnNames, columnValues)
+        }
+
+    def copy_query_to_arrays(
+        self, query: str, columnDtypes: Dict[str, Any], parameters: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, np.ndarray]:
+        # binary COPY skips the per value text parsing and python objects of a normal fetch, for large results
+        self._get_connection()
+        self._get_cursor(isInsertionQuery=True)
+        try:
+            boundQuery = self.cursor.mogrify(query, parameters).decode()
+            stream = io.BytesIO()
+            self.cursor.copy_expert(sql=f"COPY ({boundQuery}) TO STDOUT WITH (FORMAT BINARY)", file=stream)
+        finally:
+            self.close()
+        return parse_binary_copy(data=stream.getvalue(), columnDtypes=columnDtypes)
 
     def get_betting_type_index(self, bettingTypeName: str) -> Union[int, None]:
-        output = self.run_select_query(
+        isCached, cachedId = self._get_cached_lookup_id(
+            tableName="tbl_betfair_betting_types", lookupValue=bettingTypeName.strip()
+        )
+        if isCached:
+            return cachedId
+        output = self.run_column_query(
             query="""
                 SELECT
                     id
@@ -25,12 +173,15 @@ class PostgresQueryEngine(PostgresEngine):
         if len(output) == 0:
             return None
         elif len(output) == 1:
-            return int(output["id"].values[0])
+            return int(output[0])
         else:
             raise ValueError(f"No single id found for {bettingTypeName} in tbl_betfair_betting_types")
 
     def get_market_type_index(self, marketType: str) -> Union[int, None]:
-        output = self.run_select_query(
+        isCached, cachedId = self._get_cached_lookup_id(tableName="tbl_betfair_market_types", lookupValue=marketType)
+        if isCached:
+            return cachedId
+        output = self.run_column_query(
             query="""
                 SELECT
                     id
@@ -44,12 +195,15 @@ class PostgresQueryEngine(PostgresEngine):
         if len(output) == 0:
             return None
         elif len(output) == 1:
-            return int(output["id"].values[0])
+            return int(output[0])
         else:
             raise ValueError(f"No single id found for {marketType} in tbl_betfair_market_types")
 
     def get_market_status_index(self, marketStatus: str) -> Union[int, None]:
-        output = self.run_select_query(
+        isCached, cachedId = self._get_cached_lookup_id(tableName="tbl_betfair_market_status", lookupValue=marketStatus)
+        if isCached:
+            return cachedId
+        output = self.run_column_query(
             query="""
                 SELECT
                     id
@@ -63,12 +217,15 @@ class PostgresQueryEngine(PostgresEngine):
         if len(output) == 0:
             return None
         elif len(output) == 1:
-            return int(output["id"].values[0])
+            return int(output[0])
         else:
             raise ValueError(f"No single id found for {marketStatus} in tbl_betfair_market_status")
 
     def get_country_code_index(self, countryCode: str) -> Union[int, None]:
-        output = self.run_select_query(
+        isCached, cachedId = self._get_cached_lookup_id(tableName="tbl_betfair_country_codes", lookupValue=countryCode)
+        if isCached:
+            return cachedId
+        output = self.run_column_query(
             query="""
                 SELECT
                     id
@@ -82,12 +239,15 @@ class PostgresQueryEngine(PostgresEngine):
         if len(output) == 0:
             return None
         elif len(output) == 1:
-            return int(output["id"].values[0])
+            return int(output[0])
         else:
             raise ValueError(f"No single id found for {countryCode} in tbl_betfair_country_codes")
 
     def get_timezone_index(self, timezone: str) -> Union[int, None]:
-        output = self.run_select_query(
+        isCached, cachedId = self._get_cached_lookup_id(tableName="tbl_betfair_timezones", lookupValue=timezone)
+        if isCached:
+            return cachedId
+        output = self.run_column_query(
             query="""
                 SELECT
                     id
@@ -101,7 +261,7 @@ class PostgresQueryEngine(PostgresEngine):
         if len(output) == 0:
             return None
         elif len(output) == 1:
-            return int(output["id"].values[0])
+            return int(output[0])
         else:
             raise ValueError(f"No single id found for {timezone} in tbl_betfair_timezones")
 
@@ -190,7 +350,7 @@ class PostgresQueryEngine(PostgresEngine):
             raise ValueError(f"Error getting start time for event: {betfairEventId}")
 
     def get_runner_id_by_name(self, runnerName: str) -> Union[int, None]:
-        output = self.run_select_query(
+        output = self.run_column_query(
             query="""
                 SELECT
                     id
@@ -204,12 +364,15 @@ class PostgresQueryEngine(PostgresEngine):
         if len(output) == 0:
             return None
         elif len(output) == 1:
-            return int(output["id"].values[0])
+            return int(output[0])
         else:
-            return output["id"].values
+            return np.asarray(output)
 
     def get_runner_id_by_betfair_id(self, betfairRunnerId: int) -> Union[int, None]:
-        output = self.run_select_query(
+        # the runners table is too big to preload, so only recently used runners are kept
+        if self.useLookupCache and betfairRunnerId in self.runnerCache:
+            return self.runnerCache.get(key=betfairRunnerId)
+        output = self.run_column_query(
             query="""
                 SELECT
                     id
@@ -223,12 +386,18 @@ class PostgresQueryEngine(PostgresEngine):
         if len(output) == 0:
             return None
         elif len(output) == 1:
-            return int(output["id"].values[0])
+            runnerId = int(output[0])
+            if self.useLookupCache:
+                self.runnerCache.put(key=betfairRunnerId, value=runnerId)
+            return runnerId
         else:
             raise ValueError(f"No single id found for {betfairRunnerId} in tbl_betfair_runners")
 
     def get_runner_status_id(self, runnerStatus: str) -> Union[int, None]:
-        output = self.run_select_query(
+        isCached, cachedId = self._get_cached_lookup_id(tableName="tbl_betfair_runner_status", lookupValue=runnerStatus)
+        if isCached:
+            return cachedId
+        output = self.run_column_query(
             query="""
                 SELECT
                     id
@@ -242,10 +411,68 @@ class PostgresQueryEngine(PostgresEngine):
         if len(output) == 0:
             return None
         elif len(output) == 1:
-            return int(output["id"].values[0])
+            return int(output[0])
         else:
             raise ValueError(f"No single id found for {runnerStatus} in tbl_betfair_runner_status")
 
+    def get_partition_names(self, tableName: str) -> List[str]:
+        return self.run_column_query(
+            query="""
+                SELECT
+                    child.relname AS partition_name
+                FROM
+                    pg_inherits
+                JOIN
+                    pg_class parent ON pg_inherits.inhparent = parent.oid
+                JOIN
+                    pg_class child ON pg_inherits.inhrelid = child.oid
+                WHERE
+                    parent.relname = %(tableName)s
+                ORDER BY
+                    child.relname
+            """,
+            parameters={"tableName": tableName},
+        )
+
+    def get_constraint_names(self, tableName: str) -> List[str]:
+        return self.run_column_query(
+            query="""
+                SELECT
+                    conname AS constraint_name
+                FROM
+                    pg_constraint
+                WHERE
+                    conrelid = %(tableName)s::regclass
+            """,
+            parameters={"tableName": tableName},
+        )
+
+    def get_odds_series_last_refreshed_id(self) -> int:
+        output = self.run_column_query(query="""
+                SELECT
+                    COALESCE(MAX(last_traded_price_id), 0) AS last_refreshed_id
+                FROM
+                    tbl_betfair_odds_series
+            """)
+        return int(output[0])
+
+    def get_new_last_traded_price_summary(self, lastRefreshedId: int) -> Tuple[int, Optional[int], Optional[int]]:
+        _, rows = self._fetch_rows(
+            query="""
+                SELECT
+                    COUNT(*) AS num_rows, MIN(unix_timestamp) AS min_unix_timestamp, MAX(unix_timestamp) AS max_unix_timestamp
+                FROM
+                    tbl_betfair_last_traded_price
+                WHERE
+                    id > %(lastRefreshedId)s
+            """,
+            parameters={"lastRefreshedId": int(lastRefreshedId)},
+        )
+        numRows, minUnixTimestamp, maxUnixTimestamp = rows[0]
+        if numRows == 0:
+            return numRows, None, None
+        return int(numRows), int(minUnixTimestamp), int(maxUnixTimestamp)
+
     def get_last_runner_status_info(self, betfairMarketId: str, betfairRunnerTableId: int) -> Union[pd.DataFrame, None]:
         output = self.run_select_query(
             query="""
@@ -296,22 +523,277 @@ class PostgresQueryEngine(PostgresEngine):
                 f"No last traded price found for runnerId {betfairRunnerTableId}, market: {betfairMarketId} in tbl_betfair_last_traded_price"
             )
 
-    def get_odds_time_series(self, betfairMarketId: str, betfairRunnerTableId: Optional[int] = None) -> pd.DataFrame:
-        runnerTableIdClause = "AND runner_betfair_id = %(betfairRunnerTableId)s"
-        parameters = {"betfairMarketId": betfairMarketId}
-        if betfairRunnerTableId is not None:
-            parameters.update({"betfairRunnerTableId": int(betfairRunnerTableId)})
+    def get_markets_by_type(self, marketType: str, countryCode: Optional[str] = None) -> pd.DataFrame:
+        countryCodeClause = "AND country_code = %(countryCode)s"
         return self.run_select_query(
             query=f"""
                 SELECT
-                    *
+                    betfair_market_id, event_id, event_name
                 FROM
-                    vw_last_traded_bets
+                    vw_betfair_markets
                 WHERE
-                    betfair_market_id = %(betfairMarketId)s
-                    {runnerTableIdClause if betfairRunnerTableId is not None else ''}
+                    market_type = %(marketType)s
+                    {countryCodeClause if countryCode is not None else ''}
+                ORDER BY
+                    betfair_market_id
+            """,
+            parameters={"marketType": marketType, "countryCode": countryCode},
+        )
+
+    def get_final_runner_statuses(self, betfairMarketIds: Sequence[str]) -> pd.DataFrame:
+        # each runner's latest status, which is WINNER or LOSER once a market has settled
+        return self.run_select_query(
+            query="""
+                SELECT DISTINCT ON (tbl_betfair_runner_status_updates.betfair_market_id, tbl_betfair_runners.betfair_id)
+                    tbl_betfair_runner_status_updates.betfair_market_id,
+                    tbl_betfair_runners.betfair_id AS runner_betfair_id,
+                    tbl_betfair_runners.runner_name,
+                    tbl_betfair_runner_status.status
+                FROM
+                    tbl_betfair_runner_status_updates
+                JOIN
+                    tbl_betfair_runners
+                ON
+                    tbl_betfair_runner_status_updates.betfair_runner_table_id = tbl_betfair_runners.id
+                JOIN
+                    tbl_betfair_runner_status
+                ON
+                    tbl_betfair_runner_status_updates.status_id = tbl_betfair_runner_status.id
+                WHERE
+                    tbl_betfair_runner_status_updates.betfair_market_id = ANY(%(betfairMarketIds)s)
+                ORDER BY
+                    tbl_betfair_runner_status_updates.betfair_market_id,
+                    tbl_betfair_runners.betfair_id,
+                    tbl_betfair_runner_status_updates.unix_timestamp DESC
+            """,
+            parameters={"betfairMarketIds": list(betfairMarketIds)},
+        )
+
+    def get_odds_time_series(
+        self,
+        betfairMarketId: str,
+        betfairRunnerTableId: Optional[int] = None,
+        minUnixTimestamp: Optional[int] = None,
+        maxUnixTimestamp: Optional[int] = None,
+        useOddsSeries: bool = False,
+    ) -> pd.DataFrame:
+        whereClause, parameters = self._get_odds_time_series_filters(
+            betfairMarketId=betfairMarketId,
+            betfairRunnerTableId=betfairRunnerTableId,
+            minUnixTimestamp=minUnixTimestamp,
+            maxUnixTimestamp=maxUnixTimestamp,
+        )
+        return self.run_select_query(
+            query=f"""
+                SELECT
+                    {self._get_odds_series_source(useOddsSeries=useOddsSeries)}
+                {whereClause}
+                ORDER BY
+                    unix_timestamp ASC
+            """,
+            parameters=parameters,
+        )
+
+    def get_odds_time_series_arrays(
+        self,
+        betfairMarketId: str,
+        betfairRunnerTableId: Optional[int] = None,
+        minUnixTimestamp: Optional[int] = None,
+        maxUnixTimestamp: Optional[int] = None,
+        useOddsSeries: bool = False,
+    ) -> Dict[str, np.ndarray]:
+        # the same rows as get_odds_time_series, as the arrays the odds series are built from
+        whereClause, parameters = self._get_odds_time_series_filters(
+            betfairMarketId=betfairMarketId,
+            betfairRunnerTableId=betfairRunnerTableId,
+            minUnixTimestamp=minUnixTimestamp,
+            maxUnixTimestamp=maxUnixTimestamp,
+        )
+        return self.copy_query_to_arrays(
+            query=f"""
+                SELECT
+                    {ODDS_SERIES_ARRAY_SELECT}
+                FROM
+                    {self._get_odds_series_table_name(useOddsSeries=useOddsSeries)}
+                {whereClause}
                 ORDER BY
                     unix_timestamp ASC
             """,
             parameters=parameters,
+            columnDtypes=ODDS_SERIES_ARRAY_DTYPES,
         )
+
+    def get_odds_time_series_for_markets(self, betfairMarketIds: Sequence[str], useOddsSeries: bool = False) -> pd.DataFrame:
+        # one round trip for a batch of markets rather than one query each
+        return self.run_select_query(
+            query=f"""
+                SELECT
+                    {self._get_odds_series_source(useOddsSeries=useOddsSeries)}
+                WHERE
+                    betfair_market_id = ANY(%(betfairMarketIds)s)
+                ORDER BY
+                    betfair_market_id ASC, unix_timestamp ASC
+            """,
+            parameters={"betfairMarketIds": list(betfairMarketIds)},
+        )
+
+    def get_odds_time_series_arrays_for_markets(
+        self, betfairMarketIds: Sequence[str], useOddsSeries: bool = False
+    ) -> Dict[str, Dict[str, np.ndarray]]:
+        # markets come back as their position in betfairMarketIds, which keeps every column fixed width for binary COPY
+        betfairMarketIds = list(betfairMarketIds)
+        columnDtypes = {"market_index": np.int32, **ODDS_SERIES_ARRAY_DTYPES}
+        arrays = self.copy_query_to_arrays(
+            query=f"""
+                SELECT
+                    ARRAY_POSITION(%(betfairMarketIds)s::TEXT[], betfair_market_id)::INTEGER AS market_index,
+                    {ODDS_SERIES_ARRAY_SELECT}
+                FROM
+                    {self._get_odds_series_table_name(useOddsSeries=useOddsSeries)}
+                WHERE
+                    betfair_market_id = ANY(%(betfairMarketIds)s)
+                ORDER BY
+                    betfair_market_id ASC, unix_timestamp ASC
+            """,
+            parameters={"betfairMarketIds": betfairMarketIds},
+            columnDtypes=columnDtypes,
+        )
+        marketIndices = arrays.pop("market_index")
+        marketStarts = np.flatnonzero(np.diff(marketIndices, prepend=-1))
+        marketArrays = {
+            betfairMarketId: {column: np.empty(0, dtype=dtype) for column, dtype in ODDS_SERIES_ARRAY_DTYPES.items()}
+            for betfairMarketId in betfairMarketIds
+        }
+        for marketStart, marketEnd in zip(marketStarts, np.append(marketStarts[1:], len(marketIndices))):
+            # ARRAY_POSITION is 1 based
+            betfairMarketId = betfairMarketIds[marketIndices[marketStart] - 1]
+            marketArrays[betfairMarketId] = {column: array[marketStart:marketEnd] for column, array in arrays.items()}
+        return marketArrays
+
+    def iter_odds_time_series(
+        self,
+        betfairMarketIds: Optional[Sequence[str]] = None,
+        marketType: Optional[str] = None,
+        countryCode: Optional[str] = None,
+        minUnixTimestamp: Optional[int] = None,
+        maxUnixTimestamp: Optional[int] = None,
+        chunkSize: int = 100000,
+        useOddsSeries: bool = False,
+    ) -> Iterator[Tuple[str, Dict[str, np.ndarray]]]:
+        # rows come through a server side cursor a chunk at a time, so memory is bounded by the chunk and the largest market
+        whereClause, parameters = self._get_iter_odds_time_series_filters(
+            betfairMarketIds=betfairMarketIds,
+            marketType=marketType,
+            countryCode=countryCode,
+            minUnixTimestamp=minUnixTimestamp,
+            maxUnixTimestamp=maxUnixTimestamp,
+        )
+        query = f"""
+            SELECT
+                betfair_market_id, {', '.join(ODDS_SERIES_ARRAY_COLUMNS)}
+            FROM
+                {self._get_odds_series_table_name(useOddsSeries=useOddsSeries)}
+            {whereClause}
+            ORDER BY
+                betfair_market_id ASC, unix_timestamp ASC
+        """
+        # a connection of its own, so the engine can still be used while the results are consumed
+        connection = psycopg2.connect(
+            user=self.user, password=self.password, host=self.host, port=self.port, database=self.databaseName
+        )
+        try:
+            with connection.cursor(name="odds_time_series") as cursor:
+                cursor.itersize = chunkSize
+                cursor.execute(query, parameters)
+                yield from self._group_odds_time_series_rows(cursor=cursor, chunkSize=chunkSize)
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _get_timestamp_filters(
+        minUnixTimestamp: Optional[int] = None, maxUnixTimestamp: Optional[int] = None
+    ) -> Tuple[List[str], Dict[str, Any]]:
+        whereClauses, parameters = [], {}
+        if minUnixTimestamp is not None:
+            whereClauses.append("unix_timestamp >= %(minUnixTimestamp)s")
+            parameters.update({"minUnixTimestamp": int(minUnixTimestamp)})
+        if maxUnixTimestamp is not None:
+            whereClauses.append("unix_timestamp <= %(maxUnixTimestamp)s")
+            parameters.update({"maxUnixTimestamp": int(maxUnixTimestamp)})
+        return whereClauses, parameters
+
+    @staticmethod
+    def _get_iter_odds_time_series_filters(
+        betfairMarketIds: Optional[Sequence[str]] = None,
+        marketType: Optional[str] = None,
+        countryCode: Optional[str] = None,
+        minUnixTimestamp: Optional[int] = None,
+        maxUnixTimestamp: Optional[int] = None,
+    ) -> Tuple[str, Dict[str, Any]]:
+        whereClauses, parameters = [], {}
+        if betfairMarketIds is not None:
+            whereClauses.append("betfair_market_id = ANY(%(betfairMarketIds)s)")
+            parameters.update({"betfairMarketIds": list(betfairMarketIds)})
+        if marketType is not None:
+            whereClauses.append("market_type = %(marketType)s")
+            parameters.update({"marketType": marketType})
+        if countryCode is not None:
+            whereClauses.append("country_code = %(countryCode)s")
+            parameters.update({"countryCode": countryCode})
+        timestampClauses, timestampParameters = PostgresQueryEngine._get_timestamp_filters(
+            minUnixTimestamp=minUnixTimestamp, maxUnixTimestamp=maxUnixTimestamp
+        )
+        whereClauses.extend(timestampClauses)
+        parameters.update(timestampParameters)
+        return "WHERE " + " AND ".join(whereClauses) if len(whereClauses) > 0 else "", parameters
+
+    @staticmethod
+    def _group_odds_time_series_rows(cursor, chunkSize: int) -> Iterator[Tuple[str, Dict[str, np.ndarray]]]:
+        # rows are ordered by market, so a market is complete once a later market starts. A market can span several chunks
+        currentMarketId, currentMarketChunks = None, []
+        while True:
+            rows = cursor.fetchmany(chunkSize)
+            if len(rows) == 0:
+                break
+            marketIds, *columnValues = zip(*rows)
+            marketIds = np.asarray(marketIds, dtype=object)
+            chunkArrays = get_odds_series_arrays(columnValues=columnValues)
+            marketStarts = np.concatenate([[0], np.flatnonzero(marketIds[1:] != marketIds[:-1]) + 1])
+            for marketStart, marketEnd in zip(marketStarts, np.append(marketStarts[1:], len(rows))):
+                if marketIds[marketStart] != currentMarketId and len(currentMarketChunks) > 0:
+                    yield currentMarketId, concatenate_odds_series_arrays(arrayChunks=currentMarketChunks)
+                    currentMarketChunks = []
+                currentMarketId = marketIds[marketStart]
+                currentMarketChunks.append({column: array[marketStart:marketEnd] for column, array in chunkArrays.items()})
+        if len(currentMarketChunks) > 0:
+            yield currentMarketId, concatenate_odds_series_arrays(arrayChunks=currentMarketChunks)
+
+    @staticmethod
+    def _get_odds_time_series_filters(
+        betfairMarketId: str,
+        betfairRunnerTableId: Optional[int] = None,
+        minUnixTimestamp: Optional[int] = None,
+        maxUnixTimestamp: Optional[int] = None,
+    ) -> Tuple[str, Dict[str, Any]]:
+        # timestamp bounds let postgres skip the monthly last traded price partitions outside the market's lifetime
+        whereClauses, parameters = ["betfair_market_id = %(betfairMarketId)s"], {"betfairMarketId": betfairMarketId}
+        if betfairRunnerTableId is not None:
+            whereClauses.append("runner_betfair_id = %(betfairRunnerTableId)s")
+            parameters.update({"betfairRunnerTableId": int(betfairRunnerTableId)})
+        timestampClauses, timestampParameters = PostgresQueryEngine._get_timestamp_filters(
+            minUnixTimestamp=minUnixTimestamp, maxUnixTimestamp=maxUnixTimestamp
+        )
+        whereClauses.extend(timestampClauses)
+        parameters.update(timestampParameters)
+        return "WHERE " + " AND ".join(whereClauses), parameters
+
+    @staticmethod
+    def _get_odds_series_table_name(useOddsSeries: bool) -> str:
+        return "tbl_betfair_odds_series" if useOddsSeries else "vw_last_traded_bets"
+
+    @staticmethod
+    def _get_odds_series_source(useOddsSeries: bool) -> str:
+        # tbl_betfair_odds_series has the same columns as vw_last_traded_bets, plus the id it was refreshed from
+        if useOddsSeries:
+            return f"{', '.join(OddsSeries().get_column_names())} FROM tbl_betfair_odds_series"
+        return "* FROM vw_last_traded_bets"
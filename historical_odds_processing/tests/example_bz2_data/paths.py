@@ -0,0 +1,3 @@
+from pathlib import Path
+
+EXAMPLE_BZ2_FILES_DIRECTORY = Path(__file__).parent.joinpath("files")
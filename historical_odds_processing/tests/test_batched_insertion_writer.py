@@ -0,0 +1,157 @@
+import testing.postgresql
+
+import threading
+from time import sleep
+from unittest import TestCase
+from unittest.mock import patch
+
+from historical_odds_processing.datamodel.data_store_schema.historical_trading_schema import ALL_HISTORICAL_SCHEMAS
+from historical_odds_processing.datamodel.data_store_schema.mapping_table_schema import ALL_MAPPING_SCHEMAS
+from historical_odds_processing.store.batched_insertion_writer import BatchedInsertionWriter
+from historical_odds_processing.store.postgres_insertion_engine import PostgresInsertionEngine
+
+MARKET_DEFINITION = {
+    "version": 1,
+    "bspMarket": False,
+    "turnInPlayEnabled": True,
+    "persistenceEnabled": True,
+    "marketBaseRate": 5.0,
+    "numberOfWinners": 1,
+    "marketTime": "2020-01-01T12:00:00.000Z",
+    "suspendTime": "2020-01-01T12:00:00.000Z",
+    "bspReconciled": False,
+    "complete": True,
+    "inPlay": False,
+    "crossMatching": True,
+    "runnersVoidable": False,
+    "numberOfActiveRunners": 3,
+    "betDelay": 0,
+    "regulators": ["MR_INT"],
+    "discountAllowed": True,
+    "openDate": "2020-01-01T12:00:00.000Z",
+}
+
+
+def get_insertion_engine(postgresqlConnection) -> PostgresInsertionEngine:
+    config = postgresqlConnection.dsn()
+    return PostgresInsertionEngine(
+        databaseName=config["database"],
+        user=config["user"],
+        password=config.get("password"),
+        port=config["port"],
+        host=config["host"],
+    )
+
+
+def create_table(postgresqlConnection):
+    dbEngine = get_insertion_engine(postgresqlConnection=postgresqlConnection)
+    for table in ALL_MAPPING_SCHEMAS:
+        dbEngine.create_table(schema=table.create_table_sql())
+    # no partitions are created up front, the writer creates the ones each batch needs
+    for table in ALL_HISTORICAL_SCHEMAS:
+        dbEngine.create_table(schema=table.create_table_sql())
+
+
+Postgresql = testing.postgresql.PostgresqlFactory(cache_initialized_db=True, on_initialized=create_table)
+
+
+def tearDownModule():
+    Postgresql.clear_cache()
+
+
+class TestBatchedInsertionWriter(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.postgresql = Postgresql()
+        self.dbEngine = get_insertion_engine(postgresqlConnection=self.postgresql)
+
+    def tearDown(self):
+        super().tearDown()
+        self.postgresql.stop()
+
+    def get_num_rows(self, tableName: str) -> int:
+        return int(self.dbEngine.run_select_query(query=f"SELECT COUNT(*) AS num_rows FROM {tableName}")["num_rows"].values[0])
+
+    def write_rows(self, writer: BatchedInsertionWriter, numRows: int) -> None:
+        for rowIndex in range(numRows):
+            writer.add_last_traded_price(
+                unixTimestamp=rowIndex, betfairMarketId="1.1", betfairRunnerTableId=rowIndex % 3, price=2.0, eventId=1
+            )
+            writer.add_runner_status_update(unixTimestamp=rowIndex, statusId=1, betfairMarketId="1.1", betfairRunnerTableId=1)
+        writer.add_market_definition(
+            betfairMarketId="1.1", eventId=1, unixTimestamp=0, marketStatusId=1, marketDefinition=MARKET_DEFINITION
+        )
+
+    def test_copy_and_insert_flushes(self):
+        for flushMethod in ["copy", "insert"]:
+            with BatchedInsertionWriter(insertionEngine=self.dbEngine, maxBatchSize=40, flushMethod=flushMethod) as writer:
+                self.write_rows(writer=writer, numRows=100)
+            self.assertGreaterEqual(writer.stats.numFlushes, 3)
+            self.assertEqual(writer.stats.numRowsWritten, 201)
+            self.assertEqual(len(writer.stats.flushLatencies), writer.stats.numFlushes)
+        self.assertEqual(self.get_num_rows(tableName="tbl_betfair_last_traded_price"), 200)
+        self.assertEqual(self.get_num_rows(tableName="tbl_betfair_runner_status_updates"), 200)
+        marketDefinitions = self.dbEngine.run_select_query(query="SELECT * FROM tbl_betfair_market_definitions")
+        self.assertEqual(len(marketDefinitions), 2)
+        self.assertListEqual(marketDefinitions["regulators"].tolist(), ["['MR_INT']", "['MR_INT']"])
+        self.assertListEqual(marketDefinitions["num_active_runners"].tolist(), [3, 3])
+
+    def test_flush_after_max_batch_age(self):
+        with BatchedInsertionWriter(insertionEngine=self.dbEngine, maxBatchSize=1000, maxBatchAgeSeconds=0.05) as writer:
+            writer.add_last_traded_price(unixTimestamp=0, betfairMarketId="1.1", betfairRunnerTableId=1, price=2.0)
+            for _ in range(100):
+                if writer.stats.numRowsWritten == 1:
+                    break
+                sleep(0.05)
+            self.assertEqual(writer.stats.numRowsWritten, 1)
+            self.assertEqual(self.get_num_rows(tableName="tbl_betfair_last_traded_price"), 1)
+
+    def test_backpressure(self):
+        releaseFlush = threading.Event()
+        copyFromStream = self.dbEngine.copy_from_stream
+
+        def slow_copy_from_stream(**kwargs):
+            releaseFlush.wait()
+            copyFromStream(**kwargs)
+
+        with patch.object(self.dbEngine, "copy_from_stream", side_effect=slow_copy_from_stream):
+            writer = BatchedInsertionWriter(insertionEngine=self.dbEngine, maxBatchSize=5, maxPendingRows=10)
+            producer = threading.Thread(target=self.write_rows, kwargs={"writer": writer, "numRows": 20})
+            producer.start()
+            sleep(0.2)
+            # the producer is blocked while the flusher can't write
+            self.assertTrue(producer.is_alive())
+            self.assertLessEqual(writer.numPendingRows, 10)
+            releaseFlush.set()
+            producer.join(timeout=10)
+            writer.close()
+        self.assertFalse(producer.is_alive())
+        self.assertGreater(writer.stats.numBackpressureWaits, 0)
+        self.assertEqual(self.get_num_rows(tableName="tbl_betfair_last_traded_price"), 20)
+
+    def test_flush_error_is_raised(self):
+        writer = BatchedInsertionWriter(insertionEngine=self.dbEngine, flushMethod="insert")
+        writer.add_last_traded_price(unixTimestamp=0, betfairMarketId="1.1", betfairRunnerTableId=1, price="not a price")
+        with self.assertRaises(RuntimeError):
+            writer.flush()
+        with self.assertRaises(RuntimeError):
+            writer.add_last_traded_price(unixTimestamp=0, betfairMarketId="1.1", betfairRunnerTableId=1, price=2.0)
+        with self.assertRaises(RuntimeError):
+            writer.close()
+
+    def test_partitions_are_created_for_each_batch(self):
+        secondsPerDay = 24 * 60 * 60
+        with BatchedInsertionWriter(insertionEngine=self.dbEngine, maxBatchSize=1000) as writer:
+            for unixTimestamp in [1546300800, 1546300800 + 40 * secondsPerDay, 1546300800 + 70 * secondsPerDay]:
+                writer.add_last_traded_price(
+                    unixTimestamp=unixTimestamp, betfairMarketId="1.1", betfairRunnerTableId=1, price=2.0
+                )
+        self.assertEqual(self.get_num_rows(tableName="tbl_betfair_last_traded_price"), 3)
+        self.assertListEqual(
+            self.dbEngine.get_partition_names(tableName="tbl_betfair_last_traded_price"),
+            [f"tbl_betfair_last_traded_price_2019_{month:02d}" for month in range(1, 4)],
+        )
+
+    def test_invalid_flush_method(self):
+        with self.assertRaises(ValueError):
+            BatchedInsertionWriter(insertionEngine=self.dbEngine, flushMethod="upsert")
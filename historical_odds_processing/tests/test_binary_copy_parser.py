@@ -0,0 +1,47 @@
+import struct
+from unittest import TestCase
+
+import numpy as np
+
+from historical_odds_processing.store.binary_copy_parser import BINARY_COPY_SIGNATURE
+from historical_odds_processing.store.binary_copy_parser import parse_binary_copy
+
+COLUMN_DTYPES = {"unix_timestamp": np.int64, "market_index": np.int32, "price": np.float64}
+
+
+def get_binary_copy(rows) -> bytes:
+    data = BINARY_COPY_SIGNATURE + struct.pack(">ii", 0, 0)
+    for unixTimestamp, marketIndex, price in rows:
+        data += struct.pack(">hiqii", 3, 8, unixTimestamp, 4, marketIndex)
+        data += struct.pack(">i", -1) if price is None else struct.pack(">id", 8, price)
+    return data + struct.pack(">h", -1)
+
+
+class TestBinaryCopyParser(TestCase):
+    def test_fixed_width_rows(self):
+        arrays = parse_binary_copy(
+            data=get_binary_copy(rows=[(1, 1, 2.5), (2, 1, 3.0), (3, 2, 4.0)]), columnDtypes=COLUMN_DTYPES
+        )
+        self.assertSequenceEqual(list(arrays["unix_timestamp"]), [1, 2, 3])
+        self.assertSequenceEqual(list(arrays["market_index"]), [1, 1, 2])
+        self.assertSequenceEqual(list(arrays["price"]), [2.5, 3.0, 4.0])
+        for columnName, dtype in COLUMN_DTYPES.items():
+            self.assertEqual(arrays[columnName].dtype, dtype)
+            self.assertTrue(arrays[columnName].dtype.isnative)
+
+    def test_null_prices(self):
+        arrays = parse_binary_copy(data=get_binary_copy(rows=[(1, 1, None), (2, 1, 3.0)]), columnDtypes=COLUMN_DTYPES)
+        self.assertTrue(np.isnan(arrays["price"][0]))
+        self.assertEqual(arrays["price"][1], 3.0)
+        self.assertSequenceEqual(list(arrays["unix_timestamp"]), [1, 2])
+
+    def test_empty_result(self):
+        arrays = parse_binary_copy(data=get_binary_copy(rows=[]), columnDtypes=COLUMN_DTYPES)
+        self.assertEqual(len(arrays["price"]), 0)
+        self.assertEqual(arrays["unix_timestamp"].dtype, np.int64)
+
+    def test_invalid_data(self):
+        with self.assertRaises(ValueError):
+            parse_binary_copy(data=b"1,2,3\n", columnDtypes=COLUMN_DTYPES)
+        with self.assertRaises(ValueError):
+            parse_binary_copy(data=get_binary_copy(rows=[(1, 1, 2.5)]), columnDtypes={"unix_timestamp": np.int64})
@@ -0,0 +1,87 @@
+import pandas as pd
+from functools import partial
+from pathlib import Path
+from shutil import copy, rmtree
+from tempfile import mkdtemp
+from unittest import TestCase
+
+from historical_odds_processing.scripts.file_processing_steps.process_bz2_odds_files import get_bz2_processor
+from historical_odds_processing.store.db_creation.bz2_ingestion_scheduler import BZ2IngestionScheduler
+from historical_odds_processing.store.db_creation.market_file_index import MarketFileIndex
+from historical_odds_processing.store.db_creation.output_filenames import OutputFilenames
+from historical_odds_processing.tests.example_bz2_data.paths import EXAMPLE_BZ2_FILES_DIRECTORY
+
+
+def get_failing_processor(outputPath):
+    raise ValueError(f"Can't create a processor for {outputPath}")
+
+
+class TestBZ2IngestionScheduler(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.workingDirectory = mkdtemp()
+        self.inputDirectory = Path(self.workingDirectory, "input")
+        self.outputDirectory = Path(self.workingDirectory, "output")
+        for monthName, fileName in (("Jun", "1.159564697.bz2"), ("Jul", "1.159963367.bz2")):
+            monthDirectory = Path(self.inputDirectory, "2019", monthName, "1")
+            monthDirectory.mkdir(parents=True)
+            copy(EXAMPLE_BZ2_FILES_DIRECTORY.joinpath(fileName), monthDirectory)
+        Path(self.inputDirectory, "2019", "Jun", "1", "notAMarket.bz2").touch()
+
+    def tearDown(self):
+        super().tearDown()
+        rmtree(self.workingDirectory)
+
+    def _get_scheduler(self, validCountryCodes=None):
+        return BZ2IngestionScheduler(
+            inputDirectory=self.inputDirectory,
+            outputDirectory=self.outputDirectory,
+            processorFactory=partial(get_bz2_processor, validCountryCodes=validCountryCodes),
+            numWorkers=2,
+            maxInFlight=1,
+        )
+
+    def test_get_market_filepaths(self):
+        marketFilepaths = self._get_scheduler().get_market_filepaths()
+        self.assertEqual([path.name for path, _ in marketFilepaths], ["1.159564697.bz2", "1.159963367.bz2"])
+        fileSizes = [path.stat().st_size for path, _ in marketFilepaths]
+        self.assertEqual(fileSizes, sorted(fileSizes, reverse=True))
+        self.assertEqual(
+            [outputPath for _, outputPath in marketFilepaths],
+            [str(Path(self.outputDirectory, "2019", "Jun")), str(Path(self.outputDirectory, "2019", "Jul"))],
+        )
+
+    def test_run(self):
+        self._get_scheduler().run()
+        marketInfoFiles = sorted(self.outputDirectory.glob(f"**/{OutputFilenames.MARKET_INFO}.csv"))
+        marketInfo = pd.concat([pd.read_csv(file) for file in marketInfoFiles])
+        self.assertEqual(sorted(marketInfo["betfair_market_id"].astype(str)), ["1.159564697", "1.159963367"])
+        lastTradedPriceFiles = self.outputDirectory.glob(f"**/{OutputFilenames.LAST_TRADED_PRICE}.csv")
+        self.assertTrue(sum(len(pd.read_csv(file)) for file in lastTradedPriceFiles) > 0)
+        for mappingName in OutputFilenames.ALL_MAPPING_FILES:
+            self.assertTrue(len(list(self.outputDirectory.glob(f"**/{mappingName}.pkl"))) > 0)
+
+    def test_run_with_country_filter(self):
+        self._get_scheduler(validCountryCodes=["GB"]).run()
+        marketInfoFiles = self.outputDirectory.glob(f"**/{OutputFilenames.MARKET_INFO}.csv")
+        marketInfo = pd.concat([pd.read_csv(file) for file in marketInfoFiles])
+        self.assertEqual(list(marketInfo["betfair_market_id"].astype(str)), ["1.159963367"])
+
+    def test_get_market_filepaths_with_index(self):
+        scheduler = self._get_scheduler()
+        scheduler.marketFileIndex = MarketFileIndex(indexPath=Path(self.workingDirectory, "index.sqlite"))
+        scheduler.countryCodeFilter = ["GB"]
+        marketFilepaths = scheduler.get_market_filepaths()
+        scheduler.marketFileIndex.close()
+        self.assertEqual([path.name for path, _ in marketFilepaths], ["1.159963367.bz2"])
+
+    def test_run_fails_when_all_workers_exit(self):
+        scheduler = BZ2IngestionScheduler(
+            inputDirectory=self.inputDirectory,
+            outputDirectory=self.outputDirectory,
+            processorFactory=get_failing_processor,
+            numWorkers=1,
+            maxInFlight=1,
+        )
+        with self.assertRaises(RuntimeError):
+            scheduler.run()
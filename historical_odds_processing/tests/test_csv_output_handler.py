@@ -2,9 +2,18 @@ import numpy as np
 import os
 import pandas as pd
 
+from pathlib import Path
+from shutil import rmtree
+from tempfile import mkdtemp
 from unittest import TestCase
 
 from historical_odds_processing.store.db_creation.csv_output_handler import CSVOutputHandler
+from historical_odds_processing.store.db_creation.csv_output_handler import open_compressed_csv
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 
 class TestCSVOutputHandler(TestCase):
@@ -45,3 +54,57 @@ class TestCSVOutputHandler(TestCase):
 
     def test_csv_output_handler_invalid(self):
         self.assertRaises(ValueError, self.csvOutputHandler.add, self.invalidTest)
+
+    def test_csv_output_handler_buffers_rows(self):
+        outputHandler = CSVOutputHandler(
+            fileName=self.testFilename, tableFields=(self.firstVariableName, self.secondVariableName), flushSize=2
+        )
+        headerBytes = outputHandler.bytesWritten
+        outputHandler.add(data=self.validTest1)
+        self.assertEqual(outputHandler.rowsWritten, 0)
+        outputHandler.add(data=self.validTest2)
+        self.assertEqual(outputHandler.rowsWritten, 2)
+        outputHandler.add(data=self.validTest3)
+        outputHandler.close()
+        outputHandler.close()
+        self.assertEqual(outputHandler.rowsWritten, 3)
+        self.assertTrue(outputHandler.bytesWritten > headerBytes)
+        self.assertEqual(outputHandler.bytesWritten, os.path.getsize(self.testFilename))
+
+    def test_csv_output_handler_timestamp_range(self):
+        outputHandler = CSVOutputHandler(fileName=self.testFilename, tableFields=("unix_timestamp", "price"))
+        self.assertIsNone(outputHandler.timestampRange)
+        for unixTimestamp in [20, 10, 30]:
+            outputHandler.add(data={"unix_timestamp": unixTimestamp, "price": 1.5})
+        outputHandler.add(data={"price": 2.5})
+        outputHandler.close()
+        self.assertEqual(outputHandler.timestampRange, (10, 30))
+        self.csvOutputHandler.close()
+
+    def test_csv_output_handler_compression(self):
+        workingDirectory = mkdtemp()
+        for compression, fileExtension in (("gzip", "gz"), ("zstd", "zst")):
+            if compression == "zstd" and zstandard is None:
+                continue
+            fileName = str(Path(workingDirectory, f"{compression}.csv.{fileExtension}"))
+            with CSVOutputHandler(
+                fileName=fileName, tableFields=(self.firstVariableName, self.secondVariableName), compression=compression
+            ) as outputHandler:
+                outputHandler.add(data=self.validTest1)
+                outputHandler.add(data=self.validTest2)
+            self.assertTrue(outputHandler.file.closed)
+            with open_compressed_csv(fileName=fileName) as csvFile:
+                savedData = pd.read_csv(filepath_or_buffer=csvFile)
+            self.assertSequenceEqual(seq1=list(savedData[self.firstVariableName].values), seq2=[100, 200])
+        rmtree(workingDirectory)
+        self.csvOutputHandler.close()
+
+    def test_csv_output_handler_unknown_compression(self):
+        self.assertRaises(
+            ValueError,
+            CSVOutputHandler,
+            fileName=self.testFilename,
+            tableFields=(self.firstVariableName, self.secondVariableName),
+            compression="lzma",
+        )
+        self.csvOutputHandler.close()
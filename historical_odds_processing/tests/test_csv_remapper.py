@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+
+from pathlib import Path
+from shutil import rmtree
+from tempfile import mkdtemp
+from unittest import TestCase, skipIf
+
+from historical_odds_processing.store.db_creation.column_remapper import ColumnRemapper
+from historical_odds_processing.store.db_creation.csv_output_handler import CSVOutputHandler
+from historical_odds_processing.store.db_creation.csv_remapper import CSVRemapper
+from utils.paths import get_path
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class TestCSVRemapper(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.workingDirectory = mkdtemp()
+        self.fileName = f"{get_path(self.workingDirectory, '2019', 'Jun', '0_0')}/market_info.csv"
+        self.remappingDict = {"country_code": {None: 0, "GB": 1, "ES": 2}, "market_type": {"MATCH_ODDS": 5}}
+        with CSVOutputHandler(
+            fileName=self.fileName, tableFields=("betfair_market_id", "country_code", "market_type")
+        ) as outputHandler:
+            outputHandler.add(data={"betfair_market_id": "1.150000010", "country_code": "GB", "market_type": "MATCH_ODDS"})
+            outputHandler.add(data={"betfair_market_id": "1.2", "country_code": None, "market_type": "OVER_UNDER_15"})
+            outputHandler.add(data={"betfair_market_id": "1.3", "country_code": "ES", "market_type": "MATCH_ODDS"})
+
+    def tearDown(self):
+        super().tearDown()
+        rmtree(self.workingDirectory)
+
+    def test_column_remapper(self):
+        columnRemapper = ColumnRemapper(mapping=self.remappingDict["country_code"])
+        remappedColumn = columnRemapper.remap(column=pd.Series(["ES", np.nan, "FR", None, "GB"]))
+        self.assertEqual(remappedColumn.tolist(), [2, 0, pd.NA, 0, 1])
+        self.assertEqual(len(columnRemapper), 3)
+        self.assertEqual(ColumnRemapper(mapping={}).remap(column=np.array(["GB"], dtype=object)).tolist(), [pd.NA])
+
+    def _remap(self, useArrow):
+        outputDirectory = Path(self.workingDirectory, "remapped_files")
+        csvRemapper = CSVRemapper(
+            csvToRemap=self.fileName,
+            remappingDict=self.remappingDict,
+            outputDirectory=str(outputDirectory),
+            chunkSize=2,
+            useArrow=useArrow,
+        )
+        csvRemapper.process_csv()
+        remappedFiles = sorted(outputDirectory.glob("2019/Jun/0_0/*.csv"))
+        self.assertEqual([file.name for file in remappedFiles], ["market_info_0.csv", "market_info_1.csv"])
+        return pd.concat([pd.read_csv(file, dtype={"betfair_market_id": str}) for file in remappedFiles])
+
+    def test_csv_remapper(self):
+        remappedData = self._remap(useArrow=False)
+        self.assertEqual(remappedData["betfair_market_id"].tolist(), ["1.150000010", "1.2", "1.3"])
+        self.assertEqual(remappedData["country_code"].tolist(), [1, 0, 2])
+        self.assertEqual(remappedData["market_type"].astype("Int64").tolist(), [5, pd.NA, 5])
+
+    @skipIf(pyarrow is None, "pyarrow isn't installed")
+    def test_csv_remapper_with_arrow(self):
+        pd.testing.assert_frame_equal(self._remap(useArrow=True), self._remap(useArrow=False))
+
+    @skipIf(zstandard is None, "zstandard isn't installed")
+    def test_csv_remapper_reads_zstd_files(self):
+        compressedFileName = self.fileName.replace(".csv", ".csv.zst")
+        with open(self.fileName, "rb") as csvFile, zstandard.open(compressedFileName, "wb") as compressedFile:
+            compressedFile.write(csvFile.read())
+        Path(self.fileName).unlink()
+        self.fileName = compressedFileName
+        remappedData = self._remap(useArrow=False)
+        self.assertEqual(remappedData["country_code"].tolist(), [1, 0, 2])
@@ -0,0 +1,84 @@
+from unittest import TestCase
+
+from historical_odds_processing.datamodel.data_store_schema.database_components import Column
+from historical_odds_processing.datamodel.data_store_schema.database_components import HashPartitioning
+from historical_odds_processing.datamodel.data_store_schema.database_components import Index
+from historical_odds_processing.datamodel.data_store_schema.database_components import MonthlyRangePartitioning
+from historical_odds_processing.datamodel.data_store_schema.database_components import Table
+
+
+class ExampleTable(Table):
+    def __init__(self):
+        super().__init__()
+        self.tableName = "tbl_example"
+        self.columns = [
+            Column(name="id", dataType="BIGSERIAL", primaryKey=True),
+            Column(name="unix_timestamp", dataType="BIGINT"),
+            Column(name="betfair_market_id", dataType="TEXT"),
+        ]
+
+
+class TestDatabaseComponents(TestCase):
+    def test_unpartitioned_table(self):
+        table = ExampleTable()
+        self.assertEqual(table.get_primary_key_names(), ["id"])
+        self.assertNotIn("PARTITION BY", table.create_table_sql())
+        self.assertEqual(table.create_partitions_sql(), [])
+
+    def test_monthly_range_partitioning(self):
+        table = ExampleTable()
+        table.partitioning = MonthlyRangePartitioning(columnName="unix_timestamp")
+        self.assertEqual(table.get_primary_key_names(), ["id", "unix_timestamp"])
+        self.assertIn("PARTITION BY RANGE (unix_timestamp);", table.create_table_sql())
+        self.assertEqual(table.create_partitions_sql(), [])
+
+        # 2019-11-30 23:59:59 to 2020-01-01 00:00:00
+        partitionsSql = table.partitioning.get_partitions_sql(
+            tableName=table.tableName, minValue=1575158399, maxValue=1577836800
+        )
+        partitionNames = [partitionSql.split()[5] for partitionSql in partitionsSql]
+        self.assertEqual(partitionNames, ["tbl_example_2019_11", "tbl_example_2019_12", "tbl_example_2020_01"])
+        self.assertIn("FROM (1575158400)\n", partitionsSql[1])
+        self.assertIn("TO (1577836800);", partitionsSql[1])
+
+    def test_hash_partitioning(self):
+        table = ExampleTable()
+        table.partitioning = HashPartitioning(columnName="betfair_market_id", numPartitions=4)
+        self.assertEqual(table.get_primary_key_names(), ["id", "betfair_market_id"])
+        self.assertIn("PARTITION BY HASH (betfair_market_id);", table.create_table_sql())
+        partitionsSql = table.create_partitions_sql()
+        self.assertEqual(len(partitionsSql), 4)
+        self.assertIn("FOR VALUES WITH (MODULUS 4, REMAINDER 3);", partitionsSql[3])
+        self.assertEqual(table.partitioning.get_partitions_sql(tableName=table.tableName, minValue=0, maxValue=1), [])
+
+    def test_index_sql(self):
+        index = Index(tableName="tbl_example", columns=["betfair_market_id"])
+        self.assertEqual(index.name, "tbl_example_betfair_market_id")
+        self.assertEqual(
+            index.create_index_sql(),
+            "CREATE INDEX IF NOT EXISTS tbl_example_betfair_market_id ON tbl_example USING btree (betfair_market_id);",
+        )
+
+        index = Index(
+            tableName="tbl_example",
+            columns=["betfair_market_id", "unix_timestamp"],
+            include=["id"],
+            where="unix_timestamp > 0",
+            name="tbl_example_market_timestamp",
+        )
+        self.assertEqual(
+            index.create_index_sql(concurrently=True),
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS tbl_example_market_timestamp ON tbl_example USING btree "
+            "(betfair_market_id, unix_timestamp) INCLUDE (id) WHERE unix_timestamp > 0;",
+        )
+        self.assertIn("ON ONLY tbl_example USING", index.create_index_sql(onlyParent=True))
+        self.assertIn(
+            "tbl_example_market_timestamp_2019_06 ON tbl_example_2019_06 USING",
+            index.create_index_sql(tableName="tbl_example_2019_06", indexName="tbl_example_market_timestamp_2019_06"),
+        )
+
+        index = Index(tableName="tbl_example", columns=["unix_timestamp"], method="brin", name="tbl_example_brin")
+        self.assertIn("USING brin (unix_timestamp);", index.create_index_sql())
+
+        with self.assertRaises(ValueError):
+            Index(tableName="tbl_example", columns=["a" * 60])
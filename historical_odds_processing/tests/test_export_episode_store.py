@@ -0,0 +1,129 @@
+import testing.postgresql
+
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from historical_odds_processing.datamodel.data_store_schema.historical_trading_schema import LastTradedPrice
+from historical_odds_processing.scripts.database_build.post_load_build import add_views
+from historical_odds_processing.scripts.export_episode_store import export_episode_store
+from historical_odds_processing.scripts.export_episode_store import get_runner_columns
+from historical_odds_processing.tests.test_postgres_engines import create_table
+from historical_odds_processing.store.postgres_insertion_engine import PostgresInsertionEngine
+from trading.datamodel.constants import BETFAIR_DRAW_RUNNER_ID
+from trading.datamodel.episode_store.episode_store import EpisodeStore
+
+Postgresql = testing.postgresql.PostgresqlFactory(cache_initialized_db=True, on_initialized=create_table)
+
+# market id: (market type, event id, event name, {runner betfair id: (runner name, final status)})
+MARKETS = {
+    "1.1": (
+        "MATCH_ODDS",
+        10,
+        "Home FC v Away FC",
+        {101: ("Home FC", "LOSER"), 102: ("Away FC", "WINNER"), BETFAIR_DRAW_RUNNER_ID: ("The Draw", "LOSER")},
+    ),
+    "1.2": ("MATCH_ODDS", 11, "Home FC v Other FC", {101: ("Home FC", "WINNER"), 103: ("Someone Else", "LOSER")}),
+    "1.3": ("MATCH_ODDS", 12, "Away FC v Home FC", {101: ("Home FC", "ACTIVE"), 102: ("Away FC", "ACTIVE")}),
+    "1.4": ("OVER_UNDER_25", 10, "Home FC v Away FC", {201: ("Under 2.5 Goals", "WINNER"), 202: ("Over 2.5 Goals", "LOSER")}),
+}
+
+
+def tearDownModule():
+    Postgresql.clear_cache()
+
+
+class TestExportEpisodeStore(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.postgresql = Postgresql()
+        config = self.postgresql.dsn()
+        self.dbEngine = PostgresInsertionEngine(
+            databaseName=config["database"],
+            user=config["user"],
+            password=config.get("password"),
+            port=config["port"],
+            host=config["host"],
+        )
+        add_views(insertionEngine=self.dbEngine)
+        self.temporaryDirectory = TemporaryDirectory()
+        activeStatusId = self.dbEngine.insert_runner_status(runnerStatus="ACTIVE")
+        lastTradedPrices = []
+        for betfairMarketId, (marketType, eventId, eventName, runners) in MARKETS.items():
+            self.dbEngine.insert_market(
+                betfairMarketId=betfairMarketId,
+                eventName=eventName,
+                eventId=eventId,
+                eventTypeId=1,
+                bettingTypeId=None,
+                marketTypeId=self.dbEngine.insert_market_type(marketType=marketType),
+                countryCodeId=None,
+                timezoneId=None,
+            )
+            for runnerIndex, (runnerBetfairId, (runnerName, status)) in enumerate(runners.items()):
+                runnerId = self.dbEngine.get_runner_id_by_betfair_id(betfairRunnerId=runnerBetfairId)
+                if runnerId is None:
+                    runnerId = self.dbEngine.insert_runner(runnerName=runnerName, betfairId=runnerBetfairId)
+                for unixTimestamp, statusId in enumerate(
+                    [activeStatusId, self.dbEngine.insert_runner_status(runnerStatus=status)]
+                ):
+                    self.dbEngine.insert_runner_status_update(
+                        unixTimestamp=unixTimestamp,
+                        statusId=statusId,
+                        betfairMarketId=betfairMarketId,
+                        betfairRunnerTableId=runnerId,
+                    )
+                # later rows are inserted first, so the export has to put them back in order
+                for unixTimestamp in [2, 1]:
+                    lastTradedPrices.append(
+                        (unixTimestamp, betfairMarketId, eventId, runnerId, 2.0 + runnerIndex + unixTimestamp / 10)
+                    )
+        self.dbEngine.insert_rows(
+            tableName=LastTradedPrice().tableName, columnNames=LastTradedPrice().get_column_names(), rows=lastTradedPrices
+        )
+
+    def tearDown(self):
+        super().tearDown()
+        self.temporaryDirectory.cleanup()
+        self.postgresql.stop()
+
+    def test_get_runner_columns(self):
+        runnerNames = {1: "Linfield (W)", 2: "Crusaders  (W)", BETFAIR_DRAW_RUNNER_ID: "The Draw"}
+        self.assertEqual(
+            get_runner_columns(
+                oddsSeriesType="match_odds", eventName="Linfield (W) v Crusaders  (W)", runnerNames=runnerNames
+            ),
+            {1: 0, 2: 1, BETFAIR_DRAW_RUNNER_ID: 2},
+        )
+        self.assertIsNone(get_runner_columns(oddsSeriesType="match_odds", eventName="Linfield (W)", runnerNames=runnerNames))
+        self.assertEqual(
+            get_runner_columns(
+                oddsSeriesType="over_under", eventName="", runnerNames={5: "Under 1.5 Goals", 6: "Over 1.5 Goals"}
+            ),
+            {5: 1, 6: 0},
+        )
+        self.assertIsNone(get_runner_columns(oddsSeriesType="over_under", eventName="", runnerNames={5: "Over", 6: "Over"}))
+
+    def test_export_match_odds(self):
+        exportCounts = export_episode_store(
+            queryEngine=self.dbEngine, outputDirectory=self.temporaryDirectory.name, marketType="MATCH_ODDS", chunkSize=2
+        )
+        self.assertEqual(dict(exportCounts), {"exported": 1, "unrecognised runners": 1, "no single winner": 1})
+        episodeStore = EpisodeStore(directory=self.temporaryDirectory.name)
+        self.assertEqual(episodeStore.betfairMarketIds, ["1.1"])
+        self.assertEqual(episodeStore.get_outcome(marketIndex=0), (0, 1, 0))
+        episodeArrays = episodeStore.get_episode_arrays(marketIndex=0)
+        self.assertSequenceEqual(list(episodeArrays["unix_timestamp"]), [1, 1, 1, 2, 2, 2])
+        self.assertSequenceEqual(sorted(episodeArrays["runner_column"][:3]), [0, 1, 2])
+        oddsDataframe = episodeStore.get_odds_dataframe(marketIndex=0)
+        self.assertEqual(oddsDataframe.loc[oddsDataframe["unix_timestamp"] == 2, "betHAD"].tolist(), ["HOME", "AWAY", "DRAW"])
+
+    def test_export_over_under(self):
+        export_episode_store(
+            queryEngine=self.dbEngine, outputDirectory=self.temporaryDirectory.name, marketType="OVER_UNDER_25"
+        )
+        episodeStore = EpisodeStore(directory=self.temporaryDirectory.name)
+        self.assertEqual(episodeStore.oddsSeriesType, "over_under")
+        self.assertEqual(episodeStore.get_outcome(marketIndex=0), (0, 1))
+        oddsSeries = episodeStore.get_odds_series(marketIndex=0)
+        oddsSeries.initialize()
+        self.assertEqual(oddsSeries.totalNumSteps, 2)
@@ -0,0 +1,70 @@
+import pickle
+from pathlib import Path
+from shutil import copy, rmtree
+from tempfile import mkdtemp
+from unittest import TestCase
+
+from historical_odds_processing.scripts.file_processing_steps.merge_all_id_feature_maps import merge_all_mappings
+from historical_odds_processing.scripts.file_processing_steps.process_bz2_odds_files import process_all_bz2_files
+from historical_odds_processing.scripts.file_processing_steps.remap_all_id_features import remap_all_id_features
+from historical_odds_processing.store.db_creation.id_mapping import IdMapping
+from historical_odds_processing.store.db_creation.output_filenames import OutputFilenames
+from historical_odds_processing.tests.example_bz2_data.paths import EXAMPLE_BZ2_FILES_DIRECTORY
+
+
+class TestIdMapping(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.workingDirectory = mkdtemp()
+
+    def tearDown(self):
+        super().tearDown()
+        rmtree(self.workingDirectory)
+
+    def test_extend_is_append_only(self):
+        mapping = IdMapping()
+        self.assertEqual(mapping.extend(entries={"c", "a", None}), 3)
+        self.assertEqual(mapping.entries, [None, "a", "c"])
+        self.assertEqual(mapping.extend(entries={"b", "a"}), 1)
+        self.assertEqual(mapping.to_dict(), {None: 0, "a": 1, "c": 2, "b": 3})
+        self.assertEqual(mapping.get_entry(entryId=3), "b")
+        self.assertEqual(mapping.get_id(entry="c"), 2)
+        self.assertIsNone(mapping.get_id(entry="d"))
+
+    def test_save_and_load(self):
+        filePath = f"{self.workingDirectory}/mapping.pkl"
+        mapping = IdMapping(entries=["x", "y"])
+        mapping.save(filePath=filePath)
+        self.assertEqual(IdMapping.load(filePath=filePath).to_dict(), {"x": 0, "y": 1})
+        self.assertFalse(Path(f"{filePath}.tmp").exists())
+
+    def test_load_legacy_dict(self):
+        filePath = f"{self.workingDirectory}/mapping.pkl"
+        pickle.dump({"y": 1, "x": 0}, open(filePath, "wb"))
+        self.assertEqual(IdMapping.load(filePath=filePath).entries, ["x", "y"])
+
+    def test_merge_keeps_existing_ids(self):
+        inputDirectory = Path(self.workingDirectory, "input")
+        outputDirectory = Path(self.workingDirectory, "output")
+        outputDirectory.mkdir()
+        for monthName, fileName in (("Jun", "1.159564697.bz2"), ("Jul", "1.159963367.bz2")):
+            monthDirectory = Path(inputDirectory, "2019", monthName, "1")
+            monthDirectory.mkdir(parents=True)
+            copy(EXAMPLE_BZ2_FILES_DIRECTORY.joinpath(fileName), monthDirectory)
+            process_all_bz2_files(
+                inputDirectory=inputDirectory, outputDirectory=outputDirectory, validCountryCodes=None, numThreads=1
+            )
+            merge_all_mappings(outputDirectory=outputDirectory)
+            remap_all_id_features(numThreads=1, outputDirectory=outputDirectory)
+            if monthName == "Jun":
+                firstMappings = {
+                    mappingName: IdMapping.load(filePath=f"{outputDirectory}/{mappingName}_final_mapping.pkl").to_dict()
+                    for mappingName in OutputFilenames.ALL_MAPPING_FILES
+                }
+
+        for mappingName, firstMapping in firstMappings.items():
+            mapping = IdMapping.load(filePath=f"{outputDirectory}/{mappingName}_final_mapping.pkl")
+            self.assertEqual(mapping.entries[: len(firstMapping)], list(firstMapping))
+        marketTypes = IdMapping.load(filePath=f"{outputDirectory}/{OutputFilenames.MARKET_TYPES}_final_mapping.pkl")
+        self.assertEqual(marketTypes.entries, ["OVER_UNDER_15", "MATCH_ODDS"])
+        self.assertEqual(len(list(Path(outputDirectory, "remapped_files").glob("**/*.csv"))), 8)
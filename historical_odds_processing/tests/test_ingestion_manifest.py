@@ -0,0 +1,166 @@
+from pathlib import Path
+from shutil import copy, rmtree
+from tempfile import mkdtemp
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+
+from historical_odds_processing.datamodel.data_store_schema.historical_trading_schema import LastTradedPrice
+from historical_odds_processing.scripts.database_build.add_files_to_database import create_table_partitions
+from historical_odds_processing.scripts.file_processing_steps.merge_all_id_feature_maps import merge_all_mappings
+from historical_odds_processing.scripts.file_processing_steps.process_bz2_odds_files import process_all_bz2_files
+from historical_odds_processing.scripts.file_processing_steps.remap_all_id_features import remap_all_id_features
+from historical_odds_processing.store.db_creation.ingestion_manifest import IngestionManifest
+from historical_odds_processing.store.db_creation.ingestion_manifest import get_chunk_file_record
+from historical_odds_processing.tests.example_bz2_data.paths import EXAMPLE_BZ2_FILES_DIRECTORY
+
+
+class TestIngestionManifest(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.workingDirectory = mkdtemp()
+        self.inputDirectory = Path(self.workingDirectory, "input")
+        self.outputDirectory = Path(self.workingDirectory, "output")
+        self.outputDirectory.mkdir()
+        self.filePaths = []
+        for monthName, fileName in (("Jun", "1.159564697.bz2"), ("Jul", "1.159963367.bz2")):
+            monthDirectory = Path(self.inputDirectory, "2019", monthName, "1")
+            monthDirectory.mkdir(parents=True)
+            self.filePaths.append(Path(copy(EXAMPLE_BZ2_FILES_DIRECTORY.joinpath(fileName), monthDirectory)))
+
+    def tearDown(self):
+        super().tearDown()
+        rmtree(self.workingDirectory)
+
+    def _process_files(self, fuseIdEncoding: bool = False):
+        process_all_bz2_files(
+            inputDirectory=self.inputDirectory,
+            outputDirectory=self.outputDirectory,
+            validCountryCodes=None,
+            numThreads=1,
+            fuseIdEncoding=fuseIdEncoding,
+        )
+
+    def _get_chunk_paths(self):
+        ingestionManifest = IngestionManifest(outputDirectory=self.outputDirectory)
+        chunkPaths = ingestionManifest.get_complete_chunk_paths()
+        ingestionManifest.close()
+        return chunkPaths
+
+    def test_recover_removes_incomplete_chunks(self):
+        ingestionManifest = IngestionManifest(outputDirectory=self.outputDirectory)
+        completeChunkPath = Path(self.outputDirectory, "2019", "Jun", "a_0_0")
+        incompleteChunkPath = Path(self.outputDirectory, "2019", "Jul", "a_0_0")
+        for chunkPath in (completeChunkPath, incompleteChunkPath):
+            chunkPath.mkdir(parents=True)
+            ingestionManifest.start_chunk(chunkPath=chunkPath)
+        ingestionManifest.complete_chunk(
+            chunkPath=completeChunkPath, fileRecords=[get_chunk_file_record(filePath=self.filePaths[0])]
+        )
+
+        self.assertEqual(ingestionManifest.recover(), [str(incompleteChunkPath.resolve())])
+        self.assertFalse(incompleteChunkPath.exists())
+        self.assertTrue(completeChunkPath.exists())
+        self.assertEqual(ingestionManifest.get_pending_filepaths(filePaths=self.filePaths), [self.filePaths[1]])
+        ingestionManifest.close()
+
+    def test_unchanged_files_are_not_reprocessed(self):
+        self._process_files()
+        chunkPaths = self._get_chunk_paths()
+        self.assertEqual(len(chunkPaths), 2)
+        self._process_files()
+        self.assertEqual(self._get_chunk_paths(), chunkPaths)
+
+    def test_changed_file_rebuilds_its_chunk(self):
+        self._process_files()
+        chunkPaths = self._get_chunk_paths()
+        copy(EXAMPLE_BZ2_FILES_DIRECTORY.joinpath("1.159963367.bz2"), self.filePaths[0])
+        self._process_files()
+        newChunkPaths = self._get_chunk_paths()
+        self.assertEqual(len(newChunkPaths), 2)
+        self.assertEqual(len(set(chunkPaths).intersection(newChunkPaths)), 1)
+        self.assertFalse(Path([chunkPath for chunkPath in chunkPaths if "Jun" in chunkPath][0]).exists())
+
+    def test_merge_and_remap_skip_unchanged_chunks(self):
+        self._process_files()
+        merge_all_mappings(outputDirectory=self.outputDirectory)
+        remap_all_id_features(numThreads=1, outputDirectory=self.outputDirectory)
+        remappedFiles = sorted(Path(self.outputDirectory, "remapped_files").glob("**/*.csv"))
+        self.assertEqual(len(remappedFiles), 8)
+        modifiedTimes = [file.stat().st_mtime_ns for file in remappedFiles]
+
+        self._process_files()
+        merge_all_mappings(outputDirectory=self.outputDirectory)
+        remap_all_id_features(numThreads=1, outputDirectory=self.outputDirectory)
+        self.assertEqual([file.stat().st_mtime_ns for file in remappedFiles], modifiedTimes)
+
+    def test_changed_file_in_loaded_chunk_is_refused(self):
+        self._process_files()
+        merge_all_mappings(outputDirectory=self.outputDirectory)
+        remap_all_id_features(numThreads=1, outputDirectory=self.outputDirectory)
+        junChunkPath = [chunkPath for chunkPath in self._get_chunk_paths() if "Jun" in chunkPath][0]
+        ingestionManifest = IngestionManifest(outputDirectory=self.outputDirectory)
+        ingestionManifest.add_loaded_filepaths(
+            filePaths=Path(ingestionManifest.get_remapped_chunk_path(chunkPath=junChunkPath)).glob("*.csv")
+        )
+        self.assertEqual(ingestionManifest.get_loaded_chunk_paths(), {junChunkPath})
+        ingestionManifest.close()
+
+        copy(EXAMPLE_BZ2_FILES_DIRECTORY.joinpath("1.159963367.bz2"), self.filePaths[0])
+        with self.assertRaises(ValueError):
+            self._process_files()
+        self.assertTrue(Path(junChunkPath).exists())
+
+    def test_changed_file_in_loaded_fused_chunk_is_refused(self):
+        # fused chunks are written straight under remapped_files, so they are their own remapped chunk
+        self._process_files(fuseIdEncoding=True)
+        junChunkPath = [chunkPath for chunkPath in self._get_chunk_paths() if "Jun" in chunkPath][0]
+        self.assertIn(str(Path(self.outputDirectory, "remapped_files").resolve()), junChunkPath)
+        ingestionManifest = IngestionManifest(outputDirectory=self.outputDirectory)
+        self.assertEqual(ingestionManifest.get_remapped_chunk_path(chunkPath=junChunkPath), junChunkPath)
+        ingestionManifest.add_loaded_filepaths(filePaths=Path(junChunkPath).glob("*.csv"))
+        self.assertEqual(ingestionManifest.get_loaded_chunk_paths(), {junChunkPath})
+        ingestionManifest.close()
+
+        copy(EXAMPLE_BZ2_FILES_DIRECTORY.joinpath("1.159963367.bz2"), self.filePaths[0])
+        with self.assertRaises(ValueError):
+            self._process_files(fuseIdEncoding=True)
+        self.assertTrue(Path(junChunkPath).exists())
+
+    def test_timestamp_ranges_are_recorded_for_partitions(self):
+        self._process_files()
+        merge_all_mappings(outputDirectory=self.outputDirectory)
+        remap_all_id_features(numThreads=1, outputDirectory=self.outputDirectory)
+        filePaths = sorted(Path(self.outputDirectory, "remapped_files").glob("**/last_traded_price*.csv"))
+        unixTimestamps = pd.concat([pd.read_csv(filePath, usecols=["unix_timestamp"]) for filePath in filePaths])
+        insertionEngine = MagicMock()
+        ingestionManifest = IngestionManifest(outputDirectory=self.outputDirectory)
+        self.assertEqual(len(ingestionManifest.get_timestamp_ranges(filePaths=filePaths)), len(filePaths))
+        # the files themselves aren't read again
+        with patch(
+            "historical_odds_processing.scripts.database_build.add_files_to_database.get_column_range"
+        ) as getColumnRange:
+            create_table_partitions(
+                insertionEngine=insertionEngine,
+                table=LastTradedPrice(),
+                filePaths=filePaths,
+                ingestionManifest=ingestionManifest,
+            )
+        ingestionManifest.close()
+        getColumnRange.assert_not_called()
+        # the chunk ranges cover every table's rows, so they can only be wider than the files' own range
+        partitionRange = insertionEngine.create_partitions.call_args.kwargs
+        self.assertLessEqual(partitionRange["minValue"], unixTimestamps["unix_timestamp"].min())
+        self.assertGreaterEqual(partitionRange["maxValue"], unixTimestamps["unix_timestamp"].max())
+        lastTradedPrice = LastTradedPrice()
+        self.assertEqual(
+            lastTradedPrice.partitioning.get_partitions_sql(
+                tableName=lastTradedPrice.tableName, minValue=partitionRange["minValue"], maxValue=partitionRange["maxValue"]
+            ),
+            lastTradedPrice.partitioning.get_partitions_sql(
+                tableName=lastTradedPrice.tableName,
+                minValue=unixTimestamps["unix_timestamp"].min(),
+                maxValue=unixTimestamps["unix_timestamp"].max(),
+            ),
+        )
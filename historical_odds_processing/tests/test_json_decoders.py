@@ -0,0 +1,46 @@
+import json
+from unittest import TestCase
+
+from historical_odds_processing.store.db_creation.json_decoders import get_available_json_decoder_names
+from historical_odds_processing.store.db_creation.json_decoders import get_json_decoder
+from historical_odds_processing.store.db_creation.json_decoders import LazyMarketChangeDecoder
+from historical_odds_processing.store.db_creation.json_decoders import StdlibJsonDecoder
+from historical_odds_processing.tests.example_bz2_data.raw_market_change_update import RAW_MARKET_CHANGE_UPDATE
+
+
+class TestJsonDecoders(TestCase):
+    def __init__(self, methodName="runTest"):
+        super(TestJsonDecoders, self).__init__(methodName=methodName)
+        self.marketDefinitionLine = json.dumps(RAW_MARKET_CHANGE_UPDATE).encode()
+        self.runnerChange = {
+            "op": "mcm",
+            "clk": "9498544727",
+            "pt": 1561575850428,
+            "mc": [{"id": "1.159963367", "rc": [{"ltp": 1.04, "id": 11213164, "tv": 10.5}]}],
+        }
+        self.runnerChangeLine = json.dumps(self.runnerChange).encode()
+        self.heartbeatLine = json.dumps({"op": "mcm", "clk": "1", "pt": 1561575850428, "mc": [{"id": "1.2"}]}).encode()
+
+    def test_full_decoders(self):
+        for decoderName in get_available_json_decoder_names():
+            if decoderName == LazyMarketChangeDecoder.name:
+                continue
+            decoder = get_json_decoder(name=decoderName)
+            self.assertEqual(decoder.decode(self.marketDefinitionLine), RAW_MARKET_CHANGE_UPDATE)
+            self.assertEqual(decoder.decode(self.runnerChangeLine), self.runnerChange)
+
+    def test_lazy_decoder(self):
+        for fallbackDecoder in (None, StdlibJsonDecoder()):
+            decoder = LazyMarketChangeDecoder(fallbackDecoder=fallbackDecoder)
+            self.assertIsNone(decoder.decode(self.heartbeatLine))
+            self.assertEqual(decoder.decode(self.marketDefinitionLine), RAW_MARKET_CHANGE_UPDATE)
+            runnerChange = decoder.decode(self.runnerChangeLine)
+            self.assertEqual(runnerChange["pt"], self.runnerChange["pt"])
+            self.assertEqual(runnerChange["mc"][0]["id"], "1.159963367")
+            self.assertEqual(runnerChange["mc"][0]["rc"][0]["ltp"], 1.04)
+            self.assertEqual(runnerChange["mc"][0]["rc"][0]["id"], 11213164)
+
+    def test_get_json_decoder(self):
+        self.assertIsInstance(get_json_decoder(name=StdlibJsonDecoder.name), StdlibJsonDecoder)
+        self.assertIn(get_json_decoder().name, get_available_json_decoder_names())
+        self.assertRaises(ValueError, get_json_decoder, "notADecoder")
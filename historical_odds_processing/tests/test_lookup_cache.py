@@ -0,0 +1,27 @@
+from unittest import TestCase
+
+from historical_odds_processing.store.lookup_cache import LRUCache
+
+
+class TestLRUCache(TestCase):
+    def test_unbounded(self):
+        cache = LRUCache()
+        cache.update(entries={index: index * 2 for index in range(1000)})
+        self.assertEqual(len(cache), 1000)
+        self.assertEqual(cache.get(key=10), 20)
+        self.assertIsNone(cache.get(key=1000))
+        self.assertEqual((cache.numHits, cache.numMisses), (1, 1))
+
+    def test_eviction(self):
+        cache = LRUCache(maxSize=2)
+        cache.put(key="a", value=1)
+        cache.put(key="b", value=2)
+        # reading a makes b the least recently used entry
+        self.assertEqual(cache.get(key="a"), 1)
+        cache.put(key="c", value=3)
+        self.assertEqual(len(cache), 2)
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertIn("c", cache)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
@@ -0,0 +1,67 @@
+import os
+from pathlib import Path
+from shutil import copy, rmtree
+from tempfile import mkdtemp
+from unittest import TestCase
+
+from historical_odds_processing.store.db_creation.market_file_index import MarketFileIndex
+from historical_odds_processing.store.db_creation.market_file_index import read_first_line
+from historical_odds_processing.store.db_creation.market_file_index import scan_market_file
+from historical_odds_processing.tests.example_bz2_data.paths import EXAMPLE_BZ2_FILES_DIRECTORY
+
+
+class TestMarketFileIndex(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.workingDirectory = mkdtemp()
+        self.filePaths = [
+            Path(copy(EXAMPLE_BZ2_FILES_DIRECTORY.joinpath(fileName), self.workingDirectory))
+            for fileName in ("1.159564697.bz2", "1.159963367.bz2")
+        ]
+        self.marketFileIndex = MarketFileIndex(indexPath=Path(self.workingDirectory, "index.sqlite"))
+
+    def tearDown(self):
+        super().tearDown()
+        self.marketFileIndex.close()
+        rmtree(self.workingDirectory)
+
+    def test_read_first_line(self):
+        firstLine = read_first_line(filePath=self.filePaths[1])
+        self.assertTrue(firstLine.startswith(b"{"))
+        self.assertNotIn(b"\n", firstLine)
+
+    def test_scan_market_file(self):
+        row = scan_market_file(filePath=self.filePaths[1])
+        self.assertEqual(row[0], str(self.filePaths[1].resolve()))
+        self.assertEqual(row[3:], (1, "1.159963367", 1, "MATCH_ODDS", "GB"))
+
+    def test_update_only_scans_changed_files(self):
+        self.assertEqual(self.marketFileIndex.update(filePaths=self.filePaths, numWorkers=1), 2)
+        self.assertEqual(self.marketFileIndex.update(filePaths=self.filePaths, numWorkers=1), 0)
+        fileStats = self.filePaths[0].stat()
+        os.utime(self.filePaths[0], (fileStats.st_atime, fileStats.st_mtime + 10))
+        self.assertEqual(self.marketFileIndex.get_stale_filepaths(filePaths=self.filePaths), [str(self.filePaths[0])])
+
+    def test_filter_filepaths(self):
+        self.marketFileIndex.update(filePaths=self.filePaths, numWorkers=1)
+        self.assertEqual(self.marketFileIndex.filter_filepaths(filePaths=self.filePaths), self.filePaths)
+        self.assertEqual(
+            self.marketFileIndex.filter_filepaths(filePaths=self.filePaths, countryCodes=["GB"]), [self.filePaths[1]]
+        )
+        self.assertEqual(
+            self.marketFileIndex.filter_filepaths(filePaths=self.filePaths, marketTypes=["OVER_UNDER_15"]), [self.filePaths[0]]
+        )
+        self.assertEqual(
+            self.marketFileIndex.filter_filepaths(
+                filePaths=self.filePaths, countryCodes=["GB"], marketTypes=["OVER_UNDER_15"]
+            ),
+            [],
+        )
+
+    def test_unscanned_files_are_kept(self):
+        unindexedFilePath = Path(self.workingDirectory, "1.1.bz2")
+        unindexedFilePath.touch()
+        self.marketFileIndex.update(filePaths=[unindexedFilePath], numWorkers=1)
+        self.assertEqual(
+            self.marketFileIndex.filter_filepaths(filePaths=[unindexedFilePath], countryCodes=["GB"]), [unindexedFilePath]
+        )
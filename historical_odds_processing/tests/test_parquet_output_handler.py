@@ -0,0 +1,81 @@
+from datetime import datetime
+from pathlib import Path
+from shutil import rmtree
+from tempfile import mkdtemp
+from unittest import TestCase, skipIf
+
+from historical_odds_processing.store.db_creation.parquet_output_handler import ParquetOutputHandler
+from historical_odds_processing.store.db_creation.parquet_remapper import ParquetRemapper
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+
+@skipIf(pq is None, "pyarrow isn't installed")
+class TestParquetOutputHandler(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.workingDirectory = mkdtemp()
+        self.fileName = str(Path(self.workingDirectory, "2019", "Jun", "0_0", "last_traded_price.parquet"))
+        Path(self.fileName).parent.mkdir(parents=True)
+        self.outputHandler = ParquetOutputHandler(
+            fileName=self.fileName,
+            tableFields=("unix_timestamp", "betfair_market_id", "betfair_runner_table_id", "price", "market_start_time"),
+            rowGroupSize=2,
+        )
+        self.rows = [
+            {
+                "unix_timestamp": 100,
+                "betfair_market_id": "1.1",
+                "betfair_runner_table_id": "runnerA",
+                "price": 1.5,
+                "market_start_time": datetime(2019, 6, 1),
+            },
+            {"unix_timestamp": 200, "betfair_market_id": "1.1", "betfair_runner_table_id": "runnerB", "price": 2.5},
+            {"unix_timestamp": 300, "betfair_market_id": "1.2", "betfair_runner_table_id": ["runnerC"], "price": 3.5},
+        ]
+
+    def tearDown(self):
+        super().tearDown()
+        rmtree(self.workingDirectory)
+
+    def test_parquet_output_handler_valid(self):
+        for row in self.rows:
+            self.outputHandler.add(data=row)
+        self.outputHandler.close()
+
+        parquetFile = pq.ParquetFile(self.fileName)
+        self.assertEqual(parquetFile.metadata.num_row_groups, 2)
+        savedData = parquetFile.read()
+        self.assertEqual(savedData.schema.field("unix_timestamp").type, pa.int64())
+        self.assertEqual(savedData.schema.field("price").type, pa.float64())
+        self.assertTrue(pa.types.is_dictionary(savedData.schema.field("betfair_market_id").type))
+        self.assertEqual(savedData.column("betfair_market_id").to_pylist(), ["1.1", "1.1", "1.2"])
+        self.assertEqual(savedData.column("betfair_runner_table_id").to_pylist(), ["runnerA", "runnerB", "['runnerC']"])
+        self.assertEqual(savedData.column("market_start_time").to_pylist(), [datetime(2019, 6, 1), None, None])
+
+    def test_parquet_output_handler_invalid(self):
+        self.assertRaises(ValueError, self.outputHandler.add, {"randomName": "stuff"})
+        self.outputHandler.close()
+
+    def test_parquet_remapper(self):
+        for row in self.rows[:2]:
+            self.outputHandler.add(data=row)
+        self.outputHandler.close()
+        outputDirectory = Path(self.workingDirectory, "remapped_files")
+        remapper = ParquetRemapper(
+            parquetToRemap=self.fileName,
+            remappingDict={"betfair_runner_table_id": {"runnerA": 0, "runnerB": 1}},
+            outputDirectory=str(outputDirectory),
+            chunkSize=1,
+        )
+        remapper.process_parquet()
+        remappedFiles = sorted(outputDirectory.glob("2019/Jun/0_0/*.parquet"))
+        self.assertEqual([file.name for file in remappedFiles], ["last_traded_price_0.parquet", "last_traded_price_1.parquet"])
+        remappedData = pa.concat_tables([pq.read_table(file) for file in remappedFiles])
+        self.assertEqual(remappedData.column("betfair_runner_table_id").to_pylist(), [0, 1])
+        self.assertEqual(remappedData.column("price").to_pylist(), [1.5, 2.5])
@@ -0,0 +1,121 @@
+import asyncio
+import testing.postgresql
+
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+
+from historical_odds_processing.datamodel.data_store_schema.historical_trading_schema import ALL_HISTORICAL_SCHEMAS
+from historical_odds_processing.datamodel.data_store_schema.mapping_table_schema import ALL_MAPPING_SCHEMAS
+from historical_odds_processing.datamodel.data_store_schema.views import ALL_VIEWS
+from historical_odds_processing.store.pooled_postgres_engine import AsyncPostgresQueryEngine
+from historical_odds_processing.store.pooled_postgres_engine import PooledPostgresInsertionEngine
+from historical_odds_processing.store.pooled_postgres_engine import get_prepared_statement
+from historical_odds_processing.store.postgres_insertion_engine import PostgresInsertionEngine
+
+
+def create_table(postgresqlConnection):
+    config = postgresqlConnection.dsn()
+    dbEngine = PostgresInsertionEngine(
+        databaseName=config["database"],
+        user=config["user"],
+        password=config.get("password"),
+        port=config["port"],
+        host=config["host"],
+    )
+    for table in ALL_MAPPING_SCHEMAS + ALL_HISTORICAL_SCHEMAS:
+        dbEngine.create_table(schema=table.create_table_sql())
+        if table.partitioning is not None:
+            for partitionSql in table.partitioning.get_partitions_sql(tableName=table.tableName, minValue=0, maxValue=0):
+                dbEngine.create_table(schema=partitionSql)
+    for view in ALL_VIEWS:
+        dbEngine.create_table(schema=view)
+
+
+Postgresql = testing.postgresql.PostgresqlFactory(cache_initialized_db=True, on_initialized=create_table)
+
+
+def tearDownModule():
+    Postgresql.clear_cache()
+
+
+class TestPooledPostgresEngine(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.postgresql = Postgresql()
+        config = self.postgresql.dsn()
+        self.pooledEngine = PooledPostgresInsertionEngine(
+            databaseName=config["database"],
+            user=config["user"],
+            password=config.get("password"),
+            port=config["port"],
+            host=config["host"],
+            maxConnections=4,
+            healthCheckIntervalSeconds=0,
+        )
+
+    def tearDown(self):
+        super().tearDown()
+        self.pooledEngine.close_pool()
+        self.postgresql.stop()
+
+    def test_get_prepared_statement(self):
+        statementName, preparedQuery, parameterNames = get_prepared_statement(
+            query="SELECT * FROM t WHERE a = %(a)s AND b > %(b)s AND c < %(a)s"
+        )
+        self.assertTrue(statementName.startswith("statement_"))
+        self.assertEqual(preparedQuery, "SELECT * FROM t WHERE a = $1 AND b > $2 AND c < $1")
+        self.assertEqual(parameterNames, ("a", "b"))
+
+    def test_prepared_queries(self):
+        bettingTypeId = self.pooledEngine.insert_betting_type(bettingTypeName="ODDS")
+        self.assertEqual(self.pooledEngine.get_betting_type_index(bettingTypeName="ODDS"), bettingTypeId)
+        self.assertIsNone(self.pooledEngine.get_betting_type_index(bettingTypeName="LINE"))
+        preparedStatements = self.pooledEngine.run_select_query(query="SELECT name FROM pg_prepared_statements")
+        self.assertGreater(len(preparedStatements), 0)
+
+    def test_concurrent_queries(self):
+        betfairIds = list(range(20))
+        runnerIds = [
+            self.pooledEngine.insert_runner(runnerName=f"runner {betfairId}", betfairId=betfairId) for betfairId in betfairIds
+        ]
+        # more threads than pooled connections
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(
+                executor.map(
+                    lambda betfairId: self.pooledEngine.get_runner_id_by_betfair_id(betfairRunnerId=betfairId), betfairIds * 5
+                )
+            )
+        self.assertEqual(results, runnerIds * 5)
+
+    def test_broken_connections_are_replaced(self):
+        self.pooledEngine.insert_betting_type(bettingTypeName="ODDS")
+        config = self.postgresql.dsn()
+        otherEngine = PostgresInsertionEngine(
+            databaseName=config["database"],
+            user=config["user"],
+            password=config.get("password"),
+            port=config["port"],
+            host=config["host"],
+        )
+        otherEngine.run_select_query(
+            query="SELECT pg_terminate_backend(pid) FROM pg_stat_activity WHERE pid <> pg_backend_pid() AND backend_type = 'client backend'"
+        )
+        self.assertEqual(self.pooledEngine.get_betting_type_index(bettingTypeName="ODDS"), 1)
+
+    def test_async_engine(self):
+        runnerId = self.pooledEngine.insert_runner(runnerName="runner", betfairId=7)
+        for betfairMarketId in ["1.1", "1.2", "1.3"]:
+            self.pooledEngine.insert_last_traded_price(
+                unixTimestamp=0, betfairMarketId=betfairMarketId, betfairRunnerTableId=runnerId, price=2.5
+            )
+
+        async def get_markets():
+            asyncEngine = AsyncPostgresQueryEngine(pooledEngine=self.pooledEngine)
+            oddsTimeSeries = await asyncEngine.get_many_odds_time_series(betfairMarketIds=["1.1", "1.2", "1.3", "1.4"])
+            asyncEngine.executor.shutdown(wait=True)
+            return oddsTimeSeries
+
+        oddsTimeSeries = asyncio.run(get_markets())
+        self.assertEqual(list(oddsTimeSeries.keys()), ["1.1", "1.2", "1.3", "1.4"])
+        self.assertEqual(len(oddsTimeSeries["1.2"]), 1)
+        self.assertEqual(len(oddsTimeSeries["1.4"]), 0)
@@ -0,0 +1,162 @@
+import gzip
+import testing.postgresql
+
+from pathlib import Path
+from shutil import rmtree
+from tempfile import mkdtemp
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+import psycopg2
+
+from historical_odds_processing.datamodel.data_store_schema.historical_trading_schema import LastTradedPrice
+from historical_odds_processing.store.postgres_copy_loader import PostgresCopyLoader
+from historical_odds_processing.store.postgres_copy_loader import open_copy_stream
+from historical_odds_processing.store.postgres_insertion_engine import PostgresInsertionEngine
+
+
+def create_table(postgresqlConnection):
+    config = postgresqlConnection.dsn()
+    dbEngine = PostgresInsertionEngine(
+        databaseName=config["database"],
+        user=config["user"],
+        password=config.get("password"),
+        port=config["port"],
+        host=config["host"],
+    )
+    lastTradedPrice = LastTradedPrice()
+    dbEngine.create_table(schema=lastTradedPrice.create_table_sql())
+    for partitionSql in lastTradedPrice.partitioning.get_partitions_sql(
+        tableName=lastTradedPrice.tableName, minValue=0, maxValue=400
+    ):
+        dbEngine.create_table(schema=partitionSql)
+
+
+Postgresql = testing.postgresql.PostgresqlFactory(cache_initialized_db=True, on_initialized=create_table)
+
+
+def tearDownModule():
+    Postgresql.clear_cache()
+
+
+class TestPostgresCopyLoader(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.postgresql = Postgresql()
+        self.workingDirectory = mkdtemp()
+        config = self.postgresql.dsn()
+        self.dbEngine = PostgresInsertionEngine(
+            databaseName=config["database"],
+            user=config["user"],
+            password=config.get("password"),
+            port=config["port"],
+            host=config["host"],
+        )
+        self.copyLoader = PostgresCopyLoader(
+            databaseName=config["database"],
+            user=config["user"],
+            password=config.get("password"),
+            port=config["port"],
+            host=config["host"],
+            numConnections=2,
+            retryDelaySeconds=0,
+        )
+        self.columnNames = ["unix_timestamp", "betfair_market_id", "event_id", "betfair_runner_table_id", "price"]
+        self.filePaths = []
+        for fileIndex in range(3):
+            data = pd.DataFrame(
+                {
+                    "unix_timestamp": range(fileIndex * 100, (fileIndex + 1) * 100),
+                    "betfair_market_id": "1.159564697",
+                    "event_id": 29302120,
+                    "betfair_runner_table_id": fileIndex,
+                    "price": 1.5,
+                }
+            )
+            filePath = Path(self.workingDirectory, f"last_traded_price_{fileIndex}.csv")
+            data.to_csv(filePath, index=False)
+            self.filePaths.append(filePath)
+        gzipPath = Path(self.workingDirectory, "last_traded_price_3.csv.gz")
+        with gzip.open(gzipPath, "wb") as gzipFile:
+            gzipFile.write(self.filePaths[0].read_bytes())
+        self.filePaths.append(gzipPath)
+
+    def tearDown(self):
+        super().tearDown()
+        self.copyLoader.close()
+        self.postgresql.stop()
+        rmtree(self.workingDirectory)
+
+    def _get_row_count(self):
+        output = self.dbEngine.run_select_query(query="SELECT COUNT(*) AS num_rows FROM tbl_betfair_last_traded_price")
+        return int(output["num_rows"].values[0])
+
+    def test_load_files(self):
+        loadStats = self.copyLoader.load_files(
+            tableName="tbl_betfair_last_traded_price",
+            columnNames=self.columnNames,
+            filePaths=self.filePaths,
+            showProgress=False,
+        )
+        self.assertEqual(loadStats.numFiles, 4)
+        self.assertEqual(loadStats.numRows, 400)
+        self.assertEqual(
+            loadStats.numBytes, sum(file.stat().st_size for file in self.filePaths[:3]) + self.filePaths[0].stat().st_size
+        )
+        self.assertGreater(loadStats.rowsPerSecond, 0)
+        self.assertEqual(self._get_row_count(), 400)
+
+    def test_load_files_retries_transient_errors(self):
+        openCopyStream = patch(
+            "historical_odds_processing.store.postgres_copy_loader.open_copy_stream",
+            side_effect=[psycopg2.OperationalError("connection reset"), open_copy_stream(self.filePaths[0], self.columnNames)],
+        )
+        with openCopyStream:
+            loadStats = self.copyLoader.load_files(
+                tableName="tbl_betfair_last_traded_price",
+                columnNames=self.columnNames,
+                filePaths=self.filePaths[:1],
+                showProgress=False,
+            )
+        self.assertEqual(loadStats.numRows, 100)
+        self.assertEqual(self._get_row_count(), 100)
+
+    def test_load_files_raises_on_bad_data(self):
+        badFilePath = Path(self.workingDirectory, "bad.csv")
+        badFilePath.write_text("unix_timestamp,betfair_market_id,event_id,betfair_runner_table_id,price\nabc,1.1,1,1,1.5\n")
+        with self.assertRaises(psycopg2.DataError):
+            self.copyLoader.load_files(
+                tableName="tbl_betfair_last_traded_price",
+                columnNames=self.columnNames,
+                filePaths=[badFilePath],
+                showProgress=False,
+            )
+        self.assertEqual(self._get_row_count(), 0)
+
+    def test_load_files_reports_committed_files_before_raising(self):
+        badFilePath = Path(self.workingDirectory, "bad.csv")
+        badFilePath.write_text("unix_timestamp,betfair_market_id,event_id,betfair_runner_table_id,price\nabc,1.1,1,1,1.5\n")
+        loadedFilePaths = []
+        with self.assertRaises(psycopg2.DataError):
+            self.copyLoader.load_files(
+                tableName="tbl_betfair_last_traded_price",
+                columnNames=self.columnNames,
+                filePaths=self.filePaths[:2] + [badFilePath],
+                showProgress=False,
+                fileLoadedCallback=loadedFilePaths.append,
+            )
+        # every file reported as loaded was committed, and nothing else was
+        self.assertNotIn(badFilePath, loadedFilePaths)
+        self.assertEqual(self._get_row_count(), 100 * len(loadedFilePaths))
+
+    def test_commit_errors_are_not_retried(self):
+        connection = MagicMock()
+        connection.commit.side_effect = psycopg2.OperationalError("connection reset")
+        with patch.object(self.copyLoader.connectionPool, "getconn", return_value=connection) as getConnection:
+            with patch.object(self.copyLoader.connectionPool, "putconn"):
+                with self.assertRaises(psycopg2.OperationalError):
+                    self.copyLoader.copy_file(
+                        tableName="tbl_betfair_last_traded_price", columnNames=self.columnNames, filePath=self.filePaths[0]
+                    )
+        self.assertEqual(getConnection.call_count, 1)
@@ -1,12 +1,24 @@
 import testing.postgresql
 
 from datetime import datetime
+from io import BytesIO
 from unittest import TestCase
+from unittest.mock import patch
+
+import numpy as np
+import psycopg2
 
 from historical_odds_processing.datamodel.constants import BETFAIR_DATETIME_FORMAT
 from historical_odds_processing.datamodel.data_store_schema.mapping_table_schema import ALL_MAPPING_SCHEMAS
 from historical_odds_processing.datamodel.data_store_schema.historical_trading_schema import ALL_HISTORICAL_SCHEMAS
+from historical_odds_processing.datamodel.data_store_schema.indexes import INDEXES
+from historical_odds_processing.scripts.database_build.post_load_build import add_foreign_keys
+from historical_odds_processing.scripts.database_build.post_load_build import add_indexes
+from historical_odds_processing.scripts.database_build.post_load_build import add_views
+from historical_odds_processing.scripts.database_build.post_load_build import run_post_load_build
+from historical_odds_processing.scripts.database_build.refresh_odds_series import refresh_odds_series
 from historical_odds_processing.store.postgres_insertion_engine import PostgresInsertionEngine
+from historical_odds_processing.store.postgres_query_engine import LOOKUP_TABLE_COLUMNS
 
 
 def create_table(postgresqlConnection):
@@ -22,6 +34,10 @@ def create_table(postgresqlConnection):
         dbEngine.create_table(schema=table.create_table_sql())
     for table in ALL_HISTORICAL_SCHEMAS:
         dbEngine.create_table(schema=table.create_table_sql())
+        if table.partitioning is not None:
+            # the test rows all have timestamps close to 0
+            for partitionSql in table.partitioning.get_partitions_sql(tableName=table.tableName, minValue=0, maxValue=0):
+                dbEngine.create_table(schema=partitionSql)
 
 
 # Generate Postgresql class which shares the generated database
@@ -410,3 +426,205 @@ class TestPostgresEngine(TestCase):
         )
         self.assertEqual(queryResult2["unix_timestamp"].values[0], LAST_TRADED_PRICE_2["timestamp"])
         self.assertEqual(queryResult2["price"].values[0], LAST_TRADED_PRICE_2["price"])
+
+    def test_last_traded_price_creates_partition(self):
+        # only the partition for timestamps close to 0 is created by the test setup
+        self.dbEngine.insert_last_traded_price(
+            unixTimestamp=1546300800, betfairMarketId="1.1", betfairRunnerTableId=4, price=2
+        )
+        self.dbEngine.insert_last_traded_price(
+            unixTimestamp=1546300801, betfairMarketId="1.1", betfairRunnerTableId=4, price=3
+        )
+        self.assertListEqual(
+            self.dbEngine.get_partition_names(tableName="tbl_betfair_last_traded_price"),
+            ["tbl_betfair_last_traded_price_1970_01", "tbl_betfair_last_traded_price_2019_01"],
+        )
+        fullTableResults = self.dbEngine.run_select_query(query="SELECT * FROM tbl_betfair_last_traded_price_2019_01")
+        self.assertEqual(len(fullTableResults), 2)
+
+    def test_copy_from_stream(self):
+        csvStream = BytesIO(b'unix_timestamp,betfair_market_id,betfair_runner_table_id,price\n1,"1.1",4,2.5\n5,"1.1",,6\n')
+        self.dbEngine.copy_from_stream(
+            tableName="tbl_betfair_last_traded_price",
+            columnNames=["unix_timestamp", "betfair_market_id", "betfair_runner_table_id", "price"],
+            stream=csvStream,
+        )
+        fullTableResults = self.dbEngine.run_select_query(query="SELECT * FROM tbl_betfair_last_traded_price ORDER BY id")
+        self.assertSequenceEqual(list(fullTableResults["unix_timestamp"].values), [1, 5])
+        self.assertSequenceEqual(list(fullTableResults["price"].values), [2.5, 6])
+        self.assertIsNone(fullTableResults["betfair_runner_table_id"].values[1])
+
+    def test_add_indexes(self):
+        add_indexes(insertionEngine=self.dbEngine, numWorkers=2)
+        self.assertEqual(
+            self.dbEngine.get_partition_names(tableName="tbl_betfair_last_traded_price"),
+            ["tbl_betfair_last_traded_price_1970_01"],
+        )
+        indexNames = self.dbEngine.run_select_query(query="SELECT indexname FROM pg_indexes")["indexname"].tolist()
+        for index in INDEXES:
+            self.assertIn(index.name, indexNames)
+        self.assertIn("tbl_betfair_last_traded_price_market_runner_timestamp_1970_01", indexNames)
+        invalidIndexes = self.dbEngine.run_select_query(query="SELECT * FROM pg_index WHERE NOT indisvalid")
+        self.assertEqual(len(invalidIndexes), 0)
+        # rebuilding is a no op
+        add_indexes(insertionEngine=self.dbEngine, numWorkers=2)
+
+    def test_post_load_build(self):
+        runnerId = self.dbEngine.insert_runner(runnerName="runner", betfairId=1)
+        self.dbEngine.insert_last_traded_price(
+            unixTimestamp=1, betfairMarketId="1.1", betfairRunnerTableId=runnerId, price=2.5
+        )
+        stepTimings = run_post_load_build(insertionEngine=self.dbEngine, numWorkers=2, maintenanceWorkMem="64MB")
+        self.assertEqual(list(stepTimings.keys()), ["indexes", "foreign keys", "analyze", "views"])
+        foreignKeys = self.dbEngine.run_select_query(
+            query="SELECT conrelid::regclass::text AS table_name, convalidated FROM pg_constraint WHERE contype = 'f'"
+        )
+        self.assertTrue(foreignKeys["convalidated"].all())
+        self.assertIn("tbl_betfair_last_traded_price", foreignKeys["table_name"].tolist())
+        self.assertIn("tbl_betfair_last_traded_price_1970_01", foreignKeys["table_name"].tolist())
+        self.assertEqual(len(self.dbEngine.get_odds_time_series(betfairMarketId="1.1")), 1)
+        # rebuilding is a no op
+        run_post_load_build(insertionEngine=self.dbEngine, numWorkers=2)
+
+    def test_post_load_build_invalid_foreign_key(self):
+        self.dbEngine.insert_last_traded_price(unixTimestamp=1, betfairMarketId="1.1", betfairRunnerTableId=5, price=2.5)
+        with self.assertRaises(psycopg2.errors.ForeignKeyViolation):
+            add_foreign_keys(insertionEngine=self.dbEngine, numWorkers=2)
+
+    def test_add_foreign_keys_without_partitions(self):
+        self.dbEngine.run_update_query(query="DROP TABLE tbl_betfair_last_traded_price_1970_01", returnId=False)
+        add_foreign_keys(insertionEngine=self.dbEngine, numWorkers=2)
+        foreignKeys = self.dbEngine.run_select_query(
+            query="SELECT conrelid::regclass::text AS table_name, convalidated FROM pg_constraint WHERE contype = 'f'"
+        )
+        self.assertTrue(foreignKeys["convalidated"].all())
+        self.assertIn("tbl_betfair_last_traded_price", foreignKeys["table_name"].tolist())
+
+    def test_refresh_odds_series(self):
+        add_views(insertionEngine=self.dbEngine)
+        runnerId = self.dbEngine.insert_runner(runnerName="runner", betfairId=1)
+        self.dbEngine.insert_last_traded_price(
+            unixTimestamp=2, betfairMarketId="1.1", betfairRunnerTableId=runnerId, price=2.5
+        )
+        self.dbEngine.insert_last_traded_price(unixTimestamp=1, betfairMarketId="1.1", betfairRunnerTableId=runnerId, price=3)
+        self.assertEqual(refresh_odds_series(insertionEngine=self.dbEngine), 2)
+        self.assertEqual(refresh_odds_series(insertionEngine=self.dbEngine), 0)
+
+        self.dbEngine.insert_last_traded_price(unixTimestamp=3, betfairMarketId="1.1", betfairRunnerTableId=runnerId, price=4)
+        self.dbEngine.insert_last_traded_price(unixTimestamp=3, betfairMarketId="1.2", betfairRunnerTableId=runnerId, price=5)
+        self.assertEqual(refresh_odds_series(insertionEngine=self.dbEngine), 2)
+        oddsSeries = self.dbEngine.get_odds_time_series(betfairMarketId="1.1", useOddsSeries=True)
+        self.assertSequenceEqual(list(oddsSeries["price"].values), [3, 2.5, 4])
+        self.assertTrue(oddsSeries.equals(self.dbEngine.get_odds_time_series(betfairMarketId="1.1")))
+        self.assertEqual(oddsSeries["runner_name"].values[0], "runner")
+
+        allOddsSeries = self.dbEngine.get_odds_time_series_for_markets(betfairMarketIds=["1.1", "1.2"], useOddsSeries=True)
+        self.assertSequenceEqual(list(allOddsSeries["betfair_market_id"].values), ["1.1", "1.1", "1.1", "1.2"])
+        self.assertTrue(allOddsSeries.equals(self.dbEngine.get_odds_time_series_for_markets(betfairMarketIds=["1.1", "1.2"])))
+
+    def test_lookup_cache(self):
+        self.dbEngine.insert_betting_type(bettingTypeName="ODDS")
+        self.dbEngine.insert_betting_type(bettingTypeName="ASIAN_HANDICAP")
+        config = self.postgresql.dsn()
+        cachedEngine = PostgresInsertionEngine(
+            databaseName=config["database"],
+            user=config["user"],
+            password=config.get("password"),
+            port=config["port"],
+            host=config["host"],
+            useLookupCache=True,
+            runnerCacheSize=1,
+        )
+        # the mapping tables are loaded when the engine is created
+        self.assertEqual(set(cachedEngine.lookupCaches), set(LOOKUP_TABLE_COLUMNS))
+        with patch.object(cachedEngine, "_fetch_rows", wraps=cachedEngine._fetch_rows) as fetchRows:
+            self.assertEqual(cachedEngine.get_betting_type_index(bettingTypeName="ASIAN_HANDICAP"), 2)
+            self.assertEqual(cachedEngine.get_betting_type_index(bettingTypeName="ODDS "), 1)
+            self.assertIsNone(cachedEngine.get_betting_type_index(bettingTypeName="LINE"))
+            self.assertEqual(fetchRows.call_count, 0)
+
+            # inserting invalidates the cached table, which is loaded again on its next lookup
+            self.assertEqual(cachedEngine.insert_betting_type(bettingTypeName="LINE"), 3)
+            self.assertEqual(cachedEngine.insert_betting_type(bettingTypeName="LINE"), 3)
+            self.assertEqual(fetchRows.call_count, 1)
+
+            firstRunnerId = cachedEngine.insert_runner(runnerName="runner 1", betfairId=101)
+            secondRunnerId = cachedEngine.insert_runner(runnerName="runner 2", betfairId=102)
+            numQueries = fetchRows.call_count
+            self.assertEqual(cachedEngine.get_runner_id_by_betfair_id(betfairRunnerId=102), secondRunnerId)
+            self.assertEqual(fetchRows.call_count, numQueries)
+            # only one runner fits in the cache
+            self.assertEqual(cachedEngine.get_runner_id_by_betfair_id(betfairRunnerId=101), firstRunnerId)
+            self.assertEqual(fetchRows.call_count, numQueries + 1)
+
+        # writes through other engines are only seen once the cache is invalidated
+        self.dbEngine.insert_betting_type(bettingTypeName="OTHER")
+        self.assertIsNone(cachedEngine.get_betting_type_index(bettingTypeName="OTHER"))
+        cachedEngine.invalidate_lookup_caches()
+        self.assertEqual(cachedEngine.get_betting_type_index(bettingTypeName="OTHER"), 4)
+
+    def test_iter_odds_time_series(self):
+        add_views(insertionEngine=self.dbEngine)
+        runnerId = self.dbEngine.insert_runner(runnerName="runner", betfairId=7)
+        marketPrices = {"1.1": [2.5, 3, 3.5], "1.2": [4], "1.3": [5, 6]}
+        for betfairMarketId, prices in marketPrices.items():
+            for unixTimestamp, price in enumerate(prices):
+                self.dbEngine.insert_last_traded_price(
+                    unixTimestamp=unixTimestamp, betfairMarketId=betfairMarketId, betfairRunnerTableId=runnerId, price=price
+                )
+        self.dbEngine.insert_last_traded_price(unixTimestamp=9, betfairMarketId="1.2", betfairRunnerTableId=None, price=7)
+
+        marketSeries = dict(self.dbEngine.iter_odds_time_series(chunkSize=2))
+        self.assertEqual(list(marketSeries.keys()), ["1.1", "1.2", "1.3"])
+        self.assertSequenceEqual(list(marketSeries["1.1"]["price"]), [2.5, 3, 3.5])
+        self.assertSequenceEqual(list(marketSeries["1.1"]["unix_timestamp"]), [0, 1, 2])
+        self.assertSequenceEqual(list(marketSeries["1.2"]["runner_betfair_id"]), [7, -1])
+        self.assertEqual(marketSeries["1.3"]["price"].dtype, np.float64)
+
+        marketSeries = dict(
+            self.dbEngine.iter_odds_time_series(betfairMarketIds=["1.1", "1.3"], minUnixTimestamp=1, chunkSize=10)
+        )
+        self.assertEqual(list(marketSeries.keys()), ["1.1", "1.3"])
+        self.assertSequenceEqual(list(marketSeries["1.1"]["price"]), [3, 3.5])
+        self.assertSequenceEqual(list(marketSeries["1.3"]["price"]), [6])
+
+        refresh_odds_series(insertionEngine=self.dbEngine)
+        oddsSeries = self.dbEngine.iter_odds_time_series(chunkSize=1, useOddsSeries=True)
+        betfairMarketId, arrays = next(oddsSeries)
+        oddsSeries.close()
+        self.assertEqual(betfairMarketId, "1.1")
+        self.assertSequenceEqual(list(arrays["price"]), [2.5, 3, 3.5])
+
+    def test_odds_time_series_arrays(self):
+        add_views(insertionEngine=self.dbEngine)
+        runnerId = self.dbEngine.insert_runner(runnerName="runner", betfairId=7)
+        marketPrices = {"1.1": [2.5, 3, 3.5], "1.2": [4], "1.3": [5, 6]}
+        for betfairMarketId, prices in marketPrices.items():
+            for unixTimestamp, price in enumerate(prices):
+                self.dbEngine.insert_last_traded_price(
+                    unixTimestamp=unixTimestamp, betfairMarketId=betfairMarketId, betfairRunnerTableId=runnerId, price=price
+                )
+        self.dbEngine.insert_last_traded_price(unixTimestamp=9, betfairMarketId="1.2", betfairRunnerTableId=None, price=None)
+
+        arrays = self.dbEngine.get_odds_time_series_arrays(betfairMarketId="1.1", minUnixTimestamp=1)
+        self.assertSequenceEqual(list(arrays["price"]), [3, 3.5])
+        self.assertSequenceEqual(list(arrays["unix_timestamp"]), [1, 2])
+        self.assertEqual(arrays["unix_timestamp"].dtype, np.int64)
+        dataframe = self.dbEngine.get_odds_time_series(betfairMarketId="1.1", minUnixTimestamp=1)
+        self.assertSequenceEqual(list(dataframe["price"]), list(arrays["price"]))
+
+        marketArrays = self.dbEngine.get_odds_time_series_arrays_for_markets(betfairMarketIds=["1.3", "1.2", "1.9"])
+        self.assertEqual(list(marketArrays.keys()), ["1.3", "1.2", "1.9"])
+        self.assertSequenceEqual(list(marketArrays["1.3"]["price"]), [5, 6])
+        self.assertSequenceEqual(list(marketArrays["1.2"]["runner_betfair_id"]), [7, -1])
+        self.assertTrue(np.isnan(marketArrays["1.2"]["price"][1]))
+        self.assertEqual(len(marketArrays["1.9"]["unix_timestamp"]), 0)
+
+        selectArrays = self.dbEngine.run_select_arrays(
+            query="SELECT unix_timestamp, price FROM tbl_betfair_last_traded_price WHERE betfair_market_id = %(betfairMarketId)s",
+            parameters={"betfairMarketId": "1.3"},
+            columnDtypes={"price": np.float32},
+        )
+        self.assertEqual(selectArrays["price"].dtype, np.float32)
+        self.assertSequenceEqual(sorted(selectArrays["unix_timestamp"]), [0, 1])
+        self.assertEqual(self.dbEngine.run_column_query(query="SELECT id FROM tbl_betfair_runners"), [runnerId])
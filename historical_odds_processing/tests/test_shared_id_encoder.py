@@ -0,0 +1,80 @@
+import pickle
+from multiprocessing import Manager, Process
+from pathlib import Path
+from shutil import copy, rmtree
+from tempfile import mkdtemp
+from unittest import TestCase
+
+import pandas as pd
+
+from historical_odds_processing.scripts.file_processing_steps.process_bz2_odds_files import process_all_bz2_files
+from historical_odds_processing.store.db_creation.id_mapping import IdMapping
+from historical_odds_processing.store.db_creation.output_filenames import OutputFilenames
+from historical_odds_processing.store.db_creation.shared_id_encoder import SharedIdEncoder
+from historical_odds_processing.tests.example_bz2_data.paths import EXAMPLE_BZ2_FILES_DIRECTORY
+
+
+def encode_values(idEncoder, values):
+    for value in values:
+        idEncoder.encode(mappingName=OutputFilenames.RUNNERS, value=value)
+
+
+class TestSharedIdEncoder(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.workingDirectory = mkdtemp()
+        self.manager = Manager()
+
+    def tearDown(self):
+        super().tearDown()
+        self.manager.shutdown()
+        rmtree(self.workingDirectory)
+
+    def test_encode_is_shared_between_processes(self):
+        idEncoder = SharedIdEncoder(manager=self.manager)
+        workers = [Process(target=encode_values, args=(idEncoder, values)) for values in (["a", "b", "c"], ["c", "d", "a"])]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        runnerMapping = idEncoder.get_mappings()[OutputFilenames.RUNNERS]
+        self.assertEqual(sorted(runnerMapping), ["a", "b", "c", "d"])
+        self.assertEqual(sorted(runnerMapping.values()), [0, 1, 2, 3])
+        self.assertEqual(idEncoder.encode(mappingName=OutputFilenames.RUNNERS, value="d"), runnerMapping["d"])
+
+    def test_seeded_from_final_mappings(self):
+        pickle.dump({"x": 0, "y": 1}, open(f"{self.workingDirectory}/{OutputFilenames.RUNNERS}_final_mapping.pkl", "wb"))
+        idEncoder = SharedIdEncoder.from_final_mappings(manager=self.manager, outputDirectory=self.workingDirectory)
+        self.assertEqual(idEncoder.encode(mappingName=OutputFilenames.RUNNERS, value="y"), 1)
+        self.assertEqual(idEncoder.encode(mappingName=OutputFilenames.RUNNERS, value="z"), 2)
+        self.assertEqual(idEncoder.encode(mappingName=OutputFilenames.MARKET_TYPES, value="MATCH_ODDS"), 0)
+        idEncoder.save_final_mappings(outputDirectory=self.workingDirectory)
+        savedMapping = IdMapping.load(filePath=f"{self.workingDirectory}/{OutputFilenames.RUNNERS}_final_mapping.pkl")
+        self.assertEqual(savedMapping.entries, ["x", "y", "z"])
+
+    def test_fused_ingestion(self):
+        inputDirectory = Path(self.workingDirectory, "input")
+        outputDirectory = Path(self.workingDirectory, "output")
+        monthDirectory = Path(inputDirectory, "2019", "Jun", "1")
+        monthDirectory.mkdir(parents=True)
+        for fileName in ("1.159564697.bz2", "1.159963367.bz2"):
+            copy(EXAMPLE_BZ2_FILES_DIRECTORY.joinpath(fileName), monthDirectory)
+        process_all_bz2_files(
+            inputDirectory=inputDirectory,
+            outputDirectory=outputDirectory,
+            validCountryCodes=None,
+            numThreads=2,
+            fuseIdEncoding=True,
+        )
+
+        remappedDirectory = Path(outputDirectory, "remapped_files")
+        marketInfo = pd.concat([pd.read_csv(file) for file in remappedDirectory.glob(f"**/{OutputFilenames.MARKET_INFO}.csv")])
+        marketTypeMapping = IdMapping.load(filePath=f"{outputDirectory}/{OutputFilenames.MARKET_TYPES}_final_mapping.pkl")
+        self.assertEqual(sorted(marketInfo["market_type"].map(marketTypeMapping.get_entry)), ["MATCH_ODDS", "OVER_UNDER_15"])
+
+        lastTradedPrice = pd.concat(
+            [pd.read_csv(file) for file in remappedDirectory.glob(f"**/{OutputFilenames.LAST_TRADED_PRICE}.csv")]
+        )
+        runnerMapping = IdMapping.load(filePath=f"{outputDirectory}/{OutputFilenames.RUNNERS}_final_mapping.pkl")
+        self.assertEqual(len(lastTradedPrice), 417)
+        self.assertEqual(set(lastTradedPrice["betfair_runner_table_id"]), set(range(len(runnerMapping))))
@@ -1,14 +1,34 @@
 from abc import ABC, abstractmethod
 from typing import Dict, Tuple
 
+import numpy as np
+
 
 class BaseActions(ABC):
     @abstractmethod
     def get_all_actions(self) -> Tuple[str]:
         pass
 
+    @abstractmethod
+    def get_action_bets(self) -> Dict[str, Tuple[int, int]]:
+        # maps the name of each betting action to the side (BACK_SIDE or LAY_SIDE) and outcome it bets on
+        pass
+
     def get_action_name_to_id_mapping(self) -> Dict[str, int]:
         return {name: i for i, name in enumerate(self.get_all_actions())}
 
     def get_action_id_to_name_mapping(self) -> Dict[str, int]:
         return {name: i for i, name in enumerate(self.get_all_actions())}
+
+    def get_action_bet_table(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # whether each action id places a bet, and the side and outcome it bets on, looked up by action id
+        actionsNameToIdMap = self.get_action_name_to_id_mapping()
+        isBetAction = np.zeros(len(actionsNameToIdMap), dtype=bool)
+        actionSides = np.zeros(len(actionsNameToIdMap), dtype=np.int64)
+        actionOutcomes = np.zeros(len(actionsNameToIdMap), dtype=np.int64)
+        for actionName, (side, outcome) in self.get_action_bets().items():
+            actionId = actionsNameToIdMap[actionName]
+            isBetAction[actionId] = True
+            actionSides[actionId] = side
+            actionOutcomes[actionId] = outcome
+        return isBetAction, actionSides, actionOutcomes
@@ -1,6 +1,8 @@
-from typing import Tuple
+from typing import Dict, Tuple
 
 from trading.datamodel.actions.base_actions import BaseActions
+from trading.datamodel.constants import BACK_SIDE
+from trading.datamodel.constants import LAY_SIDE
 
 
 class MatchOddsActions(BaseActions):
@@ -15,3 +17,13 @@ class MatchOddsActions(BaseActions):
 
     def get_all_actions(self) -> Tuple[str, str, str, str, str, str, str]:
         return self.DO_NOTHING, self.HOME_BACK, self.AWAY_BACK, self.DRAW_BACK, self.HOME_LAY, self.AWAY_LAY, self.DRAW_LAY
+
+    def get_action_bets(self) -> Dict[str, Tuple[int, int]]:
+        return {
+            self.HOME_BACK: (BACK_SIDE, 0),
+            self.AWAY_BACK: (BACK_SIDE, 1),
+            self.DRAW_BACK: (BACK_SIDE, 2),
+            self.HOME_LAY: (LAY_SIDE, 0),
+            self.AWAY_LAY: (LAY_SIDE, 1),
+            self.DRAW_LAY: (LAY_SIDE, 2),
+        }
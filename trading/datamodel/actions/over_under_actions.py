@@ -1,6 +1,8 @@
-from typing import Tuple
+from typing import Dict, Tuple
 
 from trading.datamodel.actions.base_actions import BaseActions
+from trading.datamodel.constants import BACK_SIDE
+from trading.datamodel.constants import LAY_SIDE
 
 
 class OverUnderActions(BaseActions):
@@ -13,3 +15,11 @@ class OverUnderActions(BaseActions):
 
     def get_all_actions(self) -> Tuple[str, str, str, str, str]:
         return self.DO_NOTHING, self.OVER_BACK, self.UNDER_BACK, self.OVER_LAY, self.UNDER_LAY
+
+    def get_action_bets(self) -> Dict[str, Tuple[int, int]]:
+        return {
+            self.OVER_BACK: (BACK_SIDE, 0),
+            self.UNDER_BACK: (BACK_SIDE, 1),
+            self.OVER_LAY: (LAY_SIDE, 0),
+            self.UNDER_LAY: (LAY_SIDE, 1),
+        }
@@ -1,14 +1,67 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
+from typing import Optional, Tuple, Union
 
 import numpy as np
 
+from trading.datamodel.constants import BACK_SIDE
+from trading.datamodel.constants import LAY_SIDE
 from trading.datamodel.discounted_reward import DiscountedReward
 from utils.betting_functions import calculate_back_bet_to_trade_out
 from utils.betting_functions import calculate_lay_bet_to_trade_out
 
 
+def get_back_trade_out_rewards(
+    layOdds: Union[float, np.ndarray], layStake: float, currentBackOdds: Union[float, np.ndarray]
+) -> Union[float, np.ndarray]:
+    # the guaranteed winnings of backing out of a lay bet, plus the original liability given back for the discounted lay bet.
+    # Works on scalars and on arrays of bets alike
+    backBetToPlace = calculate_back_bet_to_trade_out(layOdds=layOdds, layStake=layStake, currentBackOdds=currentBackOdds)
+    layLiability = (layOdds - 1) * layStake
+    winningsIfNotOutcomeWin = layStake - backBetToPlace
+    winningsIfOutcomeWin = (backBetToPlace * currentBackOdds) - backBetToPlace - layLiability
+    return np.minimum(winningsIfNotOutcomeWin, winningsIfOutcomeWin) + (layOdds - layStake)
+
+
+def get_lay_trade_out_rewards(
+    backOdds: Union[float, np.ndarray], backStake: float, currentLayOdds: Union[float, np.ndarray]
+) -> Union[float, np.ndarray]:
+    # the guaranteed winnings of laying out of a back bet, plus the back stake given back for the discounted back bet
+    layBetToPlace = calculate_lay_bet_to_trade_out(backOdds=backOdds, backStake=backStake, currentLayOdds=currentLayOdds)
+    layLiability = (currentLayOdds - 1) * layBetToPlace
+    winningsIfNotOutcomeWin = layBetToPlace - backStake
+    winningsIfOutcomeWin = (backStake * backOdds) - backStake - layLiability
+    return np.minimum(winningsIfNotOutcomeWin, winningsIfOutcomeWin) + backStake
+
+
+def get_returns_for_discounted_rl(
+    bets: np.ndarray, outcomeVectors: np.ndarray, backStake: float, layStake: float
+) -> Union[float, np.ndarray]:
+    # bets has shape (..., 2, numOutcomes). Losses are already in the model as discounted negative rewards
+    losingResults = np.array(outcomeVectors != 1, dtype=np.int32)
+    backReturns = np.sum(outcomeVectors * (bets[..., BACK_SIDE, :] * backStake), axis=-1)
+    layReturns = np.sum(losingResults * bets[..., LAY_SIDE, :] * layStake, axis=-1)
+    return backReturns + layReturns
+
+
+def get_bet_odds_property(side: int, outcome: int) -> property:
+    # exposes one position of the bets array as an attribute, e.g. homeBackOdds
+    def get_odds(bettingState: BaseBettingState) -> float:
+        return bettingState.bets[side, outcome]
+
+    def set_odds(bettingState: BaseBettingState, odds: float) -> None:
+        bettingState.bets[side, outcome] = odds
+
+    return property(fget=get_odds, fset=set_odds)
+
+
 class BaseBettingState(ABC):
+
+    # bets[side, outcome] holds the odds of the open back (BACK_SIDE) or lay (LAY_SIDE) bet on an outcome, or 0 if there
+    # isn't one. Odds are kept as float64 so the odds a bet was placed at are stored exactly
+
+    numOutcomes: int
+
     def __init__(
         self,
         duplicateActionPenalty: float,
@@ -21,36 +74,42 @@ class BaseBettingState(ABC):
 
         self.backStake = 1
         self.layStake = 1
+        self.bets = np.zeros((2, self.numOutcomes), dtype=np.float64)
 
     @property
-    @abstractmethod
     def backBets(self) -> np.array:
-        pass
+        return self.bets[BACK_SIDE]
 
     @property
-    @abstractmethod
     def layBets(self) -> np.array:
-        pass
-
-    def _calculate_back_trade_out_winnings(self, layOdds: float, layStake: float, currentBackOdds: float) -> DiscountedReward:
-        if currentBackOdds == 0:
-            return DiscountedReward(reward=self.duplicateActionPenalty, discount=0)
-        backBetToPlace = calculate_back_bet_to_trade_out(layOdds=layOdds, layStake=layStake, currentBackOdds=currentBackOdds)
-        layLiability = (layOdds - 1) * layStake
-        winningsIfNotOutcomeWin = layStake - backBetToPlace
-        winningsIfOutcomeWin = (backBetToPlace * currentBackOdds) - backBetToPlace - layLiability
-        guaranteedWinnings = min(winningsIfNotOutcomeWin, winningsIfOutcomeWin)
-        return DiscountedReward(reward=guaranteedWinnings, discount=0)
-
-    def _calculate_lay_trade_out_winnings(self, backOdds: float, backStake: float, currentLayOdds: float) -> DiscountedReward:
-        if currentLayOdds == 0:
-            return DiscountedReward(reward=self.duplicateActionPenalty, discount=0)
-        layBetToPlace = calculate_lay_bet_to_trade_out(backOdds=backOdds, backStake=backStake, currentLayOdds=currentLayOdds)
-        layLiability = (currentLayOdds - 1) * layBetToPlace
-        winningsIfNotOutcomeWin = layBetToPlace - backStake
-        winningsIfOutcomeWin = (backStake * backOdds) - backStake - layLiability
-        guaranteedWinnings = min(winningsIfNotOutcomeWin, winningsIfOutcomeWin)
-        return DiscountedReward(reward=guaranteedWinnings, discount=0)
+        return self.bets[LAY_SIDE]
+
+    def place_bet(self, side: int, outcome: int, odds: float) -> Tuple[float, float]:
+        # returns the reward and discount of the bet
+        if self.bets[side, outcome] > 0 or odds == 0:
+            return self.duplicateActionPenalty, 0
+        oppositeSide = 1 - side
+        oppositeOdds = self.bets[oppositeSide, outcome]
+        if oppositeOdds == 0:
+            self.bets[side, outcome] = odds
+            if side == BACK_SIDE:
+                return -self.backStake, self.discountFactor
+            return (-self.layStake * odds) + self.layStake, self.discountFactor
+
+        if side == BACK_SIDE:
+            if self.onlyPositiveCashout and (oppositeOdds >= odds):
+                return self.duplicateActionPenalty, 0
+            reward = get_back_trade_out_rewards(layOdds=oppositeOdds, layStake=self.layStake, currentBackOdds=odds)
+        else:
+            if self.onlyPositiveCashout and (oppositeOdds <= odds):
+                return self.duplicateActionPenalty, 0
+            reward = get_lay_trade_out_rewards(backOdds=oppositeOdds, backStake=self.backStake, currentLayOdds=odds)
+        self.bets[oppositeSide, outcome] = 0
+        return reward, 0
+
+    def place_discounted_bet(self, side: int, outcome: int, odds: float) -> DiscountedReward:
+        reward, discount = self.place_bet(side=side, outcome=outcome, odds=odds)
+        return DiscountedReward(reward=reward, discount=discount)
 
     def calculate_return(self, outcomeVector: np.array) -> float:
         if len(outcomeVector) != len(self.backBets) or len(outcomeVector) != len(self.layBets):
@@ -69,23 +128,21 @@ class BaseBettingState(ABC):
         return backReturn + layReturn - backLosses - layLosses
 
     def calculate_return_for_discounted_rl(self, outcomeVector: np.array) -> float:
-        # losses are already in the model as discounted negative rewards
-        if len(outcomeVector) != len(self.backBets) or len(outcomeVector) != len(self.layBets):
+        if len(outcomeVector) != self.numOutcomes:
             raise Exception("outcomeVector is incorrect size")
-        if isinstance(outcomeVector, list):
-            outcomeVector = np.array(outcomeVector)
-        losingResults = np.array(outcomeVector != 1, dtype=np.int32)
-        backReturn = np.sum(outcomeVector * (self.backBets * self.backStake))
-        layReturn = np.sum(losingResults * (np.array(self.layBets, dtype=np.float32)) * self.layStake)
-        return backReturn + layReturn
+        return get_returns_for_discounted_rl(
+            bets=self.bets, outcomeVectors=np.asarray(outcomeVector), backStake=self.backStake, layStake=self.layStake
+        )
 
-    @abstractmethod
-    def reset(self) -> None:
-        raise NotImplementedError(f"{self.__class__.__name__} must implement `reset`")
+    def get_state_observation(self, out: Optional[np.ndarray] = None) -> np.array:
+        # writes into out, a float32 array of length 2 * numOutcomes, when it's given
+        if out is None:
+            return np.round(self.bets.reshape(2 * self.numOutcomes).astype(np.float32), decimals=2)
+        out[:] = self.bets.reshape(2 * self.numOutcomes)
+        return np.round(out, decimals=2, out=out)
 
-    @abstractmethod
-    def get_state_observation(self) -> np.array:
-        raise NotImplementedError(f"{self.__class__.__name__} must implement `get_state_observation`")
+    def reset(self) -> None:
+        self.bets[:] = 0
 
     @abstractmethod
     def from_saved_state(self, **kwargs) -> BaseBettingState:
@@ -0,0 +1,86 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+from trading.datamodel.betting_state.base_betting_state import get_back_trade_out_rewards
+from trading.datamodel.betting_state.base_betting_state import get_lay_trade_out_rewards
+from trading.datamodel.betting_state.base_betting_state import get_returns_for_discounted_rl
+from trading.datamodel.constants import BACK_SIDE
+
+
+class BatchedBettingState:
+
+    # the betting rules of BaseBettingState, applied to a batch of independent markets at once
+    # bets[market] is laid out like the bets array of BaseBettingState
+
+    def __init__(
+        self,
+        batchSize: int,
+        numOutcomes: int,
+        discountFactor: float,
+        onlyPositiveCashout: bool,
+        duplicateActionPenalty: float = -100.0,
+    ):
+        self.batchSize = batchSize
+        self.numOutcomes = numOutcomes
+        self.discountFactor = discountFactor
+        self.onlyPositiveCashout = onlyPositiveCashout
+        self.duplicateActionPenalty = duplicateActionPenalty
+        self.backStake = 1
+        self.layStake = 1
+        self.bets = np.zeros((batchSize, 2, numOutcomes), dtype=np.float64)
+
+    def place_bets(
+        self,
+        marketIndices: np.ndarray,
+        sides: np.ndarray,
+        outcomes: np.ndarray,
+        odds: np.ndarray,
+        rewards: Optional[np.ndarray] = None,
+        discounts: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        # places one bet in each of the given markets. The reward and discount of each bet are returned in market index
+        # order, or, when batch sized rewards and discounts arrays are given, written into them at the market indices
+        odds = odds.astype(np.float64)
+        isBack = sides == BACK_SIDE
+        sameSideOdds = self.bets[marketIndices, sides, outcomes]
+        oppositeOdds = self.bets[marketIndices, 1 - sides, outcomes]
+        isRejected = (sameSideOdds > 0) | (odds == 0)
+        isOpening = ~isRejected & (oppositeOdds == 0)
+        isTradeOut = ~isRejected & ~isOpening
+        if self.onlyPositiveCashout:
+            isNegativeCashout = isTradeOut & np.where(isBack, oppositeOdds >= odds, oppositeOdds <= odds)
+            isTradeOut &= ~isNegativeCashout
+
+        betRewards = np.full(len(marketIndices), self.duplicateActionPenalty, dtype=np.float64)
+        betDiscounts = np.zeros(len(marketIndices), dtype=np.float64)
+        betRewards[isOpening] = np.where(isBack, -self.backStake, (-self.layStake * odds) + self.layStake)[isOpening]
+        betDiscounts[isOpening] = self.discountFactor
+        # rejected bets divide by zero odds, but their trade out rewards are never used
+        with np.errstate(divide="ignore", invalid="ignore"):
+            backTradeOutRewards = get_back_trade_out_rewards(
+                layOdds=oppositeOdds, layStake=self.layStake, currentBackOdds=odds
+            )
+            layTradeOutRewards = get_lay_trade_out_rewards(
+                backOdds=oppositeOdds, backStake=self.backStake, currentLayOdds=odds
+            )
+        betRewards[isTradeOut] = np.where(isBack, backTradeOutRewards, layTradeOutRewards)[isTradeOut]
+
+        self.bets[marketIndices[isOpening], sides[isOpening], outcomes[isOpening]] = odds[isOpening]
+        self.bets[marketIndices[isTradeOut], 1 - sides[isTradeOut], outcomes[isTradeOut]] = 0
+        if rewards is None or discounts is None:
+            return betRewards, betDiscounts
+        rewards[marketIndices] = betRewards
+        discounts[marketIndices] = betDiscounts
+        return rewards, discounts
+
+    def calculate_returns_for_discounted_rl(self, marketIndices: np.ndarray, outcomeVectors: np.ndarray) -> np.ndarray:
+        return get_returns_for_discounted_rl(
+            bets=self.bets[marketIndices], outcomeVectors=outcomeVectors, backStake=self.backStake, layStake=self.layStake
+        )
+
+    def get_state_observations(self) -> np.ndarray:
+        return np.round(self.bets.reshape(self.batchSize, 2 * self.numOutcomes).astype(np.float32), decimals=2)
+
+    def reset(self, marketIndices: np.ndarray) -> None:
+        self.bets[marketIndices] = 0
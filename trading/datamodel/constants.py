@@ -3,3 +3,7 @@ OVER_UNDER_ODDS_NORMALISATION_CONSTANT = 5
 ENTROPY_NORMALISATION_CONSTANT = 200
 
 BETFAIR_DRAW_RUNNER_ID = 58805
+
+# the first axis of a betting state's bets array
+BACK_SIDE = 0
+LAY_SIDE = 1
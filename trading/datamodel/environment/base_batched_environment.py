@@ -0,0 +1,203 @@
+from abc import ABC, abstractmethod
+from typing import Optional, Sequence, Union
+
+import numpy as np
+from tf_agents.environments.py_environment import PyEnvironment
+from tf_agents.specs.array_spec import BoundedArraySpec
+from tf_agents.trajectories import time_step, TimeStep
+
+from trading.datamodel.actions.base_actions import BaseActions
+from trading.datamodel.betting_state.batched_betting_state import BatchedBettingState
+from trading.datamodel.odds_series.base_odds_series import BaseOddsSeries
+from trading.datamodel.odds_series.base_odds_series import jitter_odds
+
+
+class BaseBatchedEnvironment(PyEnvironment, ABC):
+
+    # steps batchSize markets at once with the rules of BaseEnvironment. Each market plays an episode drawn from the pool
+    # and, like BaseEnvironment, starts a new episode drawn from the pool as soon as it returns its last time step, so its
+    # next step is a mid step of the new episode
+
+    def __init__(
+        self,
+        oddSeriesPool: Sequence[BaseOddsSeries],
+        batchSize: int,
+        rewardDiscountFactor: float,
+        inactionPenalty: float,
+        onlyPositiveCashout: bool,
+        actions: BaseActions,
+        seed: Optional[int] = None,
+    ):
+        super().__init__()
+        if inactionPenalty > 0:
+            raise ValueError("inactionPenalty must be <= 0")
+        if len(oddSeriesPool) == 0:
+            raise ValueError("oddSeriesPool must have at least one odds series")
+        self.batchSize = batchSize
+        self.rewardDiscountFactor = rewardDiscountFactor
+        self.inactionPenalty = inactionPenalty
+        self.actions = actions
+        self.actionsNameToIdMap = self.actions.get_action_name_to_id_mapping()
+        self.numOutcomes = oddSeriesPool[0].numRunners
+        self.oddsNormalisationConstant = self._get_odds_normalisation_constant()
+        self.randomGenerator = np.random.default_rng(seed)
+        self.jitterOddsScale = None
+        self.jitterRandomGenerator = None
+        self._load_pool(oddSeriesPool=oddSeriesPool)
+        self.isBetAction, self.actionSides, self.actionOutcomes = self.actions.get_action_bet_table()
+
+        self._state = BatchedBettingState(
+            batchSize=batchSize,
+            numOutcomes=self.numOutcomes,
+            discountFactor=rewardDiscountFactor,
+            onlyPositiveCashout=onlyPositiveCashout,
+        )
+        self.marketIndices = np.arange(batchSize)
+        self.episodeIndices = np.zeros(batchSize, dtype=np.int64)
+        # the pool row each market's current observation came from, and the row its episode ends on
+        self.currentRows = np.zeros(batchSize, dtype=np.int64)
+        self.lastRows = np.zeros(batchSize, dtype=np.int64)
+        self.offeredOdds = np.zeros((batchSize, 2 * self.numOutcomes), dtype=np.float32)
+        # each market's jittered episode steps, indexed by the step number within the episode
+        self.episodeStepMatrices = None
+
+    def _load_pool(self, oddSeriesPool: Sequence[BaseOddsSeries]) -> None:
+        # every episode's steps are stacked into one matrix, so a batch of markets is stepped with a single gather
+        stepMatrices = []
+        for oddsSeries in oddSeriesPool:
+            if oddsSeries.doCycle:
+                raise ValueError("Batched environments restart finished markets from the pool, so odds series can't cycle")
+            if oddsSeries.jitterOddsScale is not None:
+                raise ValueError(
+                    "Jitter is drawn by the batched environment, so set it there rather than on the pool's odds series"
+                )
+            if oddsSeries.numRunners != self.numOutcomes:
+                raise ValueError(f"Every odds series in the pool must have {self.numOutcomes} runners")
+            if oddsSeries.totalNumSteps is None:
+                oddsSeries.initialize()
+            # the first step starts the episode and the last one ends it, so an episode needs at least two
+            if oddsSeries.totalNumSteps < 2:
+                raise ValueError("Every odds series in the pool must have at least 2 steps")
+            stepMatrices.append(oddsSeries.firstPassStepMatrix)
+        self.poolStepMatrix = np.concatenate(stepMatrices, axis=0)
+        self.poolOffsets = np.cumsum([0] + [len(stepMatrix) for stepMatrix in stepMatrices])
+        self.poolOutcomes = np.array([oddsSeries.get_end_outcome_vector() for oddsSeries in oddSeriesPool])
+
+    @abstractmethod
+    def _get_odds_normalisation_constant(self) -> Union[int, float]:
+        pass
+
+    @property
+    def batched(self) -> bool:
+        return True
+
+    @property
+    def batch_size(self) -> int:
+        return self.batchSize
+
+    def set_jitter_odds_scale(self, scale: float, seed: Optional[int] = None) -> None:
+        # as with a single odds series, the same seed gives the same jitter for each episode in turn. Episodes only take
+        # effect with jitter once they are next started
+        self.jitterOddsScale = scale
+        self.jitterRandomGenerator = np.random.default_rng(seed)
+        maxEpisodeLength = np.diff(self.poolOffsets).max()
+        self.episodeStepMatrices = np.zeros((self.batchSize, maxEpisodeLength, 2 * self.numOutcomes), dtype=np.float32)
+
+    def get_state_observation(self) -> np.array:
+        return self._state.get_state_observations()
+
+    def action_spec(self) -> BoundedArraySpec:
+        return BoundedArraySpec(
+            shape=(),
+            dtype=np.int32,
+            minimum=0,
+            maximum=len(self.actionsNameToIdMap) - 1,
+            name="action",
+        )
+
+    def observation_spec(self) -> BoundedArraySpec:
+        return BoundedArraySpec(shape=(4 * self.numOutcomes,), dtype=np.float32, minimum=0, name="observation")
+
+    def _get_observations(self) -> np.array:
+        return np.concatenate([self.get_state_observation(), self.offeredOdds], axis=-1) / self.oddsNormalisationConstant
+
+    def _start_episodes(self, marketIndices: np.array) -> None:
+        episodeIndices = self.randomGenerator.integers(low=0, high=len(self.poolOutcomes), size=len(marketIndices))
+        self.episodeIndices[marketIndices] = episodeIndices
+        self.currentRows[marketIndices] = self.poolOffsets[episodeIndices]
+        self.lastRows[marketIndices] = self.poolOffsets[episodeIndices + 1] - 1
+        self._state.reset(marketIndices=marketIndices)
+        if self.jitterOddsScale is not None:
+            self._set_episode_step_matrices(marketIndices=marketIndices)
+        self._set_offered_odds(marketIndices=marketIndices)
+
+    def _set_episode_step_matrices(self, marketIndices: np.array) -> None:
+        # noise for each market's whole episode is drawn when it starts, so stepping never touches the random generator
+        for marketIndex in marketIndices:
+            firstRow, lastRow = self.currentRows[marketIndex], self.lastRows[marketIndex]
+            self.episodeStepMatrices[marketIndex, : lastRow - firstRow + 1] = jitter_odds(
+                odds=self.poolStepMatrix[firstRow : lastRow + 1],
+                scale=self.jitterOddsScale,
+                randomGenerator=self.jitterRandomGenerator,
+            )
+
+    def _set_offered_odds(self, marketIndices: np.array) -> None:
+        if self.jitterOddsScale is None:
+            self.offeredOdds[marketIndices] = self.poolStepMatrix[self.currentRows[marketIndices]]
+            return
+        episodeStepNumbers = self.currentRows[marketIndices] - self.poolOffsets[self.episodeIndices[marketIndices]]
+        self.offeredOdds[marketIndices] = self.episodeStepMatrices[marketIndices, episodeStepNumbers]
+
+    def _reset(self) -> TimeStep:
+        self._start_episodes(marketIndices=self.marketIndices)
+        return time_step.restart(observation=self._get_observations(), batch_size=self.batchSize)
+
+    def _step(self, action: np.array) -> TimeStep:
+        action = np.asarray(action).reshape(self.batchSize)
+        if ((action < 0) | (action >= len(self.actionsNameToIdMap))).any():
+            raise ValueError(f"unknown action in: {action}")
+        stepTypes = np.full(self.batchSize, time_step.StepType.MID, dtype=np.int32)
+        rewards = np.zeros(self.batchSize, dtype=np.float64)
+        discounts = np.zeros(self.batchSize, dtype=np.float64)
+
+        # an episode ends when its next step is the last one, and its bets are settled against the outcome
+        isEnding = self.currentRows + 1 == self.lastRows
+        endingMarkets = self.marketIndices[isEnding]
+        terminalOdds = self.offeredOdds[endingMarkets] / self.oddsNormalisationConstant
+        if isEnding.any():
+            rewards[isEnding] = self._state.calculate_returns_for_discounted_rl(
+                marketIndices=endingMarkets, outcomeVectors=self.poolOutcomes[self.episodeIndices[endingMarkets]]
+            )
+            stepTypes[isEnding] = time_step.StepType.LAST
+            self._start_episodes(marketIndices=endingMarkets)
+
+        isContinuing = ~isEnding
+        isBetting = isContinuing & self.isBetAction[action]
+        rewards[isContinuing & ~isBetting] = self.inactionPenalty
+        if isBetting.any():
+            bettingMarkets = self.marketIndices[isBetting]
+            bettingActions = action[isBetting]
+            sides, outcomes = self.actionSides[bettingActions], self.actionOutcomes[bettingActions]
+            # bets are placed at the odds in the observation the action was chosen from
+            self._state.place_bets(
+                marketIndices=bettingMarkets,
+                sides=sides,
+                outcomes=outcomes,
+                odds=self.offeredOdds[bettingMarkets, sides * self.numOutcomes + outcomes],
+                rewards=rewards,
+                discounts=discounts,
+            )
+        continuingMarkets = self.marketIndices[isContinuing]
+        self.currentRows[continuingMarkets] += 1
+        self._set_offered_odds(marketIndices=continuingMarkets)
+
+        observations = self._get_observations()
+        # as in BaseEnvironment, a terminal observation has the new episode's empty betting state, and its odds are the
+        # last observation's odds normalised again
+        observations[endingMarkets, 2 * self.numOutcomes :] = terminalOdds / self.oddsNormalisationConstant
+        return TimeStep(
+            step_type=stepTypes,
+            reward=rewards.astype(np.float32),
+            discount=discounts.astype(np.float32),
+            observation=observations.astype(np.float32),
+        )
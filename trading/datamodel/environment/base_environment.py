@@ -1,12 +1,13 @@
 from abc import ABC, abstractmethod
-from typing import Union
+from typing import Tuple, Union
 
 import numpy as np
 from tf_agents.environments.py_environment import PyEnvironment
 from tf_agents.specs.array_spec import BoundedArraySpec
 from tf_agents.trajectories import time_step, TimeStep
 
-from trading.datamodel.discounted_reward import DiscountedReward
+from trading.datamodel.actions.base_actions import BaseActions
+from trading.datamodel.betting_state.base_betting_state import BaseBettingState
 from trading.datamodel.odds_series.base_odds_series import BaseOddsSeries
 
 
@@ -16,6 +17,9 @@ class BaseEnvironment(PyEnvironment, ABC):
         oddSeries: BaseOddsSeries,
         rewardDiscountFactor: float,
         inactionPenalty: float,
+        actions: BaseActions,
+        bettingState: BaseBettingState,
+        copyObservations: bool = True,
     ):
         super().__init__()
         if inactionPenalty > 0:
@@ -26,11 +30,22 @@ class BaseEnvironment(PyEnvironment, ABC):
         self.inactionPenalty = inactionPenalty
         self.observationDimensionality = len(self.oddSeries.get_step())
         self.oddSeries.reset()
-        self.actions = None
-        self.actionsNameToIdMap = None
-        self._state = None
+        self.actions = actions
+        self.actionsNameToIdMap = self.actions.get_action_name_to_id_mapping()
+        self.isBetAction, self.actionSides, self.actionOutcomes = self.actions.get_action_bet_table()
+        self._state = bettingState
         self.oddsNormalisationConstant = self._get_odds_normalisation_constant()
 
+        # observations are assembled in place in one buffer, which is handed out as is when copyObservations is False. It
+        # is then overwritten by the next step or reset, so consumers have to be done with an observation before that
+        self.copyObservations = copyObservations
+        stateObservationLength = 2 * self._state.numOutcomes
+        self.observation = np.zeros(stateObservationLength + self.observationDimensionality, dtype=np.float32)
+        self.stateObservation = self.observation[:stateObservationLength]
+        self.oddsObservation = self.observation[stateObservationLength:]
+        # the raw odds of the current observation, which bets are placed at
+        self.offeredOdds = None
+
     @abstractmethod
     def _get_odds_normalisation_constant(self) -> Union[int, float]:
         pass
@@ -51,54 +66,48 @@ class BaseEnvironment(PyEnvironment, ABC):
         totalLength = len(self.get_state_observation()) + self.observationDimensionality
         return BoundedArraySpec(shape=(totalLength,), dtype=np.float32, minimum=0, name="observation")
 
+    def _set_observation(self, oddsStep: np.array) -> np.array:
+        self._state.get_state_observation(out=self.stateObservation)
+        np.divide(self.stateObservation, self.oddsNormalisationConstant, out=self.stateObservation)
+        np.divide(oddsStep, self.oddsNormalisationConstant, out=self.oddsObservation)
+        if self.copyObservations:
+            return self.observation.copy()
+        return self.observation
+
     def _reset(self) -> TimeStep:
         self._state.reset()
         self.oddSeries.reset()
-        return time_step.restart(
-            observation=np.concatenate(
-                [self._state.get_state_observation(), self.oddSeries.get_step()],
-                axis=-1,
-            )
-            / self.oddsNormalisationConstant
-        )
+        self.offeredOdds = self.oddSeries.get_step(copy=False)
+        return time_step.restart(observation=self._set_observation(oddsStep=self.offeredOdds))
 
     def _step(self, action: int) -> TimeStep:
-        nextStep = self.oddSeries.get_step()
-        currentTimeStep = self.current_time_step()
-        numOdds = len(self.actionsNameToIdMap) - 1
-        offeredOdds = currentTimeStep.observation[-numOdds:] * self.oddsNormalisationConstant
+        nextStep = self.oddSeries.get_step(copy=False)
 
         if self.oddSeries.episodeEnded:
             reward = self._state.calculate_return_for_discounted_rl(outcomeVector=self.oddSeries.get_end_outcome_vector())
+            # the terminal observation's odds are the last observation's odds normalised again
+            terminalOddsStep = self.oddsObservation.copy()
             self.reset()
-            return time_step.termination(
-                observation=np.concatenate(
-                    [
-                        self.get_state_observation(),
-                        currentTimeStep.observation[-self.observationDimensionality :],
-                    ],
-                    axis=-1,
-                )
-                / self.oddsNormalisationConstant,
-                reward=reward,
-            )
+            return time_step.termination(observation=self._set_observation(oddsStep=terminalOddsStep), reward=reward)
 
         if action == self.actionsNameToIdMap[self.actions.DO_NOTHING]:
-            return time_step.transition(
-                observation=np.concatenate([self.get_state_observation(), nextStep], axis=-1) / self.oddsNormalisationConstant,
-                reward=self.inactionPenalty,
-                discount=0.0,
-            )
-
+            reward, discount = self.inactionPenalty, 0.0
         else:
-            rewardClass = self._action_processing(action=action, offeredOdds=offeredOdds)
+            reward, discount = self._action_processing(action=action, offeredOdds=self.offeredOdds)
+        self.offeredOdds = nextStep
 
-        return time_step.transition(
-            observation=np.concatenate([self.get_state_observation(), nextStep], axis=-1) / self.oddsNormalisationConstant,
-            reward=rewardClass.reward,
-            discount=rewardClass.discount,
+        # built directly rather than with time_step.transition, whose structure and type checks cost more than the step
+        return TimeStep(
+            step_type=time_step.StepType.MID,
+            reward=np.asarray(reward, dtype=np.float32),
+            discount=np.asarray(discount, dtype=np.float32),
+            observation=self._set_observation(oddsStep=nextStep),
         )
 
-    @abstractmethod
-    def _action_processing(self, action: int, offeredOdds: np.array) -> DiscountedReward:
-        raise NotImplementedError(f"{self.__class__.__name__} must implement `_action_processing` function")
+    def _action_processing(self, action: int, offeredOdds: np.array) -> Tuple[float, float]:
+        # offered odds are laid out like the bets array, so a bet's odds are at side * numOutcomes + outcome
+        action = int(action)
+        if not 0 <= action < len(self.isBetAction) or not self.isBetAction[action]:
+            raise ValueError(f"unknown action: {action}")
+        side, outcome = self.actionSides[action], self.actionOutcomes[action]
+        return self._state.place_bet(side=side, outcome=outcome, odds=offeredOdds[side * self._state.numOutcomes + outcome])
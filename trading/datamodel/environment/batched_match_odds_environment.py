@@ -0,0 +1,31 @@
+from typing import Optional, Sequence, Union
+
+from trading.datamodel.actions.match_odds_actions import MatchOddsActions
+from trading.datamodel.constants import MATCH_ODDS_NORMALISATION_CONSTANT
+from trading.datamodel.environment.base_batched_environment import BaseBatchedEnvironment
+from trading.datamodel.odds_series.match_odds_series import MatchOddsSeries
+
+
+class BatchedMatchOddsEnvironment(BaseBatchedEnvironment):
+    def __init__(
+        self,
+        oddSeriesPool: Sequence[MatchOddsSeries],
+        batchSize: int,
+        rewardDiscountFactor: float,
+        inactionPenalty: float,
+        onlyPositiveCashout: bool,
+        actions: Optional[MatchOddsActions] = None,
+        seed: Optional[int] = None,
+    ):
+        super().__init__(
+            oddSeriesPool=oddSeriesPool,
+            batchSize=batchSize,
+            rewardDiscountFactor=rewardDiscountFactor,
+            inactionPenalty=inactionPenalty,
+            onlyPositiveCashout=onlyPositiveCashout,
+            actions=actions or MatchOddsActions(),
+            seed=seed,
+        )
+
+    def _get_odds_normalisation_constant(self) -> Union[int, float]:
+        return MATCH_ODDS_NORMALISATION_CONSTANT
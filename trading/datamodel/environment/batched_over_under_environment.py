@@ -0,0 +1,31 @@
+from typing import Optional, Sequence, Union
+
+from trading.datamodel.actions.over_under_actions import OverUnderActions
+from trading.datamodel.constants import OVER_UNDER_ODDS_NORMALISATION_CONSTANT
+from trading.datamodel.environment.base_batched_environment import BaseBatchedEnvironment
+from trading.datamodel.odds_series.over_under_odds_series import OverUnderOddsSeries
+
+
+class BatchedOverUnderEnvironment(BaseBatchedEnvironment):
+    def __init__(
+        self,
+        oddSeriesPool: Sequence[OverUnderOddsSeries],
+        batchSize: int,
+        rewardDiscountFactor: float,
+        inactionPenalty: float,
+        onlyPositiveCashout: bool,
+        actions: Optional[OverUnderActions] = None,
+        seed: Optional[int] = None,
+    ):
+        super().__init__(
+            oddSeriesPool=oddSeriesPool,
+            batchSize=batchSize,
+            rewardDiscountFactor=rewardDiscountFactor,
+            inactionPenalty=inactionPenalty,
+            onlyPositiveCashout=onlyPositiveCashout,
+            actions=actions or OverUnderActions(),
+            seed=seed,
+        )
+
+    def _get_odds_normalisation_constant(self) -> Union[int, float]:
+        return OVER_UNDER_ODDS_NORMALISATION_CONSTANT
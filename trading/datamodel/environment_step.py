@@ -12,12 +12,12 @@ class EnvironmentStep:
     def update_offered_odds(self, offeredOdds: np.array) -> None:
         self.offeredOdds = offeredOdds
 
-    def get_numpy_array(self) -> np.array:
-        # odds need to be last, because of the way environment gets them from `current_time_step`
+    def get_numpy_array(self, copy: bool = True) -> np.array:
+        # odds need to be last, because of the way environment gets them from `current_time_step`. Without a copy, float32
+        # offered odds are returned as they are
         if len(self.sortedFeatureKeys) > 0:
             additionalFeatureVectors = np.concatenate(
-                (self.additionalFeatures[key] for key in self.sortedFeatureKeys), axis=-1
+                [self.additionalFeatures[key] for key in self.sortedFeatureKeys], axis=-1
             )
-            vector = np.concatenate([additionalFeatureVectors, self.offeredOdds], axis=-1)
-            return vector.astype(dtype=np.float32)
-        return self.offeredOdds.astype(dtype=np.float32)
+            return np.concatenate([additionalFeatureVectors, self.offeredOdds], axis=-1).astype(np.float32, copy=False)
+        return self.offeredOdds.astype(dtype=np.float32, copy=copy)
@@ -0,0 +1,164 @@
+import json
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from trading.datamodel.odds_series.base_odds_series import BaseOddsSeries
+from trading.datamodel.odds_series.match_odds_series import MatchOddsSeries
+from trading.datamodel.odds_series.over_under_odds_series import OverUnderOddsSeries
+
+EPISODE_STORE_VERSION = 1
+METADATA_FILENAME = "metadata.json"
+MARKET_OFFSETS_FILENAME = "market_offsets.npy"
+WINNING_COLUMNS_FILENAME = "winning_columns.npy"
+# one contiguous file per column, with every market's rows back to back in timestamp order
+EPISODE_STORE_COLUMNS = {"unix_timestamp": np.int64, "runner_column": np.int8, "price": np.float64}
+# the odds vector position of each runner column, and the odds series dataframe column holding its label
+ODDS_SERIES_TYPES = {
+    "match_odds": {"labelColumn": "betHAD", "runnerLabels": ("HOME", "AWAY", "DRAW")},
+    "over_under": {"labelColumn": "runner_name", "runnerLabels": ("Over", "Under")},
+}
+
+
+def get_column_filename(columnName: str) -> str:
+    return f"{columnName}.bin"
+
+
+class EpisodeStoreWriter:
+    def __init__(self, directory: Union[str, Path], oddsSeriesType: str):
+        if oddsSeriesType not in ODDS_SERIES_TYPES:
+            raise ValueError(f"oddsSeriesType must be one of {list(ODDS_SERIES_TYPES)}, got {oddsSeriesType}")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.oddsSeriesType = oddsSeriesType
+        self.numRunners = len(ODDS_SERIES_TYPES[oddsSeriesType]["runnerLabels"])
+        # columns are appended as markets arrive, so an export never holds more than one market in memory
+        self.columnFiles = {
+            columnName: open(self.directory / get_column_filename(columnName=columnName), "wb")
+            for columnName in EPISODE_STORE_COLUMNS
+        }
+        self.betfairMarketIds: List[str] = []
+        self.marketOffsets: List[int] = [0]
+        self.winningColumns: List[int] = []
+
+    def __enter__(self) -> "EpisodeStoreWriter":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def add_episode(
+        self,
+        betfairMarketId: str,
+        unixTimestamps: np.ndarray,
+        runnerColumns: np.ndarray,
+        prices: np.ndarray,
+        winningColumn: int,
+    ) -> None:
+        runnerColumns = np.asarray(runnerColumns)
+        if not len(unixTimestamps) == len(runnerColumns) == len(prices):
+            raise ValueError(f"Columns for market {betfairMarketId} have different lengths")
+        if not 0 <= winningColumn < self.numRunners or ((runnerColumns < 0) | (runnerColumns >= self.numRunners)).any():
+            raise ValueError(f"Runner columns for market {betfairMarketId} must be between 0 and {self.numRunners - 1}")
+        timestampOrder = np.argsort(unixTimestamps, kind="stable")
+        for columnName, values in zip(EPISODE_STORE_COLUMNS, [unixTimestamps, runnerColumns, prices]):
+            np.asarray(values, dtype=EPISODE_STORE_COLUMNS[columnName])[timestampOrder].tofile(self.columnFiles[columnName])
+        self.betfairMarketIds.append(betfairMarketId)
+        self.marketOffsets.append(self.marketOffsets[-1] + len(unixTimestamps))
+        self.winningColumns.append(winningColumn)
+
+    def close(self) -> None:
+        for columnFile in self.columnFiles.values():
+            columnFile.close()
+        np.save(self.directory / MARKET_OFFSETS_FILENAME, np.asarray(self.marketOffsets, dtype=np.int64))
+        np.save(self.directory / WINNING_COLUMNS_FILENAME, np.asarray(self.winningColumns, dtype=np.int8))
+        # written last, so a store without metadata is an export that didn't finish
+        with open(self.directory / METADATA_FILENAME, "w") as metadataFile:
+            json.dump(
+                {
+                    "version": EPISODE_STORE_VERSION,
+                    "oddsSeriesType": self.oddsSeriesType,
+                    "numRows": self.marketOffsets[-1],
+                    "betfairMarketIds": self.betfairMarketIds,
+                },
+                metadataFile,
+            )
+
+
+class EpisodeStore:
+    def __init__(self, directory: Union[str, Path]):
+        self.directory = Path(directory)
+        with open(self.directory / METADATA_FILENAME) as metadataFile:
+            metadata = json.load(metadataFile)
+        if metadata["version"] != EPISODE_STORE_VERSION:
+            raise ValueError(f"Episode store version {metadata['version']} isn't supported")
+        self.oddsSeriesType = metadata["oddsSeriesType"]
+        self.betfairMarketIds = metadata["betfairMarketIds"]
+        # memory mapped, so opening a store is instant and episodes are paged in from disk as they're read
+        self.columns = {
+            columnName: (
+                np.memmap(self.directory / get_column_filename(columnName=columnName), dtype=dtype, mode="r")
+                if metadata["numRows"] > 0
+                else np.empty(0, dtype=dtype)
+            )
+            for columnName, dtype in EPISODE_STORE_COLUMNS.items()
+        }
+        self.marketOffsets = np.load(self.directory / MARKET_OFFSETS_FILENAME, mmap_mode="r")
+        self.winningColumns = np.load(self.directory / WINNING_COLUMNS_FILENAME, mmap_mode="r")
+
+    def __len__(self) -> int:
+        return len(self.betfairMarketIds)
+
+    def get_episode_arrays(self, marketIndex: int) -> Dict[str, np.ndarray]:
+        # views into the mapped files rather than copies
+        marketStart, marketEnd = self.marketOffsets[marketIndex], self.marketOffsets[marketIndex + 1]
+        return {columnName: column[marketStart:marketEnd] for columnName, column in self.columns.items()}
+
+    def get_outcome(self, marketIndex: int) -> Tuple[int, ...]:
+        # in the odds vector's runner order
+        outcome = [0] * len(ODDS_SERIES_TYPES[self.oddsSeriesType]["runnerLabels"])
+        outcome[self.winningColumns[marketIndex]] = 1
+        return tuple(outcome)
+
+    def get_odds_dataframe(self, marketIndex: int) -> pd.DataFrame:
+        oddsSeriesType = ODDS_SERIES_TYPES[self.oddsSeriesType]
+        episodeArrays = self.get_episode_arrays(marketIndex=marketIndex)
+        runnerLabels = np.asarray(oddsSeriesType["runnerLabels"], dtype=object)
+        return pd.DataFrame(
+            {
+                oddsSeriesType["labelColumn"]: runnerLabels[episodeArrays["runner_column"]],
+                "unix_timestamp": episodeArrays["unix_timestamp"],
+                "price": episodeArrays["price"],
+            },
+            copy=False,
+        )
+
+    def get_odds_series(self, marketIndex: int, doCycle: bool = False, backScalingFactor: float = 0.99) -> BaseOddsSeries:
+        # runner columns are already in odds vector order, so the series compiles straight from the mapped arrays
+        episodeArrays = self.get_episode_arrays(marketIndex=marketIndex)
+        outcome = self.get_outcome(marketIndex=marketIndex)
+        if self.oddsSeriesType == "match_odds":
+            return MatchOddsSeries.from_arrays(
+                unixTimestamps=episodeArrays["unix_timestamp"],
+                runnerColumns=episodeArrays["runner_column"],
+                prices=episodeArrays["price"],
+                matchOutcome=outcome,
+                doCycle=doCycle,
+                backScalingFactor=backScalingFactor,
+            )
+        return OverUnderOddsSeries.from_arrays(
+            unixTimestamps=episodeArrays["unix_timestamp"],
+            runnerColumns=episodeArrays["runner_column"],
+            prices=episodeArrays["price"],
+            overUnderOutcome=outcome,
+            doCycle=doCycle,
+            backScalingFactor=backScalingFactor,
+        )
+
+    def iter_odds_series(
+        self, marketIndices: Optional[Sequence[int]] = None, doCycle: bool = False, backScalingFactor: float = 0.99
+    ) -> Iterator[BaseOddsSeries]:
+        for marketIndex in range(len(self)) if marketIndices is None else marketIndices:
+            yield self.get_odds_series(marketIndex=marketIndex, doCycle=doCycle, backScalingFactor=backScalingFactor)
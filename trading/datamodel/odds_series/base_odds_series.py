@@ -1,86 +1,162 @@
 from abc import ABC, abstractmethod
+from typing import Dict, Optional, Tuple
 
 import pandas as pd
 import numpy as np
 
-from trading.datamodel.environment_step import EnvironmentStep
 from trading.datamodel.outcomes.base_outcome import BaseOutcome
 
 
+def compile_odds_matrix(
+    unixTimestamps: np.ndarray, runnerColumns: np.ndarray, prices: np.ndarray, numRunners: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # returns the ordered timestamps, the forward filled odds of each runner at each of them, and whether each runner had
+    # been priced yet. Updates with a negative runner column are dropped
+    isKnownRunner = np.asarray(runnerColumns) >= 0
+    unixTimestamps = np.asarray(unixTimestamps)[isKnownRunner]
+    runnerColumns = np.asarray(runnerColumns)[isKnownRunner].astype(np.int64)
+    prices = np.asarray(prices, dtype=np.float64)[isKnownRunner]
+    orderedTimestamps, stepIndices = np.unique(unixTimestamps, return_inverse=True)
+    numSteps = len(orderedTimestamps)
+
+    # when a runner is updated more than once in a step the last update in the input wins, as it did row by row
+    updateIndices = stepIndices.reshape(-1) * numRunners + runnerColumns
+    _, lastUpdatePositions = np.unique(updateIndices[::-1], return_index=True)
+    lastUpdatePositions = len(updateIndices) - 1 - lastUpdatePositions
+    isUpdated = np.zeros(numSteps * numRunners, dtype=bool)
+    isUpdated[updateIndices[lastUpdatePositions]] = True
+    updatedOdds = np.zeros(numSteps * numRunners, dtype=np.float64)
+    updatedOdds[updateIndices[lastUpdatePositions]] = prices[lastUpdatePositions]
+    isUpdated = isUpdated.reshape(numSteps, numRunners)
+
+    # each step takes the odds from the latest step at or before it that updated the runner
+    latestUpdateSteps = np.where(isUpdated, np.arange(numSteps).reshape(-1, 1), 0)
+    np.maximum.accumulate(latestUpdateSteps, axis=0, out=latestUpdateSteps)
+    hasOdds = np.logical_or.accumulate(isUpdated, axis=0)
+    oddsMatrix = updatedOdds.reshape(numSteps, numRunners)[latestUpdateSteps, np.arange(numRunners)]
+    oddsMatrix[~hasOdds] = 0
+    return orderedTimestamps, oddsMatrix, hasOdds
+
+
+def jitter_odds(odds: np.ndarray, scale: float, randomGenerator: np.random.Generator) -> np.ndarray:
+    # jitters the implied probabilities of odds of any shape and then converts them back into odds. Unpriced odds, and
+    # odds whose jittered probability isn't positive, are 0
+    isPriced = odds > 0
+    jitteredProbabilities = np.divide(1, odds, out=np.zeros(odds.shape, dtype=np.float64), where=isPriced)
+    jitteredProbabilities += randomGenerator.normal(loc=0, scale=scale, size=odds.shape)
+    isPriced &= jitteredProbabilities > 0
+    return np.divide(1, jitteredProbabilities, out=np.zeros(odds.shape, dtype=np.float64), where=isPriced)
+
+
 class BaseOddsSeries(ABC):
+    numRunners: int
+
     def __init__(
-        self, oddsDataframe: pd.DataFrame, endOutcome: BaseOutcome, doCycle: bool = False, backScalingFactor: float = 0.99
+        self,
+        oddsDataframe: Optional[pd.DataFrame],
+        endOutcome: BaseOutcome,
+        doCycle: bool = False,
+        backScalingFactor: float = 0.99,
+        oddsArrays: Optional[Dict[str, np.ndarray]] = None,
     ):
+        if (oddsDataframe is None) == (oddsArrays is None):
+            raise ValueError("Exactly one of oddsDataframe and oddsArrays must be given")
         self.oddsDataframe = oddsDataframe
+        # unix_timestamp, runner_column and price arrays, with runner columns already in odds vector order
+        self.oddsArrays = oddsArrays
         self.endOutcome = endOutcome
         self.doCycle = doCycle
         self.backScalingFactor = backScalingFactor
         self.episodeEnded = False
-        self.groupedOddsUpdates = None
         self.orderedTimestamps = None
         self.totalNumSteps = None
         self.currentStepNumber = 0
         self.jitterOddsScale = None
+        self.randomGenerator = None
+        self.oddsMatrix = None
+        self.stepMatrix = None
+        self.firstPassStepMatrix = None
+        self.hasOdds = None
+        # the steps handed out this episode, which are the odds matrix steps with any jitter already applied
+        self.episodeStepMatrix = None
 
     def get_end_outcome_vector(self) -> np.array:
         return np.array(self.endOutcome)
 
-    def set_jitter_odds_scale(self, scale: float) -> None:
+    def set_jitter_odds_scale(self, scale: float, seed: Optional[int] = None) -> None:
+        # the same seed gives the same jitter for each episode in turn
         self.jitterOddsScale = scale
+        self.randomGenerator = np.random.default_rng(seed)
+        self._set_episode_step_matrix()
 
     def apply_jitter_to_odds(self, odds: np.array) -> np.array:
-        # jitters the implied probabilities of odds and then converts them back into odds
-        jitteredProbabilities = np.array(
-            [np.random.normal(loc=1 / v, scale=self.jitterOddsScale) if v > 0 else 0 for v in odds]
-        )
-        return np.array([1 / v if v > 0 else 0 for v in jitteredProbabilities])
+        return jitter_odds(odds=np.asarray(odds), scale=self.jitterOddsScale, randomGenerator=self.randomGenerator)
+
+    def _set_episode_step_matrix(self) -> None:
+        # noise for the whole episode is drawn up front, so stepping never touches the random generator
+        if self.jitterOddsScale is None or self.stepMatrix is None:
+            self.episodeStepMatrix = self.stepMatrix
+        else:
+            self.episodeStepMatrix = self.apply_jitter_to_odds(odds=self.stepMatrix).astype(np.float32)
 
     def initialize(self) -> None:
-        self.groupedOddsUpdates = {
-            timestamp: updateDataframe for timestamp, updateDataframe in self.oddsDataframe.groupby("unix_timestamp")
-        }
-        self.orderedTimestamps = sorted(self.groupedOddsUpdates.keys())
+        if self.oddsArrays is None:
+            self.oddsArrays = {
+                "unix_timestamp": self.oddsDataframe["unix_timestamp"].to_numpy(),
+                "runner_column": self._get_runner_columns(oddsDataframe=self.oddsDataframe),
+                "price": self.oddsDataframe["price"].to_numpy(),
+            }
+        orderedTimestamps, oddsMatrix, self.hasOdds = compile_odds_matrix(
+            unixTimestamps=self.oddsArrays["unix_timestamp"],
+            runnerColumns=self.oddsArrays["runner_column"],
+            prices=self.oddsArrays["price"],
+            numRunners=self.numRunners,
+        )
+        self.orderedTimestamps = orderedTimestamps.tolist()
         self.totalNumSteps = len(self.orderedTimestamps)
+        # always assume prices are for lay bets (and back would be lower). Both halves are worked out from the float64 odds
+        # before the cast, so steps match the ones built update by update
+        self.firstPassStepMatrix = np.concatenate((oddsMatrix * self.backScalingFactor, oddsMatrix), axis=-1).astype(
+            np.float32
+        )
+        self.stepMatrix = self.firstPassStepMatrix
+        self.oddsMatrix = self.stepMatrix[:, self.numRunners :]
+        self._set_episode_step_matrix()
 
     @property
     def isValid(self) -> bool:
+        if self.oddsArrays is not None:
+            return len(self.oddsArrays["price"]) > 0
         return len(self.oddsDataframe) > 0
 
-    def get_step(self) -> np.array:
-        updateTimestamp = self.orderedTimestamps[self.currentStepNumber]
-        groupedDataframeUpdate = self.groupedOddsUpdates[updateTimestamp]
+    def get_step(self, copy: bool = True) -> np.array:
+        # without a copy the step is a read only view of the episode's steps, which is cheaper but mustn't be written to
+        matchStep = self.episodeStepMatrix[self.currentStepNumber]
+        if copy:
+            matchStep = matchStep.copy()
         self.currentStepNumber += 1
-        self.update_step(groupedDataframeUpdate=groupedDataframeUpdate)
-        layOddsVector = self._get_odds_vector()
-        backOddsVector = (
-            layOddsVector * self.backScalingFactor
-        )  # always assume prices are for lay bets (and back would be lower)
-        if self.jitterOddsScale is not None:
-            backOddsVector = self.apply_jitter_to_odds(odds=backOddsVector)
-            layOddsVector = self.apply_jitter_to_odds(odds=layOddsVector)
-        matchStep = EnvironmentStep(offeredOdds=np.concatenate((backOddsVector, layOddsVector)))
         if self.currentStepNumber == self.totalNumSteps:
             if not self.doCycle:
                 self.episodeEnded = True
             else:
 
                 self.reset()
-        return matchStep.get_numpy_array()
-
-    @abstractmethod
-    def update_step(self, groupedDataframeUpdate) -> None:
-        pass
+        return matchStep
 
     @abstractmethod
-    def _get_odds_vector(self) -> np.array:
+    def _get_runner_columns(self, oddsDataframe: pd.DataFrame) -> np.ndarray:
+        # the odds vector position of each row's runner, or -1 for rows to ignore
         pass
 
     def reset(self) -> None:
+        if self.doCycle and self.currentStepNumber > 0:
+            # a cycled series carries each runner's last odds over until it's priced again
+            carriedStep = self.stepMatrix[self.currentStepNumber - 1]
+            self.stepMatrix = np.where(np.tile(self.hasOdds, 2), self.firstPassStepMatrix, carriedStep)
+            self.oddsMatrix = self.stepMatrix[:, self.numRunners :]
+        elif not self.doCycle:
+            self.stepMatrix = self.firstPassStepMatrix
+            self.oddsMatrix = self.stepMatrix[:, self.numRunners :]
         self.currentStepNumber = 0
         self.episodeEnded = False
-        if not self.doCycle:
-            self._reset_last_odds()
-
-    @abstractmethod
-    def _reset_last_odds(self) -> None:
-        pass
+        self._set_episode_step_matrix()
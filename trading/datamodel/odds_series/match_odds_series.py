@@ -1,35 +1,50 @@
+from typing import Dict, Optional
+
 import numpy as np
 import pandas as pd
 
 from trading.datamodel.odds_series.base_odds_series import BaseOddsSeries
 from trading.datamodel.outcomes.match_outcome import MatchOutcome
 
+MATCH_ODDS_RUNNER_COLUMNS = {"HOME": 0, "AWAY": 1, "DRAW": 2}
+
 
 class MatchOddsSeries(BaseOddsSeries):
+    numRunners = len(MATCH_ODDS_RUNNER_COLUMNS)
+
     def __init__(
-        self, oddsDataframe: pd.DataFrame, matchOutcome: MatchOutcome, doCycle: bool = False, backScalingFactor: float = 0.99
+        self,
+        oddsDataframe: Optional[pd.DataFrame],
+        matchOutcome: MatchOutcome,
+        doCycle: bool = False,
+        backScalingFactor: float = 0.99,
+        oddsArrays: Optional[Dict[str, np.ndarray]] = None,
     ):
         super().__init__(
-            oddsDataframe=oddsDataframe, doCycle=doCycle, endOutcome=matchOutcome, backScalingFactor=backScalingFactor
+            oddsDataframe=oddsDataframe,
+            doCycle=doCycle,
+            endOutcome=matchOutcome,
+            backScalingFactor=backScalingFactor,
+            oddsArrays=oddsArrays,
         )
-        self.lastHomeOdds = 0
-        self.lastAwayOdds = 0
-        self.lastDrawOdds = 0
-
-    def update_step(self, groupedDataframeUpdate: pd.DataFrame) -> None:
-        for _, row in groupedDataframeUpdate.iterrows():
-            oddsType = row["betHAD"]
-            if oddsType == "HOME":
-                self.lastHomeOdds = row["price"]
-            elif oddsType == "AWAY":
-                self.lastAwayOdds = row["price"]
-            elif oddsType == "DRAW":
-                self.lastDrawOdds = row["price"]
-
-    def _get_odds_vector(self) -> np.array:
-        return np.array((self.lastHomeOdds, self.lastAwayOdds, self.lastDrawOdds))
-
-    def _reset_last_odds(self) -> None:
-        self.lastHomeOdds = 0
-        self.lastAwayOdds = 0
-        self.lastDrawOdds = 0
+
+    @classmethod
+    def from_arrays(
+        cls,
+        unixTimestamps: np.ndarray,
+        runnerColumns: np.ndarray,
+        prices: np.ndarray,
+        matchOutcome: MatchOutcome,
+        doCycle: bool = False,
+        backScalingFactor: float = 0.99,
+    ) -> "MatchOddsSeries":
+        return cls(
+            oddsDataframe=None,
+            matchOutcome=matchOutcome,
+            doCycle=doCycle,
+            backScalingFactor=backScalingFactor,
+            oddsArrays={"unix_timestamp": unixTimestamps, "runner_column": runnerColumns, "price": prices},
+        )
+
+    def _get_runner_columns(self, oddsDataframe: pd.DataFrame) -> np.ndarray:
+        return oddsDataframe["betHAD"].map(MATCH_ODDS_RUNNER_COLUMNS).fillna(-1).to_numpy(dtype=np.int64)
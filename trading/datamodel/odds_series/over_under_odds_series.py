@@ -1,3 +1,5 @@
+from typing import Dict, Optional
+
 import numpy as np
 import pandas as pd
 
@@ -6,32 +8,47 @@ from trading.datamodel.outcomes.over_under_outcome import OverUnderOutcome
 
 
 class OverUnderOddsSeries(BaseOddsSeries):
+    numRunners = 2
+
     def __init__(
         self,
-        oddsDataframe: pd.DataFrame,
+        oddsDataframe: Optional[pd.DataFrame],
         overUnderOutcome: OverUnderOutcome,
         doCycle: bool = False,
         backScalingFactor: float = 0.99,
+        oddsArrays: Optional[Dict[str, np.ndarray]] = None,
     ):
         super().__init__(
-            oddsDataframe=oddsDataframe, doCycle=doCycle, endOutcome=overUnderOutcome, backScalingFactor=backScalingFactor
+            oddsDataframe=oddsDataframe,
+            doCycle=doCycle,
+            endOutcome=overUnderOutcome,
+            backScalingFactor=backScalingFactor,
+            oddsArrays=oddsArrays,
         )
-        self.lastOverOdds = 0
-        self.lastUnderOdds = 0
 
-    def update_step(self, groupedDataframeUpdate: pd.DataFrame) -> None:
-        for _, row in groupedDataframeUpdate.iterrows():
-            runnerName = row["runner_name"].lower()
-            if "over" in runnerName:
-                self.lastOverOdds = row["price"]
-            elif "under" in runnerName:
-                self.lastUnderOdds = row["price"]
-            else:
-                raise ValueError(f'Runner name: "{runnerName}" not recognised')
-
-    def _get_odds_vector(self) -> np.array:
-        return np.array((self.lastOverOdds, self.lastUnderOdds))
+    @classmethod
+    def from_arrays(
+        cls,
+        unixTimestamps: np.ndarray,
+        runnerColumns: np.ndarray,
+        prices: np.ndarray,
+        overUnderOutcome: OverUnderOutcome,
+        doCycle: bool = False,
+        backScalingFactor: float = 0.99,
+    ) -> "OverUnderOddsSeries":
+        return cls(
+            oddsDataframe=None,
+            overUnderOutcome=overUnderOutcome,
+            doCycle=doCycle,
+            backScalingFactor=backScalingFactor,
+            oddsArrays={"unix_timestamp": unixTimestamps, "runner_column": runnerColumns, "price": prices},
+        )
 
-    def _reset_last_odds(self) -> None:
-        self.lastOverOdds = 0
-        self.lastUnderOdds = 0
+    def _get_runner_columns(self, oddsDataframe: pd.DataFrame) -> np.ndarray:
+        runnerNames = oddsDataframe["runner_name"].astype(str).str.lower()
+        isOver = runnerNames.str.contains("over", regex=False).to_numpy(dtype=bool)
+        isUnder = runnerNames.str.contains("under", regex=False).to_numpy(dtype=bool)
+        if not (isOver | isUnder).all():
+            runnerName = runnerNames[~(isOver | isUnder)].iloc[0]
+            raise ValueError(f'Runner name: "{runnerName}" not recognised')
+        return np.where(isOver, 0, 1)
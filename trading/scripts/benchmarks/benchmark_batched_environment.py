@@ -0,0 +1,69 @@
+import sys
+
+sys.path.append("../../../")
+sys.path.append("../../")
+from time import perf_counter
+from typing import List, Sequence
+
+import fire
+import numpy as np
+
+from trading.datamodel.environment.batched_match_odds_environment import BatchedMatchOddsEnvironment
+from trading.datamodel.environment.match_odds_environment import MatchOddsEnvironment
+from trading.datamodel.odds_series.match_odds_series import MatchOddsSeries
+from trading.datamodel.outcomes.match_outcome import MatchOutcome
+from trading.scripts.benchmarks.benchmark_odds_series import get_synthetic_odds_dataframe
+
+
+def get_odds_series_pool(numEpisodes: int, numUpdates: int, seed: int) -> List[MatchOddsSeries]:
+    return [
+        MatchOddsSeries(
+            oddsDataframe=get_synthetic_odds_dataframe(numUpdates=numUpdates, updatesPerTimestamp=2, seed=seed + episodeIndex),
+            matchOutcome=MatchOutcome.HOME_WIN,
+        )
+        for episodeIndex in range(numEpisodes)
+    ]
+
+
+def benchmark_batched_environment(
+    batchSizes: Sequence[int] = (1, 16, 256),
+    numEpisodes: int = 64,
+    numUpdates: int = 1000,
+    numCalls: int = 2000,
+    seed: int = 0,
+) -> None:
+    # single threaded, so steps/sec is per core
+    randomState = np.random.RandomState(seed)
+    singleEnvironment = MatchOddsEnvironment(
+        oddSeries=get_odds_series_pool(numEpisodes=1, numUpdates=numUpdates, seed=seed)[0],
+        rewardDiscountFactor=0.99,
+        inactionPenalty=0,
+        onlyPositiveCashout=False,
+    )
+    actions = randomState.randint(low=0, high=7, size=numCalls)
+    startTime = perf_counter()
+    for action in actions:
+        singleEnvironment.step(action=action)
+    print(f"MatchOddsEnvironment: {numCalls / (perf_counter() - startTime):,.0f} steps/sec")
+
+    oddSeriesPool = get_odds_series_pool(numEpisodes=numEpisodes, numUpdates=numUpdates, seed=seed)
+    for batchSize in batchSizes:
+        batchedEnvironment = BatchedMatchOddsEnvironment(
+            oddSeriesPool=oddSeriesPool,
+            batchSize=batchSize,
+            rewardDiscountFactor=0.99,
+            inactionPenalty=0,
+            onlyPositiveCashout=False,
+            seed=seed,
+        )
+        batchedEnvironment.reset()
+        actions = randomState.randint(low=0, high=7, size=(numCalls, batchSize))
+        startTime = perf_counter()
+        for action in actions:
+            batchedEnvironment.step(action=action)
+        elapsedSeconds = perf_counter() - startTime
+        print(f"BatchedMatchOddsEnvironment N={batchSize:>4}: {numCalls * batchSize / elapsedSeconds:,.0f} steps/sec")
+
+
+if __name__ == "__main__":
+    fire.Fire(benchmark_batched_environment)
@@ -0,0 +1,44 @@
+import sys
+
+sys.path.append("../../../")
+sys.path.append("../../")
+from time import perf_counter_ns
+
+import fire
+import numpy as np
+
+from trading.datamodel.environment.match_odds_environment import MatchOddsEnvironment
+from trading.datamodel.odds_series.match_odds_series import MatchOddsSeries
+from trading.datamodel.outcomes.match_outcome import MatchOutcome
+from trading.scripts.benchmarks.benchmark_odds_series import get_synthetic_odds_dataframe
+
+
+def benchmark_environment_step(numUpdates: int = 1000, numCalls: int = 20000, seed: int = 0) -> None:
+    # times MatchOddsEnvironment._step call by call, including the episode ends where it resets itself
+    actions = np.random.RandomState(seed).randint(low=0, high=7, size=numCalls)
+    for copyObservations in (True, False):
+        environment = MatchOddsEnvironment(
+            oddSeries=MatchOddsSeries(
+                oddsDataframe=get_synthetic_odds_dataframe(numUpdates=numUpdates, updatesPerTimestamp=2, seed=seed),
+                matchOutcome=MatchOutcome.HOME_WIN,
+            ),
+            rewardDiscountFactor=0.99,
+            inactionPenalty=0,
+            onlyPositiveCashout=False,
+            copyObservations=copyObservations,
+        )
+        environment.reset()
+        latencies = np.zeros(numCalls, dtype=np.int64)
+        for i, action in enumerate(actions):
+            startTime = perf_counter_ns()
+            environment._step(action=action)
+            latencies[i] = perf_counter_ns() - startTime
+        p50, p99 = np.percentile(latencies, [50, 99]) / 1000
+        print(
+            f"_step copyObservations={copyObservations!s:>5}: mean {latencies.mean() / 1000:.1f}us, p50 {p50:.1f}us, "
+            f"p99 {p99:.1f}us"
+        )
+
+
+if __name__ == "__main__":
+    fire.Fire(benchmark_environment_step)
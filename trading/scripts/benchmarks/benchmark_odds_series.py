@@ -0,0 +1,52 @@
+import sys
+
+sys.path.append("../../../")
+sys.path.append("../../")
+from time import perf_counter
+
+import fire
+import numpy as np
+import pandas as pd
+
+from trading.datamodel.odds_series.match_odds_series import MatchOddsSeries
+from trading.datamodel.outcomes.match_outcome import MatchOutcome
+
+
+def get_synthetic_odds_dataframe(numUpdates: int, updatesPerTimestamp: int, seed: int) -> pd.DataFrame:
+    randomState = np.random.RandomState(seed)
+    return pd.DataFrame(
+        {
+            "betHAD": randomState.choice(["HOME", "AWAY", "DRAW"], size=numUpdates),
+            "unix_timestamp": 1514790730 + randomState.randint(low=0, high=numUpdates // updatesPerTimestamp, size=numUpdates),
+            "price": np.round(randomState.uniform(low=1.01, high=20.0, size=numUpdates), 2),
+        }
+    )
+
+
+def benchmark_odds_series(
+    numUpdates: int = 20000, updatesPerTimestamp: int = 2, numEpisodes: int = 5, seed: int = 0, jitterOddsScale: float = None
+) -> None:
+    oddsSeries = MatchOddsSeries(
+        oddsDataframe=get_synthetic_odds_dataframe(numUpdates=numUpdates, updatesPerTimestamp=updatesPerTimestamp, seed=seed),
+        matchOutcome=MatchOutcome.HOME_WIN,
+    )
+    if jitterOddsScale is not None:
+        oddsSeries.set_jitter_odds_scale(scale=jitterOddsScale)
+    startTime = perf_counter()
+    oddsSeries.initialize()
+    initializeSeconds = perf_counter() - startTime
+
+    numSteps = 0
+    startTime = perf_counter()
+    for _ in range(numEpisodes):
+        oddsSeries.reset()
+        while not oddsSeries.episodeEnded:
+            oddsSeries.get_step()
+            numSteps += 1
+    elapsedSeconds = perf_counter() - startTime
+    print(f"initialize: {initializeSeconds * 1000:,.1f}ms for {oddsSeries.totalNumSteps:,} steps")
+    print(f"  get_step: {numSteps / elapsedSeconds:,.0f} steps/sec")
+
+
+if __name__ == "__main__":
+    fire.Fire(benchmark_odds_series)
@@ -0,0 +1,87 @@
+import numpy as np
+import numpy.testing as npt
+
+from unittest import TestCase
+
+from trading.datamodel.betting_state.batched_betting_state import BatchedBettingState
+from trading.datamodel.betting_state.match_odds_betting_state import MatchOddsBettingState
+from trading.datamodel.outcomes.match_outcome import MatchOutcome
+
+
+class TestBatchedBettingState(TestCase):
+    def __init__(self, methodName="runTest"):
+        super().__init__(methodName=methodName)
+        self.batchSize = 8
+        self.oddsChoices = np.array([0, 1.5, 2.0, 2.5, 4.0, 10.0], dtype=np.float32)
+
+    def _get_place_bet_function(self, bettingState: MatchOddsBettingState, side: int, outcome: int):
+        return [
+            [bettingState.place_home_back_bet, bettingState.place_away_back_bet, bettingState.place_draw_back_bet],
+            [bettingState.place_home_lay_bet, bettingState.place_away_lay_bet, bettingState.place_draw_lay_bet],
+        ][side][outcome]
+
+    def _assert_matches_betting_states(self, onlyPositiveCashout: bool) -> None:
+        randomState = np.random.RandomState(0)
+        batchedBettingState = BatchedBettingState(
+            batchSize=self.batchSize, numOutcomes=3, discountFactor=0.9, onlyPositiveCashout=onlyPositiveCashout
+        )
+        bettingStates = [
+            MatchOddsBettingState(discountFactor=0.9, onlyPositiveCashout=onlyPositiveCashout) for _ in range(self.batchSize)
+        ]
+        for _ in range(50):
+            # only some of the markets bet each step
+            marketIndices = np.flatnonzero(randomState.rand(self.batchSize) < 0.7)
+            sides = randomState.randint(low=0, high=2, size=len(marketIndices))
+            outcomes = randomState.randint(low=0, high=3, size=len(marketIndices))
+            odds = randomState.choice(self.oddsChoices, size=len(marketIndices))
+            rewards, discounts = batchedBettingState.place_bets(
+                marketIndices=marketIndices, sides=sides, outcomes=outcomes, odds=odds
+            )
+            for i, marketIndex in enumerate(marketIndices):
+                discountedReward = self._get_place_bet_function(
+                    bettingState=bettingStates[marketIndex], side=sides[i], outcome=outcomes[i]
+                )(odds=odds[i])
+                self.assertAlmostEqual(rewards[i], discountedReward.reward, places=5)
+                self.assertAlmostEqual(discounts[i], discountedReward.discount)
+            npt.assert_array_equal(
+                batchedBettingState.get_state_observations(),
+                np.array([bettingState.get_state_observation() for bettingState in bettingStates]),
+            )
+        returns = batchedBettingState.calculate_returns_for_discounted_rl(
+            marketIndices=np.arange(self.batchSize), outcomeVectors=np.array([MatchOutcome.HOME_WIN] * self.batchSize)
+        )
+        expectedReturns = [
+            bettingState.calculate_return_for_discounted_rl(outcomeVector=np.array(MatchOutcome.HOME_WIN))
+            for bettingState in bettingStates
+        ]
+        npt.assert_almost_equal(actual=returns, desired=expectedReturns, decimal=5)
+
+    def test_matches_betting_states(self):
+        self._assert_matches_betting_states(onlyPositiveCashout=False)
+
+    def test_matches_betting_states_only_positive_cashout(self):
+        self._assert_matches_betting_states(onlyPositiveCashout=True)
+
+    def test_reset(self):
+        batchedBettingState = BatchedBettingState(batchSize=2, numOutcomes=2, discountFactor=0.9, onlyPositiveCashout=False)
+        batchedBettingState.place_bets(
+            marketIndices=np.array([0, 1]), sides=np.array([0, 1]), outcomes=np.array([1, 0]), odds=np.array([2.0, 3.0])
+        )
+        batchedBettingState.reset(marketIndices=np.array([1]))
+        npt.assert_array_equal(batchedBettingState.get_state_observations(), np.array([[0, 2.0, 0, 0], [0, 0, 0, 0]]))
+
+    def test_place_bets_into_arrays(self):
+        batchedBettingState = BatchedBettingState(batchSize=3, numOutcomes=2, discountFactor=0.9, onlyPositiveCashout=False)
+        rewards = np.full(3, 7.0)
+        discounts = np.full(3, 7.0)
+        batchedBettingState.place_bets(
+            marketIndices=np.array([2, 0]),
+            sides=np.array([0, 1]),
+            outcomes=np.array([1, 0]),
+            odds=np.array([2.0, 3.0]),
+            rewards=rewards,
+            discounts=discounts,
+        )
+        # markets that didn't bet keep what was already in the arrays
+        npt.assert_array_equal(rewards, np.array([-2.0, 7.0, -1.0]))
+        npt.assert_array_equal(discounts, np.array([0.9, 7.0, 0.9]))
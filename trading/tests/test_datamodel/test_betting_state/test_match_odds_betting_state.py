@@ -1,4 +1,5 @@
 import numpy as np
+import numpy.testing as npt
 import pandas as pd
 
 from unittest import TestCase
@@ -6,6 +7,8 @@ from unittest import TestCase
 from trading.datamodel.betting_state.match_odds_betting_state import (
     MatchOddsBettingState,
 )
+from trading.datamodel.constants import BACK_SIDE
+from trading.datamodel.constants import LAY_SIDE
 
 
 class TestMatchOddsBettingState(TestCase):
@@ -35,6 +38,20 @@ class TestMatchOddsBettingState(TestCase):
         self.backedBettingState = self._get_backed_betting_state()
         self.layedBettingState = self._get_layed_betting_state()
 
+    def test_bets_array(self):
+        reward, discount = self.emptyBettingState.place_bet(side=BACK_SIDE, outcome=1, odds=self.defaultHADOdds[1])
+        self.assertEqual((reward, discount), (-1, 0.9))
+        self.emptyBettingState.place_bet(side=LAY_SIDE, outcome=2, odds=self.defaultHADOdds[2])
+        npt.assert_array_equal(
+            self.emptyBettingState.bets, np.array([[0, self.defaultHADOdds[1], 0], [0, 0, self.defaultHADOdds[2]]])
+        )
+        self.assertEqual(self.emptyBettingState.awayBackOdds, self.defaultHADOdds[1])
+        self.assertEqual(self.emptyBettingState.drawLayOdds, self.defaultHADOdds[2])
+        self.emptyBettingState.homeLayOdds = self.defaultHADOdds[0]
+        npt.assert_array_equal(self.emptyBettingState.layBets, np.array([self.defaultHADOdds[0], 0, self.defaultHADOdds[2]]))
+        self.emptyBettingState.reset()
+        self.assertFalse(self.emptyBettingState.bets.any())
+
     # BACK/LAY tests
     def test_empty_home_back_placing(self):
         self.emptyBettingState.place_home_back_bet(odds=self.defaultHADOdds[0])
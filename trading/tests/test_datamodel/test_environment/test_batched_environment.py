@@ -0,0 +1,195 @@
+import numpy as np
+import numpy.testing as npt
+import tensorflow as tf
+from tf_agents.environments.tf_py_environment import TFPyEnvironment
+
+from unittest import TestCase
+
+from trading.datamodel.environment.batched_match_odds_environment import BatchedMatchOddsEnvironment
+from trading.datamodel.environment.batched_over_under_environment import BatchedOverUnderEnvironment
+from trading.datamodel.environment.match_odds_environment import MatchOddsEnvironment
+from trading.datamodel.environment.over_under_environment import OverUnderEnvironment
+from trading.datamodel.odds_series.match_odds_series import MatchOddsSeries
+from trading.datamodel.odds_series.over_under_odds_series import OverUnderOddsSeries
+from trading.datamodel.outcomes.match_outcome import MatchOutcome
+from trading.datamodel.outcomes.over_under_outcome import OverUnderOutcome
+from trading.tests.test_datamodel.constants import MatchOddsTestData
+from trading.tests.test_datamodel.constants import OverUnderOddsTestData
+
+
+class TestBatchedEnvironment(TestCase):
+    def __init__(self, methodName="runTest"):
+        super().__init__(methodName=methodName)
+        self.inactionPenalty = -1
+        # one action sequence per market, running over several episodes of the test data
+        randomState = np.random.RandomState(0)
+        self.matchOddsActions = randomState.randint(low=0, high=7, size=(5, 10)).tolist()
+        self.overUnderActions = randomState.randint(low=0, high=5, size=(5, 10)).tolist()
+
+    def _get_match_odds_series(self, doCycle: bool = False) -> MatchOddsSeries:
+        return MatchOddsSeries(
+            oddsDataframe=MatchOddsTestData.testDataframe,
+            doCycle=doCycle,
+            matchOutcome=MatchOutcome.HOME_WIN,
+            backScalingFactor=MatchOddsTestData.backScalingFactor,
+        )
+
+    def _get_over_under_odds_series(self) -> OverUnderOddsSeries:
+        return OverUnderOddsSeries(
+            oddsDataframe=OverUnderOddsTestData.testDataframe,
+            doCycle=False,
+            overUnderOutcome=OverUnderOutcome.UNDER,
+            backScalingFactor=OverUnderOddsTestData.backScalingFactor,
+        )
+
+    def _assert_matches_single_environments(self, batchedEnvironment, singleEnvironments, actions) -> None:
+        # steps each market of the batch alongside its own single market environment
+        for stepActions in np.array(actions).T:
+            batchedTimeStep = batchedEnvironment.step(action=stepActions)
+            for marketIndex, singleEnvironment in enumerate(singleEnvironments):
+                singleTimeStep = singleEnvironment.step(action=stepActions[marketIndex])
+                self.assertEqual(batchedTimeStep.step_type[marketIndex], singleTimeStep.step_type)
+                self.assertAlmostEqual(batchedTimeStep.reward[marketIndex], singleTimeStep.reward, places=4)
+                self.assertAlmostEqual(batchedTimeStep.discount[marketIndex], singleTimeStep.discount)
+                npt.assert_almost_equal(batchedTimeStep.observation[marketIndex], singleTimeStep.observation, decimal=5)
+
+    def test_match_odds_matches_single_environments(self):
+        batchedEnvironment = BatchedMatchOddsEnvironment(
+            oddSeriesPool=[self._get_match_odds_series()],
+            batchSize=len(self.matchOddsActions),
+            rewardDiscountFactor=0.1,
+            inactionPenalty=self.inactionPenalty,
+            onlyPositiveCashout=False,
+        )
+        self.assertTrue(batchedEnvironment.batched)
+        self.assertEqual(batchedEnvironment.batch_size, len(self.matchOddsActions))
+        self.assertEqual(batchedEnvironment.observation_spec().shape, (12,))
+        singleEnvironments = [
+            MatchOddsEnvironment(
+                oddSeries=self._get_match_odds_series(),
+                rewardDiscountFactor=0.1,
+                inactionPenalty=self.inactionPenalty,
+                onlyPositiveCashout=False,
+            )
+            for _ in self.matchOddsActions
+        ]
+        self._assert_matches_single_environments(
+            batchedEnvironment=batchedEnvironment, singleEnvironments=singleEnvironments, actions=self.matchOddsActions
+        )
+
+    def test_over_under_matches_single_environments(self):
+        batchedEnvironment = BatchedOverUnderEnvironment(
+            oddSeriesPool=[self._get_over_under_odds_series()],
+            batchSize=len(self.overUnderActions),
+            rewardDiscountFactor=0.1,
+            inactionPenalty=self.inactionPenalty,
+            onlyPositiveCashout=True,
+        )
+        singleEnvironments = [
+            OverUnderEnvironment(
+                oddSeries=self._get_over_under_odds_series(),
+                rewardDiscountFactor=0.1,
+                inactionPenalty=self.inactionPenalty,
+                onlyPositiveCashout=True,
+            )
+            for _ in self.overUnderActions
+        ]
+        self._assert_matches_single_environments(
+            batchedEnvironment=batchedEnvironment, singleEnvironments=singleEnvironments, actions=self.overUnderActions
+        )
+
+    def test_auto_reset(self):
+        batchedEnvironment = BatchedMatchOddsEnvironment(
+            oddSeriesPool=[self._get_match_odds_series()],
+            batchSize=2,
+            rewardDiscountFactor=0.1,
+            inactionPenalty=self.inactionPenalty,
+            onlyPositiveCashout=False,
+        )
+        firstTimeStep = batchedEnvironment.reset()
+        batchedEnvironment.step(action=np.array([0, 0]))
+        batchedEnvironment.step(action=np.array([1, 0]))
+        lastTimeStep = batchedEnvironment.step(action=np.array([0, 0]))
+        npt.assert_array_equal(lastTimeStep.step_type, [2, 2])
+        npt.assert_almost_equal(lastTimeStep.reward, [MatchOddsTestData.prices[1] * MatchOddsTestData.backScalingFactor, 0])
+        # finished markets start a new episode from the pool straight away, with a clean betting state
+        npt.assert_array_equal(lastTimeStep.observation[:, :6], 0)
+        npt.assert_almost_equal(
+            batchedEnvironment.offeredOdds / batchedEnvironment.oddsNormalisationConstant, firstTimeStep.observation[:, 6:]
+        )
+        # and their next action is a bet at the new episode's first odds
+        nextTimeStep = batchedEnvironment.step(action=np.array([2, 0]))
+        npt.assert_array_equal(nextTimeStep.step_type, [1, 1])
+        npt.assert_array_equal(nextTimeStep.reward, [-1, self.inactionPenalty])
+
+    def test_seeded_jitter_odds(self):
+        batchedEnvironment = BatchedMatchOddsEnvironment(
+            oddSeriesPool=[self._get_match_odds_series()],
+            batchSize=1,
+            rewardDiscountFactor=0.1,
+            inactionPenalty=self.inactionPenalty,
+            onlyPositiveCashout=False,
+        )
+        batchedEnvironment.set_jitter_odds_scale(scale=0.001, seed=1)
+        oddsSeries = self._get_match_odds_series()
+        oddsSeries.initialize()
+        oddsSeries.set_jitter_odds_scale(scale=0.001, seed=1)
+        batchedEnvironment.reset()
+        # each episode gets the noise a single odds series with the same seed draws for it. The last step only ends the
+        # episode, so it's never offered
+        for _ in range(2):
+            expectedSteps = [oddsSeries.get_step() for _ in range(oddsSeries.totalNumSteps - 1)]
+            offeredOdds = [batchedEnvironment.offeredOdds[0].copy()]
+            for _ in range(oddsSeries.totalNumSteps - 2):
+                batchedEnvironment.step(action=np.array([0]))
+                offeredOdds.append(batchedEnvironment.offeredOdds[0].copy())
+            npt.assert_array_equal(np.array(offeredOdds), np.array(expectedSteps))
+            oddsSeries.reset()
+            npt.assert_array_equal(batchedEnvironment.step(action=np.array([0])).step_type, [2])
+
+    def test_tf_py_environment(self):
+        batchedEnvironment = TFPyEnvironment(
+            BatchedMatchOddsEnvironment(
+                oddSeriesPool=[self._get_match_odds_series()],
+                batchSize=3,
+                rewardDiscountFactor=0.1,
+                inactionPenalty=self.inactionPenalty,
+                onlyPositiveCashout=False,
+                seed=0,
+            )
+        )
+        self.assertEqual(batchedEnvironment.batch_size, 3)
+        self.assertEqual(batchedEnvironment.reset().observation.shape, (3, 12))
+        timeStep = batchedEnvironment.step(action=tf.constant([0, 1, 2], dtype=tf.int32))
+        npt.assert_array_equal(timeStep.step_type.numpy(), [1, 1, 1])
+
+    def test_invalid_environments(self):
+        self.assertRaises(
+            ValueError,
+            BatchedMatchOddsEnvironment,
+            oddSeriesPool=[self._get_match_odds_series(doCycle=True)],
+            batchSize=2,
+            rewardDiscountFactor=0.1,
+            inactionPenalty=self.inactionPenalty,
+            onlyPositiveCashout=False,
+        )
+        jitteredOddsSeries = self._get_match_odds_series()
+        jitteredOddsSeries.set_jitter_odds_scale(scale=0.001)
+        self.assertRaises(
+            ValueError,
+            BatchedMatchOddsEnvironment,
+            oddSeriesPool=[jitteredOddsSeries],
+            batchSize=2,
+            rewardDiscountFactor=0.1,
+            inactionPenalty=self.inactionPenalty,
+            onlyPositiveCashout=False,
+        )
+        batchedEnvironment = BatchedMatchOddsEnvironment(
+            oddSeriesPool=[self._get_match_odds_series()],
+            batchSize=2,
+            rewardDiscountFactor=0.1,
+            inactionPenalty=self.inactionPenalty,
+            onlyPositiveCashout=False,
+        )
+        batchedEnvironment.reset()
+        self.assertRaises(ValueError, batchedEnvironment.step, np.array([0, 7]))
@@ -1,4 +1,5 @@
 import numpy as np
+import numpy.testing as npt
 
 from unittest import TestCase
 
@@ -33,9 +34,7 @@ class TestMatchOddsEnvironment(TestCase):
         )
 
     def test_initialise(self):
-        self.assertEqual(
-            len(self.matchOddsEnvironment.oddSeries.groupedOddsUpdates), len(MatchOddsTestData.sortedValidTimestamps)
-        )
+        self.assertEqual(len(self.matchOddsEnvironment.oddSeries.oddsMatrix), len(MatchOddsTestData.sortedValidTimestamps))
         self.assertSequenceEqual(
             self.matchOddsEnvironment.oddSeries.orderedTimestamps, MatchOddsTestData.sortedValidTimestamps
         )
@@ -128,6 +127,39 @@ class TestMatchOddsEnvironment(TestCase):
         self.assertEqual(round(sum(thirdStep.observation[-self.oddsDimensionality :]), 3), self.thirdStepOddsSum)
         self.assertEqual(round(sum(thirdStep.observation[: self.oddsDimensionality]), 3), 0.288)
 
+    def test_offered_odds_are_raw(self):
+        self.matchOddsEnvironment.step(action=0)
+        self.matchOddsEnvironment.step(action=2)
+        self.assertEqual(self.matchOddsEnvironment._state.awayBackOdds, self.exampleMatchOddsSeries.firstPassStepMatrix[0, 1])
+        # after an episode ends bets are placed at the odds of the next episode's first step
+        for action in [0, 0]:
+            timestep = self.matchOddsEnvironment.step(action=action)
+        self.assertEqual(timestep.step_type, 2)
+        self.assertEqual(self.matchOddsEnvironment._state.awayBackOdds, 0)
+        self.matchOddsEnvironment.step(action=2)
+        self.assertEqual(self.matchOddsEnvironment._state.awayBackOdds, self.exampleMatchOddsSeries.firstPassStepMatrix[0, 1])
+
+    def test_reused_observation_buffer(self):
+        bufferedEnvironment = MatchOddsEnvironment(
+            oddSeries=MatchOddsSeries(
+                oddsDataframe=MatchOddsTestData.testDataframe,
+                doCycle=False,
+                matchOutcome=MatchOutcome.HOME_WIN,
+                backScalingFactor=MatchOddsTestData.backScalingFactor,
+            ),
+            rewardDiscountFactor=0.1,
+            inactionPenalty=self.inactionPenalty,
+            onlyPositiveCashout=False,
+            copyObservations=False,
+        )
+        for action in [0, 2, 5, 1, 0, 0, 3]:
+            timestep = self.matchOddsEnvironment.step(action=action)
+            bufferedTimestep = bufferedEnvironment.step(action=action)
+            self.assertIs(bufferedTimestep.observation, bufferedEnvironment.observation)
+            self.assertIsNot(timestep.observation, self.matchOddsEnvironment.observation)
+            npt.assert_array_equal(bufferedTimestep.observation, timestep.observation)
+            self.assertEqual(bufferedTimestep.reward, timestep.reward)
+
     def test_no_cycle(self):
         actions = [0, 0, 1, 0, 0, 0]
         rewards = [
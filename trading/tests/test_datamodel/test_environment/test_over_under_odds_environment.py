@@ -33,9 +33,7 @@ class TestOverUnderOddsEnvironment(TestCase):
         )
 
     def test_initialise(self):
-        self.assertEqual(
-            len(self.overUnderEnvironment.oddSeries.groupedOddsUpdates), len(OverUnderOddsTestData.sortedValidTimestamps)
-        )
+        self.assertEqual(len(self.overUnderEnvironment.oddSeries.oddsMatrix), len(OverUnderOddsTestData.sortedValidTimestamps))
         self.assertSequenceEqual(
             self.overUnderEnvironment.oddSeries.orderedTimestamps, OverUnderOddsTestData.sortedValidTimestamps
         )
@@ -0,0 +1,24 @@
+import numpy as np
+import numpy.testing as npt
+
+from unittest import TestCase
+
+from trading.datamodel.environment_step import EnvironmentStep
+
+
+class TestEnvironmentStep(TestCase):
+    def test_get_numpy_array(self):
+        offeredOdds = np.array([2.0, 3.0], dtype=np.float32)
+        environmentStep = EnvironmentStep(offeredOdds=offeredOdds)
+        npt.assert_array_equal(environmentStep.get_numpy_array(), offeredOdds)
+        self.assertIsNot(environmentStep.get_numpy_array(), offeredOdds)
+        self.assertIs(environmentStep.get_numpy_array(copy=False), offeredOdds)
+
+    def test_get_numpy_array_with_additional_features(self):
+        # features come first, sorted by name, and the odds last
+        environmentStep = EnvironmentStep(
+            offeredOdds=np.array([2.0, 3.0]), additionalFeatures={"b": np.array([5.0]), "a": np.array([4.0])}
+        )
+        numpyArray = environmentStep.get_numpy_array()
+        self.assertEqual(numpyArray.dtype, np.float32)
+        npt.assert_array_equal(numpyArray, [4.0, 5.0, 2.0, 3.0])
@@ -0,0 +1,103 @@
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+import numpy as np
+import numpy.testing as npt
+
+from trading.datamodel.episode_store.episode_store import EpisodeStore
+from trading.datamodel.episode_store.episode_store import EpisodeStoreWriter
+from trading.datamodel.odds_series.match_odds_series import MatchOddsSeries
+from trading.datamodel.odds_series.over_under_odds_series import OverUnderOddsSeries
+from trading.tests.test_datamodel.constants import MatchOddsTestData
+from trading.tests.test_datamodel.constants import OverUnderOddsTestData
+
+MATCH_ODDS_COLUMNS = {"HOME": 0, "AWAY": 1, "DRAW": 2}
+
+
+class TestEpisodeStore(TestCase):
+    def setUp(self):
+        super().setUp()
+        self.temporaryDirectory = TemporaryDirectory()
+        self.storeDirectory = self.temporaryDirectory.name
+        testDataframe = MatchOddsTestData.testDataframe
+        with EpisodeStoreWriter(directory=self.storeDirectory, oddsSeriesType="match_odds") as writer:
+            writer.add_episode(
+                betfairMarketId="1.1",
+                unixTimestamps=testDataframe["unix_timestamp"].to_numpy(),
+                runnerColumns=testDataframe["betHAD"].map(MATCH_ODDS_COLUMNS).to_numpy(),
+                prices=testDataframe["price"].to_numpy(),
+                winningColumn=0,
+            )
+            writer.add_episode(
+                betfairMarketId="1.2", unixTimestamps=[5, 3], runnerColumns=[2, 1], prices=[3.5, 2.5], winningColumn=2
+            )
+        self.episodeStore = EpisodeStore(directory=self.storeDirectory)
+
+    def tearDown(self):
+        super().tearDown()
+        del self.episodeStore
+        self.temporaryDirectory.cleanup()
+
+    def test_episode_arrays(self):
+        self.assertEqual(len(self.episodeStore), 2)
+        self.assertEqual(self.episodeStore.betfairMarketIds, ["1.1", "1.2"])
+        episodeArrays = self.episodeStore.get_episode_arrays(marketIndex=1)
+        # rows are stored in timestamp order
+        self.assertSequenceEqual(list(episodeArrays["unix_timestamp"]), [3, 5])
+        self.assertSequenceEqual(list(episodeArrays["runner_column"]), [1, 2])
+        self.assertSequenceEqual(list(episodeArrays["price"]), [2.5, 3.5])
+        for columnName, array in episodeArrays.items():
+            self.assertTrue(np.shares_memory(array, self.episodeStore.columns[columnName]))
+        self.assertEqual(self.episodeStore.get_outcome(marketIndex=1), (0, 0, 1))
+
+    def test_odds_series_matches_dataframe_odds_series(self):
+        oddsSeries = self.episodeStore.get_odds_series(marketIndex=0, backScalingFactor=MatchOddsTestData.backScalingFactor)
+        expectedOddsSeries = MatchOddsSeries(
+            oddsDataframe=MatchOddsTestData.testDataframe,
+            matchOutcome=(1, 0, 0),
+            backScalingFactor=MatchOddsTestData.backScalingFactor,
+        )
+        self.assertIsInstance(oddsSeries, MatchOddsSeries)
+        npt.assert_array_equal(oddsSeries.get_end_outcome_vector(), np.array((1, 0, 0)))
+        oddsSeries.initialize()
+        expectedOddsSeries.initialize()
+        while not expectedOddsSeries.episodeEnded:
+            npt.assert_array_equal(oddsSeries.get_step(), expectedOddsSeries.get_step())
+        self.assertTrue(oddsSeries.episodeEnded)
+        self.assertEqual(len(list(self.episodeStore.iter_odds_series())), 2)
+
+    def test_over_under_odds_series(self):
+        testDataframe = OverUnderOddsTestData.testDataframe
+        overUnderDirectory = f"{self.storeDirectory}/over_under"
+        with EpisodeStoreWriter(directory=overUnderDirectory, oddsSeriesType="over_under") as writer:
+            writer.add_episode(
+                betfairMarketId="1.3",
+                unixTimestamps=testDataframe["unix_timestamp"].to_numpy(),
+                runnerColumns=testDataframe["runner_name"].str.lower().map({"over": 0, "under": 1}).to_numpy(),
+                prices=testDataframe["price"].to_numpy(),
+                winningColumn=1,
+            )
+        oddsSeries = EpisodeStore(directory=overUnderDirectory).get_odds_series(
+            marketIndex=0, backScalingFactor=OverUnderOddsTestData.backScalingFactor
+        )
+        self.assertIsInstance(oddsSeries, OverUnderOddsSeries)
+        oddsSeries.initialize()
+        npt.assert_array_almost_equal(oddsSeries.get_step(), OverUnderOddsTestData.expectedFirstStep)
+        npt.assert_array_almost_equal(oddsSeries.get_step(), OverUnderOddsTestData.expectedSecondStep)
+
+    def test_empty_store(self):
+        emptyDirectory = f"{self.storeDirectory}/empty"
+        with EpisodeStoreWriter(directory=emptyDirectory, oddsSeriesType="over_under"):
+            pass
+        self.assertEqual(len(EpisodeStore(directory=emptyDirectory)), 0)
+
+    def test_invalid_episodes(self):
+        with self.assertRaises(ValueError):
+            EpisodeStoreWriter(directory=self.storeDirectory, oddsSeriesType="asian_handicap")
+        with EpisodeStoreWriter(directory=f"{self.storeDirectory}/invalid", oddsSeriesType="over_under") as writer:
+            with self.assertRaises(ValueError):
+                writer.add_episode(betfairMarketId="1.4", unixTimestamps=[1], runnerColumns=[2], prices=[2.0], winningColumn=0)
+            with self.assertRaises(ValueError):
+                writer.add_episode(
+                    betfairMarketId="1.4", unixTimestamps=[1, 2], runnerColumns=[0], prices=[2.0], winningColumn=0
+                )
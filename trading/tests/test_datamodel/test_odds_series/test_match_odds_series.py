@@ -4,6 +4,7 @@ import pandas as pd
 
 from unittest import TestCase
 
+from trading.datamodel.odds_series.base_odds_series import jitter_odds
 from trading.datamodel.odds_series.match_odds_series import MatchOddsSeries
 from trading.datamodel.outcomes.match_outcome import MatchOutcome
 from trading.tests.test_datamodel.constants import MatchOddsTestData
@@ -24,7 +25,8 @@ class TestMatchOddsSeries(TestCase):
         self.matchOddsSeries.initialize()
 
     def test_initialize(self):
-        self.assertEqual(len(self.matchOddsSeries.groupedOddsUpdates), 4)
+        self.assertEqual(self.matchOddsSeries.oddsMatrix.shape, (4, 3))
+        self.assertEqual(self.matchOddsSeries.oddsMatrix.dtype, np.float32)
         self.assertSequenceEqual(self.matchOddsSeries.orderedTimestamps, MatchOddsTestData.sortedValidTimestamps)
         self.assertEqual(self.matchOddsSeries.totalNumSteps, len(MatchOddsTestData.sortedValidTimestamps))
 
@@ -43,27 +45,42 @@ class TestMatchOddsSeries(TestCase):
         outcomeVector = self.matchOddsSeries.get_end_outcome_vector()
         self.assertTrue((np.array((1, 0, 0)) == outcomeVector).all())
 
-    def test_update_first_step(self):
-        groupedDataframeUpdate = self.matchOddsSeries.groupedOddsUpdates[MatchOddsTestData.sortedValidTimestamps[0]]
-        self.matchOddsSeries.update_step(groupedDataframeUpdate=groupedDataframeUpdate)
-        self.assertEqual(self.matchOddsSeries.lastHomeOdds, MatchOddsTestData.expectedFirstStep[3])
-        self.assertEqual(self.matchOddsSeries.lastAwayOdds, MatchOddsTestData.expectedFirstStep[4])
-        self.assertEqual(self.matchOddsSeries.lastDrawOdds, MatchOddsTestData.expectedFirstStep[5])
-
-    def test_update_second_step(self):
-        groupedDataframeUpdate = self.matchOddsSeries.groupedOddsUpdates[MatchOddsTestData.sortedValidTimestamps[1]]
-        self.matchOddsSeries.update_step(groupedDataframeUpdate=groupedDataframeUpdate)
-        self.assertEqual(self.matchOddsSeries.lastHomeOdds, MatchOddsTestData.expectedSecondStep[3])
-        self.assertEqual(self.matchOddsSeries.lastAwayOdds, MatchOddsTestData.expectedSecondStep[4])
-        self.assertEqual(self.matchOddsSeries.lastDrawOdds, MatchOddsTestData.expectedSecondStep[5])
-
-    def test_update_third_step(self):
-        # steps are treated independent in these tests, so not full expected step as nothing is carried over from step 2 like in proper processing
-        groupedDataframeUpdate = self.matchOddsSeries.groupedOddsUpdates[MatchOddsTestData.sortedValidTimestamps[2]]
-        self.matchOddsSeries.update_step(groupedDataframeUpdate=groupedDataframeUpdate)
-        self.assertEqual(self.matchOddsSeries.lastHomeOdds, 0)
-        self.assertEqual(self.matchOddsSeries.lastAwayOdds, MatchOddsTestData.expectedThirdStep[4])
-        self.assertEqual(self.matchOddsSeries.lastDrawOdds, 0)
+    def test_odds_matrix_first_step(self):
+        npt.assert_almost_equal(
+            actual=self.matchOddsSeries.oddsMatrix[0], desired=MatchOddsTestData.expectedFirstStep[3:], decimal=4
+        )
+
+    def test_odds_matrix_second_step(self):
+        npt.assert_almost_equal(
+            actual=self.matchOddsSeries.oddsMatrix[1], desired=MatchOddsTestData.expectedSecondStep[3:], decimal=4
+        )
+
+    def test_odds_matrix_third_step(self):
+        # only away is updated in step 3, so home and draw are carried over from step 2
+        npt.assert_almost_equal(
+            actual=self.matchOddsSeries.oddsMatrix[2], desired=MatchOddsTestData.expectedThirdStep[3:], decimal=4
+        )
+
+    def test_last_update_in_step_wins(self):
+        oddsDataframe = pd.DataFrame(
+            {"betHAD": ["HOME", "HOME", "UNKNOWN", "AWAY"], "unix_timestamp": [2, 2, 2, 1], "price": [1.5, 1.6, 9.0, 3.0]}
+        )
+        matchOddsSeries = MatchOddsSeries(oddsDataframe=oddsDataframe, matchOutcome=MatchOutcome.HOME_WIN)
+        matchOddsSeries.initialize()
+        npt.assert_almost_equal(actual=matchOddsSeries.oddsMatrix, desired=np.array([[0, 3.0, 0], [1.6, 3.0, 0]]), decimal=4)
+
+    def test_from_arrays(self):
+        testDataframe = MatchOddsTestData.testDataframe
+        matchOddsSeries = MatchOddsSeries.from_arrays(
+            unixTimestamps=testDataframe["unix_timestamp"].to_numpy(),
+            runnerColumns=testDataframe["betHAD"].map({"HOME": 0, "AWAY": 1, "DRAW": 2}).to_numpy(),
+            prices=testDataframe["price"].to_numpy(),
+            matchOutcome=MatchOutcome.HOME_WIN,
+            backScalingFactor=MatchOddsTestData.backScalingFactor,
+        )
+        self.assertTrue(matchOddsSeries.isValid)
+        matchOddsSeries.initialize()
+        npt.assert_array_equal(matchOddsSeries.stepMatrix, self.matchOddsSeries.stepMatrix)
 
     def test_get_step_without_jitter_odds(self):
         firstStep = self.matchOddsSeries.get_step()
@@ -73,6 +90,12 @@ class TestMatchOddsSeries(TestCase):
         thirdStep = self.matchOddsSeries.get_step()
         npt.assert_almost_equal(actual=thirdStep, desired=MatchOddsTestData.expectedThirdStep, decimal=4)
 
+    def test_get_step_without_copy(self):
+        firstStep = self.matchOddsSeries.get_step(copy=False)
+        self.assertTrue(np.shares_memory(firstStep, self.matchOddsSeries.episodeStepMatrix))
+        npt.assert_array_equal(firstStep, self.matchOddsSeries.episodeStepMatrix[0])
+        self.assertEqual(self.matchOddsSeries.currentStepNumber, 1)
+
     @staticmethod
     def _convert_odds_to_probabilities(odds: np.array) -> np.array:
         return np.array([1 / v if v > 0 else 0 for v in odds])
@@ -100,18 +123,40 @@ class TestMatchOddsSeries(TestCase):
         thirdStepOddsDifference = sum(abs(thirdStep - MatchOddsTestData.expectedThirdStep))
         self.assertTrue(thirdStepOddsDifference > 0)
 
+    def _get_episode_steps(self) -> np.array:
+        return np.array([self.matchOddsSeries.get_step() for _ in range(self.matchOddsSeries.totalNumSteps)])
+
+    def test_seeded_jitter_odds(self):
+        self.matchOddsSeries.set_jitter_odds_scale(scale=0.001, seed=1)
+        firstEpisodeSteps = self._get_episode_steps()
+        self.matchOddsSeries.reset()
+        secondEpisodeSteps = self._get_episode_steps()
+        # each episode gets fresh noise, but unpriced odds stay unpriced
+        self.assertFalse(np.array_equal(firstEpisodeSteps, secondEpisodeSteps))
+        npt.assert_array_equal(firstEpisodeSteps == 0, self.matchOddsSeries.stepMatrix == 0)
+        self.matchOddsSeries.reset()
+        self.matchOddsSeries.set_jitter_odds_scale(scale=0.001, seed=1)
+        npt.assert_array_equal(self._get_episode_steps(), firstEpisodeSteps)
+        self.matchOddsSeries.reset()
+        npt.assert_array_equal(self._get_episode_steps(), secondEpisodeSteps)
+
+    def test_jitter_odds(self):
+        odds = np.array([[2.0, 0, 4.0], [0, 0, 1.25]])
+        jitteredOdds = jitter_odds(odds=odds, scale=0, randomGenerator=np.random.default_rng(0))
+        npt.assert_almost_equal(actual=jitteredOdds, desired=odds)
+        # a jittered probability that isn't positive can't be turned back into odds
+        jitteredOdds = jitter_odds(odds=odds, scale=100, randomGenerator=np.random.default_rng(0))
+        self.assertTrue((jitteredOdds >= 0).all())
+        npt.assert_array_equal(jitteredOdds[odds == 0], 0)
+
     def test_reset(self):
-        self.matchOddsSeries.lastUpdateTime = MatchOddsTestData.timestamps[1] - 1
-        self.matchOddsSeries.currentStepNumber = 100
-        groupedDataframeUpdate = self.matchOddsSeries.groupedOddsUpdates[MatchOddsTestData.timestamps[1]]
-        self.matchOddsSeries.update_step(groupedDataframeUpdate=groupedDataframeUpdate)
+        self.matchOddsSeries.get_step()
+        self.matchOddsSeries.get_step()
         self.matchOddsSeries.episodeEnded = True
         self.matchOddsSeries.reset()
         self.assertEqual(self.matchOddsSeries.currentStepNumber, 0)
         self.assertFalse(self.matchOddsSeries.episodeEnded)
-        self.assertEqual(self.matchOddsSeries.lastHomeOdds, 0)
-        self.assertEqual(self.matchOddsSeries.lastAwayOdds, 0)
-        self.assertEqual(self.matchOddsSeries.lastDrawOdds, 0)
+        npt.assert_almost_equal(actual=self.matchOddsSeries.get_step(), desired=MatchOddsTestData.expectedFirstStep, decimal=4)
 
     def test_full_series_no_cycle(self):
         for _ in range(len(MatchOddsTestData.sortedValidTimestamps)):
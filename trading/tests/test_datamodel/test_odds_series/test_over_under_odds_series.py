@@ -24,7 +24,7 @@ class TestOverUnderOddsSeries(TestCase):
         self.overUnderOddsSeries.initialize()
 
     def test_initialize(self):
-        self.assertEqual(len(self.overUnderOddsSeries.groupedOddsUpdates), 5)
+        self.assertEqual(self.overUnderOddsSeries.oddsMatrix.shape, (5, 2))
         self.assertSequenceEqual(self.overUnderOddsSeries.orderedTimestamps, OverUnderOddsTestData.sortedValidTimestamps)
         self.assertEqual(self.overUnderOddsSeries.totalNumSteps, len(OverUnderOddsTestData.sortedValidTimestamps))
 
@@ -43,24 +43,26 @@ class TestOverUnderOddsSeries(TestCase):
         outcomeVector = self.overUnderOddsSeries.get_end_outcome_vector()
         self.assertTrue((np.array((0, 1)) == outcomeVector).all())
 
-    def test_update_first_step(self):
-        groupedDataframeUpdate = self.overUnderOddsSeries.groupedOddsUpdates[OverUnderOddsTestData.sortedValidTimestamps[0]]
-        self.overUnderOddsSeries.update_step(groupedDataframeUpdate=groupedDataframeUpdate)
-        self.assertEqual(self.overUnderOddsSeries.lastOverOdds, OverUnderOddsTestData.prices[3])
-        self.assertEqual(self.overUnderOddsSeries.lastUnderOdds, 0)
-
-    def test_update_second_step(self):
-        groupedDataframeUpdate = self.overUnderOddsSeries.groupedOddsUpdates[OverUnderOddsTestData.sortedValidTimestamps[1]]
-        self.overUnderOddsSeries.update_step(groupedDataframeUpdate=groupedDataframeUpdate)
-        self.assertEqual(self.overUnderOddsSeries.lastOverOdds, 0)
-        self.assertEqual(self.overUnderOddsSeries.lastUnderOdds, OverUnderOddsTestData.prices[2])
-
-    def test_update_third_step(self):
-        # steps are treated independent in these tests, so not full expected step as nothing is carried over from step 2 like in proper processing
-        groupedDataframeUpdate = self.overUnderOddsSeries.groupedOddsUpdates[OverUnderOddsTestData.sortedValidTimestamps[2]]
-        self.overUnderOddsSeries.update_step(groupedDataframeUpdate=groupedDataframeUpdate)
-        self.assertEqual(self.overUnderOddsSeries.lastOverOdds, OverUnderOddsTestData.prices[0])
-        self.assertEqual(self.overUnderOddsSeries.lastUnderOdds, OverUnderOddsTestData.prices[1])
+    def test_odds_matrix_first_step(self):
+        npt.assert_almost_equal(
+            actual=self.overUnderOddsSeries.oddsMatrix[0], desired=OverUnderOddsTestData.expectedFirstStep[2:], decimal=4
+        )
+
+    def test_odds_matrix_second_step(self):
+        # over is carried over from step 1
+        npt.assert_almost_equal(
+            actual=self.overUnderOddsSeries.oddsMatrix[1], desired=OverUnderOddsTestData.expectedSecondStep[2:], decimal=4
+        )
+
+    def test_odds_matrix_third_step(self):
+        npt.assert_almost_equal(
+            actual=self.overUnderOddsSeries.oddsMatrix[2], desired=OverUnderOddsTestData.expectedThirdStep[2:], decimal=4
+        )
+
+    def test_unrecognised_runner(self):
+        oddsDataframe = pd.DataFrame({"runner_name": ["Over", "Draw"], "unix_timestamp": [1, 2], "price": [1.5, 2.0]})
+        overUnderOddsSeries = OverUnderOddsSeries(oddsDataframe=oddsDataframe, overUnderOutcome=OverUnderOutcome.OVER)
+        self.assertRaises(ValueError, overUnderOddsSeries.initialize)
 
     def test_get_step_without_jitter_odds(self):
         firstStep = self.overUnderOddsSeries.get_step()
@@ -98,16 +100,15 @@ class TestOverUnderOddsSeries(TestCase):
         self.assertTrue(thirdStepOddsDifference > 0)
 
     def test_reset(self):
-        self.overUnderOddsSeries.lastUpdateTime = OverUnderOddsTestData.timestamps[1] - 1
-        self.overUnderOddsSeries.currentStepNumber = 100
-        groupedDataframeUpdate = self.overUnderOddsSeries.groupedOddsUpdates[OverUnderOddsTestData.timestamps[1]]
-        self.overUnderOddsSeries.update_step(groupedDataframeUpdate=groupedDataframeUpdate)
+        self.overUnderOddsSeries.get_step()
+        self.overUnderOddsSeries.get_step()
         self.overUnderOddsSeries.episodeEnded = True
         self.overUnderOddsSeries.reset()
         self.assertEqual(self.overUnderOddsSeries.currentStepNumber, 0)
         self.assertFalse(self.overUnderOddsSeries.episodeEnded)
-        self.assertEqual(self.overUnderOddsSeries.lastOverOdds, 0)
-        self.assertEqual(self.overUnderOddsSeries.lastUnderOdds, 0)
+        npt.assert_almost_equal(
+            actual=self.overUnderOddsSeries.get_step(), desired=OverUnderOddsTestData.expectedFirstStep, decimal=4
+        )
 
     def test_full_series_no_cycle(self):
         for _ in range(len(OverUnderOddsTestData.sortedValidTimestamps)):